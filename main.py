@@ -1,6 +1,6 @@
 import sys, os, darkdetect
 from pathlib import Path
-from PyQt6.QtCore import QTimer
+from PyQt6.QtCore import Qt, QTimer
 from PyQt6.QtWidgets import QSplashScreen, QApplication
 from PyQt6.QtGui import QPixmap, QIcon
 import src.app.config  # noqa: F401 — runs lame_core.config.setup()
@@ -35,6 +35,7 @@ def create_app():
     """
 
     global app
+    QApplication.setAttribute(Qt.ApplicationAttribute.AA_ShareOpenGLContexts)
     app = QApplication(sys.argv)
 
     # Enable high-DPI scaling (enabled by default in PyQt6)
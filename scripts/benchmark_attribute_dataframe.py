@@ -0,0 +1,102 @@
+"""Micro-benchmark of ``AttributeDataFrame`` column attribute handling.
+
+Compares the columnar, copy-on-write ``AttributeTable`` with the previous
+storage (a dict of dicts deep-copied by ``__finalize__`` on every pandas
+operation that propagates metadata, and matched by linear scans), on a frame
+shaped like a processed sample: a few hundred analyte columns, each with the
+attributes ``SampleObj`` sets.
+
+    python scripts/benchmark_attribute_dataframe.py [ncols] [nrows]
+
+Prints the median time of ``df[cols]``, ``df.copy()``, ``df * 2`` and
+attribute matching for both implementations.
+"""
+import copy
+import sys
+import timeit
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+project_root = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.data.ExtendedDF import AttributeDataFrame
+
+
+class LegacyAttributeDataFrame(pd.DataFrame):
+    """Previous attribute storage, kept here for comparison only."""
+    _metadata = ['column_attributes']
+
+    @property
+    def _constructor(self):
+        return LegacyAttributeDataFrame
+
+    def __finalize__(self, other, method=None, **kwargs):
+        super().__finalize__(other, method=method, **kwargs)
+        if isinstance(other, LegacyAttributeDataFrame):
+            self.column_attributes = copy.deepcopy(other.column_attributes)
+        return self
+
+    def __init__(self, data=None, *args, **kwargs):
+        super().__init__()
+        self.column_attributes = kwargs.pop('column_attributes', {})
+        super().__init__({} if data is None else data, *args, **kwargs)
+
+    def __getitem__(self, key):
+        result = super().__getitem__(key)
+        if isinstance(result, pd.DataFrame):
+            result.column_attributes = {
+                col: self.column_attributes[col] for col in result.columns if col in self.column_attributes
+            }
+        return result
+
+    def set_attribute(self, column, attribute, value):
+        self.column_attributes.setdefault(column, {})[attribute] = value
+
+    def match_attributes(self, attributes_dict):
+        return [col for col, attrs in self.column_attributes.items()
+                if all(attrs.get(attr) == val for attr, val in attributes_dict.items())]
+
+
+def build(cls, ncols, nrows):
+    rng = np.random.default_rng(0)
+    columns = [f'A{i}' for i in range(ncols)]
+    df = cls(pd.DataFrame(rng.random((nrows, ncols)), columns=columns))
+    for i, column in enumerate(columns):
+        for attribute, value in {
+            'data_type': 'Analyte' if i % 5 else 'Ratio', 'units': 'ppm', 'use': i % 3 != 0,
+            'norm': 'log', 'label': column, 'plot_min': 0.0, 'plot_max': 1.0, 'lower_bound': 0.005,
+            'upper_bound': 0.995, 'diff_lower_bound': 0.005, 'diff_upper_bound': 0.995,
+            'negative_method': 'ignore negative values', 'outlier_method': 'quantile criteria',
+            'smoothing_method': 'none', 'formula': None,
+        }.items():
+            df.set_attribute(column, attribute, value)
+    return df, columns
+
+
+def median_ms(stmt, number=20, repeat=7):
+    return 1e3 * float(np.median(timeit.repeat(stmt, number=number, repeat=repeat))) / number
+
+
+def main(ncols=300, nrows=10_000):
+    cases = {
+        'df[cols]': lambda df, cols: df[cols[: len(cols) // 2]],
+        'df.copy()': lambda df, cols: df.copy(),
+        'df * 2': lambda df, cols: df * 2,
+        'match_attributes': lambda df, cols: df.match_attributes({'data_type': 'Analyte', 'use': True}),
+    }
+    frames = {
+        'before': build(LegacyAttributeDataFrame, ncols, nrows),
+        'after': build(AttributeDataFrame, ncols, nrows),
+    }
+    print(f"{ncols} columns x {nrows} rows, median ms per call")
+    print(f"{'':18s}{'before':>10s}{'after':>10s}{'speedup':>10s}")
+    for name, case in cases.items():
+        before, after = (median_ms(lambda f=frames[k]: case(*f)) for k in ('before', 'after'))
+        print(f"{name:18s}{before:10.3f}{after:10.3f}{before / after:9.1f}x")
+
+
+if __name__ == '__main__':
+    main(*(int(a) for a in sys.argv[1:3]))
@@ -0,0 +1,53 @@
+"""Timing of ``quantile_and_difference`` on a synthetic map.
+
+Compares the previous implementation (kept in ``tests/test_outliers.py`` as
+the bit-for-bit reference) with the current float64 and float32 paths on a
+map of lognormal analyte columns with spikes:
+
+    python scripts/benchmark_quantile_and_difference.py [npixels] [nanalytes]
+
+Defaults to a 4-megapixel x 40-analyte map, which needs roughly 10 GB of
+memory for the previous implementation; pass a smaller size on smaller
+machines.
+"""
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+project_root = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.data.outliers import quantile_and_difference
+from tests.test_outliers import reference_quantile_and_difference, synthetic_map
+
+BOUNDS = (0.5, 99.5, 0.5, 99.5)
+
+
+def best_of(func, repeat=3):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        times.append(time.perf_counter() - start)
+    return min(times), result
+
+
+def main(npixels=4_000_000, nanalytes=40):
+    data = synthetic_map(npixels, nanalytes, nan_fraction=0.001)
+    print(f"{npixels} pixels x {nanalytes} analytes, best of 3 (s)")
+
+    before, expected = best_of(lambda: reference_quantile_and_difference(data, *BOUNDS, True, 1e6))
+    after, result = best_of(lambda: quantile_and_difference(data, *BOUNDS, True, 1e6))
+    after32, result32 = best_of(lambda: quantile_and_difference(data, *BOUNDS, True, 1e6, dtype=np.float32))
+
+    identical = np.array_equal(result.view(np.uint64), expected.view(np.uint64))
+    print(f"  previous          {before:8.2f}")
+    print(f"  float64           {after:8.2f}  ({before / after:.1f}x, bit-identical: {identical})")
+    print(f"  float32           {after32:8.2f}  ({before / after32:.1f}x, max rel. error "
+          f"{np.nanmax(np.abs(result32 / expected - 1)):.1e})")
+
+
+if __name__ == '__main__':
+    main(*(int(a) for a in sys.argv[1:3]))
@@ -0,0 +1,46 @@
+"""Timing of ``subsample_hdbscan`` on a synthetic multi-megapixel feature matrix.
+
+Clusters a map of four compositional groups plus scattered outliers, and
+compares the labels with a full HDBSCAN fit on the first ``reference`` rows:
+
+    python scripts/benchmark_subsample_hdbscan.py [npixels] [nfeatures] [reference]
+
+Defaults to 5 megapixels x 20 features, with a 20000-row full-fit reference.
+"""
+import sys
+import time
+import warnings
+from pathlib import Path
+
+import numpy as np
+from sklearn.cluster import HDBSCAN
+from sklearn.metrics import adjusted_rand_score
+
+project_root = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.common.density_clustering import subsample_hdbscan
+from tests.test_density_clustering import _blobs
+
+
+def main(npixels=5_000_000, nfeatures=20, reference=20000):
+    X, _ = _blobs(npixels, n_features=nfeatures)
+    print(f"{npixels} pixels x {nfeatures} features")
+
+    start = time.perf_counter()
+    result = subsample_hdbscan(X, sample_size=20000, min_cluster_size=25 * npixels // reference, min_samples=10)
+    print(f"  subsample fit + propagation  {time.perf_counter() - start:8.1f} s, "
+          f"{result.labels.max() + 1} clusters, {result.noise_fraction:.1%} noise")
+
+    head = X[:reference]
+    start = time.perf_counter()
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', FutureWarning)
+        full = HDBSCAN(min_cluster_size=25, min_samples=10, copy=True).fit(head)
+    sub = subsample_hdbscan(head, sample_size=reference // 5, min_cluster_size=25, min_samples=10)
+    print(f"  full and subsample fit of {reference} rows {time.perf_counter() - start:6.1f} s, "
+          f"adjusted Rand index {adjusted_rand_score(full.labels_, sub.labels):.3f}")
+
+
+if __name__ == '__main__':
+    main(*(int(a) for a in sys.argv[1:4]))
@@ -133,6 +133,10 @@ class AppData(QObject):
         Axis indices for dimensionality reduction.
     dim_red_x_max, dim_red_y_max : int
         Maximum axis indices for dimensionality reduction.
+    dim_red_solver : str
+        PCA solver, one of ``src.common.pca.PCA_SOLVERS``.
+    dim_red_n_components : int
+        Number of principal components to compute, 0 for all.
     cluster_method : str
         Current clustering method.
     max_clusters : int
@@ -221,6 +225,8 @@ class AppData(QObject):
     dimRedMethodChanged = pyqtSignal(str)
     dimRedValueChanged = pyqtSignal(str,int)
     dimRedMaxValueChanged = pyqtSignal(str,int)
+    dimRedSolverChanged = pyqtSignal(str)
+    dimRedComponentsChanged = pyqtSignal(int)
 
     clusterMethodChanged = pyqtSignal(str)
     maxClustersChanged = pyqtSignal(int)
@@ -230,6 +236,7 @@ class AppData(QObject):
     clusterDistanceChanged = pyqtSignal(str)
     clusterMinSizeChanged = pyqtSignal(int)
     clusterMinSamplesChanged = pyqtSignal(int)
+    clusterSampleSizeChanged = pyqtSignal(int)
     selectedClustersChanged = pyqtSignal(list)
     clusterPreconditionChanged = pyqtSignal(bool)
     numBasisChanged = pyqtSignal(int)
@@ -417,6 +424,8 @@ class AppData(QObject):
         self._dim_red_y = 0
         self._dim_red_x_max = 2 # should change based on the number of fields used to compute basis
         self._dim_red_y_max = 2 # should change based on the number of fields used to compute basis
+        self._dim_red_solver = 'auto'
+        self._dim_red_n_components = 0 # all components
 
         self._cluster_method = "k-means"
         self.cluster_dict = {
@@ -435,6 +444,8 @@ class AppData(QObject):
             'HDBSCAN':{
                 'min_cluster_size':25,
                 'min_samples':10,
+                'sample_size':0,
+                'seed':23,
                 'selected_clusters':[],
             },
         }
@@ -450,6 +461,7 @@ class AppData(QObject):
             self._cluster_exponent = 0
         self._cluster_min_size = self.cluster_dict[self._cluster_method].get('min_cluster_size', 25)
         self._cluster_min_samples = self.cluster_dict[self._cluster_method].get('min_samples', 10)
+        self._cluster_sample_size = self.cluster_dict[self._cluster_method].get('sample_size', 0)
         self._cluster_seed = self.cluster_dict[self._cluster_method].get('seed', 23)
         self._selected_clusters = self.cluster_dict[self._cluster_method]['selected_clusters']
         self._dim_red_precondition = False
@@ -1104,6 +1116,32 @@ class AppData(QObject):
         self._dim_red_y_max = new_max
         self.dimRedMaxValueChanged.emit('y', new_max)
 
+    @property
+    def dim_red_solver(self):
+        """str : PCA solver, ``'auto'``, ``'full'``, ``'randomized'`` or ``'incremental'``."""
+        return self._dim_red_solver
+
+    @dim_red_solver.setter
+    def dim_red_solver(self, solver):
+        if solver == self._dim_red_solver:
+            return
+        self._dim_red_solver = solver
+        self.update_pca_flag = True
+        self.dimRedSolverChanged.emit(solver)
+
+    @property
+    def dim_red_n_components(self):
+        """int : Number of principal components to compute, 0 for all."""
+        return self._dim_red_n_components
+
+    @dim_red_n_components.setter
+    def dim_red_n_components(self, n_components):
+        if n_components == self._dim_red_n_components:
+            return
+        self._dim_red_n_components = n_components
+        self.update_pca_flag = True
+        self.dimRedComponentsChanged.emit(n_components)
+
     ### Cluster Properties ###
     @property
     def cluster_method_options(self):
@@ -1241,6 +1279,22 @@ class AppData(QObject):
         self.update_cluster_flag = True
         self.clusterMinSamplesChanged.emit(new_value)
 
+    @property
+    def cluster_sample_size(self):
+        """int : Number of pixels HDBSCAN is fit on before the remaining pixels are assigned to its clusters; 0 (the default) fits every pixel."""
+        return self._cluster_sample_size
+
+    @cluster_sample_size.setter
+    def cluster_sample_size(self, new_value):
+        if new_value == self._cluster_sample_size:
+            return
+
+        self._cluster_sample_size = new_value
+        # update cluster dict with new sample size
+        self.cluster_dict[self._cluster_method]['sample_size'] = self._cluster_sample_size
+        self.update_cluster_flag = True
+        self.clusterSampleSizeChanged.emit(new_value)
+
     @property
     def selected_clusters(self):
         """list : The list of selected clusters for masking."""
@@ -1594,6 +1648,8 @@ class AppData(QObject):
             self.cluster_min_size = self.cluster_dict[self._cluster_method]['min_cluster_size']
         if 'min_samples' in self.cluster_dict[self._cluster_method]:
             self.cluster_min_samples = self.cluster_dict[self._cluster_method]['min_samples']
+        if 'sample_size' in self.cluster_dict[self._cluster_method]:
+            self.cluster_sample_size = self.cluster_dict[self._cluster_method]['sample_size']
 
     def generate_random_seed(self):
         """Generates a random seed for clustering.
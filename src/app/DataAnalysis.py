@@ -10,12 +10,10 @@ from lame_core.UITheme import default_font
 import math
 import pandas as pd
 import numpy as np
-from sklearn.cluster import HDBSCAN, KMeans
-from sklearn.metrics import silhouette_score
 #from sklearn_extra.cluster import KMedoids
-import skfuzzy as fuzz
-from sklearn.preprocessing import StandardScaler
-from sklearn.decomposition import PCA
+from src.common.pca import PCA_SOLVERS, fit_pca
+from src.common.density_clustering import subsample_hdbscan
+from src.common.fuzzy_cmeans import fuzzy_cmeans
 from global_geochemistry.geochem.coda import clr, closure, multiplicative_replacement
 from src.control.Logger import log, auto_log_methods
 from lame_core.config import ICONPATH
@@ -37,6 +35,9 @@ class Clustering():
         if app_data.sample_id == '':
             return
 
+        from sklearn.cluster import KMeans
+        from sklearn.metrics import silhouette_score
+
         df_filtered, isotopes = data.get_processed_data()
 
         if app_data.dim_red_precondition:
@@ -123,26 +124,27 @@ class Clustering():
 
             # fuzzy c-means
             case 'fuzzy c-means':
+                centers = None
                 for nc in n_clusters:
-                    # compute cluster scores
-                    cntr, u, _, dist, _, _, _ = fuzz.cluster.cmeans(array.T, nc, exponent, error=0.00001, maxiter=1000, seed=seed)
-                    #cntr, u, _, _, _, _, _ = fuzz.cluster.cmeans(array.T, n_clusters, exponent, metric='precomputed', error=0.00001, maxiter=1000, seed=seed)
-                    # cntr, u, _, _, _, _, _ = fuzz.cluster.cmeans(array.T, n_clusters, exponent, error=0.005, maxiter=1000,seed =23)
+                    # compute cluster scores; in a sweep, each fit starts from the
+                    # previous solution plus one k-means++ centre
+                    result = fuzzy_cmeans(array, nc, m=exponent, tol=0.00001, max_iter=1000, seed=seed, init=centers)
+                    centers = result.centers
+                    u = result.memberships
 
-                    labels = np.argmax(u, axis=0)
+                    labels = result.labels
 
                     if max_clusters is None:
                         # assign cluster scores to self.data
                         for n in range(nc):
                             #data['computed_data']['cluster score'].loc[:,str(n)] = pd.NA
-                            data.add_columns('Cluster score', 'cluster' + str(n), u[n-1,:], data.mask)
+                            data.add_columns('Cluster score', 'cluster' + str(n), u[:, n], data.mask)
 
                         #add cluster results to self.data
                         data.add_columns('Cluster', method, labels, data.mask)
                     else:
                         # weighted sum of squared errors (WSSE)
-                        wsse = np.sum((u ** exponent) * (dist ** 2))
-                        cluster_results.append(wsse)
+                        cluster_results.append(result.objective)
 
                         if nc == 1:
                             silhouette_scores.append(0)
@@ -160,12 +162,17 @@ class Clustering():
                     # skip the cluster-performance path rather than crash
                     return
 
+                # every pixel is fit unless a fit sample size is set, in which case
+                # the rest are assigned to the nearest fitted cluster (see subsample_hdbscan)
                 clr_array = self._clr_feature_matrix(data)[data.mask]
-                model = HDBSCAN(
+                result = subsample_hdbscan(
+                    clr_array,
+                    sample_size=app_data.cluster_sample_size,
                     min_cluster_size=app_data.cluster_min_size,
                     min_samples=app_data.cluster_min_samples,
-                    copy=True,
-                ).fit(clr_array)
+                    seed=seed,
+                )
+                log(f"HDBSCAN: {result.noise_fraction:.1%} of pixels labelled noise", prefix="Analysis")
 
                 # HDBSCAN labels noise points -1; remap to this app's existing
                 # "id 99 = unclustered/Mask" convention (see AppData.cluster_group_changed,
@@ -173,8 +180,9 @@ class Clustering():
                 # exclude list) so noise pixels get correct display/exclusion behavior
                 # everywhere with no changes to any of that code. Real clusters are
                 # already 0-indexed and contiguous, matching k-means/fuzzy c-means.
-                labels = model.labels_.copy()
+                labels = result.labels.copy()
                 labels[labels == -1] = 99
+                data.add_columns('Cluster score', 'HDBSCAN strength', result.probabilities, data.mask)
                 data.add_columns('Cluster', method, labels, data.mask)
 
     def _clr_feature_matrix(self, data):
@@ -329,6 +337,19 @@ class ClusterPage(CustomPage, Clustering):
         self.spinBoxMinSamples.setObjectName("spinBoxMinSamples")
         self.cluster_form_layout.addRow("Min. samples", self.spinBoxMinSamples)
 
+        self.spinBoxClusterSampleSize = QSpinBox(parent=self.groupBoxClustering)
+        self.spinBoxClusterSampleSize.setMaximumSize(QSize(150, 16777215))
+        self.spinBoxClusterSampleSize.setFont(default_font())
+        self.spinBoxClusterSampleSize.setAlignment(Qt.AlignmentFlag.AlignRight|Qt.AlignmentFlag.AlignTrailing|Qt.AlignmentFlag.AlignVCenter)
+        self.spinBoxClusterSampleSize.setKeyboardTracking(False)
+        self.spinBoxClusterSampleSize.setMinimum(0)
+        self.spinBoxClusterSampleSize.setMaximum(10000000)
+        self.spinBoxClusterSampleSize.setSingleStep(1000)
+        self.spinBoxClusterSampleSize.setProperty("value", 0)
+        self.spinBoxClusterSampleSize.setToolTip("Number of pixels HDBSCAN is fit on; the remaining pixels are assigned to the nearest cluster. 0 fits every pixel; set a size (e.g. 20000) to speed up large maps.")
+        self.spinBoxClusterSampleSize.setObjectName("spinBoxClusterSampleSize")
+        self.cluster_form_layout.addRow("Fit sample size", self.spinBoxClusterSampleSize)
+
         self.horizontalLayout = QHBoxLayout()
         self.horizontalLayout.setObjectName("horizontalLayout")
 
@@ -393,6 +414,7 @@ class ClusterPage(CustomPage, Clustering):
         # HDBSCAN parameters
         self.spinBoxMinClusterSize.valueChanged.connect(lambda _: self.update_cluster_min_size())
         self.spinBoxMinSamples.valueChanged.connect(lambda _: self.update_cluster_min_samples())
+        self.spinBoxClusterSampleSize.valueChanged.connect(lambda _: self.update_cluster_sample_size())
 
         # starting seed
         self.lineEditSeed.editingFinished.connect(lambda: self.update_cluster_seed())
@@ -423,6 +445,7 @@ class ClusterPage(CustomPage, Clustering):
         self.dock.ui.app_data.clusterDistanceChanged.connect(self.update_cluster_distance)
         self.dock.ui.app_data.clusterMinSizeChanged.connect(self.update_cluster_min_size)
         self.dock.ui.app_data.clusterMinSamplesChanged.connect(self.update_cluster_min_samples)
+        self.dock.ui.app_data.clusterSampleSizeChanged.connect(self.update_cluster_sample_size)
         self.dock.ui.app_data.clusterPreconditionChanged.connect(self.update_dim_red_precondition)
         self.dock.ui.app_data.numBasisChanged.connect(self.update_num_basis_for_precondition)
 
@@ -434,6 +457,7 @@ class ClusterPage(CustomPage, Clustering):
         self.comboBoxClusterDistance.activated.connect(lambda: log(f"comboBoxClusterDistance value=[{self.comboBoxClusterDistance.currentText()}]", prefix="UI"))
         self.spinBoxMinClusterSize.valueChanged.connect(lambda: log(f"spinBoxMinClusterSize value=[{self.spinBoxMinClusterSize.value()}]", prefix="UI"))
         self.spinBoxMinSamples.valueChanged.connect(lambda: log(f"spinBoxMinSamples value=[{self.spinBoxMinSamples.value()}]", prefix="UI"))
+        self.spinBoxClusterSampleSize.valueChanged.connect(lambda: log(f"spinBoxClusterSampleSize value=[{self.spinBoxClusterSampleSize.value()}]", prefix="UI"))
         self.lineEditSeed.editingFinished.connect(lambda: log(f"lineEditSeed value=[{self.lineEditSeed.value}]", prefix="UI"))
         self.toolButtonRandomSeed.clicked.connect(lambda: log("toolButtonRandomSeed", prefix="UI"))
         self.checkBoxWithPCA.checkStateChanged.connect(lambda: log(f"checkBoxWithPCA value=[{self.checkBoxWithPCA.isChecked()}]", prefix="UI"))
@@ -468,6 +492,7 @@ class ClusterPage(CustomPage, Clustering):
                 self.sliderClusterExponent.setEnabled(False)
                 self.spinBoxMinClusterSize.setEnabled(False)
                 self.spinBoxMinSamples.setEnabled(False)
+                self.spinBoxClusterSampleSize.setEnabled(False)
                 self.lineEditSeed.setEnabled(True)
                 self.toolButtonRandomSeed.setEnabled(True)
             case 'fuzzy c-means':
@@ -477,19 +502,21 @@ class ClusterPage(CustomPage, Clustering):
                 self.sliderClusterExponent.setEnabled(True)
                 self.spinBoxMinClusterSize.setEnabled(False)
                 self.spinBoxMinSamples.setEnabled(False)
+                self.spinBoxClusterSampleSize.setEnabled(False)
                 self.lineEditSeed.setEnabled(True)
                 self.toolButtonRandomSeed.setEnabled(True)
             case 'HDBSCAN':
-                # density-based -- no target cluster count, no distance
-                # metric/fuzzy exponent choice, and no seed (deterministic)
+                # density-based -- no target cluster count and no distance
+                # metric/fuzzy exponent choice; the seed picks the fit sample
                 self.spinBoxNClusters.setEnabled(False)
                 self.spinBoxClusterMax.setEnabled(False)
                 self.comboBoxClusterDistance.setEnabled(False)
                 self.sliderClusterExponent.setEnabled(False)
                 self.spinBoxMinClusterSize.setEnabled(True)
                 self.spinBoxMinSamples.setEnabled(True)
-                self.lineEditSeed.setEnabled(False)
-                self.toolButtonRandomSeed.setEnabled(False)
+                self.spinBoxClusterSampleSize.setEnabled(True)
+                self.lineEditSeed.setEnabled(True)
+                self.toolButtonRandomSeed.setEnabled(True)
             case _:
                 ValueError(f"Unknown clustering method {self.dock.ui.app_data.cluster_method}")
 
@@ -692,6 +719,27 @@ class ClusterPage(CustomPage, Clustering):
         if self.dock.toolbox.currentIndex() == self.dock.ui.control_dock.tab_dict['cluster']:
             self.dock.ui.schedule_update()
 
+    def update_cluster_sample_size(self, new_value=None):
+        """Update the number of pixels HDBSCAN is fit on.
+
+        Parameters
+        ----------
+        new_value : int or None, optional
+            The new sample size. If not provided, the current value of the spin box is used.
+            If provided, the spin box is updated with the new value.
+        """
+        if new_value is None:
+            self.dock.ui.app_data.cluster_sample_size = self.spinBoxClusterSampleSize.value()
+        else:
+            if new_value == self.spinBoxClusterSampleSize.value():
+                return
+            self.spinBoxClusterSampleSize.blockSignals(True)
+            self.spinBoxClusterSampleSize.setValue(new_value)
+            self.spinBoxClusterSampleSize.blockSignals(False)
+
+        if self.dock.toolbox.currentIndex() == self.dock.ui.control_dock.tab_dict['cluster']:
+            self.dock.ui.schedule_update()
+
     def update_dim_red_precondition(self, new_value=None):
         """Update the preconditioning for PCA in clustering.
 
@@ -791,27 +839,45 @@ class DimensionalReduction():
                 self.compute_pca(data, app_data)
     
     def compute_pca(self,data, app_data):
-        #print('compute_pca')
+        """Computes PCA scores for the processed data, reusing the last fit when its input is unchanged.
+
+        The fit is cached per sample and method together with the processed-data
+        and mask versions, input columns, solver and component count, so
+        re-plotting or changing ``dim_red_x``/``dim_red_y`` doesn't refit. See
+        ``src.common.pca.fit_pca`` for the solvers.
+        """
         df_filtered, _ = data.get_processed_data()
 
-        # Preprocess the data
-        scaler = StandardScaler()
-        df_scaled = scaler.fit_transform(df_filtered)
+        # norm is a column attribute, so changing it doesn't bump processed_version
+        norms = tuple(data.processed.get_attribute(column.removesuffix(' (normalized)'), 'norm') for column in df_filtered.columns)
+        fit_key = (
+            data.mask_version,
+            tuple(df_filtered.columns),
+            norms,
+            app_data.dim_red_solver,
+            app_data.dim_red_n_components,
+        )
+        pca_results = data.dim_red_results.get(app_data.dim_red_method)
+        if (pca_results is None or data.dim_red_keys.get(app_data.dim_red_method) != (data.processed_version, fit_key)
+                or not data.processed.match_attribute('data_type', 'PCA score')):
+            array = df_filtered.values[data.mask]
+            pca_results, scores = fit_pca(array, n_components=app_data.dim_red_n_components, solver=app_data.dim_red_solver)
 
-        # Perform PCA
-        pca_results = PCA(n_components=min(len
-                                           (df_filtered.columns), len(df_filtered)))  # Adjust n_components as needed
-        
-        # store PCA results in data
-        data.dim_red_results[app_data.dim_red_method] = pca_results
+            # store PCA results in data
+            data.dim_red_results[app_data.dim_red_method] = pca_results
 
-        # compute pca scores
-        pca_scores = pd.DataFrame(pca_results.fit_transform(df_scaled), columns=[f'PC{i+1}' for i in range(pca_results.n_components_)])
-        
+            # drop scores of components no longer computed (e.g. fewer requested this time)
+            columns = [f'PC{i+1}' for i in range(pca_results.n_components_)]
+            for column in data.processed.match_attribute('data_type', 'PCA score'):
+                if column not in columns:
+                    data.delete_column(column)
+
+            # Add PCA scores to DataFrame for easier plotting
+            data.add_columns('PCA score', columns, scores, data.mask)
+            # writing the scores bumps processed_version; the inputs are unchanged,
+            # so record the version as it stands now
+            data.dim_red_keys[app_data.dim_red_method] = (data.processed_version, fit_key)
 
-        # Add PCA scores to DataFrame for easier plotting
-        data.add_columns('PCA score',pca_scores.columns,pca_scores.values,data.mask)
-        
         # update_pca_flag to prevent PCA running during when app_data.dim_red_y is being set
         app_data.update_pca_flag = False
         #update min and max of PCA spinboxes
@@ -889,6 +955,21 @@ class DimensionalReductionPage(CustomPage, DimensionalReduction):
         self.spinBoxPCY.setObjectName("spinBoxPCY")
         self.multidim_form_layout.addRow("PC Y", self.spinBoxPCY)
 
+        self.comboBoxDimRedSolver = QComboBox(parent=self.groupBoxMultidim)
+        self.comboBoxDimRedSolver.setFont(default_font())
+        self.comboBoxDimRedSolver.setObjectName("comboBoxDimRedSolver")
+        self.comboBoxDimRedSolver.setToolTip("PCA solver; 'auto' uses randomized SVD for a few components and\nincremental PCA for very large maps")
+        self.multidim_form_layout.addRow("Solver", self.comboBoxDimRedSolver)
+
+        self.spinBoxDimRedComponents = QSpinBox(parent=self.groupBoxMultidim)
+        self.spinBoxDimRedComponents.setFont(default_font())
+        self.spinBoxDimRedComponents.setAlignment(Qt.AlignmentFlag.AlignRight|Qt.AlignmentFlag.AlignTrailing|Qt.AlignmentFlag.AlignVCenter)
+        self.spinBoxDimRedComponents.setKeyboardTracking(False)
+        self.spinBoxDimRedComponents.setRange(0, 999)
+        self.spinBoxDimRedComponents.setSpecialValueText("All")
+        self.spinBoxDimRedComponents.setObjectName("spinBoxDimRedComponents")
+        self.multidim_form_layout.addRow("Components", self.spinBoxDimRedComponents)
+
         self.addWidget(self.groupBoxMultidim)
         field_spacer = QSpacerItem(20, 40, QSizePolicy.Policy.Minimum, QSizePolicy.Policy.Expanding)
         self.addItem(field_spacer)
@@ -915,17 +996,28 @@ class DimensionalReductionPage(CustomPage, DimensionalReduction):
         self.spinBoxPCX.valueChanged.connect(lambda: setattr(self.dock.ui.app_data, "dim_red_x",self.spinBoxPCX.value()))
         self.spinBoxPCY.valueChanged.connect(lambda: setattr(self.dock.ui.app_data, "dim_red_y",self.spinBoxPCY.value()))
 
+        self.comboBoxDimRedSolver.clear()
+        self.comboBoxDimRedSolver.addItems(PCA_SOLVERS)
+        self.comboBoxDimRedSolver.setCurrentText(self.dock.ui.app_data.dim_red_solver)
+        self.comboBoxDimRedSolver.currentTextChanged.connect(lambda text: setattr(self.dock.ui.app_data, "dim_red_solver", text))
+        self.spinBoxDimRedComponents.setValue(self.dock.ui.app_data.dim_red_n_components)
+        self.spinBoxDimRedComponents.valueChanged.connect(lambda value: setattr(self.dock.ui.app_data, "dim_red_n_components", value))
+
     def connect_observer(self):
         """Connects properties to observer functions."""
         self.dock.ui.app_data.dimRedMethodChanged.connect(lambda method: self.update_dim_red_method_combobox(method))
         self.dock.ui.app_data.dimRedValueChanged.connect(lambda ax, new_value: self.update_dim_red_spinbox(ax, new_value))
         self.dock.ui.app_data.dimRedMaxValueChanged.connect(lambda ax, new_value: self.update_dim_red_max_spinbox(ax, new_value))
+        self.dock.ui.app_data.dimRedSolverChanged.connect(lambda solver: self.update_dim_red_solver(solver))
+        self.dock.ui.app_data.dimRedComponentsChanged.connect(lambda n: self.update_dim_red_components(n))
 
     def connect_logger(self):
         """Connects widgets to logger."""
         self.comboBoxDimRedTechnique.currentTextChanged.connect(lambda: log(f"comboBoxDimRedTechnique, value=[{self.comboBoxDimRedTechnique.currentText()}]",prefix="UI"))
         self.spinBoxPCX.valueChanged.connect(lambda: log(f"spinBoxPCX value=[{self.spinBoxPCX.value()}]", prefix="UI"))
         self.spinBoxPCY.valueChanged.connect(lambda: log(f"spinBoxPCY value=[{self.spinBoxPCY.value()}]", prefix="UI"))
+        self.comboBoxDimRedSolver.currentTextChanged.connect(lambda: log(f"comboBoxDimRedSolver, value=[{self.comboBoxDimRedSolver.currentText()}]",prefix="UI"))
+        self.spinBoxDimRedComponents.valueChanged.connect(lambda: log(f"spinBoxDimRedComponents value=[{self.spinBoxDimRedComponents.value()}]", prefix="UI"))
 
     def update_dim_red_method_combobox(self, new_method):
         self.comboBoxDimRedTechnique.setCurrentText(new_method)
@@ -940,4 +1032,14 @@ class DimensionalReductionPage(CustomPage, DimensionalReduction):
 
     def update_dim_red_max_spinbox(self, ax, new_value):
         spinbox = getattr(self, f"spinBoxPC{ax.upper()}")
-        spinbox.setMaximum(int(new_value))
\ No newline at end of file
+        spinbox.setMaximum(int(new_value))
+
+    def update_dim_red_solver(self, solver):
+        self.comboBoxDimRedSolver.setCurrentText(solver)
+        if self.dock.toolbox.currentIndex() == self.dock.ui.control_dock.tab_dict['dim_red']:
+            self.dock.ui.schedule_update()
+
+    def update_dim_red_components(self, n_components):
+        self.spinBoxDimRedComponents.setValue(int(n_components))
+        if self.dock.toolbox.currentIndex() == self.dock.ui.control_dock.tab_dict['dim_red']:
+            self.dock.ui.schedule_update()
\ No newline at end of file
@@ -179,12 +179,18 @@ class LameIO():
             )
 
             # Tier 2: replay this project's saved filters/masks/computed
-            # fields onto the freshly (re)loaded sample. field_calculator is
-            # optional -- omitted rather than crashing if the Calculator
-            # dock hasn't been created yet (e.g. in a lighter-weight test
-            # harness).
+            # fields onto the freshly (re)loaded sample. The Calculator dock
+            # is only built when first opened; until then computed fields
+            # are replayed with a standalone calculator.
             if entry is not None:
-                field_calculator = getattr(getattr(self.ui, 'calculator', None), 'cfc', None)
+                calculator = getattr(self.ui, 'calculator', None)
+                if calculator is not None:
+                    field_calculator = calculator.cfc
+                elif entry.processing.computed_fields:
+                    from src.common.Calculator import CustomFieldCalculator
+                    field_calculator = CustomFieldCalculator()
+                else:
+                    field_calculator = None
                 self.ui.data[self.ui.app_data.sample_id].apply_processing_state(
                     entry.processing,
                     ref_chem=self.ui.app_data.ref_chem,
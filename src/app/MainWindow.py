@@ -24,6 +24,7 @@ from src.plotting.LamePlot import (
     create_plot, plot_map_mpl, plot_histogram, plot_correlation, get_scatter_data, plot_scatter,
     plot_ternary_map, plot_ndim, plot_pca, plot_clusters, cluster_performance_plot
 )
+from src.plotting.MapView import FieldMapView
 from src.app.LameIO import LameIO
 from src.project.ProjectManager import ProjectManager
 from src.control.FieldLogic import ControlDock
@@ -34,28 +35,33 @@ from src.app.LameStatusBar import MainStatusBar
 from src.common.TableFunctions import TableFcn as TableFcn
 from src.tree.PlotTree import PlotTree
 from src.plotting.CanvasWidget import CanvasWidget
-from src.data.Masking import MaskDock
 from src.plotting.CropImage import CropTool
-from src.plotting.Profile import Profiling, ProfileDock
-from src.data.Regression import RegressionDock
-from src.common.geochronology import GeochronDock
-from src.common.diffusion import DiffusionDock
-from src.stoichiometry.dock import StoichiometryDock
-from src.project.ProjectFilesDock import ProjectFilesDock
-from siesta.reSTNotes import NotesDock
-from src.common.Browser import Browser
-from src.workflow.Workflow import Workflow
-from src.app.InfoViewer import InfoDock
 from lame_core.config import BASEDIR, APPDATA_PATH, ICONPATH, STYLE_PATH, load_stylesheet
 from src.app.settings import prefs
 from src.app.help_mapping import create_help_mapping
 from src.control.Logger import LoggerConfig, auto_log_methods, log, no_log, LoggerDock
-from src.common.Calculator import CalculatorDock
 from src.tree.PlotRegistry import PlotRegistry
 from src.workflow.ActionRecorder import ActionRecorder
 from src.app.ReportWriter import ReportWriter
 from src.workflow import WorkflowFile
 from src.plotting.CustomMplCanvas import MplCanvas
+from src.app.Startup import LazyClass, startup_timer
+
+# docks are imported the first time they are opened (see src/app/Startup.py)
+MaskDock = LazyClass('src.data.Masking', 'MaskDock')
+ProfileDock = LazyClass('src.plotting.Profile', 'ProfileDock')
+RegressionDock = LazyClass('src.data.Regression', 'RegressionDock')
+GeochronDock = LazyClass('src.common.geochronology', 'GeochronDock')
+DiffusionDock = LazyClass('src.common.diffusion', 'DiffusionDock')
+StoichiometryDock = LazyClass('src.stoichiometry.dock', 'StoichiometryDock')
+ProjectFilesDock = LazyClass('src.project.ProjectFilesDock', 'ProjectFilesDock')
+NotesDock = LazyClass('siesta.reSTNotes', 'NotesDock')
+Browser = LazyClass('src.common.Browser', 'Browser')
+Workflow = LazyClass('src.workflow.Workflow', 'Workflow')
+InfoDock = LazyClass('src.app.InfoViewer', 'InfoDock')
+CalculatorDock = LazyClass('src.common.Calculator', 'CalculatorDock')
+
+startup_timer.mark('imports')
 
 import faulthandler
 faulthandler.enable()
@@ -138,7 +144,7 @@ class MainWindow(QMainWindow):
         self.style_data = StyleData(parent=self)
         
         # initialize plot registry for canvas and metadata management
-        self.plot_registry = PlotRegistry(app_data=self.app_data, max_cached_canvases=10)
+        self.plot_registry = PlotRegistry(app_data=self.app_data, max_cached_canvases=10, memory_budget_mb=512)
 
         # records structured, replayable action events for the Workflow dock and
         # the auto-report writer; see connect_action_recorder_sources
@@ -151,7 +157,9 @@ class MainWindow(QMainWindow):
         self.scheduler = Scheduler(callback=self.update_SV)
 
         # initialize the styling data and dock
+        startup_timer.mark('app data')
         self.setupUI()
+        startup_timer.mark('setupUI')
 
         self.connect_action_recorder_sources()
 
@@ -174,18 +182,22 @@ class MainWindow(QMainWindow):
         self.connect_widgets()
 
         # holds the custom field names and formulas set by the user in the calculator
+        # (the Calculator dock itself is built the first time it is opened)
         self.calc_dict = {}
-        self.open_calculator()
-        self.calculator.hide()
 
         self.info_tab = {}
 
         #self.init_canvas_widget()
         self.mpl_canvas = None # will hold the current canvas
+        # retained SingleView field map, updated in place between fields
+        self.field_map_view = FieldMapView()
 
         # Force initial update of theme
         self._apply_theme_to_buttons(self.theme_manager.theme)
 
+        startup_timer.mark('connections and theme')
+        log(startup_timer.report(), "INFO")
+
         # self.mpl_canvas = MplCanvas()
         # self.mpl_canvas.axes.clear()
         # self.mpl_canvas.axes.imshow()
@@ -1276,7 +1288,9 @@ class MainWindow(QMainWindow):
                 case 'field map':
                     # Field map has special UI handling for mask/profile modes and histogram
                     if (hasattr(self, "mask_dock") and self.mask_dock.polygon_tab.polygon_toggle.isChecked()) or (hasattr(self, "profile_dock") and self.profile_dock.profile_toggle.isChecked()):
-                        # Mask/profile mode - use create_plot directly
+                        # Mask/profile mode - use create_plot directly; polygons/profiles are
+                        # drawn onto the canvas, so it can't be retained for in-place updates
+                        self.field_map_view.invalidate()
                         canvas, self.plot_info = create_plot(self, data, self.app_data, self.style_data)
                         
                         # Handle profile/mask specific UI updates
@@ -1287,15 +1301,23 @@ class MainWindow(QMainWindow):
                             self.mask_dock.polygon_tab.polygon_manager.clear_polygons()
                             self.mask_dock.polygon_tab.polygon_manager.plot_existing_polygon(canvas)
                     else:
-                        # Always use create_plot for main canvas
-                        canvas, self.plot_info = create_plot(self, data, self.app_data, self.style_data)
+                        # Retained field map: updates the on-screen canvas in place unless
+                        # the layout changed, in which case a new canvas is built
+                        canvas, self.plot_info, rebuilt = self.field_map_view.update(
+                            self, data, self.app_data, self.style_data,
+                            self.app_data.c_field_type, self.app_data.c_field,
+                            reuse=self.field_map_canvas_reusable()
+                        )
+                        if not rebuilt:
+                            # already on screen, skip placement below but record the new field
+                            self.mpl_canvas = canvas
+                            self.canvas_widget.set_single_view_plot(self.plot_info)
+                            canvas = None
                         
                         # Handle histogram separately if needed (UI-specific feature)
                         if self.control_dock.toolbox.currentIndex() == self.control_dock.tab_dict['process']:
-                            from src.plotting.LamePlot import plot_map_mpl
-                            field_type = self.app_data.c_field_type
-                            field = self.app_data.c_field
-                            _, _, hist_canvas = plot_map_mpl(self, data, self.app_data, self.style_data, field_type, field, add_histogram=True)
+                            from src.plotting.LamePlot import plot_small_histogram
+                            hist_canvas = plot_small_histogram(self, data, self.app_data, self.style_data, self.field_map_view.map_df)
                             
                             # Handle histogram UI placement
                             if hist_canvas:
@@ -1381,6 +1403,32 @@ class MainWindow(QMainWindow):
             self.plot_flag = old_plot_flag
 
 
+    def field_map_canvas_reusable(self):
+        """Whether the retained field map canvas can be updated in place.
+
+        Only the canvas currently shown in SingleView can be reused, and only
+        if it hasn't been saved to the plot tree/registry (saved plots must
+        keep the map they were saved with) or annotated by the user.
+
+        Returns
+        -------
+        bool
+            ``True`` if ``field_map_view.canvas`` may be updated in place.
+        """
+        canvas = self.field_map_view.canvas
+        if canvas is None or canvas is not getattr(self.canvas_widget, 'sv_widget', None):
+            return False
+        if self.canvas_widget.canvasWindow.currentIndex() != self.canvas_widget.tab_dict['sv']:
+            return False
+        if canvas.annotations or canvas.saved_line:
+            return False
+
+        registry = getattr(self, 'plot_registry', None)
+        if registry is not None:
+            if any(cached is canvas for cached in registry.canvas_cache.values()):
+                return False
+        return True
+
     def apply_cluster_mask(self, inverse=False):
         """Creates a mask from the clusters currently selected in the Cluster tab.
 
@@ -1401,7 +1449,6 @@ class MainWindow(QMainWindow):
             # No clusters selected → cluster filter is off; let everything through.
             d = self.data[sample_id]
             d.cluster_mask = np.ones(len(d.mask), dtype=bool)
-            d.mask = d.crop_mask & d.filter_mask & d.polygon_mask & d.cluster_mask & d.roi_selection_mask
             self.lame_action.ClusterMask.setChecked(False)
             self.schedule_update()
             return
@@ -1413,12 +1460,9 @@ class MainWindow(QMainWindow):
             selected_clusters = [c for c in all_clusters if c not in selected_clusters]
 
         ind = np.isin(cluster_group, selected_clusters)
+        # the combined mask is rebuilt from the changed layer when next read
         self.data[sample_id].cluster_mask = ind
 
-        # recompute combined mask
-        d = self.data[sample_id]
-        d.mask = d.crop_mask & d.filter_mask & d.polygon_mask & d.cluster_mask & d.roi_selection_mask
-
         self.lame_action.ClearFilters.setEnabled(True)
         self.lame_action.ClusterMask.setEnabled(True)
         self.lame_action.ClusterMask.setChecked(True)
@@ -1473,12 +1517,11 @@ class MainWindow(QMainWindow):
                 if plot_id not in self.plot_registry.canvas_cache:
                     self.plot_registry._cache_canvas(plot_id, existing_figure)
             else:
-                # No rendered figure - try to get from cache
-                canvas = self.plot_registry.canvas_cache.get(plot_id)
+                # No rendered figure - take it from the cache, re-rendering it from
+                # the plot's recipe if it was evicted
+                canvas = self.plot_registry.get_or_create_canvas(plot_id)
                 if canvas:
-                    plot_info['figure'] = canvas
-                # If not in cache either, we can't display anything meaningful
-                # Don't call _create_canvas because it only makes a blank canvas
+                    plot_info = {**plot_info, 'figure': canvas, 'data': canvas.data}
 
         # Use existing CanvasWidget logic
         self.canvas_widget.add_canvas_to_window(plot_info, position)
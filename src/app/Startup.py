@@ -0,0 +1,179 @@
+"""Startup timing and deferred imports for the main window.
+
+Most docks are only needed once the user opens them, and several pull in
+heavy dependencies when their module is imported (``GeochronDock`` -> cv2,
+``DiffusionDock`` -> scipy.sparse, ``Workflow``/``Browser`` -> QtWebEngine,
+``CalculatorDock`` -> numexpr). ``MainWindow`` refers to them through
+``LazyClass`` proxies, so a dock's module is imported the first time the dock
+is built (``MainWindow.open_*``) rather than before the first window paints.
+
+``startup_timer`` records how long each phase of startup (importing and
+building ``MainWindow``) and each deferred import took
+(``StartupTimer.report``, logged once the window is built), and
+``import_times`` measures a cold import of a module in a fresh interpreter
+so a startup budget can be held in a regression test (see
+``tests/test_startup.py``).
+"""
+import importlib
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+# modules that must not be imported before the main window is shown. They are
+# slow to import and only some sessions need them, so each is imported inside
+# the function that uses it (clustering, PCA, image processing, formula
+# compilation, ...) or by the dock's module, loaded through a LazyClass, rather
+# than at the top of a module MainWindow imports
+DEFERRED_MODULES = (
+    'cv2',
+    'numexpr',
+    'sklearn',
+    'scipy.sparse.linalg',
+    'PyQt6.QtWebEngineWidgets',
+)
+
+
+class StartupTimer:
+    """Records the duration of startup phases and deferred imports.
+
+    Phases are consecutive: ``mark(name)`` closes phase ``name`` at the time
+    it is called, the phase having started at the previous mark (or when the
+    timer was created, early in the import of ``MainWindow``).
+
+    Attributes
+    ----------
+    phases : dict
+        Seconds spent in each named phase, in the order they ran.
+    imports : dict
+        Seconds spent importing each deferred module, in the order imported.
+    """
+    def __init__(self):
+        self.phases = {}
+        self.imports = {}
+        self._last = time.perf_counter()
+
+    def mark(self, name):
+        """Ends phase ``name`` now and starts the next one."""
+        now = time.perf_counter()
+        self.phases[name] = self.phases.get(name, 0.0) + now - self._last
+        self._last = now
+
+    @property
+    def total(self):
+        """Seconds spent in all phases."""
+        return sum(self.phases.values())
+
+    def report(self):
+        """Startup timings as text, one phase or import per line (ms)."""
+        lines = [f"startup: {1e3 * self.total:.0f} ms"]
+        lines += [f"  {name}: {1e3 * t:.0f} ms" for name, t in self.phases.items()]
+        if self.imports:
+            lines.append("deferred imports:")
+            lines += [f"  {name}: {1e3 * t:.0f} ms" for name, t in self.imports.items()]
+        return '\n'.join(lines)
+
+
+startup_timer = StartupTimer()
+
+
+class LazyClass:
+    """Stands in for a class whose module is imported on first use.
+
+    Calling the proxy imports the module (once, timed into
+    ``startup_timer.imports``) and constructs the class with the same
+    arguments, so ``Dock = LazyClass('src.x', 'Dock')`` followed by
+    ``Dock(parent)`` works as the direct import would.
+
+    Parameters
+    ----------
+    module : str
+        Module defining the class.
+    name : str
+        Class name.
+    """
+    def __init__(self, module, name):
+        self.module = module
+        self.name = name
+        self._cls = None
+
+    @property
+    def loaded(self):
+        """True once the class's module has been imported through the proxy."""
+        return self._cls is not None
+
+    def load(self):
+        """Imports the module and returns the class."""
+        if self._cls is None:
+            start = time.perf_counter()
+            self._cls = getattr(importlib.import_module(self.module), self.name)
+            startup_timer.imports[self.module] = time.perf_counter() - start
+        return self._cls
+
+    def __call__(self, *args, **kwargs):
+        return self.load()(*args, **kwargs)
+
+    def __instancecheck__(self, obj):
+        return self.loaded and isinstance(obj, self._cls)
+
+    def __repr__(self):
+        return f"LazyClass({self.module!r}, {self.name!r})"
+
+
+def parse_importtime(text):
+    """Parses ``python -X importtime`` output.
+
+    Parameters
+    ----------
+    text : str
+        stderr of an interpreter run with ``-X importtime``.
+
+    Returns
+    -------
+    dict
+        Cumulative import time in seconds by module name, in import order.
+    """
+    times = {}
+    for line in text.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        fields = line[len('import time:'):].split('|')
+        if len(fields) != 3 or not fields[1].strip().isdigit():
+            continue  # the header line
+        times[fields[2].strip()] = int(fields[1]) * 1e-6
+    return times
+
+
+def import_times(module, python=None):
+    """Times a cold import of ``module`` in a fresh interpreter.
+
+    Parameters
+    ----------
+    module : str
+        Module to import, e.g. ``'src.app.MainWindow'``.
+    python : str, optional
+        Interpreter, by default the running one.
+
+    Returns
+    -------
+    dict
+        Cumulative import time in seconds of every module the import loaded,
+        by module name (see `parse_importtime`).
+
+    Raises
+    ------
+    ImportError
+        If the import fails; the message holds the interpreter's traceback.
+    """
+    root = Path(__file__).resolve().parents[2]
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [str(root), os.environ.get('PYTHONPATH')])))
+    env.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    proc = subprocess.run(
+        [python or sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=root, env=env, capture_output=True, text=True,
+    )
+    if proc.returncode != 0:
+        tail = [line for line in proc.stderr.splitlines() if not line.startswith('import time:')]
+        raise ImportError(f"importing {module} failed:\n" + '\n'.join(tail[-20:]))
+    return parse_importtime(proc.stderr)
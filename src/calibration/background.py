@@ -16,18 +16,18 @@ from datetime import datetime
 import numpy as np
 import pandas as pd
 
-from src.calibration.counts import cps_to_counts, resolve_tau
+from src.calibration.counts import resolve_tau_columns
 from src.calibration.currie import CurrieLimits, compute_currie_limits
 from src.calibration.drift import (
     DriftFit,
     DriftFitError,
     DriftFitLike,
     fit_polynomial,
-    select_drift_fit,
-    select_order_by_aic,
+    predict_many,
+    select_orders_by_aic,
 )
 from src.calibration.lod import compute_lod
-from src.calibration.poisson_drift import PoissonFitError, detect_poisson_file_outliers
+from src.calibration.poisson_drift import detect_poisson_file_outliers, select_poisson_orders_lrt
 from src.calibration.rawfile import LineFileData, LineFileMeta
 
 
@@ -338,6 +338,12 @@ def fit_session_background_drift(
     analytes = list(backgrounds[0].background_mean.keys())
 
     fits: dict[str, DriftFitLike] = {}
+    # Gaussian/AIC fits are selected together after the loop, batched over
+    # analytes sharing the same files (see drift.select_orders_by_aic)
+    aic_series: dict[str, tuple] = {}
+    # likewise Poisson fits (see poisson_drift.select_poisson_orders_lrt)
+    poisson_series: dict[str, tuple] = {}
+    aic_fallback: dict[str, tuple] = {}
     for analyte in analytes:
         usable = [b for b in backgrounds if analyte in b.background_mean]
         if not usable:
@@ -361,23 +367,11 @@ def fit_session_background_drift(
                 p_times = [t for t, k in zip(p_times_all, keep) if k]
                 p_counts = p_counts_all[keep]
                 p_tau = p_tau_all[keep]
-                try:
-                    fits[analyte] = select_drift_fit(
-                        p_times, None, counts=p_counts, tau_s=p_tau,
-                        method="auto_poisson_lrt", max_order=max_order, analyte=analyte,
-                    )
-                    continue
-                except PoissonFitError:
-                    pass  # fall through to the Gaussian/AIC fallback below
-            try:
-                fits[analyte] = select_order_by_aic(fit_times, values, max_order=max_order, analyte=analyte)
-            except DriftFitError:
-                continue
+                poisson_series[analyte] = (p_times, p_counts, p_tau)
+            # Gaussian/AIC fallback, used if the Poisson fit fails (or isn't possible)
+            aic_fallback[analyte] = (fit_times, values)
         elif method == "auto_aic":
-            try:
-                fits[analyte] = select_order_by_aic(fit_times, values, max_order=max_order, analyte=analyte)
-            except DriftFitError:
-                continue
+            aic_series[analyte] = (fit_times, values)
         else:  # "fixed"
             eff_order = order
             while eff_order > 0 and len(values) < eff_order + 2:
@@ -386,7 +380,13 @@ def fit_session_background_drift(
                 fits[analyte] = fit_polynomial(fit_times, values, order=eff_order, analyte=analyte)
             except DriftFitError:
                 continue
-    return fits
+
+    if poisson_series:
+        fits.update(select_poisson_orders_lrt(poisson_series, max_order=max_order))
+    aic_series.update({analyte: series for analyte, series in aic_fallback.items() if analyte not in fits})
+    if aic_series:
+        fits.update(select_orders_by_aic(aic_series, max_order=max_order))
+    return {analyte: fits[analyte] for analyte in analytes if analyte in fits}
 
 
 def compute_background_result(
@@ -460,6 +460,38 @@ def compute_background_result(
         )
 
     bg_signal = line_data.signal.iloc[window.start_idx:window.end_idx]
+    analytes = list(bg_signal.columns)
+    bg_cps = bg_signal.to_numpy(dtype=float)
+
+    # every statistic below is computed for all analytes at once over the
+    # (rows x analytes) window, each column with its own row mask
+    row_outlier_mask = detect_row_outliers_matrix(bg_cps)
+    # Degenerate case (every row flagged) -- don't trust the screen for
+    # that analyte, fall back to the full, unfiltered window rather than
+    # reporting statistics over zero rows.
+    row_outlier_mask[:, row_outlier_mask.all(axis=0)] = False
+    for j, analyte in enumerate(analytes):
+        for abs_idx in (manual_row_exclusions or {}).get(analyte, ()):
+            if window.start_idx <= abs_idx < window.end_idx:
+                row_outlier_mask[abs_idx - window.start_idx, j] = True
+    clean = ~row_outlier_mask
+
+    n_clean = clean.sum(axis=0)
+    clean_cps = np.where(clean, bg_cps, 0.0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        clean_mean = clean_cps.sum(axis=0) / n_clean
+        clean_var = np.where(clean, (bg_cps - clean_mean) ** 2, 0.0).sum(axis=0) / (n_clean - 1)
+    std = np.where(n_clean > 1, np.sqrt(clean_var), 0.0)
+
+    tau_estimates = resolve_tau_columns(bg_cps, clean, dwell_time_ms, sweeps_per_reading)
+    tau_s = np.array([np.nan if t.tau_s is None else t.tau_s for t in tau_estimates])
+    # as cps_to_counts, for all columns at once; NaN where tau is unknown
+    counts = np.clip(np.round(bg_cps * tau_s), 0, None)
+    total_counts = np.where(clean, counts, 0.0).sum(axis=0)
+    has_counts = ~np.isnan(tau_s)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        poisson_rate = total_counts / (tau_s * n_clean)
+    mean = np.where(has_counts & (n_clean > 0), poisson_rate, np.where(n_clean > 0, clean_mean, 0.0))
 
     background_mean: dict[str, float] = {}
     background_std: dict[str, float] = {}
@@ -469,40 +501,15 @@ def compute_background_result(
     background_tau_s: dict[str, float | None] = {}
     tau_provenance: dict[str, str] = {}
     currie_limits: dict[str, CurrieLimits] = {}
-    for analyte in bg_signal.columns:
-        analyte_cps_full = bg_signal[analyte].to_numpy()
-        row_outlier_mask = detect_row_outliers(analyte_cps_full, order=0)
-        clean_cps = analyte_cps_full[~row_outlier_mask]
-        if clean_cps.size == 0:
-            # Degenerate case (every row flagged) -- don't trust the
-            # screen for this analyte, fall back to the full, unfiltered
-            # window rather than reporting statistics over zero rows.
-            row_outlier_mask = np.zeros(len(analyte_cps_full), dtype=bool)
-            clean_cps = analyte_cps_full
-
-        manual = (manual_row_exclusions or {}).get(analyte, ())
-        if manual:
-            for abs_idx in manual:
-                if window.start_idx <= abs_idx < window.end_idx:
-                    row_outlier_mask[abs_idx - window.start_idx] = True
-            clean_cps = analyte_cps_full[~row_outlier_mask]
-        background_row_outlier_mask[analyte] = row_outlier_mask
-
-        n_clean = int(clean_cps.size)
-        background_n[analyte] = n_clean
-        background_std[analyte] = float(np.std(clean_cps, ddof=1)) if n_clean > 1 else 0.0
-
-        tau_estimate = resolve_tau(clean_cps, dwell_time_ms, sweeps_per_reading)
+    for j, analyte in enumerate(analytes):
+        tau_estimate = tau_estimates[j]
+        background_row_outlier_mask[analyte] = row_outlier_mask[:, j].copy()
+        background_n[analyte] = int(n_clean[j])
+        background_std[analyte] = float(std[j])
+        background_mean[analyte] = float(mean[j])
         tau_provenance[analyte] = tau_estimate.provenance
         background_tau_s[analyte] = tau_estimate.tau_s
-        counts_arr = cps_to_counts(clean_cps, tau_estimate)
-        total_counts = float(np.sum(counts_arr)) if counts_arr is not None else None
-        background_counts[analyte] = total_counts
-
-        if total_counts is not None and n_clean > 0:
-            background_mean[analyte] = total_counts / (tau_estimate.tau_s * n_clean)
-        else:
-            background_mean[analyte] = float(np.mean(clean_cps)) if n_clean > 0 else 0.0
+        background_counts[analyte] = float(total_counts[j]) if has_counts[j] else None
 
         if tau_estimate.tau_s is not None:
             mu_b_counts = max(background_mean[analyte] * tau_estimate.tau_s, 0.0)
@@ -514,18 +521,18 @@ def compute_background_result(
     ablation_time = line_data.absolute_time[ablation.start_idx:ablation.end_idx]
 
     if session_background_drift:
-        used_drift = False
-        corrected_cols = {}
-        for analyte in ablation_signal.columns:
-            fit = session_background_drift.get(analyte)
-            if fit is not None:
-                predicted_bg = fit.predict(ablation_time)
-                corrected_cols[analyte] = ablation_signal[analyte].to_numpy() - predicted_bg
-                used_drift = True
-            else:
-                corrected_cols[analyte] = ablation_signal[analyte].to_numpy() - background_mean[analyte]
+        drift_fits = {
+            analyte: session_background_drift[analyte] for analyte in ablation_signal.columns
+            if session_background_drift.get(analyte) is not None
+        }
+        # all drift curves evaluated together on the shared ablation time axis
+        predicted_bg = predict_many(drift_fits, ablation_time)
+        corrected_cols = {
+            analyte: ablation_signal[analyte].to_numpy() - predicted_bg.get(analyte, background_mean[analyte])
+            for analyte in ablation_signal.columns
+        }
         corrected = pd.DataFrame(corrected_cols, index=ablation_signal.index)
-        method_used = "session_drift_aware" if used_drift else "naive_per_file_constant"
+        method_used = "session_drift_aware" if drift_fits else "naive_per_file_constant"
     else:
         corrected = (ablation_signal - pd.Series(background_mean)).reset_index(drop=True)
         method_used = "naive_per_file_constant"
@@ -802,6 +809,39 @@ def detect_row_outliers(
     return np.abs(z2) > threshold
 
 
+def detect_row_outliers_matrix(values: np.ndarray, threshold: float = 5.0) -> np.ndarray:
+    """:func:`detect_row_outliers` with ``order=0``, for every column of a
+    (rows x analytes) matrix at once.
+
+    Each column is screened on its own nonzero rows exactly as the scalar
+    ``order=0`` path does (median center, MAD scale, mean-absolute-deviation
+    fallback when the MAD is 0, at least 4 nonzero rows); zero rows are
+    masked out as NaN so medians and means over all columns are taken in one
+    call each. Returns a boolean mask the shape of ``values``.
+    """
+    values = np.asarray(values, dtype=float)
+    n_rows, n_cols = values.shape
+    out = np.zeros((n_rows, n_cols), dtype=bool)
+    if n_rows < 4:
+        return out
+
+    nonzero = values != 0
+    cols = np.flatnonzero(nonzero.sum(axis=0) >= 4)
+    if cols.size == 0:
+        return out
+
+    nz = np.where(nonzero[:, cols], values[:, cols], np.nan)
+    resid = nz - np.nanmedian(nz, axis=0)
+    abs_resid = np.abs(resid)
+    mad = np.nanmedian(abs_resid, axis=0)
+    mad = np.where(mad == 0, np.nanmean(abs_resid, axis=0), mad)
+    screened = mad != 0
+    with np.errstate(divide="ignore", invalid="ignore"):
+        z = 0.6745 * resid / mad
+    out[:, cols] = (np.abs(z) > threshold) & screened & nonzero[:, cols]
+    return out
+
+
 def classify_rows(
     line_data: LineFileData, background: BackgroundResult | None, analyte: str | None = None,
     is_outlier: bool = False, manual_row_mask: np.ndarray | None = None,
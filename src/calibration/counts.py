@@ -14,6 +14,7 @@ from __future__ import annotations
 from dataclasses import dataclass
 
 import numpy as np
+from scipy import sparse
 
 VALID_PROVENANCE = {"metadata", "inferred", "bounded", "unknown"}
 
@@ -62,22 +63,59 @@ def estimate_quantum(
     meaningful when it's actually visible -- i.e. the low-count regime this
     whole module exists for).
     """
+    quantum = estimate_quantum_columns(
+        np.asarray(cps, dtype=float).reshape(-1, 1), dmin=dmin, dmax=dmax, nsteps=nsteps,
+        score_tol=score_tol, max_best_score=max_best_score,
+    )[0]
+    return None if np.isnan(quantum) else float(quantum)
+
+
+def estimate_quantum_columns(
+    cps, valid=None, dmin: float = 0.1, dmax: float = 200.0, nsteps: int = 20000,
+    score_tol: float = 1e-6, max_best_score: float = 0.01, chunk: int = 1024,
+) -> np.ndarray:
+    """:func:`estimate_quantum` for every column of a (rows x analytes) CPS matrix.
+
+    Quantized channels repeat the same few multiples of Delta, within a
+    column and across analytes sharing a counting time, so each *distinct*
+    positive value is scored against the candidate grid once, and the
+    per-column scores are sums over a sparse (columns x distinct values)
+    multiplicity matrix -- the same quantity :func:`estimate_quantum` computes,
+    at a cost set by the number of distinct values rather than rows x columns.
+
+    ``valid`` (same shape as ``cps``) restricts each column to its ``True``
+    rows. Returns the estimated Delta per column, NaN where
+    :func:`estimate_quantum` would return ``None``.
+    """
     v = np.asarray(cps, dtype=float)
-    v = v[v > 0]
-    if len(v) < 3:
-        return None
+    use = v > 0
+    if valid is not None:
+        use &= np.asarray(valid, dtype=bool)
+    n_pos = use.sum(axis=0)
+    quantum = np.full(v.shape[1], np.nan)
+    cols = np.flatnonzero(n_pos >= 3)
+    if cols.size == 0:
+        return quantum
+
+    row_idx, col_idx = np.nonzero(use[:, cols])
+    distinct, inverse = np.unique(v[:, cols][row_idx, col_idx], return_inverse=True)
+    multiplicity = sparse.csr_matrix(
+        (np.ones(inverse.size), (col_idx, inverse.ravel())), shape=(cols.size, distinct.size)
+    )
 
     deltas = np.geomspace(dmin, dmax, nsteps)
-    r = v[:, None] / deltas[None, :]
-    frac = r - np.round(r)
-    scores = np.mean(frac ** 2, axis=0)
-
-    best = float(scores.min())
-    if best > max_best_score:
-        return None
+    scores = np.empty((cols.size, nsteps))
+    for start in range(0, nsteps, chunk):
+        r = distinct[:, None] / deltas[None, start:start + chunk]
+        frac = r - np.round(r)
+        scores[:, start:start + chunk] = multiplicity @ (frac ** 2)
+    scores /= n_pos[cols, None]
 
-    good = scores <= best + score_tol
-    return float(deltas[good].max())
+    best = scores.min(axis=1)
+    good = scores <= best[:, None] + score_tol
+    largest_good = nsteps - 1 - np.argmax(good[:, ::-1], axis=1)
+    quantum[cols] = np.where(best > max_best_score, np.nan, deltas[largest_good])
+    return quantum
 
 
 def resolve_tau(
@@ -131,6 +169,38 @@ def resolve_tau(
     return TauEstimate(tau_s=None, provenance="unknown")
 
 
+def resolve_tau_columns(
+    cps, valid=None, dwell_time_ms: float | None = None, sweeps_per_reading: int | None = None,
+    max_tau_s: float = 60.0,
+) -> list[TauEstimate]:
+    """:func:`resolve_tau` for every column of a (rows x analytes) CPS matrix,
+    each column restricted to its ``valid`` rows (all rows by default).
+
+    The quantum search runs once over the whole matrix (see
+    :func:`estimate_quantum_columns`) instead of once per analyte.
+    """
+    v = np.asarray(cps, dtype=float)
+    n_cols = v.shape[1]
+    if dwell_time_ms is not None and sweeps_per_reading is not None:
+        tau_s = (dwell_time_ms / 1000.0) * sweeps_per_reading
+        return [TauEstimate(tau_s=tau_s, provenance="metadata") for _ in range(n_cols)]
+
+    valid = np.ones(v.shape, dtype=bool) if valid is None else np.asarray(valid, dtype=bool)
+    quantum = estimate_quantum_columns(v, valid)
+    plausible = valid & (v >= 1.0 / max_tau_s)
+    smallest = np.where(plausible, v, np.inf).min(axis=0, initial=np.inf)
+
+    estimates = []
+    for j in range(n_cols):
+        if quantum[j] > 0:
+            estimates.append(TauEstimate(tau_s=1.0 / float(quantum[j]), provenance="inferred", quantum_cps=float(quantum[j])))
+        elif np.isfinite(smallest[j]):
+            estimates.append(TauEstimate(tau_s=1.0 / float(smallest[j]), provenance="bounded"))
+        else:
+            estimates.append(TauEstimate(tau_s=None, provenance="unknown"))
+    return estimates
+
+
 def cps_to_counts(cps, tau: TauEstimate) -> np.ndarray | None:
     """Best-effort integer-count recovery given a :class:`TauEstimate`.
 
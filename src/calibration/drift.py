@@ -79,6 +79,61 @@ def evaluate(fit: DriftFit, times) -> np.ndarray:
     return fit.predict(times)
 
 
+def predict_many(fits: dict, times) -> dict[str, np.ndarray]:
+    """``{analyte: fit.predict(times)}`` for many fits sharing the same times.
+
+    The times are converted to seconds once per distinct time origin rather
+    than once per fit, and fits of the same kind, origin (and, for
+    :class:`~src.calibration.poisson_drift.PoissonDriftFit`, time scale) and
+    order are evaluated together as one matrix of polynomials.
+
+    Parameters
+    ----------
+    fits : dict
+        ``{analyte: DriftFit | PoissonDriftFit}``.
+    times : sequence
+        Times to evaluate at.
+
+    Returns
+    -------
+    dict[str, numpy.ndarray]
+        Predicted values per analyte, in the order of ``fits``.
+    """
+    if not fits:
+        return {}
+    ts = pd.to_datetime(list(times))
+    seconds: dict = {}
+
+    def _seconds(t0):
+        if t0 not in seconds:
+            seconds[t0] = (ts - pd.Timestamp(t0)).total_seconds().to_numpy(dtype=float)
+        return seconds[t0]
+
+    groups: dict[tuple, list[str]] = {}
+    for analyte, fit in fits.items():
+        if isinstance(fit, PoissonDriftFit):
+            key = ("poisson", fit.t0, fit.t_scale, len(fit.coeffs))
+        else:
+            key = ("polynomial", fit.t0, None, len(fit.coeffs))
+        groups.setdefault(key, []).append(analyte)
+
+    predicted: dict[str, np.ndarray] = {}
+    for (kind, t0, t_scale, n_coeffs), analytes in groups.items():
+        coeffs = np.column_stack([fits[analyte].coeffs for analyte in analytes])
+        if kind == "poisson":
+            s = _seconds(t0) / t_scale
+            values = np.exp(np.clip(np.vander(s, n_coeffs, increasing=True) @ coeffs, -700.0, 30.0))
+        else:
+            # Horner's scheme over all columns at once, as np.polyval
+            x = _seconds(t0)[:, None]
+            values = np.zeros((len(ts), len(analytes)))
+            for row in coeffs:
+                values = values * x + row
+        for j, analyte in enumerate(analytes):
+            predicted[analyte] = values[:, j]
+    return {analyte: predicted[analyte] for analyte in fits}
+
+
 def fit_polynomial_with_order_fallback(times, values, order: int, analyte: str = "") -> DriftFit | None:
     """:func:`fit_polynomial`, reducing ``order`` (down to 0) when there
     aren't enough points to support the requested order, instead of
@@ -111,24 +166,87 @@ def _cv_rss_for_order(times, values, order: int) -> float | None:
     catches this because that same fit predicts a held-out point from its
     own cluster poorly once it's not in the training data.
 
-    Returns ``None`` if there aren't enough points, or any fold fails to fit.
+    Computed in closed form (PRESS) rather than by refitting once per held-out
+    point -- see :func:`_order_stats`.
+
+    Returns ``None`` if there aren't enough points, or a held-out point can't
+    be predicted from the rest (leverage 1, e.g. the only sample at its time).
     """
     times_list = list(times)
     n = len(times_list)
     if n < order + 3:
         return None
-    values_arr = np.asarray(values, dtype=float)
-    total = 0.0
-    for i in range(n):
-        idx = [j for j in range(n) if j != i]
-        train_times = [times_list[j] for j in idx]
-        try:
-            fold_fit = fit_polynomial(train_times, values_arr[idx], order=order)
-        except DriftFitError:
-            return None
-        pred_i = fold_fit.predict([times_list[i]])[0]
-        total += (values_arr[i] - pred_i) ** 2
-    return total
+    x = _to_seconds(times_list, pd.Timestamp(min(times_list)).to_pydatetime())
+    values_arr = np.asarray(values, dtype=float).reshape(n, 1)
+    press = _order_stats(x, values_arr, order)[1]
+    return None if press is None else float(press[0])
+
+
+def _order_stats(x, Y, order: int, x_probe=None):
+    """OLS polynomial fit of every column of ``Y`` against ``x`` in one solve.
+
+    For least squares the leave-one-out residual of point ``i`` is
+    ``e_i / (1 - h_ii)``, where ``e_i`` is the full-fit residual and ``h_ii``
+    the hat-matrix diagonal, so the leave-one-out RSS (PRESS) of every column
+    follows from a single fit -- no per-point refits. ``x`` is centred and
+    scaled first, which changes the coefficients but not the fitted values,
+    residuals or leverages, and keeps the Vandermonde matrix well conditioned.
+
+    Parameters
+    ----------
+    x : np.ndarray
+        Sample positions, shape ``(n,)``.
+    Y : np.ndarray
+        Values, shape ``(n, m)`` -- one column per analyte.
+    order : int
+        Polynomial order.
+    x_probe : np.ndarray, optional
+        Positions to evaluate the fitted polynomials at.
+
+    Returns
+    -------
+    rss : np.ndarray
+        Residual sum of squares per column, shape ``(m,)``.
+    press : np.ndarray or None
+        Leave-one-out RSS per column, or ``None`` if any point has leverage 1.
+    probe : np.ndarray or None
+        Fitted values at ``x_probe``, shape ``(len(x_probe), m)``.
+    """
+    center = float(np.mean(x))
+    scale = float(np.ptp(x)) or 1.0
+    V = np.vander((x - center) / scale, order + 1)
+
+    # thin SVD rather than QR so repeated times (a rank-deficient V) behave like np.polyfit's lstsq
+    U, sv, Vt = np.linalg.svd(V, full_matrices=False)
+    keep = sv > sv[0] * max(V.shape) * np.finfo(float).eps
+    U, sv, Vt = U[:, keep], sv[keep], Vt[keep]
+
+    UtY = U.T @ Y
+    residuals = Y - U @ UtY
+    rss = np.sum(residuals ** 2, axis=0)
+
+    leverage = np.sum(U ** 2, axis=1)
+    if np.any(leverage >= 1.0 - 1e-10):
+        press = None
+    else:
+        press = np.sum((residuals / (1.0 - leverage)[:, None]) ** 2, axis=0)
+
+    probe = None
+    if x_probe is not None:
+        coeffs = Vt.T @ (UtY / sv[:, None])
+        probe = np.vander((x_probe - center) / scale, order + 1) @ coeffs
+    return rss, press, probe
+
+
+def _stable_columns(probe, Y, max_ratio: float = 10.0) -> np.ndarray:
+    """Column-wise :func:`_predicted_values_are_stable` on fitted values ``probe`` at the probe times."""
+    span = np.max(Y, axis=0) - np.min(Y, axis=0)
+    center = np.median(Y, axis=0)
+    span = np.where(span <= 0, np.maximum(np.abs(center), 1.0), span)
+    finite = np.all(np.isfinite(probe), axis=0)
+    with np.errstate(invalid="ignore"):
+        within = np.max(np.abs(probe - center), axis=0) <= max_ratio * span
+    return finite & within
 
 
 def _predicted_values_are_stable(fit: DriftFit, times, observed_values, max_ratio: float = 10.0) -> bool:
@@ -173,39 +291,93 @@ def select_order_by_aic(times, values, max_order: int = 3, analyte: str = "") ->
     A simpler alternative to :func:`~src.calibration.poisson_drift.select_poisson_order_lrt`
     for values the Poisson non-negative-integer-count assumption doesn't
     apply to (e.g. a background-corrected/net signal, which can be negative).
+    For many analytes, :func:`select_orders_by_aic` makes the same choice for
+    all of them at once.
     """
     times = list(times)
     values = np.asarray(values, dtype=float)
-    n = len(times)
-    if n == 0:
+    if len(times) == 0:
         raise DriftFitError("No data points to fit.")
+    return _select_orders_shared_times(times, values.reshape(-1, 1), [analyte], max_order)[analyte]
+
 
-    def _aic(order: int) -> tuple[DriftFit, float]:
-        fit = fit_polynomial(times, values, order=order, analyte=analyte)
-        predicted = fit.predict(times)
+def select_orders_by_aic(series: dict, max_order: int = 3) -> dict[str, DriftFit]:
+    """:func:`select_order_by_aic` for many analytes, batched.
+
+    Analytes measured at the same times are fit together: each candidate
+    order is one least-squares solve with the analytes as columns, and the
+    AIC, leave-one-out RSS and stability checks are evaluated for every
+    column at once (see :func:`_order_stats`). The selected order per analyte
+    is identical to calling :func:`select_order_by_aic` on each.
+
+    Parameters
+    ----------
+    series : dict
+        ``{analyte: (times, values)}``.
+    max_order : int
+        Highest order tested.
+
+    Returns
+    -------
+    dict[str, DriftFit]
+        Fit per analyte; analytes with no data points are omitted.
+    """
+    groups: dict[tuple, list[str]] = {}
+    for analyte, (times, _) in series.items():
+        if len(times) == 0:
+            continue
+        key = tuple(pd.Timestamp(t) for t in times)
+        groups.setdefault(key, []).append(analyte)
+
+    fits: dict[str, DriftFit] = {}
+    for key, analytes in groups.items():
+        Y = np.column_stack([np.asarray(series[a][1], dtype=float) for a in analytes])
+        fits.update(_select_orders_shared_times(list(series[analytes[0]][0]), Y, analytes, max_order))
+    return fits
+
+
+def _select_orders_shared_times(times, Y, analytes, max_order) -> dict[str, DriftFit]:
+    n, m = Y.shape
+    t0 = pd.Timestamp(min(times)).to_pydatetime()
+    x = _to_seconds(times, t0)
+
+    # probe times for the stability check, as _predicted_values_are_stable
+    ts, te = pd.Timestamp(min(times)), pd.Timestamp(max(times))
+    x_probe = _to_seconds(pd.date_range(ts, te, periods=200), t0) if te > ts else None
+
+    def _aic(rss, order):
         # A perfect fit (RSS=0, e.g. order == n-1) makes ln(RSS/n) -> -inf;
         # floor RSS so AIC stays finite and comparable instead of an
         # overfit order spuriously "winning" via an undefined -inf.
-        rss = max(float(np.sum((values - predicted) ** 2)), 1e-12)
-        return fit, n * np.log(rss / n) + 2 * (order + 1)
+        return n * np.log(np.maximum(rss, 1e-12) / n) + 2 * (order + 1)
+
+    rss0, press0, _ = _order_stats(x, Y, 0)
+    best_order = np.zeros(m, dtype=int)
+    best_aic = _aic(rss0, 0)
+    # NaN where CV RSS is unavailable (too few points), which any order then improves on
+    best_cv = press0 if (press0 is not None and n >= 3) else np.full(m, np.nan)
+    active = np.ones(m, dtype=bool)
 
-    best_fit, best_aic = _aic(0)
-    best_cv = _cv_rss_for_order(times, values, 0)
     for order in range(1, max_order + 1):
-        if n < order + 3:
+        if n < order + 3 or not active.any():
             break
-        fit_k, aic_k = _aic(order)
-        cv_k = _cv_rss_for_order(times, values, order)
+        rss_k, cv_k, probe = _order_stats(x, Y, order, x_probe)
         if cv_k is None:
             break
-        improves_cv = best_cv is None or cv_k < best_cv
-        is_stable = _predicted_values_are_stable(fit_k, times, values)
-        if aic_k < best_aic and improves_cv and is_stable:
-            best_fit, best_aic, best_cv = fit_k, aic_k, cv_k
-        else:
-            break
-
-    return best_fit
+        aic_k = _aic(rss_k, order)
+        improves_cv = np.isnan(best_cv) | (cv_k < best_cv)
+        is_stable = _stable_columns(probe, Y) if probe is not None else np.ones(m, dtype=bool)
+        accept = active & (aic_k < best_aic) & improves_cv & is_stable
+
+        best_order[accept] = order
+        best_aic = np.where(accept, aic_k, best_aic)
+        best_cv = np.where(accept, cv_k, best_cv)
+        active = accept
+
+    return {
+        analyte: fit_polynomial(times, Y[:, j], order=int(best_order[j]), analyte=analyte)
+        for j, analyte in enumerate(analytes)
+    }
 
 
 def select_drift_fit(
@@ -30,7 +30,14 @@ from src.calibration.drift import DriftFitLike
 from src.calibration.geometry import InstrumentSettings, compute_pixel_spacing
 from src.calibration.dating_ratios import DatingRatioFit, DatingRatioSpec, corrected_dating_ratio, fit_session_dating_ratios
 from src.calibration.isotope_apportion import IsotopeShareSpec, apportion_from_spec
-from src.calibration.massbias import BiasFit, BiasSpec, DEFAULT_ISOTOPE_TABLE_PATH, corrected_ratio, fit_session_bias
+from src.calibration.massbias import (
+    BiasFit,
+    BiasSpec,
+    DEFAULT_ISOTOPE_TABLE_PATH,
+    corrected_ratio,
+    fit_session_bias,
+    load_isotope_table,
+)
 from src.calibration.pooling import PooledElementSpec, synthesize_pooled_channels
 from src.calibration.rawfile import LineFileData, list_line_files, parse_line_file
 from src.calibration.reflib import ReferenceMaterial
@@ -71,6 +78,91 @@ class SampleCalibratedResult:
     dating_ratio_fits: dict[str, DatingRatioFit] = field(default_factory=dict)  # "Pb206/U238" -> session cross-element dating-ratio fit, see dating_ratios.py
 
 
+FileStamp = tuple[int, int]  # (size in bytes, mtime in ns) -- changes whenever a file is rewritten
+
+
+def file_stamp(path: Path) -> FileStamp:
+    """``(size, mtime_ns)`` of ``path``, the key :class:`PipelineCache` entries are checked against."""
+    st = path.stat()
+    return st.st_size, st.st_mtime_ns
+
+
+@dataclass
+class PipelineCache:
+    """Per-file and per-standard intermediate results that :func:`run`
+    reuses across repeated calls on a folder the instrument is still
+    writing to (see ``streaming.py``).
+
+    Each entry is stored with the key it was computed from -- the file's
+    :func:`file_stamp`, the reference channels, and the session-drift
+    version -- and is recomputed only when that key changes, so a re-run
+    after one new file arrives parses and background-corrects just that
+    file. The session-level fits are deliberately held still between
+    standards: reference-channel selection and the session background
+    drift are refit only when the set of standard files changes (a new
+    standard arrives, or one is rewritten or removed), which bumps
+    ``drift_version`` and so re-runs the second background pass and every
+    standard's calibration. Samples acquired since the last standard use
+    the previous drift model until the next standard brackets them --
+    provisional results, which become identical to an uncached ``run``
+    once the session ends on a standard.
+
+    A cache is only valid for one folder and one set of ``run`` arguments;
+    start a new one when either changes.
+    """
+    line_files: dict[str, tuple[FileStamp, LineFileData]] = field(default_factory=dict)
+    initial_backgrounds: dict[str, tuple[tuple, BackgroundResult]] = field(default_factory=dict)
+    backgrounds: dict[str, tuple[tuple, BackgroundResult]] = field(default_factory=dict)
+    standard_results: dict[str, tuple[tuple, StandardCalibrationResult]] = field(default_factory=dict)
+    reference_channels: list[str] | None = None
+    session_background_drift: dict[str, DriftFitLike] | None = None
+    drift_standards: tuple | None = None    # ((filename, stamp), ...) the session fits were made from
+    drift_version: int = 0
+
+    @staticmethod
+    def lookup(table: dict, name: str, key, compute: Callable):
+        """``table[name]``'s value if it was stored under ``key``, else ``compute()`` (stored under ``key``)."""
+        entry = table.get(name)
+        if entry is not None and entry[0] == key:
+            return entry[1]
+        value = compute()
+        table[name] = (key, value)
+        return value
+
+    def prune(self, file_names: set[str], labels: set[str]) -> None:
+        """Drops entries for files (and standard labels) no longer in the folder."""
+        for table in (self.line_files, self.initial_backgrounds, self.backgrounds):
+            for name in set(table) - file_names:
+                del table[name]
+        for label in set(self.standard_results) - labels:
+            del self.standard_results[label]
+
+    @property
+    def standards(self) -> dict[str, StandardCalibrationResult]:
+        """The latest calibration of every standard label, also available before any sample has arrived."""
+        return {label: result for label, (_, result) in self.standard_results.items()}
+
+
+def prepare_line_file(
+    path: Path,
+    standard_names: Iterable[str] | Callable[[str], bool],
+    acquired_time_format: str | None = None,
+    despike_noise: bool = False,
+    pool_specs: list[PooledElementSpec] | None = None,
+    isotope_table: pd.DataFrame | str | Path | None = DEFAULT_ISOTOPE_TABLE_PATH,
+) -> LineFileData:
+    """Parses one raw file and applies :func:`run`'s per-file preprocessing
+    (optional despiking, then pooled-channel synthesis) -- everything that
+    happens to a file before background-window detection."""
+    f = parse_line_file(path, standard_names=standard_names, acquired_time_format=acquired_time_format)
+    if despike_noise:
+        for analyte in f.analytes:
+            f.signal[analyte] = noise_despike(f.signal[analyte].to_numpy())
+    if pool_specs:
+        synthesize_pooled_channels([f], pool_specs, isotope_table=isotope_table)
+    return f
+
+
 def _group_by_label(files: list[LineFileData]) -> dict[str, list[LineFileData]]:
     groups: dict[str, list[LineFileData]] = {}
     for f in files:
@@ -273,6 +365,7 @@ def run(
     dating_ratio_drift_order: int = 1,
     dating_ratio_drift_method: str = "fixed",
     dating_ratio_max_order: int = 3,
+    cache: PipelineCache | None = None,
 ) -> dict[str, SampleCalibratedResult]:
     """Runs the full background/drift/calibration pipeline over one self-contained
     raw-data folder (one or more sample labels, bracketed by standard files).
@@ -414,6 +507,13 @@ def run(
     ``bias_drift_method``/``bias_max_order`` above, but for this fit
     specifically.
 
+    ``cache`` (default none) keeps parsed files, per-file backgrounds and
+    standard calibrations between calls, for re-running on a folder that is
+    still being acquired -- only new or rewritten files are processed, and
+    the session-level fits are refreshed only when a new standard arrives
+    (see :class:`PipelineCache`; ``streaming.StreamingCalibration`` drives
+    this during acquisition). Without it every call starts from scratch.
+
     Returns a dict keyed by sample label (non-standard files) -- usually one
     entry, but a folder may hold more than one distinct sample label.
     """
@@ -437,20 +537,28 @@ def run(
     if not paths:
         raise PipelineError(f"All raw line files in {sample_dir} were excluded via excluded_files.")
 
-    files = [
-        parse_line_file(p, standard_names=standard_names, acquired_time_format=acquired_time_format)
-        for p in paths
-    ]
+    pool_isotope_table = isotope_table_resolved
+    if pool_specs and not isinstance(pool_isotope_table, pd.DataFrame):
+        pool_isotope_table = load_isotope_table(pool_isotope_table)
 
-    if despike_noise:
-        for f in files:
-            for analyte in f.analytes:
-                f.signal[analyte] = noise_despike(f.signal[analyte].to_numpy())
+    def _prepare(path: Path) -> LineFileData:
+        return prepare_line_file(
+            path, standard_names, acquired_time_format=acquired_time_format,
+            despike_noise=despike_noise, pool_specs=pool_specs, isotope_table=pool_isotope_table,
+        )
 
-    if pool_specs:
-        synthesize_pooled_channels(files, pool_specs, isotope_table=isotope_table_resolved)
+    if cache is None:
+        files = [_prepare(p) for p in paths]
+    else:
+        stamps = {p.name: file_stamp(p) for p in paths}
+        files = [cache.lookup(cache.line_files, p.name, stamps[p.name], lambda p=p: _prepare(p)) for p in paths]
+        standard_stamps = tuple((f.meta.path.name, stamps[f.meta.path.name]) for f in files if f.meta.is_standard)
+        refit_session = cache.session_background_drift is None or cache.drift_standards != standard_stamps
 
-    reference_channels = select_reference_channels(files, top_n=reference_channel_top_n)
+    if cache is None or refit_session:
+        reference_channels = select_reference_channels(files, top_n=reference_channel_top_n)
+    else:
+        reference_channels = cache.reference_channels
 
     def _override_window(f: LineFileData) -> tuple[BackgroundWindow, AblationWindow] | tuple[None, None]:
         override = per_file_overrides.get(f.meta.path.name) or background_override
@@ -460,36 +568,62 @@ def run(
 
     # First pass: auto-detect (or apply a manual override) and compute naive
     # per-file backgrounds.
-    initial_backgrounds = []
-    for f in files:
+    def _initial_background(f: LineFileData) -> BackgroundResult:
         window, ablation = _override_window(f)
-        initial_backgrounds.append(
-            compute_background_result(
-                f, window=window, ablation=ablation,
-                reference_channels=reference_channels, detection_kwargs=background_detection_kwargs,
-                dwell_time_ms=instrument_settings.dwell_time_ms,
-                sweeps_per_reading=instrument_settings.sweeps_per_reading,
-                manual_row_exclusions=manual_row_exclusions.get(f.meta.path.name),
-            )
+        return compute_background_result(
+            f, window=window, ablation=ablation,
+            reference_channels=reference_channels, detection_kwargs=background_detection_kwargs,
+            dwell_time_ms=instrument_settings.dwell_time_ms,
+            sweeps_per_reading=instrument_settings.sweeps_per_reading,
+            manual_row_exclusions=manual_row_exclusions.get(f.meta.path.name),
         )
 
+    if cache is None:
+        initial_backgrounds = [_initial_background(f) for f in files]
+    else:
+        initial_backgrounds = [
+            cache.lookup(
+                cache.initial_backgrounds, f.meta.path.name, (stamps[f.meta.path.name], tuple(reference_channels)),
+                lambda f=f: _initial_background(f),
+            )
+            for f in files
+        ]
+
     # Session-level background drift (standards AND samples both contribute).
-    session_background_drift = fit_session_background_drift(
-        initial_backgrounds, order=background_drift_order, method=background_drift_method, max_order=max_order,
-    )
+    if cache is None or refit_session:
+        session_background_drift = fit_session_background_drift(
+            initial_backgrounds, order=background_drift_order, method=background_drift_method, max_order=max_order,
+        )
+    else:
+        session_background_drift = cache.session_background_drift
+    if cache is not None and refit_session:
+        cache.reference_channels = reference_channels
+        cache.session_background_drift = session_background_drift
+        cache.drift_standards = standard_stamps
+        cache.drift_version += 1
 
     # Second pass: recompute with the session drift model, reusing the same
     # detected/overridden windows (no re-running changepoint detection).
-    backgrounds = [
-        compute_background_result(
+    def _background(f: LineFileData, b: BackgroundResult) -> BackgroundResult:
+        return compute_background_result(
             f, window=b.window, ablation=b.ablation, reference_channels=reference_channels,
             session_background_drift=session_background_drift,
             dwell_time_ms=instrument_settings.dwell_time_ms,
             sweeps_per_reading=instrument_settings.sweeps_per_reading,
             manual_row_exclusions=manual_row_exclusions.get(f.meta.path.name),
         )
-        for f, b in zip(files, initial_backgrounds)
-    ]
+
+    if cache is None:
+        backgrounds = [_background(f, b) for f, b in zip(files, initial_backgrounds)]
+    else:
+        backgrounds = [
+            cache.lookup(
+                cache.backgrounds, f.meta.path.name,
+                (stamps[f.meta.path.name], tuple(reference_channels), cache.drift_version),
+                lambda f=f, b=b: _background(f, b),
+            )
+            for f, b in zip(files, initial_backgrounds)
+        ]
 
     pairs_by_label = _group_by_label(files)
     backgrounds_by_label: dict[str, list[BackgroundResult]] = {}
@@ -506,14 +640,25 @@ def run(
         if reference is None:
             missing_reference_for.append(label)
             continue
-        occurrences = assemble_occurrences(backgrounds_by_label[label], manual_row_exclusions=manual_row_exclusions)
-        standard_results[label] = calibrate_standard(
-            occurrences, reference, drift_order=drift_order, split_odd_even=split_odd_even,
-            accuracy_threshold=accuracy_threshold, standard_label=label,
-            method=drift_method, max_order=max_order,
-            manual_occurrence_exclusions=manual_occurrence_exclusions,
-            detrend=detrend,
-        )
+
+        def _calibrate(label: str = label, reference: ReferenceMaterial = reference) -> StandardCalibrationResult:
+            occurrences = assemble_occurrences(backgrounds_by_label[label], manual_row_exclusions=manual_row_exclusions)
+            return calibrate_standard(
+                occurrences, reference, drift_order=drift_order, split_odd_even=split_odd_even,
+                accuracy_threshold=accuracy_threshold, standard_label=label,
+                method=drift_method, max_order=max_order,
+                manual_occurrence_exclusions=manual_occurrence_exclusions,
+                detrend=detrend,
+            )
+
+        if cache is None:
+            standard_results[label] = _calibrate()
+        else:
+            key = (tuple((f.meta.path.name, stamps[f.meta.path.name]) for f in pairs_by_label[label]), cache.drift_version)
+            standard_results[label] = cache.lookup(cache.standard_results, label, key, _calibrate)
+
+    if cache is not None:
+        cache.prune(set(stamps), set(standard_results))
 
     bias_fits = (
         fit_session_bias(
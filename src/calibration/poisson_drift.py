@@ -11,6 +11,7 @@ returns a rate in CPS with no tau needed at prediction time, exactly like
 """
 from __future__ import annotations
 
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass
 from datetime import datetime
 
@@ -241,6 +242,219 @@ def fit_poisson_glm(
     )
 
 
+# -- Batched IRLS ---------------------------------------------------------
+# A session fit runs select_poisson_order_lrt for every analyte, and its
+# cross-validation step refits each candidate order once per held-out file,
+# so one session used to be tens of thousands of tiny scalar IRLS solves.
+# The helpers below run the same IRLS for many independent series at once:
+# each column (an analyte, or one leave-one-out fold of an analyte) is a row
+# of stacked arrays padded to a common length, with ``present`` marking its
+# real observations, and the weighted least-squares step is one stacked SVD.
+# Columns stop iterating individually as they converge, so every column
+# follows exactly the iteration sequence fit_poisson_glm would.
+
+# folds x points x coefficients per stacked leave-one-out batch (bounds memory)
+_FOLD_BATCH_ELEMENTS = 2**22
+
+
+def _deviance_columns(n: np.ndarray, mu: np.ndarray, present: np.ndarray) -> np.ndarray:
+    """Column-wise :func:`_poisson_deviance` over the ``present`` entries of each row."""
+    mu_safe = np.maximum(mu, 1e-300)
+    positive = present & (n > 0)
+    ratio = np.where(positive, n, 1.0) / np.where(positive, mu_safe, 1.0)
+    term = np.where(positive, n * np.log(ratio), 0.0)
+    return 2.0 * np.sum(np.where(present, term - (n - mu), 0.0), axis=1)
+
+
+def _lstsq_columns(A: np.ndarray, b: np.ndarray, n_rows: np.ndarray) -> np.ndarray:
+    """Stacked ``np.linalg.lstsq(A[j], b[j], rcond=None)``; rows of NaN where a system can't be solved."""
+    p = A.shape[2]
+    try:
+        U, sv, Vt = np.linalg.svd(A, full_matrices=False)
+    except np.linalg.LinAlgError:
+        # one unsolvable system fails the whole stack -- solve them one at a time
+        beta = np.full((A.shape[0], p), np.nan)
+        for j in range(A.shape[0]):
+            try:
+                beta[j] = np.linalg.lstsq(A[j], b[j], rcond=None)[0]
+            except np.linalg.LinAlgError:
+                pass
+        return beta
+    # lstsq's default cutoff, relative to each system's own row count
+    cutoff = np.finfo(float).eps * np.maximum(n_rows, p)[:, None] * sv[:, :1]
+    inv = np.divide(1.0, sv, out=np.zeros_like(sv), where=sv > cutoff)
+    return np.einsum("jqp,jq->jp", Vt, inv * np.einsum("jnq,jn->jq", U, b))
+
+
+def _cond_columns(M: np.ndarray) -> np.ndarray:
+    """Stacked ``np.linalg.cond``; ``inf`` where it can't be computed."""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        try:
+            return np.linalg.cond(M)
+        except np.linalg.LinAlgError:
+            cond = np.full(M.shape[0], np.inf)
+            for j in range(M.shape[0]):
+                try:
+                    cond[j] = np.linalg.cond(M[j])
+                except np.linalg.LinAlgError:
+                    pass
+            return cond
+
+
+def _fit_columns(
+    s: np.ndarray, n: np.ndarray, tau: np.ndarray, present: np.ndarray, order: int,
+    max_iter: int = 50, tol: float = 1e-8, eta_clip: float = 30.0,
+):
+    """:func:`fit_poisson_glm` for every row of the stacked ``(columns, points)`` arrays.
+
+    ``s`` holds each column's standardized times (``(t - t0) / t_scale`` for
+    its own t0/t_scale). Returns ``(coeffs, deviance, converged, ok)``, where
+    ``ok`` is False wherever ``fit_poisson_glm`` would have returned ``None``.
+    """
+    m = n.shape[0]
+    n_points = present.sum(axis=1)
+    n = np.where(present, n, 0.0)
+    tau = np.where(present, tau, 1.0)
+
+    if order == 0:
+        total_n = n.sum(axis=1)
+        total_tau = np.where(present, tau, 0.0).sum(axis=1)
+        ok = (n_points > 0) & (total_tau > 0)
+        rate = np.divide(total_n, total_tau, out=np.zeros(m), where=ok)
+        beta0 = np.log(rate, out=np.full(m, -700.0), where=rate > 0)
+        deviance = _deviance_columns(n, tau * rate[:, None], present)
+        return beta0[:, None], deviance, ok.copy(), ok
+
+    X = np.where(present, s, 0.0)[:, :, None] ** np.arange(order + 1)
+    offset = np.log(np.maximum(tau, 1e-300))
+    mu = n + 0.5
+    eta = np.log(mu)
+    deviance = _deviance_columns(n, mu, present)
+    beta = np.full((m, order + 1), np.nan)
+    w = np.zeros_like(mu)
+    converged = np.zeros(m, dtype=bool)
+    failed = n_points < order + 2
+    active = ~failed
+
+    for _ in range(max_iter):
+        idx = np.flatnonzero(active)
+        if idx.size == 0:
+            break
+        mu_a = mu[idx]
+        z = eta[idx] - offset[idx] + (n[idx] - mu_a) / mu_a
+        w_a = np.where(present[idx], mu_a, 0.0)
+        sw = np.sqrt(w_a)
+        beta_a = _lstsq_columns(sw[:, :, None] * X[idx], sw * z, n_points[idx])
+
+        eta_a = np.clip(offset[idx] + np.einsum("jnp,jp->jn", X[idx], beta_a), -eta_clip, eta_clip)
+        mu[idx] = np.exp(eta_a)
+        eta[idx] = eta_a
+        w[idx] = w_a
+        beta[idx] = beta_a
+        dev_a = _deviance_columns(n[idx], mu[idx], present[idx])
+
+        unsolved = ~np.all(np.isfinite(beta_a), axis=1)
+        done = np.abs(dev_a - deviance[idx]) < tol * (deviance[idx] + 1e-8)
+        deviance[idx] = dev_a
+        converged[idx[done & ~unsolved]] = True
+        failed[idx[unsolved]] = True
+        active[idx[done | unsolved]] = False
+
+    ok = ~failed & np.all(np.isfinite(beta), axis=1) & np.isfinite(deviance)
+    XtWX = np.einsum("jnp,jn,jnq->jpq", X, w, X)
+    cond = _cond_columns(XtWX)
+    ok &= np.isfinite(cond) & (cond <= 1e10)
+    return beta, deviance, converged, ok
+
+
+def _pack_series(series: dict):
+    """Pads ``{analyte: (times, counts, tau_s)}`` into stacked ``(analytes, points)`` arrays.
+
+    Times are seconds from each analyte's own earliest time, as
+    :func:`fit_poisson_glm` computes them. Analytes whose inputs have no
+    points or mismatched lengths get no ``present`` entries (and so fail to
+    fit, like the scalar path).
+    """
+    analytes = list(series)
+    times_lists = [list(series[a][0]) for a in analytes]
+    width = max((len(t) for t in times_lists), default=0)
+    shape = (len(analytes), width)
+    t_seconds = np.zeros(shape)
+    counts = np.zeros(shape)
+    tau = np.ones(shape)
+    present = np.zeros(shape, dtype=bool)
+    t0s = []
+    for j, (analyte, times) in enumerate(zip(analytes, times_lists)):
+        n_arr = np.asarray(series[analyte][1], dtype=float)
+        tau_arr = np.asarray(series[analyte][2], dtype=float)
+        if not times or not len(n_arr) == len(tau_arr) == len(times):
+            t0s.append(None)
+            continue
+        t0 = pd.Timestamp(min(times)).to_pydatetime()
+        t0s.append(t0)
+        k = len(times)
+        t_seconds[j, :k] = _to_seconds(times, t0)
+        counts[j, :k] = n_arr
+        tau[j, :k] = tau_arr
+        present[j, :k] = True
+    return analytes, times_lists, t0s, t_seconds, counts, tau, present
+
+
+def _time_scale(t_seconds: np.ndarray, present: np.ndarray) -> np.ndarray:
+    """Per-column ``t_scale``: the largest ``|t - t0|`` among present points, or 1."""
+    scale = np.where(present, np.abs(t_seconds), 0.0).max(axis=1, initial=0.0)
+    return np.where(scale > 0, scale, 1.0)
+
+
+def _cv_deviance_columns(t_seconds, counts, tau, present, order: int) -> np.ndarray:
+    """:func:`_cv_deviance_for_order` for every row of the stacked arrays.
+
+    Every leave-one-out fold of every row becomes its own column of one
+    batched fit, standardized on its own training times exactly as
+    ``fit_poisson_glm`` standardizes them. Returns NaN where the scalar
+    function returns ``None``.
+    """
+    m, width = counts.shape
+    result = np.full(m, np.nan)
+    n_points = present.sum(axis=1)
+    rows = np.flatnonzero(n_points >= order + 3)
+    if rows.size == 0:
+        return result
+
+    # batch analytes so each stacked fit stays within _FOLD_BATCH_ELEMENTS
+    per_batch = max(1, _FOLD_BATCH_ELEMENTS // max(1, width * width * (order + 1)))
+    for start in range(0, rows.size, per_batch):
+        batch = rows[start:start + per_batch]
+        owner = np.repeat(np.arange(batch.size), n_points[batch])
+        held = np.concatenate([np.flatnonzero(present[j]) for j in batch])
+        folds = np.arange(owner.size)
+
+        fold_present = present[batch][owner]
+        fold_present[folds, held] = False
+        fold_t = t_seconds[batch][owner]
+        fold_t0 = np.where(fold_present, fold_t, np.inf).min(axis=1)
+        fold_t = fold_t - fold_t0[:, None]
+        fold_s = fold_t / _time_scale(fold_t, fold_present)[:, None]
+
+        coeffs, _, converged, ok = _fit_columns(
+            fold_s, counts[batch][owner], tau[batch][owner], fold_present, order,
+        )
+
+        # score each fold's prediction (as PoissonDriftFit.predict) against its held-out count
+        s_held = fold_s[folds, held]
+        eta = np.clip((s_held[:, None] ** np.arange(order + 1) * coeffs).sum(axis=1), -700.0, 30.0)
+        n_i = counts[batch][owner, held]
+        mu_i = np.maximum(np.exp(eta) * tau[batch][owner, held], 1e-300)
+        positive = n_i > 0
+        log_ratio = np.log(np.where(positive, n_i, 1.0) / np.where(positive, mu_i, 1.0))
+        term = np.where(positive, n_i * log_ratio, 0.0) - (n_i - mu_i)
+
+        total = np.bincount(owner, weights=2.0 * term, minlength=batch.size)
+        bad = np.bincount(owner, weights=~(ok & converged), minlength=batch.size)
+        result[batch] = np.where(bad > 0, np.nan, total)
+    return result
+
+
 def _cv_deviance_for_order(times, counts, tau_s, order: int, analyte: str = "") -> float | None:
     """Leave-one-out cross-validated Poisson deviance for a candidate order.
 
@@ -255,29 +469,18 @@ def _cv_deviance_for_order(times, counts, tau_s, order: int, analyte: str = "")
     improve even though in-sample deviance did, and :func:`select_poisson_order_lrt`
     uses that disagreement to reject the order.
 
+    All n folds are fit together as one batched IRLS (see
+    :func:`_cv_deviance_columns`), each fold giving the same fit
+    :func:`fit_poisson_glm` would on its training points.
+
     Returns ``None`` if there aren't enough points, or any fold fails to
     fit/converge -- an order that can't even be evaluated robustly across
     folds isn't a safe choice either.
     """
-    times_list = list(times)
-    n = len(times_list)
-    if n < order + 3:
-        return None
-    counts_arr = np.asarray(counts, dtype=float)
-    tau_arr = np.asarray(tau_s, dtype=float)
-    total = 0.0
-    for i in range(n):
-        idx = [j for j in range(n) if j != i]
-        train_times = [times_list[j] for j in idx]
-        fold_fit = fit_poisson_glm(train_times, counts_arr[idx], tau_arr[idx], order=order, analyte=analyte)
-        if fold_fit is None or not fold_fit.converged:
-            return None
-        rate_i = fold_fit.predict([times_list[i]])[0]
-        mu_i = max(rate_i * tau_arr[i], 1e-300)
-        n_i = counts_arr[i]
-        term = (n_i * np.log(n_i / mu_i) - (n_i - mu_i)) if n_i > 0 else -(n_i - mu_i)
-        total += 2.0 * term
-    return total
+    _, _, _, t_seconds, n_arr, tau_arr, present = _pack_series({analyte: (times, counts, tau_s)})
+    total = _cv_deviance_columns(t_seconds, n_arr, tau_arr, present, order)[0]
+    return None if np.isnan(total) else float(total)
+
 
 
 def _predicted_rate_is_stable(
@@ -331,35 +534,118 @@ def select_poisson_order_lrt(
     :func:`detect_poisson_file_outliers`) -- this function performs no
     robustness of its own; see that function's docstring for why file-level
     robustness is handled as a one-time pre-filter rather than folded into
-    this search.
+    this search. For many analytes, :func:`select_poisson_orders_lrt` runs
+    the same search for all of them at once.
     """
-    fit_prev = fit_poisson_glm(times, counts, tau_s, order=0, analyte=analyte)
-    if fit_prev is None:
+    fits = select_poisson_orders_lrt({analyte: (times, counts, tau_s)}, max_order=max_order, alpha=alpha)
+    if analyte not in fits:
         raise PoissonFitError("Could not fit even a constant Poisson model -- check input data.")
+    return fits[analyte]
+
+
+def select_poisson_orders_lrt(
+    series: dict, max_order: int = 3, alpha: float = 0.05, n_jobs: int | None = None,
+) -> dict[str, PoissonDriftFit]:
+    """:func:`select_poisson_order_lrt` for many analytes, batched.
+
+    Each step of the order search is one stacked IRLS over every analyte
+    still in the search (see :func:`_fit_columns`), and the leave-one-out
+    check fits all folds of all candidate analytes together. Since each
+    column iterates exactly as :func:`fit_poisson_glm` would, the selected
+    orders match calling :func:`select_poisson_order_lrt` per analyte, and
+    the coefficients agree to within the IRLS tolerance.
+
+    Parameters
+    ----------
+    series : dict
+        ``{analyte: (times, counts, tau_s)}``; analytes may have different
+        times and numbers of points.
+    max_order : int
+        Highest order tested.
+    alpha : float
+        Significance level of each likelihood-ratio test.
+    n_jobs : int, optional
+        When greater than 1, analytes are split across this many worker
+        processes, each running the batched search on its share. By default
+        the search runs in this process.
+
+    Returns
+    -------
+    dict[str, PoissonDriftFit]
+        Fit per analyte; analytes for which not even the constant model can
+        be fit are omitted (callers fall back to another method for them).
+    """
+    if n_jobs is not None and n_jobs > 1 and len(series) > 1:
+        shares = [list(part) for part in np.array_split(np.array(list(series), dtype=object), n_jobs) if len(part)]
+        tasks = [({a: series[a] for a in share}, max_order, alpha) for share in shares]
+        fits: dict[str, PoissonDriftFit] = {}
+        with ProcessPoolExecutor(max_workers=len(tasks)) as pool:
+            for part in pool.map(_select_poisson_share, tasks):
+                fits.update(part)
+        return {a: fits[a] for a in series if a in fits}
+
+    analytes, times_lists, t0s, t_seconds, counts, tau, present = _pack_series(series)
+    n_points = present.sum(axis=1)
+    t_scale = _time_scale(t_seconds, present)
+    s = t_seconds / t_scale[:, None]
+    tau_total = np.where(present, tau, 0.0).sum(axis=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        observed_max_rate = np.where(present, counts / np.maximum(tau, 1e-300), -np.inf).max(axis=1, initial=0.0)
+
+    def _make_fit(j, order, coeffs, deviance, converged):
+        return PoissonDriftFit(
+            analyte=analytes[j], order=order, model="constant" if order == 0 else f"poly({order})",
+            coeffs=np.array(coeffs), t0=t0s[j], t_scale=float(t_scale[j]), deviance=float(deviance),
+            n_points=int(n_points[j]), drift_pvalue=None, tau_total_s=float(tau_total[j]),
+            converged=bool(converged),
+        )
 
-    n_arr = np.asarray(counts, dtype=float)
-    tau_arr = np.asarray(tau_s, dtype=float)
-    observed_max_rate = float(np.max(n_arr / np.maximum(tau_arr, 1e-300))) if len(n_arr) else 0.0
+    coeffs0, deviance0, converged0, ok0 = _fit_columns(s, counts, tau, present, 0)
+    best = {j: _make_fit(j, 0, coeffs0[j], deviance0[j], converged0[j]) for j in np.flatnonzero(ok0)}
+    prev_deviance = deviance0
+    # NaN where the previous order's CV deviance is unavailable, which any order then improves on;
+    # order 0's is only computed for analytes that get as far as the order-1 CV check
+    cv_prev = np.full(len(analytes), np.nan)
+    active = ok0.copy()
 
-    best = fit_prev
-    cv_prev = _cv_deviance_for_order(times, counts, tau_s, 0, analyte=analyte)
-    n_points = len(list(times))
     for k in range(1, max_order + 1):
-        if n_points < k + 3:
-            break
-        fit_k = fit_poisson_glm(times, counts, tau_s, order=k, analyte=analyte)
-        if fit_k is None or not fit_k.converged:
+        active &= n_points >= k + 3
+        idx = np.flatnonzero(active)
+        if idx.size == 0:
             break
-        lrt_stat = max(fit_prev.deviance - fit_k.deviance, 0.0)
-        fit_k.drift_pvalue = float(chi2.sf(lrt_stat, df=1))
-        cv_k = _cv_deviance_for_order(times, counts, tau_s, k, analyte=analyte)
-        if cv_k is None:
-            break
-        improves_cv = cv_prev is None or cv_k < cv_prev
-        is_significant = fit_k.drift_pvalue < alpha
-        is_stable = _predicted_rate_is_stable(fit_k, times, observed_max_rate)
-        if is_significant and improves_cv and is_stable:
-            best, fit_prev, cv_prev = fit_k, fit_k, cv_k
-        else:
-            break
-    return best
+        coeffs_k, deviance_k, converged_k, ok_k = _fit_columns(
+            s[idx], counts[idx], tau[idx], present[idx], k,
+        )
+        pvalue = chi2.sf(np.maximum(prev_deviance[idx] - deviance_k, 0.0), df=1)
+        candidate = ok_k & converged_k & (pvalue < alpha)
+
+        fits_k = {}
+        for i in np.flatnonzero(candidate):
+            j = idx[i]
+            fit = _make_fit(j, k, coeffs_k[i], deviance_k[i], True)
+            fit.drift_pvalue = float(pvalue[i])
+            if _predicted_rate_is_stable(fit, times_lists[j], observed_max_rate[j]):
+                fits_k[i] = fit
+            else:
+                candidate[i] = False
+
+        rows = idx[candidate]
+        cv_k = _cv_deviance_columns(t_seconds[rows], counts[rows], tau[rows], present[rows], k)
+        if k == 1:
+            cv_prev[rows] = _cv_deviance_columns(t_seconds[rows], counts[rows], tau[rows], present[rows], 0)
+        accepted = ~np.isnan(cv_k) & (np.isnan(cv_prev[rows]) | (cv_k < cv_prev[rows]))
+
+        for i, j, cv in zip(np.flatnonzero(candidate)[accepted], rows[accepted], cv_k[accepted]):
+            best[j] = fits_k[i]
+            prev_deviance[j] = deviance_k[i]
+            cv_prev[j] = cv
+        active[:] = False
+        active[rows[accepted]] = True
+
+    return {analytes[j]: best[j] for j in sorted(best)}
+
+
+def _select_poisson_share(task):
+    """Process-pool entry point for :func:`select_poisson_orders_lrt`'s ``n_jobs``."""
+    share, max_order, alpha = task
+    return select_poisson_orders_lrt(share, max_order=max_order, alpha=alpha)
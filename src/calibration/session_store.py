@@ -0,0 +1,321 @@
+"""One contiguous, shareable block of memory holding every line file of a session.
+
+Handing :class:`~src.calibration.rawfile.LineFileData` objects to worker
+processes pickles each file's signal DataFrame into every worker, which on a
+~200-file session costs more than the per-file work it parallelizes.
+:class:`SessionStore` instead packs the whole session once:
+
+- ``signal`` -- one C-contiguous float64 ``(total rows x analytes)`` matrix,
+  the files stacked in order (``offsets[i]:offsets[i + 1]`` are file ``i``'s
+  rows); an analyte a file doesn't have is NaN in that file's rows,
+- ``time_s`` / ``absolute_time`` -- the matching shared time axis,
+
+in a ``multiprocessing.shared_memory`` block or a memory-mapped file. The
+store pickles as a small :class:`SessionStoreHandle` (names, offsets and file
+metadata, no array data), and :meth:`SessionStore.line_data` rebuilds each
+file's ``LineFileData`` as zero-copy views into the block -- so a worker
+attaching to the store reads the same physical memory as the parent.
+
+Views are read-only: replacing a column of a view's signal (as despiking
+does, ``signal[analyte] = ...``) gives that DataFrame its own column, while
+an in-place element write raises rather than writing through to the block
+other processes are reading.
+"""
+from __future__ import annotations
+
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from multiprocessing import shared_memory
+from pathlib import Path
+from typing import Callable
+
+import numpy as np
+import pandas as pd
+
+from src.calibration.rawfile import LineFileData, LineFileMeta
+
+VALID_BACKINGS = ("shared_memory", "memmap", "memory")
+
+# stores attached by this process, by block name, so worker processes attach
+# to each session once rather than once per task
+_attached: dict[str, SessionStore] = {}
+
+
+@dataclass(frozen=True)
+class SessionStoreHandle:
+    """Everything needed to re-attach to a :class:`SessionStore` from another process."""
+    backing: str                              # "shared_memory" | "memmap"
+    name: str                                 # shared memory block name, or memmap file path
+    analytes: tuple[str, ...]                 # columns of the packed signal matrix
+    offsets: tuple[int, ...]                  # file i's rows are offsets[i]:offsets[i + 1]
+    metas: tuple[LineFileMeta, ...]
+    file_analytes: tuple[tuple[str, ...], ...]  # each file's own analytes, in its own order
+    dt_s: tuple[float, ...]
+
+    @property
+    def n_rows(self) -> int:
+        return self.offsets[-1]
+
+    @property
+    def nbytes(self) -> int:
+        return self.n_rows * (len(self.analytes) + 2) * 8
+
+
+def _layout(buffer, n_rows: int, n_analytes: int) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Signal matrix, ``time_s`` and ``absolute_time`` arrays laid out back to back in ``buffer``."""
+    signal = np.ndarray((n_rows, n_analytes), dtype=np.float64, buffer=buffer)
+    time_s = np.ndarray((n_rows,), dtype=np.float64, buffer=buffer, offset=signal.nbytes)
+    absolute_time = np.ndarray(
+        (n_rows,), dtype="datetime64[us]", buffer=buffer, offset=signal.nbytes + time_s.nbytes
+    )
+    return signal, time_s, absolute_time
+
+
+def _open_shared_memory(name: str) -> shared_memory.SharedMemory:
+    try:
+        # Python 3.13+: an attaching process must not unlink the block on exit
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        return shared_memory.SharedMemory(name=name)
+
+
+class SessionStore:
+    """A session's line files packed into one shared block of memory.
+
+    Build one with :meth:`from_line_files`; pass the store itself (or its
+    :attr:`handle`) to worker processes, which get the same zero-copy views
+    back via :meth:`attach`. The process that built the store owns the block
+    and frees it on :meth:`unlink` (or on leaving a ``with`` block).
+
+    Parameters
+    ----------
+    handle : SessionStoreHandle
+        Layout and metadata of the packed session.
+    buffer : buffer-like
+        The block holding the packed arrays.
+    owner : bool
+        Whether this store created the block (and so unlinks it).
+    resource : SharedMemory or numpy.memmap, optional
+        Object keeping ``buffer`` alive, closed by :meth:`close`.
+    temporary : bool, optional
+        Whether the store created its memmap file itself (and so deletes it
+        on :meth:`unlink`); a file the caller named is left in place.
+    """
+    def __init__(self, handle: SessionStoreHandle, buffer, owner: bool = False, resource=None, temporary: bool = False):
+        self.handle = handle
+        self.owner = owner
+        self.temporary = temporary
+        self._resource = resource
+        self.signal, self.time_s, self.absolute_time = _layout(buffer, handle.n_rows, len(handle.analytes))
+        for array in (self.signal, self.time_s, self.absolute_time):
+            array.flags.writeable = False
+
+    @classmethod
+    def from_line_files(
+        cls, files: list[LineFileData], backing: str = "shared_memory", path: str | Path | None = None,
+    ) -> SessionStore:
+        """Packs ``files`` into a new store.
+
+        Parameters
+        ----------
+        files : list[LineFileData]
+            The session's line files, in order.
+        backing : str, optional
+            ``"shared_memory"`` (default), ``"memmap"`` (a file on disk,
+            ``path`` or a new temporary file), or ``"memory"`` (a private
+            in-process array; pickling such a store copies the data).
+        path : str or Path, optional
+            File backing a ``"memmap"`` store, kept after :meth:`unlink`; by
+            default a temporary file, deleted by :meth:`unlink`.
+
+        Returns
+        -------
+        SessionStore
+            The owning store.
+
+        Raises
+        ------
+        ValueError
+            If ``backing`` is not one of ``VALID_BACKINGS``.
+        """
+        if backing not in VALID_BACKINGS:
+            raise ValueError(f"Unknown session store backing {backing!r}; expected one of {', '.join(VALID_BACKINGS)}.")
+
+        analytes: list[str] = []
+        for f in files:
+            analytes.extend(a for a in f.analytes if a not in analytes)
+        offsets = np.concatenate([[0], np.cumsum([len(f.signal) for f in files])]).astype(int)
+        n_rows = int(offsets[-1])
+        nbytes = max(n_rows * (len(analytes) + 2) * 8, 1)
+
+        resource, temporary = None, False
+        if backing == "shared_memory":
+            resource = shared_memory.SharedMemory(create=True, size=nbytes)
+            buffer, name = resource.buf, resource.name
+        elif backing == "memmap":
+            if path is None:
+                fd, path = tempfile.mkstemp(prefix="session_", suffix=".store")
+                os.close(fd)
+                temporary = True
+            name = str(path)
+            resource = np.memmap(name, dtype=np.uint8, mode="w+", shape=(nbytes,))
+            buffer = resource
+        else:
+            buffer, name = bytearray(nbytes), ""
+
+        signal, time_s, absolute_time = _layout(buffer, n_rows, len(analytes))
+        column = {analyte: j for j, analyte in enumerate(analytes)}
+        for f, start, stop in zip(files, offsets[:-1], offsets[1:]):
+            if list(f.analytes) == analytes:
+                signal[start:stop] = f.signal.to_numpy(dtype=np.float64)
+            else:
+                signal[start:stop] = np.nan
+                signal[start:stop, [column[a] for a in f.analytes]] = f.signal[list(f.analytes)].to_numpy(dtype=np.float64)
+            time_s[start:stop] = f.time_s
+            absolute_time[start:stop] = np.asarray(f.absolute_time, dtype="datetime64[us]")
+        if backing == "memmap":
+            resource.flush()
+
+        handle = SessionStoreHandle(
+            backing=backing, name=name, analytes=tuple(analytes), offsets=tuple(int(o) for o in offsets),
+            metas=tuple(f.meta for f in files), file_analytes=tuple(tuple(f.analytes) for f in files),
+            dt_s=tuple(float(f.dt_s) for f in files),
+        )
+        return cls(handle, buffer, owner=True, resource=resource, temporary=temporary)
+
+    @classmethod
+    def attach(cls, handle: SessionStoreHandle) -> SessionStore:
+        """Attaches to an existing shared-memory or memory-mapped store (never copies the data)."""
+        if handle.backing == "memory":
+            raise ValueError("An in-memory session store can't be attached from another process.")
+        store = _attached.get(handle.name)
+        if store is not None and store.handle == handle:
+            return store
+
+        if handle.backing == "shared_memory":
+            resource = _open_shared_memory(handle.name)
+            buffer = resource.buf
+        else:
+            resource = np.memmap(handle.name, dtype=np.uint8, mode="r", shape=(max(handle.nbytes, 1),))
+            buffer = resource
+        store = cls(handle, buffer, owner=False, resource=resource)
+        _attached[handle.name] = store
+        return store
+
+    def __len__(self) -> int:
+        return len(self.handle.metas)
+
+    def __enter__(self) -> SessionStore:
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        if self.owner:
+            self.unlink()
+
+    def __reduce__(self):
+        if self.handle.backing == "memory":
+            return _from_arrays, (self.handle, self.signal, self.time_s, self.absolute_time)
+        return SessionStore.attach, (self.handle,)
+
+    @property
+    def analytes(self) -> list[str]:
+        return list(self.handle.analytes)
+
+    def rows(self, i: int) -> slice:
+        """Rows of file ``i`` in the packed arrays."""
+        return slice(self.handle.offsets[i], self.handle.offsets[i + 1])
+
+    def line_data(self, i: int) -> LineFileData:
+        """File ``i`` as a ``LineFileData`` viewing the packed arrays.
+
+        Zero-copy when the file has the store's analytes in the store's
+        order (the usual case: every file of a session shares one acquisition
+        method); otherwise the file's own columns are selected, which copies
+        its signal.
+        """
+        rows = self.rows(i)
+        analytes = list(self.handle.file_analytes[i])
+        signal = pd.DataFrame(self.signal[rows], columns=self.analytes, copy=False)
+        if analytes != self.analytes:
+            signal = signal[analytes]
+        return LineFileData(
+            meta=self.handle.metas[i], time_s=self.time_s[rows], absolute_time=self.absolute_time[rows],
+            analytes=analytes, signal=signal, dt_s=self.handle.dt_s[i], n_rows=rows.stop - rows.start,
+        )
+
+    def line_files(self) -> list[LineFileData]:
+        """Every file, in order, as :meth:`line_data` views."""
+        return [self.line_data(i) for i in range(len(self))]
+
+    def map(self, fn: Callable, indices=None, max_workers: int | None = None, **kwargs) -> list:
+        """``[fn(self.line_data(i), **kwargs) for i in indices]``, run in worker processes.
+
+        Only the store's handle, the file index and ``kwargs`` are sent to
+        each worker; the worker attaches to the store once and reads the
+        file's rows in place. ``fn`` must be picklable (a module-level
+        function).
+
+        Parameters
+        ----------
+        fn : callable
+            Called as ``fn(line_data, **kwargs)``.
+        indices : iterable of int, optional
+            Files to process, by default all of them.
+        max_workers : int, optional
+            Worker processes, by default ``os.cpu_count()``. ``1`` runs in
+            this process.
+
+        Returns
+        -------
+        list
+            Results in the order of ``indices``.
+        """
+        indices = list(range(len(self))) if indices is None else list(indices)
+        if max_workers == 1 or self.handle.backing == "memory":
+            return [fn(self.line_data(i), **kwargs) for i in indices]
+        with ProcessPoolExecutor(max_workers=max_workers) as pool:
+            futures = [pool.submit(_call_on_line_file, self.handle, i, fn, kwargs) for i in indices]
+            return [future.result() for future in futures]
+
+    def close(self) -> None:
+        """Releases this process's mapping of the block (views become invalid)."""
+        if self.handle.name in _attached and _attached[self.handle.name] is self:
+            del _attached[self.handle.name]
+        if isinstance(self._resource, shared_memory.SharedMemory):
+            # drop our own views first; SharedMemory.close() fails while buffers are exported
+            self.signal = self.time_s = self.absolute_time = None
+            try:
+                self._resource.close()
+            except BufferError:
+                pass  # views handed out by line_data() are still alive; unmapped with them
+
+    def unlink(self) -> None:
+        """Frees the block itself (owner only); other processes' mappings stay valid until closed.
+
+        A memmap file is deleted only if the store created it (see ``temporary``).
+        """
+        if not self.owner:
+            return
+        if isinstance(self._resource, shared_memory.SharedMemory):
+            try:
+                self._resource.unlink()
+            except FileNotFoundError:
+                pass
+        elif self.handle.backing == "memmap" and self.temporary:
+            Path(self.handle.name).unlink(missing_ok=True)
+
+
+def _from_arrays(handle: SessionStoreHandle, signal, time_s, absolute_time) -> SessionStore:
+    """Unpickles an in-memory store from its copied arrays."""
+    buffer = bytearray(max(handle.nbytes, 1))
+    store = SessionStore(handle, buffer, owner=True)
+    for target, source in zip(_layout(buffer, handle.n_rows, len(handle.analytes)), (signal, time_s, absolute_time)):
+        target[...] = source
+    return store
+
+
+def _call_on_line_file(handle: SessionStoreHandle, i: int, fn: Callable, kwargs: dict):
+    return fn(SessionStore.attach(handle).line_data(i), **kwargs)
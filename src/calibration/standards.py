@@ -22,10 +22,9 @@ from src.calibration.drift import (
     DriftFitLike,
     fit_polynomial,
     fit_polynomial_with_order_fallback,
-    select_drift_fit,
-    select_order_by_aic,
+    select_orders_by_aic,
 )
-from src.calibration.poisson_drift import PoissonFitError
+from src.calibration.poisson_drift import select_poisson_orders_lrt
 from src.calibration.rawfile import LineFileMeta
 from src.calibration.reflib import ReferenceMaterial, resolve_elemental_value
 
@@ -369,6 +368,9 @@ def calibrate_standard(
     inlier_masks: dict[str, list[bool]] = {}
     excluded_outliers: dict[str, list[int]] = {}
     manually_excluded_occurrences: dict[str, list[int]] = {}
+    aic_series: dict[str, tuple] = {}
+    poisson_series: dict[str, tuple] = {}
+    aic_fallback: dict[str, tuple] = {}
     for analyte in analytes:
         values = [o.mean_signal[analyte] for o in fit_group]
         keep_mask = _mad_outlier_mask(values)
@@ -393,31 +395,29 @@ def calibrate_standard(
         kept_times = [o.file_meta.acquired_at for o in kept_occurrences]
         kept_values = [o.mean_signal[analyte] for o in kept_occurrences]
 
-        fit: DriftFitLike | None = None
-        if method == "auto_poisson_lrt" and kept_occurrences and all(
-            _poisson_eligible(o, analyte, poisson_background_fraction_threshold) for o in kept_occurrences
-        ):
-            p_times, p_counts, p_tau = _poisson_inputs_for_analyte(kept_occurrences, analyte)
-            if len(p_times) >= 2:
-                try:
-                    fit = select_drift_fit(
-                        p_times, None, counts=p_counts, tau_s=p_tau,
-                        method="auto_poisson_lrt", max_order=max_order, analyte=analyte,
-                    )
-                except PoissonFitError:
-                    fit = None
-
-        if fit is None:
-            if method in ("auto_poisson_lrt", "auto_aic"):
-                try:
-                    fit = select_order_by_aic(kept_times, kept_values, max_order=max_order, analyte=analyte)
-                except DriftFitError:
-                    fit = None
-            else:  # "fixed"
-                fit = fit_polynomial_with_order_fallback(kept_times, kept_values, drift_order, analyte)
-
-        if fit is not None:
-            drift_fits[analyte] = fit
+        if method == "auto_poisson_lrt":
+            if kept_occurrences and all(
+                _poisson_eligible(o, analyte, poisson_background_fraction_threshold) for o in kept_occurrences
+            ):
+                p_times, p_counts, p_tau = _poisson_inputs_for_analyte(kept_occurrences, analyte)
+                if len(p_times) >= 2:
+                    poisson_series[analyte] = (p_times, p_counts, p_tau)
+            # Gaussian/AIC fallback, used if the Poisson fit fails (or isn't possible)
+            aic_fallback[analyte] = (kept_times, kept_values)
+        elif method == "auto_aic":
+            # selected after the loop, batched over analytes with the same kept occurrences
+            aic_series[analyte] = (kept_times, kept_values)
+        else:  # "fixed"
+            fit = fit_polynomial_with_order_fallback(kept_times, kept_values, drift_order, analyte)
+            if fit is not None:
+                drift_fits[analyte] = fit
+
+    if poisson_series:
+        drift_fits.update(select_poisson_orders_lrt(poisson_series, max_order=max_order))
+    aic_series.update({analyte: series for analyte, series in aic_fallback.items() if analyte not in drift_fits})
+    if aic_series:
+        drift_fits.update(select_orders_by_aic(aic_series, max_order=max_order))
+    drift_fits = {analyte: drift_fits[analyte] for analyte in analytes if analyte in drift_fits}
 
     calibration_factor: dict[str, float] = {}
     mean_predicted_signal: dict[str, float] = {}
@@ -0,0 +1,244 @@
+"""Calibrating a session folder while the instrument is still writing to it.
+
+``pipeline.run`` only sees a session once it has ended, so a standard that
+failed mid-session (a bad ablation, a drifting cone) is only noticed the
+next morning. :class:`StreamingCalibration` instead polls the folder --
+plain ``list_line_files``/``stat`` calls, no OS-specific file-watching API
+-- and re-runs the pipeline on whatever has landed so far through a shared
+:class:`~src.calibration.pipeline.PipelineCache`, so each poll parses and
+background-corrects only the new files, and the session background drift
+and standard calibrations are refit only when a new standard arrives.
+
+A file is picked up once it is complete: either it already ends with the
+instrument's trailing ``Printed:<timestamp>`` line, or its size and
+modification time haven't changed for ``settle_polls`` consecutive polls
+(for exports written without the trailer). A complete file that still
+fails to parse is reported in :attr:`StreamingUpdate.failed_files` and left
+out of the run, and retried if it is rewritten.
+
+Every poll's results are provisional in the same sense as the cache's:
+samples acquired after the latest standard are corrected with the drift
+model fit at that standard. Once the session ends on a standard the
+results match a plain ``pipeline.run`` over the finished folder.
+"""
+from __future__ import annotations
+
+import threading
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Iterable
+
+from src.calibration.massbias import DEFAULT_ISOTOPE_TABLE_PATH
+from src.calibration.pipeline import (
+    FileStamp,
+    PipelineCache,
+    PipelineError,
+    SampleCalibratedResult,
+    file_stamp,
+    prepare_line_file,
+    run,
+)
+from src.calibration.rawfile import RawFileFormatError, list_line_files
+from src.calibration.reflib import ReferenceMaterial
+from src.calibration.standards import StandardCalibrationResult
+
+# how far back from the end of a file to look for the "Printed:" trailer
+_TRAILER_BYTES = 256
+
+
+@dataclass
+class StreamingUpdate:
+    """What one :meth:`StreamingCalibration.poll` found and the provisional results after it."""
+    new_files: list[str]                                  # files calibrated for the first time (or re-read after a rewrite) this poll
+    pending_files: list[str]                              # seen but not yet complete
+    failed_files: dict[str, str]                          # filename -> parse error, for every complete file that can't be read
+    results: dict[str, SampleCalibratedResult]            # provisional pipeline.run output on the files so far
+    standard_results: dict[str, StandardCalibrationResult] = field(default_factory=dict)  # available before any sample arrives
+    flagged_standards: dict[str, list[str]] = field(default_factory=dict)  # new standard file -> analytes failing the accuracy check
+    error: str | None = None                              # PipelineError of the latest run (e.g. no standard calibrated yet)
+
+    @property
+    def changed(self) -> bool:
+        return bool(self.new_files)
+
+
+def has_printed_trailer(path: Path) -> bool:
+    """Whether ``path`` already ends with the instrument's ``Printed:<timestamp>`` line."""
+    with open(path, "rb") as fh:
+        fh.seek(0, 2)
+        size = fh.tell()
+        fh.seek(max(size - _TRAILER_BYTES, 0))
+        tail = fh.read().decode("ascii", errors="ignore")
+    lines = [line.strip() for line in tail.splitlines() if line.strip()]
+    return bool(lines) and lines[-1].startswith("Printed:")
+
+
+def _flagged_analytes(result: StandardCalibrationResult, file_name: str) -> list[str]:
+    orders = {o.occurrence_order for o in result.occurrences if o.file_meta.path.name == file_name}
+    rows = list(result.accuracy_table) + list(result.holdout_accuracy_table or [])
+    return sorted({r.analyte for r in rows if r.flagged and r.occurrence_order in orders})
+
+
+class StreamingCalibration:
+    """Provisional calibration of one acquisition folder, refreshed as files land.
+
+    Call :meth:`poll` whenever convenient (a GUI timer), or :meth:`watch`
+    to poll on an interval until stopped. ``standard_names``,
+    ``reference_library`` and ``run_kwargs`` are passed to every
+    ``pipeline.run`` unchanged; files the instrument hasn't finished
+    writing are withheld through its ``excluded_files``.
+
+    Parameters
+    ----------
+    sample_dir : str or Path
+        Folder the instrument writes line files into.
+    standard_names : iterable of str or callable
+        As ``pipeline.run``.
+    reference_library : dict[str, ReferenceMaterial]
+        As ``pipeline.run``.
+    settle_polls : int, optional
+        Consecutive polls a file without a ``Printed:`` trailer must keep
+        the same size and modification time before it is read, by default 1.
+    **run_kwargs
+        Any other ``pipeline.run`` argument (except ``cache``).
+    """
+    def __init__(
+        self,
+        sample_dir: str | Path,
+        standard_names: Iterable[str] | Callable[[str], bool],
+        reference_library: dict[str, ReferenceMaterial],
+        settle_polls: int = 1,
+        **run_kwargs,
+    ):
+        if "cache" in run_kwargs:
+            raise TypeError("StreamingCalibration manages its own pipeline cache.")
+        self.sample_dir = Path(sample_dir)
+        self.standard_names = standard_names
+        self.reference_library = reference_library
+        self.settle_polls = settle_polls
+        self.run_kwargs = run_kwargs
+        self.cache = PipelineCache()
+        self.latest: StreamingUpdate | None = None
+        self._seen: dict[str, tuple[FileStamp, int]] = {}   # filename -> (stamp, polls unchanged)
+        self._failed: dict[str, tuple[FileStamp, str]] = {}
+        self._calibrated: dict[str, FileStamp] = {}
+
+    def _is_complete(self, path: Path, stamp: FileStamp) -> bool:
+        previous = self._seen.get(path.name)
+        unchanged = previous[1] + 1 if previous is not None and previous[0] == stamp else 0
+        self._seen[path.name] = (stamp, unchanged)
+        return unchanged >= self.settle_polls or has_printed_trailer(path)
+
+    def _isotope_table(self):
+        table = self.run_kwargs.get("isotope_table")
+        return table if table is not None else DEFAULT_ISOTOPE_TABLE_PATH
+
+    def _check_parses(self, path: Path, stamp: FileStamp) -> bool:
+        """Parses a newly complete file into the cache, recording it as failed if it can't be read."""
+        failed = self._failed.get(path.name)
+        if failed is not None and failed[0] == stamp:
+            return False
+        try:
+            line_file = prepare_line_file(
+                path, self.standard_names,
+                acquired_time_format=self.run_kwargs.get("acquired_time_format"),
+                despike_noise=self.run_kwargs.get("despike_noise", False),
+                pool_specs=self.run_kwargs.get("pool_specs"),
+                isotope_table=self._isotope_table(),
+            )
+        except (RawFileFormatError, OSError, UnicodeDecodeError) as exc:
+            self._failed[path.name] = (stamp, str(exc))
+            return False
+        self._failed.pop(path.name, None)
+        self.cache.line_files[path.name] = (stamp, line_file)
+        return True
+
+    def poll(self) -> StreamingUpdate:
+        """Scans the folder once, calibrates any newly completed files and returns the refreshed results."""
+        user_excluded = set(self.run_kwargs.get("excluded_files") or ())
+        pending: list[str] = []
+        ready: dict[str, FileStamp] = {}
+        new_files: list[str] = []
+        paths = list_line_files(self.sample_dir)
+        for path in paths:
+            if path.name in user_excluded:
+                continue
+            try:
+                stamp = file_stamp(path)
+            except FileNotFoundError:
+                continue  # removed between listing and stat
+            if self._calibrated.get(path.name) == stamp:
+                ready[path.name] = stamp
+            elif not self._is_complete(path, stamp):
+                pending.append(path.name)
+            elif self._check_parses(path, stamp):
+                ready[path.name] = stamp
+                new_files.append(path.name)
+
+        self._seen = {name: seen for name, seen in self._seen.items() if name in ready or name in pending}
+        withheld = {p.name for p in paths} - set(ready)
+        failed_files = {name: message for name, (_, message) in self._failed.items() if name in withheld}
+
+        removed = set(self._calibrated) - set(ready)
+        if not new_files and not removed and self.latest is not None:
+            self.latest = StreamingUpdate(
+                new_files=[], pending_files=pending, failed_files=failed_files,
+                results=self.latest.results, standard_results=self.latest.standard_results,
+                error=self.latest.error,
+            )
+            return self.latest
+
+        results: dict[str, SampleCalibratedResult] = {}
+        error = None
+        if ready:
+            kwargs = dict(self.run_kwargs)
+            kwargs["excluded_files"] = user_excluded | withheld
+            try:
+                results = run(
+                    self.sample_dir, self.standard_names, self.reference_library, cache=self.cache, **kwargs,
+                )
+            except (PipelineError, RawFileFormatError) as exc:  # e.g. no standard yet, or a file rewritten mid-poll
+                error = str(exc)
+        self._calibrated = ready
+
+        standard_results = self.cache.standards
+        flagged_standards = {}
+        for name in new_files:
+            meta = self.cache.line_files[name][1].meta
+            if meta.is_standard and meta.label in standard_results:
+                analytes = _flagged_analytes(standard_results[meta.label], name)
+                if analytes:
+                    flagged_standards[name] = analytes
+
+        self.latest = StreamingUpdate(
+            new_files=new_files, pending_files=pending, failed_files=failed_files, results=results,
+            standard_results=standard_results, flagged_standards=flagged_standards, error=error,
+        )
+        return self.latest
+
+    def watch(
+        self,
+        interval_s: float = 10.0,
+        on_update: Callable[[StreamingUpdate], None] | None = None,
+        stop: threading.Event | None = None,
+        idle_timeout_s: float | None = None,
+    ) -> StreamingUpdate | None:
+        """Polls every ``interval_s`` seconds until ``stop`` is set or no new
+        file has arrived for ``idle_timeout_s`` seconds (the session has
+        ended), calling ``on_update`` after every poll that calibrated new
+        files. Returns the last update.
+        """
+        stop = stop or threading.Event()
+        idle_s = 0.0
+        while not stop.is_set():
+            update = self.poll()
+            if update.changed:
+                idle_s = 0.0
+                if on_update is not None:
+                    on_update(update)
+            else:
+                idle_s += interval_s
+                if idle_timeout_s is not None and idle_s >= idle_timeout_s:
+                    break
+            stop.wait(interval_s)
+        return self.latest
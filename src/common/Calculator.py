@@ -1,9 +1,7 @@
-import os, re
-import numexpr as ne
+import os
 from lame_core.config import BASEDIR
-import numpy as np
-import pandas as pd
 from src.common.varfunc import partial_match
+from src.common.formula import FormulaError, compile_formula
 
 from PyQt6.QtCore import Qt, QSize
 from PyQt6.QtWidgets import (
@@ -558,119 +556,35 @@ class CustomFieldCalculator():
         self.logger_key = 'Calculator'
         self.parent = parent
 
-    def calc_parse(self, data, ref_chem, txt=None):
-        """Prepares expression for calculating a custom field 
+    def calc_parse(self, txt=None):
+        """Compiles a calculator formula
 
-        Parses ``MainWindow.calc_text_edit`` to produce an expression that can be evaluated.
+        Parses ``txt`` into a :class:`src.common.formula.FormulaPlan`: field references are resolved to
+        positional inputs and each expression (and case condition) is precompiled by numexpr.  Plans are
+        cached by formula text, so replaying a formula (another sample, or recomputation after its inputs
+        change) doesn't parse it again.  The plan doesn't depend on a sample; normalized inputs are read
+        through ``SampleObj.get_map_data`` with the sample's own reference chemistry when it is evaluated.
 
         Parameters
         ----------
-        data : AttributeDataFrame
-            Data used to compute custom field
-        ref_chem : pandas.DataFrame
-            Reference chemistry used when normalization is required
         txt : str
+            Formula entered in the calculator
 
         Returns
         -------
-        str, str :
-            returns the conditional (cond) and expression (expr)
+        FormulaPlan or None
+            The compiled formula, ``None`` if it could not be parsed.
         """
         func = 'CustomFieldCalculator.calc_parse'
 
-        # remove whitespace
         if txt is None:
-            return None, None
-
-        txt = ''.join(txt.split())
-
-        txt = txt.replace('^','**')
-        txt = txt.replace('log(','log10(')
-        txt = txt.replace('ln(','log(')
-        txt = txt.replace('grad(','gradient(')
-
-        cond = None
-        if ('case' in txt) or ('otherwise' in txt):
-            cases = txt.split(';')
-            # if last case includes a ';', there will be an extra blank in cases list, remove it
-            if cases[-1] == '':
-                cases.pop()
-
-            cond = []
-            expr = []
-
-            # deal with otherwise first as it will be used to set all the values and then cases will reset them
-            otherwise_expr = None
-            for i, c in enumerate(cases):
-                if c.startswith('otherwise'):
-                    try:
-                        # extract expression after 'otherwise'
-                        otherwise_expr = c[len('otherwise'):].strip()
-                        _, expr_temp = self.calc_parse(data, ref_chem, txt=otherwise_expr)
-                        cond.append('any')  # or None, depending on how you use it
-                        expr.append(expr_temp)
-                    except Exception as e:
-                        calc_error(self.parent, func, "Error parsing otherwise expression", e)
-                        return None, None
-                    cases.pop(i)
-                    break  # only handle one 'otherwise'
-
-            for c in cases:
-                try:
-                    # remove 'case' and trailing spaces
-                    c = c[len('case'):].strip()
-                    cond_txt, expr_txt = c.split(',', 1)
-                    _, cond_temp = self.calc_parse(data, ref_chem, txt=cond_txt)
-                    _, expr_temp = self.calc_parse(data, ref_chem, txt=expr_txt)
-                    cond.append(cond_temp)
-                    expr.append(expr_temp)
-                except Exception as e:
-                    err = "Each 'case' must be formatted as 'case condition, expression;'"
-                    calc_error(self.parent, func, err, e)
-                    return None, None
-
-        if txt.count('(') != txt.count(')'):
-            err = 'mismatched parentheses in expr'
-            calc_error(self.parent, func, err, '')
-            return None, None
-
-        if txt.count('{') != txt.count('}'):
-            err = 'mismatched braces in expr'
-            calc_error(self.parent, func, err, '')
-            return None, None
-        
-        field_list = re.findall(r'\{.*?\}', txt)
-        print(field_list)
-        var = {}
-        for field_str in field_list:
-            field_str = field_str.replace('{','')
-            field_str = field_str.replace('}','')
-            try:
-                field_type, field = field_str.split('.')
-            except Exception as e:
-                err = "field type and field must be separated by a '.'"
-                calc_error(self.parent, func, err, e)
-                return None, None
-            if field[-2:] == '_N':
-                field = field[:-2]
-                if field_type in ['Analyte', 'Ratio']:
-                    field_type = f"{field_type} (normalized)"
-
-            if field in list(var.keys()):
-                continue
-
-            df = data.get_map_data(field, field_type)
-            var.update({field: df['array']})
-
-            txt = txt.replace(f"{{{field_str}}}", f"{field}")
-        
-        if len(var) == 0:
-            var = None
-        expr = [txt, var]
-
-        print(expr)
+            return None
 
-        return cond, expr
+        try:
+            return compile_formula(txt)
+        except FormulaError as e:
+            calc_error(self.parent, func, str(e), '')
+            return None
 
     def calculate_new_field(self, data, ref_chem, new_field, txt):
         """Calculates a new field from ``MainWindow.calc_text_edit``
@@ -681,12 +595,16 @@ class CustomFieldCalculator():
         and used at a future time or in another sample.  Pushing ``MainWindow.toolButtonCalcSave``,
         opens a dialog prompting the user to input the name for the newly calculated field.
 
+        The compiled formula is registered with ``data.calculated_fields``, so the field is recomputed
+        automatically whenever any of its inputs change (see ``SampleObj.refresh_calculated_fields``).
+
         Parameters
         ----------
         data : SampleObj
             Sample data used to compute custom field
         ref_chem : pandas.Series
-            Reference chemistry used when normalization is required
+            Reference chemistry of the caller; not read, as normalized inputs use ``data.ref_chem``
+            through ``SampleObj.get_map_data``
         new_field : str
             Name of new field to be computed
         txt : str
@@ -700,109 +618,22 @@ class CustomFieldCalculator():
         func = 'calculate_new_field'
 
         # parse the expression
-        cond, expr = self.calc_parse(data, ref_chem, txt=txt)
-        if expr is None:
+        plan = self.calc_parse(txt=txt)
+        if plan is None:
             err = "expr returned 'None' could not evaluate formula. Check syntax."
             calc_error(self.parent, func, err, '')
             return False
-        elif cond is None:    # no conditionals
-            result = self.calc_evaluate_expr(expr[0], val_dict=expr[1])
-            if result is None:
-                return False
-            data.add_columns('Calculated', new_field, result)
-        else:   # conditionals
-            # start with empty dataFrame
-            result = pd.DataFrame({new_field: np.nan*np.zeros_like(data.processed.iloc[:,0])})
-
-            # loop over cases (cond, expr)
-            for i in range(0,len(cond),2):
-                if (i == 0) and (cond[i] == 'any'):
-                    try:
-                        res = self.calc_evaluate_expr(expr[0], val_dict=expr[1])
-                    except Exception as e:
-                        err = "could not evaluate otherwise expression. Check syntax."
-                        calc_error(self.parent, func, err, e)
-                        return False
-                    result[new_field] = res
-                    continue
-
-                # conditional yields boolean numpy.ndarray keep
-                try:
-                    keep = self.calc_evaluate_expr(cond[i], val_dict=cond[i+1])
-                except Exception as e:
-                    err = "could not evaluate conditional statement. Check syntax."
-                    calc_error(self.parent, func, err, e)
-                    return False
-
-                # check for missing or incorrectly type for conditional
-                if keep is None:
-                    err = 'conditional did not return boolean result.'
-                    calc_error(self.parent, func, err, '')
-                    return False
-                elif not isinstance(keep, np.ndarray):
-                    if not np.issubdtype(keep.dtype, np.bool_):
-                        err = 'conditional did not return boolean result.\n  Did you swap the conditional and expression?'
-                        calc_error(self.parent, func, err, '')
-                        return False
-
-                # check for size error
-                if keep.shape[0] != result.shape[0]:
-                    err = 'the conditional size does not match the size of expected computed array.'
-                    calc_error(self.parent, func, err, '')
-                    return False
-
-                # compute expression for indexes where keep==`True`
-                try:
-                    res = self.calc_evaluate_expr(expr[i], val_dict=expr[i+1], keep=keep)
-                except Exception as e:
-                    err = "could not evaluate expression. Check syntax."
-                    calc_error(self.parent, func, err, e)
-                    return False
-
-                if res is None:
-                    err = 'the expression failed to return an array of values.'
-                    calc_error(self.parent, func, err, '')
-                    return False
-
-                result.loc[keep,new_field] = res
-
-            data.add_columns('Calculated', new_field, result[new_field].values)
 
-        return True
-
-
-    def calc_evaluate_expr(self, expr, val_dict=None, keep=None):
-        """Evaluates an expression and returns the result
+        try:
+            data.add_calculated_field(new_field, plan)
+        except KeyError as e:
+            calc_error(self.parent, func, 'field referenced in the formula does not exist.', e)
+            return False
+        except (FormulaError, ValueError) as e:
+            calc_error(self.parent, func, 'unable to evaluate expression.', e)
+            return False
 
-        Parameters
-        ----------
-        expr : string
-            Expression to be evaluated.  The expression can be a conditional expression, which results
-            in returning a np.ndarray of bool, otherwise, generally np.ndarray of float
-        val_dict : dict
-            Dictionary with variable names as the key and values taken from the data, generally np.ndarray, by default ``None``
-        keep : np.ndarray of bool or None, optional
-            An array of True/False values that are used to evaluate the expression of limited values,
-            i.e., generally when cases are involved.
+        if self.parent is not None and hasattr(self.parent, 'message_label'):
+            self.parent.message_label.setText("Success")
 
-        Returns
-        -------
-        np.ndarray of float or bool
-            Result of evaluated expression.
-        """        
-        func = 'calc_evaluate_expr'
-        try:
-            if val_dict is None:
-                result = ne.evaluate(expr)
-            else:
-                result = ne.evaluate(expr, local_dict=val_dict)
-            if self.parent is not None and hasattr(self.parent, 'message_label'):
-                self.parent.message_label.setText("Success")
-            if keep is None or result.ndim == 0:
-                return result
-            else:
-                return result[keep]
-        except Exception as e:
-            err = 'unable to evaluate expression.'
-            calc_error(self.parent, func, err, e)
-            return None
+        return True
@@ -0,0 +1,205 @@
+"""Bin counting for histograms and 2-D heatmaps, with a cache of computed counts.
+
+Histogram and heatmap plots used to re-bin the full data vectors on every
+redraw (once per cluster for grouped histograms), even when only a color or
+line width had changed. ``hist1d_counts`` and ``hist2d_counts`` compute the
+counts in one pass -- grouped counts use a combined ``group * nbins + bin``
+index with a single ``bincount`` -- and ``BinCountCache`` keeps the results
+so a style-only redraw reuses them. Plots then hand matplotlib the pre-binned
+counts (see ``hist_from_counts``) rather than the raw vectors.
+
+Binning follows ``numpy.histogram``: bins are half-open ``[a, b)`` except the
+last, which includes its right edge, and values outside the edges (or NaN)
+are not counted.
+"""
+import hashlib
+from collections import OrderedDict
+
+import numpy as np
+
+
+def bin_index(values, edges):
+    """Bin number of each value, or -1 for values outside ``edges`` or NaN.
+
+    Parameters
+    ----------
+    values : numpy.ndarray
+        Values to bin.
+    edges : numpy.ndarray
+        Monotonically increasing bin edges.
+
+    Returns
+    -------
+    numpy.ndarray
+        int64 bin indices, ``0 .. len(edges) - 2`` or -1.
+    """
+    values = np.asarray(values, dtype=float)
+    index = np.searchsorted(edges, values, side='right') - 1
+    # the last bin is closed on the right
+    index[values == edges[-1]] = len(edges) - 2
+    index[(index < 0) | (index >= len(edges) - 1) | np.isnan(values)] = -1
+    return index
+
+
+def group_index(labels, groups):
+    """Position of each label in ``groups``, or -1 for labels not in ``groups``.
+
+    Parameters
+    ----------
+    labels : array-like
+        Group label of each value (e.g. cluster ids, NaN for unassigned).
+    groups : list
+        Group labels to count, in output order.
+
+    Returns
+    -------
+    numpy.ndarray
+        int64 group positions.
+    """
+    labels = np.asarray(labels, dtype=float)
+    groups = np.asarray(groups, dtype=float)
+    order = np.argsort(groups)
+    sorted_groups = groups[order]
+
+    pos = np.searchsorted(sorted_groups, labels)
+    pos_clipped = np.minimum(pos, len(groups) - 1)
+    found = (pos < len(groups)) & (sorted_groups[pos_clipped] == labels)
+    return np.where(found, order[pos_clipped], -1)
+
+
+def hist1d_counts(values, edges, labels=None, groups=None):
+    """Counts values in bins, optionally per group, in a single pass.
+
+    Parameters
+    ----------
+    values : numpy.ndarray
+        Values to bin.
+    edges : numpy.ndarray
+        Bin edges.
+    labels : array-like, optional
+        Group label of each value; requires ``groups``.
+    groups : list, optional
+        Groups to count.
+
+    Returns
+    -------
+    numpy.ndarray
+        Counts of shape ``(nbins,)``, or ``(len(groups), nbins)`` when grouped.
+    """
+    nbins = len(edges) - 1
+    index = bin_index(values, edges)
+
+    if labels is None:
+        return np.bincount(index[index >= 0], minlength=nbins)
+
+    gindex = group_index(labels, groups)
+    valid = (index >= 0) & (gindex >= 0)
+    combined = gindex[valid] * nbins + index[valid]
+    return np.bincount(combined, minlength=len(groups) * nbins).reshape(len(groups), nbins)
+
+
+def histogram_edges(values, nbins):
+    """Edges ``numpy.histogram2d`` would use for ``nbins`` bins spanning the finite values."""
+    finite = np.asarray(values, dtype=float)
+    finite = finite[np.isfinite(finite)]
+    if finite.size == 0:
+        lo, hi = 0.0, 1.0
+    else:
+        lo, hi = float(finite.min()), float(finite.max())
+    if lo == hi:
+        lo, hi = lo - 0.5, hi + 0.5
+    return np.linspace(lo, hi, nbins + 1)
+
+
+def hist2d_counts(x, y, xedges, yedges):
+    """Counts ``(x, y)`` pairs in a 2-D grid of bins.
+
+    Returns
+    -------
+    numpy.ndarray
+        Counts of shape ``(len(xedges) - 1, len(yedges) - 1)``, as
+        ``numpy.histogram2d``.
+    """
+    nx, ny = len(xedges) - 1, len(yedges) - 1
+    ix = bin_index(x, xedges)
+    iy = bin_index(y, yedges)
+    valid = (ix >= 0) & (iy >= 0)
+    return np.bincount(ix[valid] * ny + iy[valid], minlength=nx * ny).reshape(nx, ny)
+
+
+def hist_from_counts(axes, counts, edges, **kwargs):
+    """Draws a histogram of pre-binned ``counts`` with ``axes.hist``.
+
+    Each bin contributes one weighted value, so ``density``, ``cumulative``,
+    ``histtype`` and the other ``hist`` options behave as they would on the
+    raw data, at a cost independent of the number of values.
+
+    Returns
+    -------
+    tuple
+        ``(n, bins, patches)`` as returned by ``axes.hist``.
+    """
+    counts = np.asarray(counts, dtype=float)
+    if counts.sum() == 0:
+        # density normalization of an empty histogram divides by zero
+        kwargs.pop('density', None)
+    return axes.hist(edges[:-1], bins=edges, weights=counts, **kwargs)
+
+
+def array_digest(array):
+    """Short digest of an array's contents, for use in cache keys."""
+    if array is None:
+        return None
+    array = np.ascontiguousarray(array)
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(repr((array.shape, str(array.dtype))).encode())
+    digest.update(array.data)
+    return digest.hexdigest()
+
+
+class BinCountCache:
+    """Least-recently-used cache of bin counts.
+
+    Keys are built by the caller from whatever determines the counts --
+    fields, edges, and versions or digests of the data, mask and labels.
+
+    Parameters
+    ----------
+    max_entries : int, optional
+        Number of count arrays kept, by default 32.
+    """
+    def __init__(self, max_entries=32):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def clear(self):
+        """Drops every cached entry."""
+        self._entries.clear()
+
+    def get(self, key, compute):
+        """Returns the counts for ``key``, calling ``compute()`` on a miss.
+
+        Parameters
+        ----------
+        key : hashable
+            Cache key.
+        compute : callable
+            Returns the counts (any object) when ``key`` isn't cached.
+        """
+        if key in self._entries:
+            self._entries.move_to_end(key)
+            return self._entries[key]
+
+        value = compute()
+        self._entries[key] = value
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return value
+
+    @staticmethod
+    def edges_key(edges):
+        """Hashable form of bin edges."""
+        return tuple(np.asarray(edges, dtype=float).tolist())
@@ -0,0 +1,164 @@
+"""HDBSCAN for maps too large to cluster pixel by pixel.
+
+HDBSCAN's mutual-reachability spanning tree grows faster than linearly with
+the number of points, so fitting every pixel of a multi-megapixel map is
+impractically slow and memory-hungry. ``subsample_hdbscan`` fits HDBSCAN on a
+spatially stratified subsample of the pixels and then propagates labels to
+the rest, in the manner of ``approximate_predict`` from the ``hdbscan``
+package: each pixel joins the cluster of the sampled point it is closest to
+in mutual-reachability distance, and inherits that point's membership
+strength scaled by how much farther out the pixel sits.
+
+Nearest sampled points are found with a KD-tree built on the leading
+principal components of the sample (KD-trees degrade to brute force in the
+tens of dimensions of an analyte matrix); candidates from the tree are then
+re-ranked by their exact distance in the full feature space.
+"""
+from dataclasses import dataclass
+
+import numpy as np
+
+
+@dataclass
+class DensityClusters:
+    """Result of `subsample_hdbscan`.
+
+    Attributes
+    ----------
+    labels : numpy.ndarray
+        Cluster label of each row, ``-1`` for noise.
+    probabilities : numpy.ndarray
+        Membership strength of each row in its cluster, from 0 (noise) to 1.
+    sample_indices : numpy.ndarray
+        Rows HDBSCAN was fit on (all rows when no subsample was taken).
+    """
+    labels: np.ndarray
+    probabilities: np.ndarray
+    sample_indices: np.ndarray
+
+    @property
+    def noise_fraction(self):
+        """float : Fraction of rows labelled noise."""
+        return float(np.mean(self.labels == -1)) if self.labels.size else 0.0
+
+
+def stratified_sample(n, size, rng):
+    """One random row from each of ``size`` consecutive, equal blocks of ``n`` rows.
+
+    Map rows are stored in raster order, so the sample covers the whole map
+    evenly rather than by chance.
+    """
+    edges = np.linspace(0, n, size + 1).astype(np.int64)
+    return edges[:-1] + (rng.random(size) * np.diff(edges)).astype(np.int64)
+
+
+def _principal_axes(X, variance, max_components):
+    """Mean and leading principal axes of ``X`` explaining ``variance`` of its variance."""
+    mean = X.mean(axis=0)
+    _, s, vt = np.linalg.svd(X - mean, full_matrices=False)
+    explained = np.cumsum(s**2) / max(np.sum(s**2), np.finfo(float).tiny)
+    n_components = int(np.searchsorted(explained, variance) + 1)
+    return mean, vt[:min(n_components, max_components, len(s))].T
+
+
+def subsample_hdbscan(X, sample_size=0, min_cluster_size=25, min_samples=10, seed=23,
+                      chunk_rows=32768, candidates=5, variance=0.99, max_components=8):
+    """Fits HDBSCAN on a subsample of ``X`` and propagates labels to every row.
+
+    Parameters
+    ----------
+    X : numpy.ndarray
+        Feature matrix of shape ``(n_samples, n_features)`` without NaNs.
+    sample_size : int, optional
+        Number of rows to fit on, by default 0, which fits HDBSCAN on every
+        row, as it does when ``X`` has no more rows than ``sample_size``.
+    min_cluster_size : int, optional
+        Smallest cluster, in rows of ``X``, by default 25. Scaled by the
+        sampling fraction for the fit (to no fewer than 2 sampled rows).
+    min_samples : int, optional
+        Neighbourhood size used to estimate density, in rows of ``X``, by
+        default 10. Also scaled by the sampling fraction, to no fewer than 5
+        sampled rows (or ``min_samples`` if smaller).
+    seed : int, optional
+        Seed of the subsample, by default 23.
+    chunk_rows : int, optional
+        Rows propagated at a time, by default 32768.
+    candidates : int, optional
+        Nearest sampled rows considered for each propagated row, by default 5.
+    variance : float, optional
+        Fraction of the sample's variance kept by the KD-tree's projection, by
+        default 0.99.
+    max_components : int, optional
+        Most principal components kept by the projection, by default 8; the
+        tree's queries slow down steeply with more.
+
+    Returns
+    -------
+    DensityClusters
+    """
+    from sklearn.cluster import HDBSCAN
+
+    X = np.asarray(X, dtype=np.float64)
+    n = X.shape[0]
+    if not sample_size or n <= sample_size:
+        model = HDBSCAN(min_cluster_size=min_cluster_size, min_samples=min_samples, copy=True).fit(X)
+        return DensityClusters(model.labels_.copy(), model.probabilities_.copy(), np.arange(n))
+
+    from scipy.spatial import cKDTree
+
+    sample_indices = stratified_sample(n, sample_size, np.random.default_rng(seed))
+    sample = X[sample_indices]
+    # both sizes count rows of X; in the sample the same density spans proportionally fewer rows
+    fraction = sample_size / n
+    min_samples = min(max(min(min_samples, 5), round(min_samples * fraction)), sample_size - 1)
+    sample_min_cluster_size = max(2, round(min_cluster_size * fraction))
+    model = HDBSCAN(min_cluster_size=sample_min_cluster_size, min_samples=min_samples, copy=True).fit(sample)
+    sample_labels, sample_probabilities = model.labels_, model.probabilities_
+
+    # core distance of each sampled row (its min_samples-th neighbour, itself included, as in sklearn)
+    core = cKDTree(sample, balanced_tree=False).query(sample, k=min_samples)[0]
+    core = core.reshape(sample_size, -1)[:, -1]
+    # a row farther than any member's core distance from a cluster only joins it
+    # after the cluster has merged away, so it is noise as far as the cluster is concerned
+    n_clusters = sample_labels.max() + 1
+    reach = np.zeros(max(n_clusters, 0))
+    np.maximum.at(reach, sample_labels[sample_labels >= 0], core[sample_labels >= 0])
+
+    mean, axes = _principal_axes(sample, variance, max_components)
+    # sliding-midpoint splits cope far better than median splits with the
+    # flat, elongated clouds of compositional data
+    tree = cKDTree((sample - mean) @ axes, balanced_tree=False)
+    k = min(candidates, sample_size)
+
+    labels = np.full(n, -1, dtype=sample_labels.dtype)
+    probabilities = np.zeros(n)
+    # projected distances never exceed full ones, so rows farther than every
+    # cluster's reach are noise without a full search of the tree
+    bound = np.nextafter(reach.max(), np.inf) if n_clusters > 0 else 0.0
+    for lo in range(0, n if n_clusters > 0 else 0, chunk_rows):
+        rows = X[lo:lo + chunk_rows]
+        index = np.arange(len(rows))
+        _, nearest = tree.query((rows - mean) @ axes, k=k, distance_upper_bound=bound, workers=-1)
+        nearest = nearest.reshape(len(rows), k)
+        found = nearest < sample_size
+        nearest[~found] = 0
+        distance = np.sqrt(np.einsum('ijk,ijk->ij', *(sample[nearest] - rows[:, np.newaxis, :],) * 2))
+        reachability = np.where(found, np.maximum(distance, core[nearest]), np.inf)
+        best = np.argmin(reachability, axis=1)
+        j = nearest[index, best]
+        reachability = reachability[index, best]
+
+        label = sample_labels[j].copy()
+        with np.errstate(divide='ignore', invalid='ignore'):
+            strength = sample_probabilities[j] * np.where(reachability > 0, core[j] / reachability, 1.0)
+        clustered = label >= 0
+        outside = ~clustered
+        outside[clustered] = reachability[clustered] > reach[label[clustered]]
+        label[outside] = -1
+        strength[outside] = 0.0
+        labels[lo:lo + chunk_rows] = label
+        probabilities[lo:lo + chunk_rows] = strength
+
+    labels[sample_indices] = sample_labels
+    probabilities[sample_indices] = sample_probabilities
+    return DensityClusters(labels, probabilities, sample_indices)
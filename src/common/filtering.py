@@ -0,0 +1,171 @@
+"""Incremental evaluation of field filters and ROI labels.
+
+A filter table (``SampleObj.filter_df``) is an ordered chain of rows, each
+keeping the pixels whose field value lies in ``[min, max]`` and combining
+that with the rows before it by ``and``, ``or`` or ``not`` (and-not). The
+table used to be re-evaluated row by row on every edit, and every ROI's
+stored filter table after any edit to the ROI stack.
+
+``FilterEngine`` caches each row's result, bit-packed, keyed on the row's
+field, field type, operator and limits and on the field's data version, so
+editing one threshold re-evaluates only that row; the chain is then folded
+from the cached rows (in packed form, eight pixels per byte). Folded chains
+are cached as well, so an ROI whose filter table is unchanged costs nothing,
+and ROI labels are written in one vectorized pass over all ROIs
+(``FilterEngine.label``).
+"""
+import numpy as np
+
+FILTER_COLUMNS = ['use', 'field_type', 'field', 'norm', 'min', 'max', 'operator', 'persistent']
+
+OPERATORS = ('and', 'or', 'not')
+
+
+def row_in_use(use):
+    """Whether a filter row's ``use`` entry (bool or ``'True'``/``'False'``) enables it."""
+    if isinstance(use, str):
+        return use.strip().lower() == 'true'
+    return bool(use)
+
+
+class FilterEngine:
+    """Evaluates filter tables of one sample, re-evaluating only changed rows.
+
+    Parameters
+    ----------
+    size : int
+        Number of pixels.
+    values : callable
+        ``values(field, field_type)`` returns the field's values as an array
+        of length ``size``; raises ``KeyError`` if the sample has no such field
+        (rows on missing fields are skipped).
+    version : callable
+        ``version(field, field_type)`` returns a hashable that changes whenever
+        the field's values may have changed.
+
+    Attributes
+    ----------
+    evaluations : int
+        Number of filter rows evaluated against data so far (cache misses).
+    """
+    def __init__(self, size, values, version):
+        self.size = int(size)
+        self._values = values
+        self._version = version
+        self._rows = {}    # row key -> packed row result, operator applied
+        self._chains = {}  # tuple of row keys -> packed folded mask
+        self.evaluations = 0
+
+    def __len__(self):
+        return len(self._rows)
+
+    def row_keys(self, filter_df):
+        """Cache keys of the rows of ``filter_df`` that are in use, in order.
+
+        Parameters
+        ----------
+        filter_df : pandas.DataFrame
+            Filter table with the columns of ``FILTER_COLUMNS``.
+
+        Returns
+        -------
+        list of tuple
+            ``(operator, field_type, field, min, max, data version)`` per row.
+        """
+        if filter_df is None or filter_df.empty:
+            return []
+        keys = []
+        rows = filter_df[['use', 'field_type', 'field', 'min', 'max', 'operator']].itertuples(index=False, name=None)
+        for use, field_type, field, vmin, vmax, operator in rows:
+            if not row_in_use(use) or operator not in OPERATORS:
+                continue
+            keys.append((operator, field_type, field, vmin, vmax, self._version(field, field_type)))
+        return keys
+
+    def _row(self, key):
+        """Packed result of one row, or None when its field is missing."""
+        packed = self._rows.get(key)
+        if packed is not None:
+            return packed
+        operator, field_type, field, vmin, vmax, _ = key
+        try:
+            values = np.asarray(self._values(field, field_type))
+        except KeyError:
+            return None
+        self.evaluations += 1
+        in_range = (vmin <= values) & (values <= vmax)
+        if operator == 'not':
+            np.logical_not(in_range, out=in_range)
+        packed = np.packbits(in_range)
+        self._rows[key] = packed
+        return packed
+
+    def _fold(self, keys):
+        """Packed mask of a chain of rows, folded from the cached row results."""
+        keys = tuple(keys)
+        packed = self._chains.get(keys)
+        if packed is not None:
+            return packed
+        packed = np.packbits(np.ones(self.size, dtype=bool))
+        for key in keys:
+            row = self._row(key)
+            if row is None:
+                continue
+            if key[0] == 'or':
+                np.bitwise_or(packed, row, out=packed)
+            else:
+                # 'not' rows are cached already inverted
+                np.bitwise_and(packed, row, out=packed)
+        self._chains[keys] = packed
+        return packed
+
+    def evaluate(self, filter_df):
+        """Boolean mask selected by a filter table.
+
+        Parameters
+        ----------
+        filter_df : pandas.DataFrame
+            Filter table with the columns of ``FILTER_COLUMNS``.
+
+        Returns
+        -------
+        numpy.ndarray
+            Boolean mask of length ``size`` (all True for an empty table).
+        """
+        return np.unpackbits(self._fold(self.row_keys(filter_df)), count=self.size).view(bool)
+
+    def label(self, filter_dfs, ids):
+        """Integer region label of every pixel, later regions winning overlaps.
+
+        Parameters
+        ----------
+        filter_dfs : list of pandas.DataFrame
+            Filter table of each region, in ascending priority.
+        ids : list of int
+            Label of each region (nonzero).
+
+        Returns
+        -------
+        numpy.ndarray
+            int32 labels of length ``size``; 0 where no region matches.
+        """
+        if len(filter_dfs) == 0:
+            return np.zeros(self.size, dtype=np.int32)
+        packed = np.stack([self._fold(self.row_keys(df)) for df in filter_dfs[::-1]])
+        members = np.unpackbits(packed, axis=1, count=self.size).view(bool)
+        # highest-priority region containing each pixel
+        top = members.argmax(axis=0)
+        labels = np.asarray(ids, dtype=np.int32)[::-1][top]
+        labels[~members.any(axis=0)] = 0
+        return labels
+
+    def retain(self, filter_dfs):
+        """Drops cached rows and chains not used by any of ``filter_dfs``."""
+        chains = {tuple(self.row_keys(df)) for df in filter_dfs}
+        rows = {key for chain in chains for key in chain}
+        self._chains = {k: v for k, v in self._chains.items() if k in chains}
+        self._rows = {k: v for k, v in self._rows.items() if k in rows}
+
+    def clear(self):
+        self._rows.clear()
+        self._chains.clear()
@@ -0,0 +1,355 @@
+"""Compiled calculator formulas and the dependency graph of calculated fields.
+
+Calculator formulas reference fields as ``{type.field}`` (``{Analyte.Si29}``,
+``{Analyte.Si29_N}`` for the normalized value, ``{Ratio.Si29 / Al27}``) and
+may be split into cases::
+
+    case {Analyte.Fe57} > 100, {Analyte.Fe57} / 1000; otherwise 0
+
+``compile_formula`` parses the text once into a ``FormulaPlan``: each field
+reference becomes a positional input (``f0``, ``f1``, ...) and each case
+condition and expression a precompiled numexpr program, so evaluating the
+formula again (a different sample, or after its inputs change) skips the
+parsing and compilation. Compiled plans are cached by formula text.
+
+Case expressions are evaluated only on the rows their case decides: a row
+takes the value of the *last* case whose condition holds for it (later cases
+override earlier ones), the ``otherwise`` expression fills rows no case
+holds for, and rows left over are NaN.
+
+``CalculatedFieldGraph`` records which inputs each calculated field was
+computed from, and the input versions it was last computed at, so a sample
+can recompute a calculated field -- and only the fields downstream of an
+input that changed -- once that input has been changed.
+"""
+import re
+from functools import lru_cache
+
+import numpy as np
+
+# numexpr reductions need every row, so expressions using them are evaluated
+# on the full inputs and subset afterwards
+_REDUCTION_RE = re.compile(r'\b(sum|prod|min|max)\(')
+_FIELD_RE = re.compile(r'\{(.*?)\}')
+
+
+class FormulaError(ValueError):
+    """Raised for a formula that cannot be parsed, compiled or evaluated."""
+
+
+class FieldReference:
+    """One ``{type.field}`` reference of a formula.
+
+    Parameters
+    ----------
+    field_type : str
+        Field type passed to ``get_map_data``, e.g. ``'Analyte'`` or
+        ``'Analyte (normalized)'``.
+    field : str
+        Column name.
+    """
+    __slots__ = ('field_type', 'field')
+
+    def __init__(self, field_type, field):
+        self.field_type = field_type
+        self.field = field
+
+    def __eq__(self, other):
+        return isinstance(other, FieldReference) and (self.field_type, self.field) == (other.field_type, other.field)
+
+    def __hash__(self):
+        return hash((self.field_type, self.field))
+
+    def __repr__(self):
+        return f"FieldReference({self.field_type!r}, {self.field!r})"
+
+
+class _Program:
+    """One precompiled numexpr expression over some of a formula's inputs."""
+    def __init__(self, text, n_inputs):
+        self.text = text
+        # only the inputs this expression uses, in input order
+        self.inputs = [i for i in range(n_inputs) if re.search(rf'\bf{i}\b', text)]
+        self.reduces = bool(_REDUCTION_RE.search(text))
+        import numexpr as ne
+
+        try:
+            self.program = ne.NumExpr(text, signature=[(f'f{i}', np.float64) for i in self.inputs])
+        except Exception as e:
+            raise FormulaError(f"unable to compile expression '{text}': {e}") from e
+        unknown = set(self.program.input_names) - {f'f{i}' for i in self.inputs}
+        if unknown:
+            raise FormulaError(
+                f"unknown name(s) {', '.join(sorted(unknown))} in '{text}'; fields are written as {{type.field}}."
+            )
+
+    def __call__(self, inputs, rows=None):
+        """Evaluates on all rows, or only ``rows`` (boolean mask) of ``inputs``."""
+        if rows is not None and not self.reduces:
+            args = [inputs[i][rows] for i in self.inputs]
+        else:
+            args = [inputs[i] for i in self.inputs]
+        result = self.program(*args)
+        if rows is not None and self.reduces and np.ndim(result) > 0:
+            result = result[rows]
+        return result
+
+
+class FormulaPlan:
+    """A parsed and compiled calculator formula (see ``compile_formula``).
+
+    Attributes
+    ----------
+    text : str
+        The formula as entered.
+    references : tuple of FieldReference
+        Fields the formula reads, in input order.
+    cases : tuple of (condition, expression)
+        Compiled case branches, empty for a plain expression.
+    expression : compiled expression or None
+        The plain expression, or the ``otherwise`` expression of a case formula.
+    """
+    def __init__(self, text, references, cases, expression):
+        self.text = text
+        self.references = tuple(references)
+        self.cases = tuple(cases)
+        self.expression = expression
+
+    @property
+    def fields(self):
+        """Names of the columns the formula reads."""
+        return {ref.field for ref in self.references}
+
+    def evaluate(self, inputs, n_rows=None):
+        """Evaluates the formula.
+
+        Parameters
+        ----------
+        inputs : list of numpy.ndarray
+            Values of ``references``, in order, all of the same length.
+        n_rows : int, optional
+            Result length, needed only for a formula without field references.
+
+        Returns
+        -------
+        numpy.ndarray
+            One value per row.
+
+        Raises
+        ------
+        FormulaError
+            If an input is missing, or a case condition isn't a boolean
+            array of the right length.
+        """
+        if len(inputs) != len(self.references):
+            raise FormulaError(f"expected {len(self.references)} inputs, got {len(inputs)}.")
+        inputs = [np.asarray(values, dtype=np.float64) for values in inputs]
+        if inputs:
+            n_rows = len(inputs[0])
+        elif n_rows is None:
+            raise FormulaError("n_rows is required for a formula without field references.")
+
+        if not self.cases:
+            return self._broadcast(self.expression(inputs), n_rows)
+
+        result = np.full(n_rows, np.nan)
+        claimed = np.zeros(n_rows, dtype=bool)
+        # the last case that holds for a row wins, so assign cases in reverse
+        # and never overwrite a row a later case already claimed
+        for condition, expression in reversed(self.cases):
+            keep = condition(inputs)
+            if np.ndim(keep) == 0 or keep.dtype != np.bool_:
+                raise FormulaError(
+                    f"case condition '{condition.text}' did not return a boolean result. "
+                    "Did you swap the conditional and expression?"
+                )
+            if keep.shape[0] != n_rows:
+                raise FormulaError('the conditional size does not match the size of expected computed array.')
+            rows = keep & ~claimed
+            if rows.any():
+                result[rows] = self._broadcast(expression(inputs, rows), int(rows.sum()))
+            claimed |= keep
+        if self.expression is not None and not claimed.all():
+            rows = ~claimed
+            result[rows] = self._broadcast(self.expression(inputs, rows), int(rows.sum()))
+        return result
+
+    @staticmethod
+    def _broadcast(values, n_rows):
+        if np.ndim(values) == 0:
+            return np.full(n_rows, values)
+        return values
+
+
+def _normalize_text(txt):
+    """Removes whitespace outside ``{...}`` field references."""
+    parts = re.split(r'(\{.*?\})', txt)
+    return ''.join(part if part.startswith('{') else ''.join(part.split()) for part in parts)
+
+
+def _translate(txt):
+    """Calculator syntax to numexpr syntax."""
+    txt = txt.replace('^', '**')
+    txt = txt.replace('log(', 'log10(')
+    txt = txt.replace('ln(', 'log(')
+    txt = txt.replace('grad(', 'gradient(')
+    return txt
+
+
+def _parse_reference(field_str):
+    try:
+        field_type, field = field_str.split('.', 1)
+    except ValueError as e:
+        raise FormulaError("field type and field must be separated by a '.'") from e
+    field_type, field = field_type.strip(), field.strip()
+    if field.endswith('_N'):
+        field = field[:-2]
+        if field_type in ['Analyte', 'Ratio']:
+            field_type = f"{field_type} (normalized)"
+    return FieldReference(field_type, field)
+
+
+@lru_cache(maxsize=256)
+def compile_formula(txt):
+    """Parses and compiles a calculator formula.
+
+    Parameters
+    ----------
+    txt : str
+        Formula in calculator syntax (``^`` for powers, ``log``/``ln`` for
+        base-10/natural logarithms, ``{type.field}`` references, optional
+        ``case condition, expression;`` and ``otherwise expression`` parts).
+
+    Returns
+    -------
+    FormulaPlan
+        The compiled formula; cached, so the same text returns the same plan.
+
+    Raises
+    ------
+    FormulaError
+        If the formula is malformed or numexpr can't compile part of it.
+    """
+    if txt is None or not txt.strip():
+        raise FormulaError('formula is empty.')
+    text = _normalize_text(txt)
+
+    if text.count('(') != text.count(')'):
+        raise FormulaError('mismatched parentheses in expr')
+    if text.count('{') != text.count('}'):
+        raise FormulaError('mismatched braces in expr')
+
+    # replace each distinct field reference by a positional input name
+    references = []
+
+    def substitute(match):
+        ref = _parse_reference(match.group(1))
+        if ref not in references:
+            references.append(ref)
+        return f"f{references.index(ref)}"
+
+    text = _translate(_FIELD_RE.sub(substitute, text))
+    n_inputs = len(references)
+
+    if 'case' not in text and 'otherwise' not in text:
+        return FormulaPlan(txt, references, (), _Program(text, n_inputs))
+
+    cases = []
+    otherwise = None
+    for part in (p for p in text.split(';') if p):
+        if part.startswith('otherwise'):
+            if otherwise is not None:
+                raise FormulaError("a formula can only have one 'otherwise'.")
+            otherwise = _Program(part[len('otherwise'):], n_inputs)
+            continue
+        if not part.startswith('case') or ',' not in part:
+            raise FormulaError("Each 'case' must be formatted as 'case condition, expression;'")
+        cond_txt, expr_txt = part[len('case'):].split(',', 1)
+        cases.append((_Program(cond_txt, n_inputs), _Program(expr_txt, n_inputs)))
+    return FormulaPlan(txt, references, cases, otherwise)
+
+
+class CalculatedFieldGraph:
+    """Calculated fields, the formulas that produce them, and what they depend on.
+
+    Each field is stored with the compiled formula and a *stamp* of its
+    inputs -- whatever the owner uses to tell that an input column changed,
+    e.g. a tuple of per-column version numbers -- taken when it was last
+    computed. The owner compares a fresh stamp with ``stamp(field)`` to
+    decide whether the stored values are stale.
+    """
+    def __init__(self):
+        self._plans = {}
+        self._stamps = {}
+
+    def __contains__(self, field):
+        return field in self._plans
+
+    def __iter__(self):
+        return iter(self._plans)
+
+    def __len__(self):
+        return len(self._plans)
+
+    def plan(self, field):
+        """Compiled formula of ``field``."""
+        return self._plans[field]
+
+    def stamp(self, field):
+        """Input stamp ``field`` was last computed at, or ``None``."""
+        return self._stamps.get(field)
+
+    def add(self, field, plan, stamp=None):
+        """Registers (or replaces) calculated ``field``.
+
+        Raises
+        ------
+        FormulaError
+            If the formula depends, directly or through other calculated
+            fields, on ``field`` itself.
+        """
+        if field in self._upstream(plan.fields):
+            raise FormulaError(f"'{field}' cannot depend on itself.")
+        self._plans[field] = plan
+        self._stamps[field] = stamp
+
+    def mark_computed(self, field, stamp):
+        """Records that ``field`` now holds values computed at ``stamp``."""
+        self._stamps[field] = stamp
+
+    def discard(self, field):
+        """Forgets ``field`` (a no-op if it isn't registered)."""
+        self._plans.pop(field, None)
+        self._stamps.pop(field, None)
+
+    def clear(self):
+        """Forgets every calculated field."""
+        self._plans.clear()
+        self._stamps.clear()
+
+    def _upstream(self, fields):
+        """``fields`` plus every field they depend on through calculated fields."""
+        seen = set()
+        stack = list(fields)
+        while stack:
+            field = stack.pop()
+            if field in seen:
+                continue
+            seen.add(field)
+            if field in self._plans:
+                stack.extend(self._plans[field].fields)
+        return seen
+
+    def dependents(self, field):
+        """Calculated fields that depend on ``field``, directly or indirectly,
+        in an order that computes each after the fields it reads."""
+        order = []
+
+        def visit(name):
+            for other, plan in self._plans.items():
+                if name in plan.fields and other not in order:
+                    visit(other)
+                    order.insert(0, other)
+
+        visit(field)
+        return order
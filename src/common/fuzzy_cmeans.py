@@ -0,0 +1,202 @@
+"""Fuzzy c-means clustering of map pixels in bounded memory.
+
+``skfuzzy.cluster.cmeans`` works on the whole ``(n_features, n_pixels)``
+matrix in float64 and allocates new distance and membership matrices on
+every iteration. ``fuzzy_cmeans`` instead passes over the pixels in chunks
+of float32 rows, reusing one set of buffers: each pass computes squared
+distances to the centres by expanding ``|x - v|^2 = |x|^2 - 2 x.v + |v|^2``
+(one matrix product per chunk), updates the memberships in place and
+accumulates the weighted sums for the next centres, so an iteration is a
+single pass over the data. Iteration stops once no membership changes by
+more than ``tol``.
+
+Centres are seeded with k-means++; ``seed_centers`` can also extend an
+existing solution by one or more centres, so a sweep over the number of
+clusters warm-starts each ``k + 1`` fit from the ``k`` solution.
+"""
+from dataclasses import dataclass
+
+import numpy as np
+
+
+@dataclass
+class FuzzyClusters:
+    """Result of `fuzzy_cmeans`.
+
+    Attributes
+    ----------
+    centers : numpy.ndarray
+        Cluster centres, shape ``(n_clusters, n_features)``.
+    memberships : numpy.ndarray
+        Float32 membership of each row in each cluster, shape ``(n_samples,
+        n_clusters)``; rows sum to 1.
+    objective : float
+        Weighted sum of squared errors, ``sum(u**m * d**2)``.
+    n_iter : int
+        Number of iterations run.
+    """
+    centers: np.ndarray
+    memberships: np.ndarray
+    objective: float
+    n_iter: int
+
+    @property
+    def labels(self):
+        """numpy.ndarray : Cluster of highest membership for each row."""
+        return np.argmax(self.memberships, axis=1)
+
+
+def _squared_distances(x, x_norms, centers, center_norms, out):
+    """Squared distances from rows ``x`` to ``centers``, written to ``out``."""
+    np.matmul(x, centers.T, out=out)
+    out *= -2
+    out += x_norms[:, np.newaxis]
+    out += center_norms
+    np.maximum(out, 0, out=out)
+    return out
+
+
+def seed_centers(X, n_clusters, seed=None, centers=None, chunk_rows=65536, dtype=np.float32):
+    """k-means++ centres, optionally extending ``centers`` already chosen.
+
+    Parameters
+    ----------
+    X : numpy.ndarray
+        Data of shape ``(n_samples, n_features)``.
+    n_clusters : int
+        Total number of centres to return.
+    seed : int or numpy.random.Generator, optional
+        Random seed, by default None.
+    centers : numpy.ndarray, optional
+        Centres to keep, e.g. a previous solution with fewer clusters.
+    chunk_rows : int, optional
+        Rows processed at a time, by default 65536.
+    dtype : numpy.dtype, optional
+        Precision of the distance computations, by default ``np.float32``.
+
+    Returns
+    -------
+    numpy.ndarray
+        Centres of shape ``(n_clusters, n_features)``.
+    """
+    rng = np.random.default_rng(seed)
+    n = X.shape[0]
+    chosen = [] if centers is None else [np.asarray(c, dtype=np.float64) for c in centers]
+    if not chosen:
+        chosen.append(np.asarray(X[rng.integers(n)], dtype=np.float64))
+    if len(chosen) >= n_clusters:
+        return np.array(chosen[:n_clusters])
+
+    # squared distance of every row to its nearest chosen centre, about the data
+    # mean for float32 accuracy (see fuzzy_cmeans)
+    offset = X.mean(axis=0, dtype=np.float64)
+    nearest = np.full(n, np.inf, dtype=dtype)
+    d2 = np.empty((min(chunk_rows, n), 1), dtype=dtype)
+    new = (np.array(chosen) - offset).astype(dtype)
+    while True:
+        for lo in range(0, n, chunk_rows):
+            x = (X[lo:lo + chunk_rows] - offset).astype(dtype)
+            x_norms = np.einsum('ij,ij->i', x, x)
+            for center in new:
+                out = _squared_distances(x, x_norms, center[np.newaxis], center @ center, d2[:len(x)])
+                np.minimum(nearest[lo:lo + len(x)], out[:, 0], out=nearest[lo:lo + len(x)])
+        if len(chosen) >= n_clusters:
+            return np.array(chosen)
+        weights = np.cumsum(nearest, dtype=np.float64)
+        if weights[-1] > 0:
+            row = min(int(np.searchsorted(weights, rng.random() * weights[-1], side='right')), n - 1)
+        else:
+            row = int(rng.integers(n))  # every row coincides with a centre
+        chosen.append(np.asarray(X[row], dtype=np.float64))
+        new = (chosen[-1] - offset).astype(dtype)[np.newaxis]
+
+
+def fuzzy_cmeans(X, n_clusters, m=2.0, tol=1e-5, max_iter=1000, seed=None, init=None,
+                 chunk_rows=65536, dtype=np.float32):
+    """Fuzzy c-means clustering.
+
+    Parameters
+    ----------
+    X : numpy.ndarray
+        Data of shape ``(n_samples, n_features)`` without NaNs.
+    n_clusters : int
+        Number of clusters.
+    m : float, optional
+        Fuzziness exponent, greater than 1, by default 2.0.
+    tol : float, optional
+        Stop once no membership changes by more than this between
+        iterations, by default 1e-5.
+    max_iter : int, optional
+        Most iterations to run, by default 1000.
+    seed : int, optional
+        Seed of the k-means++ initialization, by default None.
+    init : numpy.ndarray, optional
+        Initial centres, by default k-means++ seeded. Fewer than
+        ``n_clusters`` centres are extended with k-means++ (warm start).
+    chunk_rows : int, optional
+        Rows processed at a time, by default 65536.
+    dtype : numpy.dtype, optional
+        Precision of the per-chunk arithmetic, by default ``np.float32``;
+        centre sums are accumulated in float64.
+
+    Returns
+    -------
+    FuzzyClusters
+    """
+    if m <= 1:
+        raise ValueError("fuzzy c-means exponent m must be greater than 1")
+    n, n_features = X.shape
+    chunk_rows = max(1, min(chunk_rows, n))
+    centers = seed_centers(X, n_clusters, seed=seed, centers=init, chunk_rows=chunk_rows, dtype=dtype)
+    # distances are computed about the data mean; expanding |x - v|^2 in float32
+    # far from the origin would lose most of its digits to cancellation
+    offset = X.mean(axis=0, dtype=np.float64)
+    centers = centers - offset
+    power = 1.0 / (m - 1)
+
+    memberships = np.zeros((n, n_clusters), dtype=dtype)
+    x = np.empty((chunk_rows, n_features), dtype=dtype)
+    x_norms = np.empty(chunk_rows, dtype=dtype)
+    d2 = np.empty((chunk_rows, n_clusters), dtype=dtype)
+    u = np.empty((chunk_rows, n_clusters), dtype=dtype)
+    weights = np.empty((chunk_rows, n_clusters), dtype=dtype)
+    tiny = np.finfo(dtype).tiny
+
+    for n_iter in range(1, max_iter + 1):
+        c = centers.astype(dtype)
+        c_norms = np.einsum('ij,ij->i', c, c)
+        sums = np.zeros((n_clusters, n_features))
+        totals = np.zeros(n_clusters)
+        objective = 0.0
+        change = 0.0
+        for lo in range(0, n, chunk_rows):
+            rows = min(chunk_rows, n - lo)
+            xc, nc, dc, uc, wc = x[:rows], x_norms[:rows], d2[:rows], u[:rows], weights[:rows]
+            np.subtract(X[lo:lo + rows], offset, out=xc, casting='unsafe')
+            np.einsum('ij,ij->i', xc, xc, out=nc)
+            _squared_distances(xc, nc, c, c_norms, dc)
+
+            # u_ik = 1 / sum_j (d_ik / d_ij)^(2/(m-1)); taken relative to the nearest
+            # centre, so the ratios lie in (0, 1] and can't overflow
+            np.maximum(dc, tiny, out=uc)
+            np.divide(uc.min(axis=1, keepdims=True), uc, out=uc)
+            np.power(uc, power, out=uc)
+            uc /= uc.sum(axis=1, keepdims=True)
+
+            previous = memberships[lo:lo + rows]
+            np.subtract(uc, previous, out=wc)
+            change = max(change, float(np.abs(wc).max()))
+            previous[...] = uc
+
+            np.power(uc, m, out=wc)
+            sums += wc.T @ xc
+            totals += wc.sum(axis=0, dtype=np.float64)
+            objective += float(np.einsum('ij,ij->', wc, dc, dtype=np.float64))
+
+        previous_centers = centers
+        centers = sums / np.maximum(totals, tiny)[:, np.newaxis]
+        if change < tol:
+            break
+
+    # memberships were computed from the centres before the last update
+    return FuzzyClusters(previous_centers + offset, memberships, objective, n_iter)
@@ -1,7 +1,6 @@
 import numpy as np
 from scipy.stats import norm, mode
 from scipy.special import erfinv,erf
-from scipy.interpolate import interp1d
 
 def gausscensor(x, scale='linear', q=[0.05, 0.25, 0.5, 0.75, 0.95] , a=3/8):
     """Estimates statistical parameters when there are censored data.
@@ -54,21 +53,10 @@ def gausscensor(x, scale='linear', q=[0.05, 0.25, 0.5, 0.75, 0.95] , a=3/8):
     c = np.sort(c)
     u = np.sort(u)
 
-    # Handling censored and uncensored data
-    nc = len(c)
-    nu = len(u)
+    # rank of each uncensored value among all values; censored values tied with
+    # an uncensored one rank below it
     N = len(x)
-    ind = np.zeros_like(u, dtype=int)
-    j = k = 0
-    if len(c)>0:
-        while k < nc and j < nu:
-            if c[k] <= u[j]:
-                k += 1
-            else:
-                ind[j] = j + k
-                j += 1
-        if j < nu:
-            ind[j:nu] = np.arange(j, nu) + k
+    ind = np.arange(len(u)) + np.searchsorted(c, u, side='right')
 
     # Creating empirical CDF
     y = (N - a + 1) / (N - 2 * a + 1) * np.cumprod(((ind+1 - a) / (ind+2 - a))[::-1], axis=0)[::-1]
@@ -91,16 +79,157 @@ def gausscensor(x, scale='linear', q=[0.05, 0.25, 0.5, 0.75, 0.95] , a=3/8):
     quantile_values = np.zeros((len(q), 2))  # Initialize quantile_values with two columns
     quantile_values[:, 0] = mu + sigma * np.sqrt(2) * erfinv(2 * np.array(q) - 1)
     
-    # Try to interpolate uu at points Q based on yy, and handle exceptions
-    try:
-        interp_func = interp1d(yy, uu)  # will raise an error if Q is out of bounds
-        quantile_values[:, 1] = interp_func(q)
-    except Exception as e:
-        print(f"Interpolation failed: {e}")
-        quantile_values[:, 1] = quantile_values[:, 0]
+    # Interpolate the empirical CDF, falling back on the model outside its range
+    q = np.asarray(q, dtype=float)
+    outside = (q < yy[0]) | (q > yy[-1])
+    quantile_values[:, 1] = np.where(outside, quantile_values[:, 0], np.interp(q, yy, uu))
 
     return model, quantile_values
 
+def _column_modes(values):
+    """Most frequent value of each column (the smallest on ties, as ``scipy.stats.mode``), ignoring NaN; 0 for empty columns."""
+    rows, cols = np.nonzero(~np.isnan(values))
+    modes = np.zeros(values.shape[1])
+    if rows.size == 0:
+        return modes
+    v = values[rows, cols]
+    order = np.lexsort((v, cols))
+    v, cols = v[order], cols[order]
+    start = np.r_[True, (np.diff(v) != 0) | (np.diff(cols) != 0)]
+    run_start = np.flatnonzero(start)
+    run_length = np.diff(np.r_[run_start, len(v)])
+    run_col, run_value = cols[run_start], v[run_start]
+    # longest run of each column, smallest value first among equally long runs
+    best = np.lexsort((run_value, -run_length, run_col))
+    first = np.r_[True, np.diff(run_col[best]) != 0]
+    modes[run_col[best][first]] = run_value[best][first]
+    return modes
+
+
+def _censored_columns(x, scale, q, a):
+    """`gausscensor` applied to every column of ``x`` at once."""
+    n, k = x.shape
+    valid = ~np.isnan(x)
+    N = valid.sum(axis=0)
+    uncensored = x > 0
+    censored = valid & ~uncensored
+    nu = uncensored.sum(axis=0)
+
+    # detection limits; zeros (unknown limit) take the most common limit, or 10x the smallest detection
+    c = np.where(censored, -x, np.nan)
+    mode_c = _column_modes(c)
+    min_u = np.where(uncensored, x, np.inf).min(axis=0, initial=np.inf)
+    fill = np.where(mode_c != 0, mode_c, 10 * min_u)
+    v = np.where(uncensored, x, np.where(c == 0, fill, c))
+    if scale == 'log':
+        v = np.log(v)
+    elif scale == 'log10':
+        v = np.log10(v)
+
+    # merged order of each column: ascending, censored before uncensored on ties, NaN last
+    order = np.lexsort((uncensored, v), axis=0)
+    v = np.take_along_axis(v, order, axis=0)
+    is_u = np.take_along_axis(uncensored, order, axis=0)
+
+    # uncensored values of each column moved to the top (u), with their merged rank (ind)
+    r, col = np.nonzero(is_u)
+    rank = np.cumsum(is_u, axis=0)[r, col] - 1
+    u = np.full((n, k), np.nan)
+    ind = np.zeros((n, k))
+    u[rank, col] = v[r, col]
+    ind[rank, col] = r
+    row = np.arange(n)[:, np.newaxis]
+    in_u = row < nu
+
+    # empirical CDF
+    f = np.where(in_u, (ind + 1 - a) / (ind + 2 - a), 1.0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        y = (N - a + 1) / (N - 2 * a + 1) * np.cumprod(f[::-1], axis=0)[::-1]
+
+        # first occurrence of each distinct value, and the CDF step to it
+        first = in_u & np.r_[np.ones((1, k), bool), u[1:] != u[:-1]]
+        latest = np.maximum.accumulate(np.where(first, row, 0), axis=0)
+        previous = np.vstack([np.zeros((1, k)), np.take_along_axis(y, latest[:-1], axis=0)])
+        dy = np.where(first, y - previous, 0.0)
+
+        mu = np.sum(np.where(first, u, 0.0) * dy, axis=0)
+        sigma = np.sqrt(N / (N - 1) * np.sum(np.where(first, (u - mu)**2, 0.0) * dy, axis=0))
+        cdf = 0.5 * (1 + erf((u - mu) / (np.sqrt(2) * sigma)))
+        rms = np.sqrt(np.sum(np.where(first, (y - cdf)**2, 0.0), axis=0) / N)
+
+    # quantiles from the model, and interpolated from the distinct values' CDF
+    q = np.asarray(q, dtype=float)
+    quantiles = np.zeros((k, len(q), 2))
+    quantiles[:, :, 0] = mu[:, np.newaxis] + sigma[:, np.newaxis] * np.sqrt(2) * erfinv(2 * q - 1)
+    r, col = np.nonzero(first)
+    rank = np.cumsum(first, axis=0)[r, col] - 1
+    uu = np.zeros((n + 1, k))
+    yy = np.full((n + 1, k), np.inf)
+    uu[rank, col] = u[r, col]
+    yy[rank, col] = y[r, col]
+    last = np.maximum(first.sum(axis=0) - 1, 0)
+    cols = np.arange(k)
+    for i, qi in enumerate(q):
+        lo = np.maximum((yy <= qi).sum(axis=0) - 1, 0)
+        hi = np.minimum(lo + 1, last)
+        step = yy[hi, cols] - yy[lo, cols]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            t = np.where(step > 0, (qi - yy[lo, cols]) / step, 0.0)
+        empirical = uu[lo, cols] + t * (uu[hi, cols] - uu[lo, cols])
+        outside = (qi < yy[0]) | (qi > yy[last, cols])
+        quantiles[:, i, 1] = np.where(outside, quantiles[:, i, 0], empirical)
+
+    too_few = nu < 8
+    mu[too_few] = sigma[too_few] = rms[too_few] = np.nan
+    quantiles[too_few] = np.nan
+    return mu, sigma, rms, quantiles
+
+
+def gausscensor_batch(matrix, scale='linear', q=[0.05, 0.25, 0.5, 0.75, 0.95], a=3/8, groups=None):
+    """Censored-data estimates for every column of a matrix in one vectorized pass.
+
+    Applies `gausscensor` to each column of ``matrix`` (e.g. the analytes of a
+    spot or pixel dataset, one row per spot) without a Python-level call per
+    column, optionally for each group of rows (e.g. clusters) separately.
+    Columns with fewer than 8 uncensored values return NaN.
+
+    Parameters
+    ----------
+    matrix : numpy.ndarray or pandas.DataFrame
+        Values of shape ``(n_rows, n_columns)``, censored as for `gausscensor`;
+        NaN values are ignored.
+    scale : str, optional
+        Options include ``linear``, ``log`` and ``log10``, by default 'linear'
+    q : list, optional
+        A list of percentiles to estimate the quantile, by default [0.05, 0.25, 0.5, 0.75, 0.95]
+    a : shape parameter, optional
+        Determined by the type of distribution, by default 3/8
+    groups : array_like, optional
+        Group label of each row; statistics are estimated per group, by default
+        over all rows.
+
+    Returns
+    -------
+    dict
+        ``mu``, ``sigma`` and ``rms`` of shape ``(n_columns,)``, and
+        ``quantiles`` of shape ``(n_columns, len(q), 2)`` holding the model
+        and empirical quantiles as returned by `gausscensor`. With ``groups``,
+        each gains a leading axis over the sorted unique labels, which are
+        returned as ``groups``.
+    """
+    x = np.asarray(matrix, dtype=float)
+    if x.ndim == 1:
+        x = x[:, np.newaxis]
+    if groups is None:
+        mu, sigma, rms, quantiles = _censored_columns(x, scale, q, a)
+        return {'mu': mu, 'sigma': sigma, 'rms': rms, 'quantiles': quantiles}
+
+    groups = np.asarray(groups)
+    labels, inverse = np.unique(groups, return_inverse=True)
+    results = [_censored_columns(x[inverse == g], scale, q, a) for g in range(len(labels))]
+    mu, sigma, rms, quantiles = (np.stack(r) for r in zip(*results))
+    return {'mu': mu, 'sigma': sigma, 'rms': rms, 'quantiles': quantiles, 'groups': labels}
+
 # # Example usage
 # data = [-1, 0.5, 1, 1.5, -2, -3, 4, 5, 6, 7, 8]  # Example dataset
 # q =  np.array([0.025, 0.25, 0.5, 0.75, 0.975])
@@ -0,0 +1,149 @@
+"""Principal component analysis backends for dimensional reduction.
+
+Map matrices are tall (millions of pixels) and narrow (tens of analytes),
+and plots or PCA-preconditioned clustering usually only need the first few
+components. ``fit_pca`` standardizes the matrix in float32 and fits only the
+requested number of components, choosing between
+
+* ``'full'`` -- exact SVD, used when most components are requested,
+* ``'randomized'`` -- randomized truncated SVD for a few leading components,
+* ``'incremental'`` -- ``IncrementalPCA`` over row chunks, so the working
+  set stays bounded for maps too large to decompose in one piece.
+
+The returned model is a fitted scikit-learn estimator, so callers can keep
+using ``components_``, ``explained_variance_ratio_`` and ``n_components_``
+regardless of the solver.
+"""
+
+import numpy as np
+
+PCA_SOLVERS = ['auto', 'full', 'randomized', 'incremental']
+
+# standardized float32 matrices above this size are fit incrementally by 'auto'
+INCREMENTAL_THRESHOLD_BYTES = 512 * 2**20
+
+
+def standardize(X, mean=None, scale=None):
+    """Centres and scales columns to unit variance in float32.
+
+    Statistics are accumulated in float64 for accuracy; constant columns are
+    left unscaled (as ``StandardScaler`` does).
+
+    Parameters
+    ----------
+    X : numpy.ndarray
+        Matrix of shape ``(n_samples, n_features)``.
+    mean, scale : numpy.ndarray, optional
+        Column statistics to apply instead of computing them from ``X``.
+
+    Returns
+    -------
+    Xs : numpy.ndarray
+        Standardized float32 matrix.
+    mean, scale : numpy.ndarray
+        Column means and standard deviations used.
+    """
+    if mean is None:
+        mean = X.mean(axis=0, dtype=np.float64)
+        scale = X.std(axis=0, dtype=np.float64)
+        scale[scale == 0] = 1.0
+
+    Xs = np.array(X, dtype=np.float32)
+    Xs -= mean.astype(np.float32)
+    Xs /= scale.astype(np.float32)
+    return Xs, mean, scale
+
+
+def resolve_solver(solver, n_samples, n_features, n_components):
+    """Resolves ``'auto'`` to a concrete solver for a matrix of the given size."""
+    if solver != 'auto':
+        return solver
+    if n_samples * n_features * 4 > INCREMENTAL_THRESHOLD_BYTES:
+        return 'incremental'
+    if n_components < 0.8 * min(n_samples, n_features):
+        return 'randomized'
+    return 'full'
+
+
+def fit_pca(X, n_components=None, solver='auto', batch_size=None, random_state=0):
+    """Standardizes ``X`` and fits a PCA, returning the model and float32 scores.
+
+    Parameters
+    ----------
+    X : numpy.ndarray
+        Matrix of shape ``(n_samples, n_features)`` without NaNs.
+    n_components : int, optional
+        Number of components to compute, by default all
+        (``min(n_samples, n_features)``).
+    solver : str, optional
+        One of ``PCA_SOLVERS``, by default ``'auto'``.
+    batch_size : int, optional
+        Rows per chunk for the incremental solver, by default sized to keep
+        each chunk near 64 MB.
+    random_state : int, optional
+        Seed for the randomized solver, by default 0.
+
+    Returns
+    -------
+    model : sklearn.decomposition.PCA or sklearn.decomposition.IncrementalPCA
+        Fitted model. The column means and scales used to standardize ``X``
+        are stored on it as ``standardize_mean_`` and ``standardize_scale_``.
+    scores : numpy.ndarray
+        float32 scores of shape ``(n_samples, n_components)``.
+
+    Raises
+    ------
+    ValueError
+        If ``solver`` is not one of ``PCA_SOLVERS``.
+    """
+    if solver not in PCA_SOLVERS:
+        raise ValueError(f"Unknown PCA solver '{solver}'. Valid solvers include: " + ", ".join(PCA_SOLVERS))
+
+    n_samples, n_features = X.shape
+    max_components = min(n_samples, n_features)
+    n_components = max_components if not n_components else min(int(n_components), max_components)
+    solver = resolve_solver(solver, n_samples, n_features, n_components)
+
+    if solver == 'incremental':
+        model, scores, mean, scale = _fit_incremental(X, n_components, batch_size)
+    else:
+        from sklearn.decomposition import PCA
+
+        Xs, mean, scale = standardize(X)
+        model = PCA(n_components=n_components, svd_solver=solver, random_state=random_state if solver == 'randomized' else None)
+        scores = model.fit_transform(Xs).astype(np.float32, copy=False)
+
+    model.standardize_mean_ = mean
+    model.standardize_scale_ = scale
+    return model, scores
+
+
+def _fit_incremental(X, n_components, batch_size):
+    mean = X.mean(axis=0, dtype=np.float64)
+    scale = X.std(axis=0, dtype=np.float64)
+    scale[scale == 0] = 1.0
+
+    n_samples, n_features = X.shape
+    if batch_size is None:
+        batch_size = max(64 * 2**20 // (4 * n_features), 1)
+    # every partial_fit batch needs at least n_components rows
+    batch_size = max(batch_size, n_components)
+
+    from sklearn.decomposition import IncrementalPCA
+
+    model = IncrementalPCA(n_components=n_components, batch_size=batch_size)
+    starts = list(range(0, n_samples, batch_size))
+    # a short final chunk is folded into the one before it
+    if len(starts) > 1 and n_samples - starts[-1] < n_components:
+        starts.pop()
+    bounds = list(zip(starts, starts[1:] + [n_samples]))
+
+    for start, stop in bounds:
+        chunk, _, _ = standardize(X[start:stop], mean, scale)
+        model.partial_fit(chunk)
+
+    scores = np.empty((n_samples, model.n_components_), dtype=np.float32)
+    for start, stop in bounds:
+        chunk, _, _ = standardize(X[start:stop], mean, scale)
+        scores[start:stop] = model.transform(chunk)
+    return model, scores, mean, scale
@@ -0,0 +1,232 @@
+"""Multi-resolution image pyramids for rendering large maps.
+
+A 4000 x 3000 map drawn into a 600 px wide canvas is resampled from ~12 MP
+on every draw, and QuickView does the same for every thumbnail. An
+``ImagePyramid`` holds block-mean downsampled copies of a map (each level
+half the size of the previous one) so the renderer can draw the coarsest
+level that still has at least one data pixel per screen pixel, dropping to
+full resolution only when zoomed in far enough to need it. Categorical maps
+(cluster and ROI labels, masks) are downsampled with the block mode instead,
+since the mean of two labels is not a label.
+
+``ImagePyramidBinding`` wires a pyramid to Matplotlib ``AxesImage`` artists,
+swapping the displayed level as the axes are zoomed, panned or resized. The
+image extent is pinned to full-resolution pixel coordinates, so axes
+limits, annotations and mouse read-outs are unaffected by the level shown.
+"""
+import numpy as np
+
+
+def block_mean(array, factor):
+    """Downsamples the first two axes of ``array`` by averaging ``factor`` x ``factor`` blocks.
+
+    NaNs are ignored within a block (a block that is entirely NaN stays NaN),
+    and edge blocks that extend beyond the array average only the pixels
+    present.
+
+    Parameters
+    ----------
+    array : numpy.ndarray
+        Array of shape ``(M, N)`` or ``(M, N, C)``.
+    factor : int
+        Block size.
+
+    Returns
+    -------
+    numpy.ndarray
+        float32 array of shape ``(ceil(M/factor), ceil(N/factor), ...)``.
+    """
+    M, N = array.shape[:2]
+    m, n = -(-M // factor), -(-N // factor)
+
+    padded = np.full((m*factor, n*factor) + array.shape[2:], np.nan, dtype=np.float32)
+    padded[:M, :N] = array
+    blocks = padded.reshape((m, factor, n, factor) + array.shape[2:])
+
+    valid = ~np.isnan(blocks)
+    counts = valid.sum(axis=(1, 3))
+    sums = np.where(valid, blocks, 0).sum(axis=(1, 3), dtype=np.float32)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(counts > 0, sums / counts, np.nan).astype(np.float32)
+
+
+def block_mode(array, factor):
+    """Downsamples the first two axes of ``array`` to the most common value of each ``factor`` x ``factor`` block.
+
+    Meant for label maps, where every downsampled pixel must still be one of
+    the labels present. NaNs are ignored within a block (a block that is
+    entirely NaN stays NaN), ties go to the smallest value, and channels of a
+    ``(M, N, C)`` array are treated independently.
+
+    Parameters
+    ----------
+    array : numpy.ndarray
+        Array of shape ``(M, N)`` or ``(M, N, C)``.
+    factor : int
+        Block size.
+
+    Returns
+    -------
+    numpy.ndarray
+        float32 array of shape ``(ceil(M/factor), ceil(N/factor), ...)``.
+    """
+    M, N = array.shape[:2]
+    m, n = -(-M // factor), -(-N // factor)
+
+    padded = np.full((m*factor, n*factor) + array.shape[2:], np.nan, dtype=np.float32)
+    padded[:M, :N] = array
+    blocks = padded.reshape((m, factor, n, factor) + array.shape[2:])
+    # block values on the last axis, sorted so NaNs come last and ties resolve to the smallest value
+    blocks = np.moveaxis(blocks, (1, 3), (-2, -1)).reshape((m, n) + array.shape[2:] + (factor*factor,))
+    blocks = np.sort(blocks, axis=-1)
+
+    counts = (blocks[..., :, np.newaxis] == blocks[..., np.newaxis, :]).sum(axis=-1)
+    mode = np.argmax(counts, axis=-1)
+    return np.take_along_axis(blocks, mode[..., np.newaxis], axis=-1)[..., 0]
+
+
+class ImagePyramid:
+    """Block-mean (or block-mode) image pyramid over a 2D (or 2D multi-channel) array.
+
+    Level 0 is the array itself; level ``k`` is downsampled by ``2**k``.
+    Coarse levels are built on construction, from each previous level,
+    until the smaller dimension would drop below ``min_size``.
+
+    Parameters
+    ----------
+    array : numpy.ndarray
+        Full-resolution array, shape ``(M, N)`` or ``(M, N, C)``.
+    min_size : int, optional
+        Smallest dimension of the coarsest level, by default 64.
+    coarse : list of numpy.ndarray, optional
+        Previously built coarse levels for ``array`` (see ``coarse``), reused
+        instead of being recomputed.
+    categorical : bool, optional
+        Whether ``array`` holds labels (clusters, ROIs, masks), downsampled
+        with ``block_mode`` rather than ``block_mean``, by default False.
+    """
+    def __init__(self, array, min_size=64, coarse=None, categorical=False):
+        self.levels = [array]
+        self.categorical = categorical
+        if coarse is not None:
+            self.levels.extend(coarse)
+            return
+
+        downsample = block_mode if categorical else block_mean
+        level = array
+        while min(level.shape[:2]) // 2 >= min_size:
+            level = downsample(level, 2)
+            self.levels.append(level)
+
+    @property
+    def shape(self):
+        """Shape of the full-resolution array."""
+        return self.levels[0].shape
+
+    @property
+    def coarse(self):
+        """Downsampled levels only (everything but level 0), e.g. for caching without the full array."""
+        return self.levels[1:]
+
+    def __len__(self):
+        return len(self.levels)
+
+    def __getitem__(self, level):
+        return self.levels[level]
+
+    def level_for(self, visible_shape, screen_shape):
+        """Picks the coarsest level that still resolves every screen pixel.
+
+        Parameters
+        ----------
+        visible_shape : tuple of float
+            ``(rows, cols)`` of full-resolution pixels currently visible.
+        screen_shape : tuple of float
+            ``(height, width)`` in screen pixels the visible region is drawn into.
+
+        Returns
+        -------
+        int
+            Pyramid level to display.
+        """
+        rows, cols = visible_shape
+        height, width = screen_shape
+        level = 0
+        while level + 1 < len(self.levels):
+            factor = 2 ** (level + 1)
+            if rows / factor < height or cols / factor < width:
+                break
+            level += 1
+        return level
+
+
+class ImagePyramidBinding:
+    """Keeps ``AxesImage`` artists showing the pyramid level that matches their on-screen size.
+
+    Parameters
+    ----------
+    axes : matplotlib.axes.Axes
+        Axes containing the images.
+    """
+    def __init__(self, axes):
+        self.axes = axes
+        self.images = []
+        self.level = None
+        self._updating = False
+
+        axes.callbacks.connect('xlim_changed', self._limits_changed)
+        axes.callbacks.connect('ylim_changed', self._limits_changed)
+        axes.figure.canvas.mpl_connect('resize_event', self._limits_changed)
+
+    def add(self, image, pyramid):
+        """Adds an image to keep in step with the others.
+
+        The image's extent is fixed to full-resolution pixel coordinates, as
+        ``imshow`` would have set for level 0.
+        """
+        M, N = pyramid.shape[:2]
+        image.set_extent((-0.5, N - 0.5, M - 0.5, -0.5))
+        self.images.append([image, pyramid])
+        self.refresh(force=True)
+
+    def set_pyramid(self, image, pyramid):
+        """Replaces the pyramid displayed by ``image`` (e.g. a new field on the same canvas)."""
+        for entry in self.images:
+            if entry[0] is image:
+                entry[1] = pyramid
+        self.refresh(force=True)
+
+    def refresh(self, force=False):
+        """Shows the level matching the current view; returns ``True`` if any image changed."""
+        if not self.images or self._updating:
+            return False
+
+        pyramid = self.images[0][1]
+        level = pyramid.level_for(self._visible_shape(pyramid), self._screen_shape())
+        if level == self.level and not force:
+            return False
+
+        self._updating = True
+        try:
+            for image, pyr in self.images:
+                image.set_data(pyr[min(level, len(pyr) - 1)])
+        finally:
+            self._updating = False
+        self.level = level
+        return True
+
+    def _limits_changed(self, *args):
+        if self.refresh():
+            self.axes.figure.canvas.draw_idle()
+
+    def _visible_shape(self, pyramid):
+        M, N = pyramid.shape[:2]
+        x0, x1 = sorted(self.axes.get_xlim())
+        y0, y1 = sorted(self.axes.get_ylim())
+        cols = min(x1, N - 0.5) - max(x0, -0.5)
+        rows = min(y1, M - 0.5) - max(y0, -0.5)
+        return max(rows, 1), max(cols, 1)
+
+    def _screen_shape(self):
+        bbox = self.axes.bbox
+        return max(bbox.height, 1), max(bbox.width, 1)
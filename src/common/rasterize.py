@@ -0,0 +1,181 @@
+"""Scanline rasterization of polygon masks.
+
+``MaskDock``'s polygon tab masks the pixels inside the checked polygons.
+Testing every pixel of the map against every polygon
+(``Path.contains_points``) costs polygons x map size however small the
+polygons are; here each polygon is filled row by row over its bounding box
+only (``rasterize_polygon``), kept as a bounding-box raster, cached per
+polygon until its vertices change (``PolygonRasterCache``) and the rasters
+are combined over the overlap of their boxes (``intersect_rasters``).
+"""
+import numpy as np
+
+
+class PolygonRaster:
+    """Pixels inside a polygon, stored over the polygon's bounding box only.
+
+    Parameters
+    ----------
+    row0, col0 : int
+        Image position of ``mask[0, 0]``.
+    mask : numpy.ndarray
+        Boolean array covering the rows and columns of the bounding box that
+        fall on the map.
+    """
+    __slots__ = ('row0', 'col0', 'mask')
+
+    def __init__(self, row0, col0, mask):
+        self.row0 = row0
+        self.col0 = col0
+        self.mask = mask
+
+    @property
+    def row1(self):
+        return self.row0 + self.mask.shape[0]
+
+    @property
+    def col1(self):
+        return self.col0 + self.mask.shape[1]
+
+
+def rasterize_polygon(verts, shape):
+    """Rasterizes a polygon onto a map with an even-odd scanline fill.
+
+    Vertices are in image pixel-index space (``x`` = column, ``y`` = row), as
+    drawn on ``imshow``; a pixel is inside when its centre is, by the
+    even-odd rule (as ``matplotlib.path.Path.contains_points`` for simple
+    polygons). Only the rows of the polygon's bounding box are visited: each
+    row's crossings with the polygon's edges are sorted and the spans
+    between successive pairs filled.
+
+    Parameters
+    ----------
+    verts : sequence of (float, float)
+        Polygon vertices; the polygon is closed implicitly.
+    shape : tuple of int
+        Map size ``(nrows, ncols)``.
+
+    Returns
+    -------
+    PolygonRaster
+        Inside pixels over the on-map part of the bounding box (empty if the
+        polygon is off the map).
+    """
+    nrows, ncols = shape
+    v = np.asarray(verts, dtype=float).reshape(-1, 2)
+    if len(v) < 3 or not np.isfinite(v).all():
+        return PolygonRaster(0, 0, np.zeros((0, 0), dtype=bool))
+
+    # pixel centres (integers) whose row/column lies within the bounding box
+    row0 = max(int(np.ceil(v[:, 1].min())), 0)
+    row1 = min(int(np.floor(v[:, 1].max())) + 1, nrows)
+    col0 = max(int(np.ceil(v[:, 0].min())), 0)
+    col1 = min(int(np.floor(v[:, 0].max())) + 1, ncols)
+    if row0 >= row1 or col0 >= col1:
+        return PolygonRaster(0, 0, np.zeros((0, 0), dtype=bool))
+
+    x0, y0 = v[:, 0], v[:, 1]
+    x1, y1 = np.roll(x0, -1), np.roll(y0, -1)
+    y = np.arange(row0, row1, dtype=float)[:, None]
+
+    # half-open crossing rule, so a vertex on a scanline is counted once
+    crosses = (y0 <= y) != (y1 <= y)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        x = x0 + (y - y0) * (x1 - x0) / (y1 - y0)
+    x = np.sort(np.where(crosses, x, np.inf), axis=1)
+    if x.shape[1] % 2:
+        x = np.hstack([x, np.full((len(x), 1), np.inf)])
+
+    # every row has an even number of crossings; pair them into spans
+    # [start, stop) of columns whose centres lie inside
+    start = np.clip(np.ceil(x[:, 0::2] - col0), 0, col1 - col0)
+    stop = np.clip(np.ceil(x[:, 1::2] - col0), 0, col1 - col0)
+    start = np.where(np.isfinite(start), start, col1 - col0).astype(np.intp)
+    stop = np.where(np.isfinite(stop), stop, col1 - col0).astype(np.intp)
+
+    rows = np.broadcast_to(np.arange(row1 - row0)[:, None], start.shape)
+    counts = np.zeros((row1 - row0, col1 - col0 + 1), dtype=np.int32)
+    np.add.at(counts, (rows, start), 1)
+    np.add.at(counts, (rows, stop), -1)
+    mask = np.cumsum(counts[:, :-1], axis=1) > 0
+    return PolygonRaster(row0, col0, mask)
+
+
+def intersect_rasters(rasters, shape):
+    """Pixels inside every polygon, as a full map.
+
+    Parameters
+    ----------
+    rasters : list of PolygonRaster
+        Rasterized polygons; with none, every pixel is inside.
+    shape : tuple of int
+        Map size ``(nrows, ncols)``.
+
+    Returns
+    -------
+    numpy.ndarray
+        Boolean array of ``shape``.
+    """
+    if not rasters:
+        return np.ones(shape, dtype=bool)
+
+    out = np.zeros(shape, dtype=bool)
+    r0 = max(r.row0 for r in rasters)
+    r1 = min(r.row1 for r in rasters)
+    c0 = max(r.col0 for r in rasters)
+    c1 = min(r.col1 for r in rasters)
+    if r0 >= r1 or c0 >= c1:
+        return out
+
+    region = np.ones((r1 - r0, c1 - c0), dtype=bool)
+    for r in rasters:
+        region &= r.mask[r0 - r.row0:r1 - r.row0, c0 - r.col0:c1 - r.col0]
+    out[r0:r1, c0:c1] = region
+    return out
+
+
+class PolygonRasterCache:
+    """Rasterized polygons, each rebuilt only when its vertices change.
+
+    Entries are kept per polygon (e.g. ``(sample_id, p_id)``) and keyed on
+    the polygon's vertex tuple and map size, so moving one vertex re-rasterizes
+    only that polygon.
+    """
+    def __init__(self):
+        self._rasters = {}  # polygon key -> (vertex key, PolygonRaster)
+
+    def __len__(self):
+        return len(self._rasters)
+
+    def get(self, key, verts, shape):
+        """Raster of polygon ``key``, re-rasterized if ``verts`` or ``shape`` changed.
+
+        Parameters
+        ----------
+        key : hashable
+            Identifies the polygon.
+        verts : sequence of (float, float)
+            Current vertices.
+        shape : tuple of int
+            Map size ``(nrows, ncols)``.
+
+        Returns
+        -------
+        PolygonRaster
+        """
+        vertex_key = (tuple((float(x), float(y)) for x, y in verts), tuple(shape))
+        cached = self._rasters.get(key)
+        if cached is not None and cached[0] == vertex_key:
+            return cached[1]
+        raster = rasterize_polygon(verts, shape)
+        self._rasters[key] = (vertex_key, raster)
+        return raster
+
+    def retain(self, keys):
+        """Drops the entries of polygons not in ``keys`` (e.g. deleted ones)."""
+        keys = set(keys)
+        for key in [k for k in self._rasters if k not in keys]:
+            del self._rasters[key]
+
+    def clear(self):
+        self._rasters.clear()
@@ -10,7 +10,6 @@ import src.plotting.CustomMplCanvas as mplc
 from scipy import ndimage
 from scipy.signal import convolve2d, wiener, decimate
 from pyqtgraph import ( ImageItem )
-import cv2
 from src.control.Logger import log, auto_log_methods
 from lame_core.ColorManager import convert_color
 
@@ -80,6 +79,8 @@ class ImageProcessing():
             # remove existing filters
             self.remove_edge_detection()
 
+        import cv2
+
         algorithm = self.parent.app_data.edge_detection_method.lower()
         if algorithm == 'sobel':
             # Apply Sobel edge detection
@@ -241,6 +242,8 @@ class ImageProcessing():
         # plot map
         self.array = np.reshape(map_df['array'].values, array_size, order=self.parent.data[self.parent.sample_id].order)
 
+        import cv2
+
         match algorithm:
             case 'none':
                 return
@@ -98,7 +98,7 @@ class AnalyteDialog(QDialog):
         self.correlation_matrix = None
 
         self.comboBoxCorrelation.clear()
-        self.correlation_methods = ["Pearson", "Spearman"]
+        self.correlation_methods = ["Pearson", "Spearman", "Kendall"]
         for method in self.correlation_methods:
             self.comboBoxCorrelation.addItem(method)
         self.comboBoxCorrelation.activated.connect(self.calculate_correlation)
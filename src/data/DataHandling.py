@@ -1,25 +1,35 @@
 import re, os, copy, json
+import itertools
 import uuid
 from datetime import datetime
+from collections import OrderedDict
+from contextlib import contextmanager
 from typing import Optional, Union, Any, Dict, List
 import numpy as np
 from numpy.typing import NDArray
 import pandas as pd
 from src.data.ExtendedDF import AttributeDataFrame
-from scipy.stats import yeojohnson
+from src.data.MaskStack import MaskStack
 from scipy import ndimage
 # from kneed import KneeLocator
-from sklearn.cluster import KMeans
-from sklearn.preprocessing import StandardScaler
 import matplotlib.pyplot as plt
 import lame_core.format as fmt
 from src.data.SortAnalytes import sort_analytes
 from src.data.outliers import chauvenet_criterion, quantile_and_difference
+from src.common.pyramid import ImagePyramid
+from src.common.binning import BinCountCache
+from src.common.correlation import CorrelationEngine
+from src.common.filtering import FilterEngine
+from src.common.formula import CalculatedFieldGraph
 from PyQt6.QtCore import QObject, pyqtSignal
 from PyQt6.QtWidgets import QMessageBox
 from src.app.Status import StatusMessageManager
 from src.control.Logger import LoggerConfig, auto_log_methods, log
 
+# processed-data versions are drawn from one counter, so a reloaded sample (a new
+# SampleObj with the same sample_id) never repeats the version of the one it replaces
+_processed_versions = itertools.count(1)
+
 
 @auto_log_methods(logger_key='Data')
 class SampleObj(QObject):
@@ -165,6 +175,7 @@ class SampleObj(QObject):
     'polygon_mask' : (MaskObj) -- mask created from selected polygons.
     'cluster_mask' : (MaskObj) -- mask created from selected or inverse selected cluster groups.  Once this mask is set, it cannot be reset unless it is turned off, clustering is recomputed, and selected clusters are used to produce a new mask.
     'mask' : () -- combined mask, derived from filter_mask & 'polygon_mask' & 'crop_mask'
+    'mask_stack' : (MaskStack) -- bit-packed, versioned storage of the mask layers and combined mask (see ``mask_version``).
 
     Signals
     -------
@@ -243,9 +254,28 @@ class SampleObj(QObject):
         # Default ref_chem for base class - empty Series, subclasses can override
         self._ref_chem = pd.Series(dtype=float)
 
-        # cache of analyte correlation matrices, keyed by method ('pearson', 'spearman');
-        # cleared whenever prep_data() runs since that's the only place analyte values change
-        self._correlation_cache = {}
+        # correlation matrices of processed columns, refreshed column by column using
+        # column_version (see get_correlation_matrix)
+        self.correlation_engine = CorrelationEngine()
+
+        # counts changes to processed values (prep_data, added/deleted columns, swaps);
+        # caches derived from processed data store the version they were built from
+        self._processed_version = next(_processed_versions)
+        # per-column change counters, plus an epoch for changes that touch every column,
+        # so calculated fields can tell whether their own inputs changed (see column_version)
+        self._column_versions = {}
+        self._columns_epoch = 0
+        # compiled formulas of 'Calculated' columns, recomputed after each change to
+        # processed that touches their inputs (see refresh_calculated_fields)
+        self.calculated_fields = CalculatedFieldGraph()
+        self._refreshing_calculated = False
+        # coarse image pyramid levels for recently plotted maps, least recently used first,
+        # held to a memory budget in bytes (see get_map_pyramid)
+        self._pyramid_cache = OrderedDict()
+        self._pyramid_cache_budget = 256 * 2**20
+        # histogram/heatmap bin counts, keyed by the plotting code on fields, edges,
+        # processed_version and mask/label digests (see src.common.binning)
+        self.binning_cache = BinCountCache()
 
         self._default_lower_bound = 0.005
         self._default_upper_bound = 0.995
@@ -562,13 +592,13 @@ class SampleObj(QObject):
     @property
     def crop_mask(self):
         """numpy.ndarray: Boolean mask used to crop the raw data. True values will be used."""
-        return self._crop_mask
+        return self.mask_stack['crop']
     
     @crop_mask.setter
     def crop_mask(self, new_xlim, new_ylim):
         self.crop=True
 
-        self._crop_mask = (
+        self.mask_stack['crop'] = (
             (self.raw['Xc'] >= new_xlim[0]) & 
             (self.raw['Xc'] <= new_xlim[1]) &
             (self.raw['Yc'] <= self.raw['Yc'].max() - new_ylim[0]) &
@@ -590,10 +620,67 @@ class SampleObj(QObject):
         self.x = self.processed['Xc']
         self.y = self.processed['Yc']
 
-        self._crop_mask = np.ones_like(self.raw['Xc'], dtype=bool)
+        self.mask_stack['crop'] = np.ones_like(self.raw['Xc'], dtype=bool)
 
         self.prep_data()
 
+    @property
+    def filter_mask(self):
+        """numpy.ndarray: Boolean mask of pixels passing the field filters."""
+        return self.mask_stack['filter']
+
+    @filter_mask.setter
+    def filter_mask(self, value):
+        self.mask_stack['filter'] = value
+
+    @property
+    def polygon_mask(self):
+        """numpy.ndarray: Boolean mask of pixels inside the selected polygons."""
+        return self.mask_stack['polygon']
+
+    @polygon_mask.setter
+    def polygon_mask(self, value):
+        self.mask_stack['polygon'] = value
+
+    @property
+    def cluster_mask(self):
+        """numpy.ndarray: Boolean mask of pixels in the selected cluster groups."""
+        return self.mask_stack['cluster']
+
+    @cluster_mask.setter
+    def cluster_mask(self, value):
+        self.mask_stack['cluster'] = value
+
+    @property
+    def roi_selection_mask(self):
+        """numpy.ndarray: Boolean mask of pixels in the selected regions of interest."""
+        return self.mask_stack['roi_selection']
+
+    @roi_selection_mask.setter
+    def roi_selection_mask(self, value):
+        self.mask_stack['roi_selection'] = value
+
+    @property
+    def mask(self):
+        """numpy.ndarray: Combined crop, filter, polygon, cluster and ROI-selection mask (read-only).
+
+        Rebuilt only after a layer changes. Setting it replaces the combined
+        mask (e.g. to also exclude missing values) until the next layer change.
+        """
+        return self.mask_stack.mask
+
+    @mask.setter
+    def mask(self, value):
+        self.mask_stack.mask = value
+
+    @property
+    def mask_version(self):
+        """int: Identifies the current combined mask; changes whenever it does.
+
+        Caches of masked results can key on it instead of hashing ``mask``.
+        """
+        return self.mask_stack.version
+
     def scale_options(self, plot_type: str|None=None, ax: str|None=None, field_type: str|None=None, field: str|None=None) -> list:
         """Options for scaling the data.
 
@@ -653,6 +740,9 @@ class SampleObj(QObject):
             self._ref_chem = value
         else:
             self._ref_chem = pd.Series(dtype=float)
+        # normalized fields change with the reference
+        self._invalidate_columns()
+        self.refresh_calculated_fields()
 
     @property
     def current_field(self):
@@ -789,18 +879,14 @@ class SampleObj(QObject):
         #non_ratio_columns = [col for col in sample_df.columns if col not in ratio_columns]
         #self.raw = sample_df[non_ratio_columns]
 
-        # set mask of size of analyte array
-        self._crop_mask = np.ones_like(self.raw['Xc'].values, dtype=bool)
-        self.filter_mask = np.ones_like(self.raw['Xc'].values, dtype=bool)
-        self.polygon_mask = np.ones_like(self.raw['Xc'].values, dtype=bool)
-        self.cluster_mask = np.ones_like(self.raw['Xc'].values, dtype=bool)
-        self.roi_selection_mask = np.ones_like(self.raw['Xc'].values, dtype=bool)
-        self.mask = \
-            self.crop_mask & \
-            self.filter_mask & \
-            self.polygon_mask & \
-            self.cluster_mask & \
-            self.roi_selection_mask
+        # set masks of size of analyte array, all True; layers are stored bit-packed
+        # and the combined mask is rebuilt only when a layer changes (see MaskStack)
+        self.mask_stack = MaskStack(len(self.raw))
+        # filter rows (live table and ROI definitions) are evaluated once per
+        # change of limits or field data, then reused (see FilterEngine)
+        self.filter_engine = FilterEngine(len(self.raw), self._filter_field_values, self._filter_field_version)
+        # correlation statistics are per pixel row, so they can't outlive a reset or crop
+        self.correlation_engine.clear()
 
         # Regions of interest: an ordered stack of named, colored, filter-defined
         # groups (see `add_roi`). Each entry remembers the filter definition that
@@ -811,7 +897,12 @@ class SampleObj(QObject):
         self.roi_stack = []
         self.selected_rois = []
 
+        # computed fields are removed by a reset
+        self.calculated_fields.clear()
+
         self.dim_red_results = {}
+        # input fingerprint of each fit in dim_red_results, so unchanged inputs aren't refit
+        self.dim_red_keys = {}
         self.cluster_results = {}
         self.silhouette_scores = {}
 
@@ -889,6 +980,8 @@ class SampleObj(QObject):
 
         self.x = self.raw['Xc']
         self.y = self.raw['Yc']
+        self._invalidate_columns()
+        self.refresh_calculated_fields()
 
         # swap orientation of original dx and dy to be consistent with X and Y
         self._orig_dx, self._orig_dy = self._orig_dy, self._orig_dx
@@ -989,28 +1082,236 @@ class SampleObj(QObject):
         self.processed.set_attribute(ratio_name, 'use', True)
         self.processed.set_attribute(ratio_name, 'use_normalized', False)
 
-    def get_correlation_matrix(self, method='pearson'):
-        """Correlation matrix between analyte columns, cached per method.
+    def get_correlation_matrix(self, method='pearson', columns=None, values=None, rows=None, rows_key=None):
+        """Correlation matrix between analyte columns.
 
-        Computing the correlation matrix (especially with ``'spearman'``, which ranks
-        every column) is expensive, so the result is cached and reused until ``prep_data``
-        next runs and invalidates the cache.
+        Pair statistics are kept by ``correlation_engine`` per column version,
+        so after a change only the changed columns' rows and columns of the
+        matrix are recomputed.
 
         Parameters
         ----------
         method : str
-            Correlation method, ``'pearson'`` or ``'spearman'``. Defaults to ``'pearson'``.
+            Correlation method, ``'pearson'``, ``'spearman'`` or ``'kendall'``.
+            Kendall's tau is estimated from a subsample of pixels; the returned
+            frame's ``attrs['kendall']`` holds the estimate with its confidence
+            interval. Defaults to ``'pearson'``.
+        columns : list of str, optional
+            Columns to correlate, by default all analytes of ``processed`` (or
+            all columns of ``values``).
+        values : pandas.DataFrame, optional
+            Data derived from ``processed`` column by column, such as the output
+            of ``get_processed_data``, by default ``processed`` itself. Each
+            column is versioned by the ``processed`` column it is named after
+            (less a ``' (normalized)'`` suffix) and that column's ``norm``,
+            ``use`` and ``use_normalized`` attributes.
+        rows : numpy.ndarray, optional
+            Boolean mask of pixels to correlate over, by default all pixels.
+        rows_key : hashable, optional
+            Identifies ``rows``; must change whenever ``rows`` does.
 
         Returns
         -------
         pandas.DataFrame
-            Correlation matrix indexed and labeled by analyte name.
+            Correlation matrix indexed and labeled by column name.
         """
-        method = method.lower()
-        if method not in self._correlation_cache:
-            analyte_columns = self.processed.match_attribute('data_type', 'Analyte')
-            self._correlation_cache[method] = self.processed[analyte_columns].corr(method=method)
-        return self._correlation_cache[method]
+        if values is None:
+            source, version = self.processed, self.column_version
+            if columns is None:
+                columns = self.processed.match_attribute('data_type', 'Analyte')
+        else:
+            source = values
+            if columns is None:
+                columns = list(values.columns)
+
+            def version(column):
+                field = column.removesuffix(' (normalized)')
+                attributes = tuple(self.processed.get_attribute(field, a) for a in ('norm', 'use', 'use_normalized'))
+                return self.column_version(field), attributes, column
+
+        return self.correlation_engine.matrix(
+            columns,
+            lambda column: source[column].to_numpy(),
+            version,
+            method=method,
+            rows=rows,
+            key=('processed' if values is None else 'derived', rows_key),
+        )
+
+    @property
+    def processed_version(self):
+        """int: Increases whenever values in ``processed`` change, for invalidating derived caches.
+
+        Unique across samples, so ``(sample_id, processed_version)`` identifies
+        the data even after a sample is reloaded.
+        """
+        return self._processed_version
+
+    def _invalidate_columns(self, columns=None):
+        """Records a change to ``columns`` of ``processed``, or to every column when ``None``."""
+        self._processed_version = next(_processed_versions)
+        if columns is None:
+            self._columns_epoch += 1
+            return
+        for column in columns:
+            self._column_versions[column] = self._column_versions.get(column, 0) + 1
+
+    def column_version(self, column):
+        """tuple: Changes whenever the values of ``column`` in ``processed`` may have changed."""
+        return self._columns_epoch, self._column_versions.get(column, 0)
+
+    def _calculated_field_stamp(self, plan):
+        return tuple(self.column_version(ref.field) for ref in plan.references)
+
+    def _calculated_field_values(self, plan):
+        inputs = [self.get_map_data(ref.field, ref.field_type)['array'].to_numpy() for ref in plan.references]
+        return plan.evaluate(inputs, n_rows=self.processed.shape[0])
+
+    def add_calculated_field(self, field, plan):
+        """Computes a calculator formula into a 'Calculated' column and keeps it up to date.
+
+        The compiled formula is registered with ``calculated_fields``; whenever
+        one of its inputs changes afterwards, the column is recomputed by the
+        method that changed it (see ``refresh_calculated_fields``).
+
+        Parameters
+        ----------
+        field : str
+            Name of the calculated column.
+        plan : src.common.formula.FormulaPlan
+            Compiled formula (``src.common.formula.compile_formula``).
+
+        Raises
+        ------
+        FormulaError
+            If the formula can't be evaluated on this sample or depends on ``field`` itself.
+        KeyError
+            If the formula references a column this sample doesn't have.
+        """
+        # register first, so a formula depending on itself is rejected before evaluating it
+        previous = self.calculated_fields.plan(field) if field in self.calculated_fields else None
+        previous_stamp = self.calculated_fields.stamp(field)
+        self.calculated_fields.add(field, plan)
+        try:
+            for ref in plan.references:
+                if ref.field in self.calculated_fields:
+                    self.refresh_calculated_field(ref.field)
+            values = self._calculated_field_values(plan)
+        except Exception:
+            if previous is None:
+                self.calculated_fields.discard(field)
+            else:
+                self.calculated_fields.add(field, previous, previous_stamp)
+            raise
+        with self._holding_calculated_refresh():
+            self.add_columns('Calculated', field, values)
+            self.calculated_fields.mark_computed(field, self._calculated_field_stamp(plan))
+        # fields computed from a redefined field
+        self.refresh_calculated_fields()
+
+    @contextmanager
+    def _holding_calculated_refresh(self):
+        """Defers ``refresh_calculated_fields`` while a calculated column is being written."""
+        previous = self._refreshing_calculated
+        self._refreshing_calculated = True
+        try:
+            yield
+        finally:
+            self._refreshing_calculated = previous
+
+    def refresh_calculated_fields(self):
+        """Recomputes every calculated field whose inputs changed since it was computed.
+
+        Called by the methods that change ``processed`` (``prep_data``,
+        ``add_columns``, coordinate swaps, a new reference chemistry), once the
+        change is complete, so reads such as ``get_map_data`` never write to
+        ``processed`` and are safe from worker threads.
+
+        Returns
+        -------
+        list of str
+            Calculated fields that were recomputed.
+        """
+        if self._refreshing_calculated or not self.calculated_fields:
+            return []
+        with self._holding_calculated_refresh():
+            return [field for field in list(self.calculated_fields) if self.refresh_calculated_field(field)]
+
+    def refresh_calculated_field(self, field):
+        """Recomputes calculated ``field`` if any of its inputs changed since it was computed.
+
+        Calculated inputs are refreshed first, so a change propagates only
+        through the fields downstream of it. Attributes of the column (scale,
+        bounds, ``formula``) are kept.
+
+        Returns
+        -------
+        bool
+            ``True`` if the column was recomputed.
+        """
+        plan = self.calculated_fields.plan(field)
+        for ref in plan.references:
+            if ref.field in self.calculated_fields:
+                self.refresh_calculated_field(ref.field)
+
+        stamp = self._calculated_field_stamp(plan)
+        if field in self.processed.columns and self.calculated_fields.stamp(field) == stamp:
+            return False
+        if any(ref.field not in self.processed.columns for ref in plan.references):
+            # an input was removed; keep whatever values the column still has
+            return False
+
+        values = self._calculated_field_values(plan)
+        with self._holding_calculated_refresh():
+            if field in self.processed.columns:
+                self.processed[field] = values
+                self._invalidate_columns([field])
+            else:
+                # dropped when processed was rebuilt (prep_data('all')); restore it with its formula
+                self.add_columns('Calculated', field, values)
+                self.processed.set_attribute(field, 'formula', plan.text)
+            self.calculated_fields.mark_computed(field, stamp)
+        return True
+
+    def get_map_pyramid(self, key, array, categorical=False):
+        """Image pyramid for a reshaped map, reusing cached coarse levels.
+
+        Building the block-mean levels of a large map costs about as much as
+        one full-resolution draw, so the coarse levels are cached per map and
+        reused until ``processed`` changes (see ``processed_version``).
+
+        Parameters
+        ----------
+        key : tuple
+            Identifies what ``array`` shows, e.g. ``(field_type, field, equalized)``.
+        array : numpy.ndarray
+            Full-resolution map, shape ``array_size``.
+        categorical : bool, optional
+            Whether ``array`` holds labels, downsampled by block mode rather
+            than block mean (see ``ImagePyramid``), by default False.
+
+        Returns
+        -------
+        ImagePyramid
+            Pyramid with ``array`` as level 0.
+        """
+        stamp = (self._processed_version, array.shape, categorical)
+        cached = self._pyramid_cache.get(key)
+        if cached is not None and cached[0] == stamp:
+            self._pyramid_cache.move_to_end(key)
+            return ImagePyramid(array, coarse=cached[1], categorical=categorical)
+
+        pyramid = ImagePyramid(array, categorical=categorical)
+        self._pyramid_cache[key] = (stamp, pyramid.coarse)
+        self._pyramid_cache.move_to_end(key)
+
+        def nbytes(entry):
+            return sum(level.nbytes for level in entry[1])
+        total = sum(nbytes(entry) for entry in self._pyramid_cache.values())
+        while total > self._pyramid_cache_budget and len(self._pyramid_cache) > 1:
+            _, evicted = self._pyramid_cache.popitem(last=False)
+            total -= nbytes(evicted)
+        return pyramid
 
     # ------------------------------------------
     # Dialogs
@@ -1112,6 +1413,7 @@ class SampleObj(QObject):
                 raise ValueError("The number of rows in (array) must match the number of `True` values in the mask.")
 
         result = {}
+        self._invalidate_columns(column_names)
 
         # Loop through each column
         for i, column_name in enumerate(column_names):
@@ -1174,6 +1476,8 @@ class SampleObj(QObject):
             self.processed.set_attribute(column_name, 'p_min', None)
             self.processed.set_attribute(column_name, 'p_max', None)
 
+        self.refresh_calculated_fields()
+
         # Return a message if a single column was added, or the result dictionary for multiple columns
         if len(column_names) == 1:
             return result[column_names[0]]
@@ -1329,6 +1633,11 @@ class SampleObj(QObject):
             formula = self.processed.get_attribute(field, 'formula')
             if formula:
                 computed_fields.append(ComputedFieldSpec(field=field, formula=formula))
+        # calculated columns missing from processed (e.g. an input was deleted) are still registered
+        listed = {spec.field for spec in computed_fields}
+        for field in self.calculated_fields:
+            if field not in listed:
+                computed_fields.append(ComputedFieldSpec(field=field, formula=self.calculated_fields.plan(field).text))
 
         return SampleProcessingState(
             applied_filters=applied_filters,
@@ -1423,6 +1732,8 @@ class SampleObj(QObject):
         
         # Remove the column from the DataFrame
         self.processed.drop(columns=[column_name], inplace=True)
+        self._invalidate_columns([column_name])
+        self.calculated_fields.discard(column_name)
         
         # Remove associated attributes, if any
         if column_name in self.processed.column_attributes:
@@ -1438,6 +1749,10 @@ class SampleObj(QObject):
         re-checking which pixels a committed ROI's own stored filter
         definition currently matches (see `recompute_roi_assignments`).
 
+        Rows are evaluated through `self.filter_engine`, which caches each
+        row's result until its limits, operator or field data change, so only
+        edited rows are compared against the data again.
+
         Parameters
         ----------
         filter_df : pandas.DataFrame
@@ -1449,37 +1764,28 @@ class SampleObj(QObject):
         numpy.ndarray of bool
             One entry per row of `self.processed`.
         """
-        mask = np.ones_like(self.processed['Xc'].values, dtype=bool)
-        for _, filter_row in filter_df.iterrows():
-            use_val = filter_row['use']
-            if isinstance(use_val, str):
-                use_val = use_val.strip().lower() == 'true'
-            if not use_val:
-                continue
-            try:
-                field_df = self.get_map_data(filter_row['field'], filter_row['field_type'])
-            except KeyError:
-                # Field doesn't exist in the current sample — skip this filter
-                continue
+        return self.filter_engine.evaluate(filter_df)
+
+    def _filter_field_values(self, field, field_type):
+        """Values a filter row on ``field`` compares against its limits."""
+        return self.get_map_data(field, field_type)['array'].to_numpy()
 
-            field_mask = ((filter_row['min'] <= field_df['array'].values) & (field_df['array'].values <= filter_row['max']))
+    def _filter_field_version(self, field, field_type):
+        """Data version of a filtered field, for `filter_engine` cache keys."""
+        return self.column_version(field)
 
-            operator = filter_row['operator']
-            if operator == 'and':
-                mask = mask & field_mask
-            elif operator == 'or':
-                mask = mask | field_mask
-            elif operator == 'not':
-                mask = mask & ~field_mask
-        return mask
+    def _retain_filter_cache(self):
+        """Drops cached filter rows no longer used by the live table or any ROI."""
+        self.filter_engine.retain([self.filter_df] + [r['filter_df'] for r in self.roi_stack])
 
     def apply_field_filters(self):
         """Applies filters based on field values.
 
         Field-based filters are stored in ``self.filter_df``.  This method updates ``self.filter_mask``.
         """
+        self.refresh_calculated_fields()
         self.filter_mask = self._compute_filter_mask(self.filter_df)
-        self.mask = self.crop_mask & self.filter_mask & self.polygon_mask & self.cluster_mask & self.roi_selection_mask
+        self._retain_filter_cache()
         log(f"apply_field_filters: filter_mask={self.filter_mask.sum()}/{len(self.filter_mask)} True, mask={self.mask.sum()}/{len(self.mask)} True", prefix='Mask')
 
     # -------------------------------------
@@ -1565,27 +1871,25 @@ class SampleObj(QObject):
     def recompute_roi_assignments(self):
         """Rebuild the `processed['ROI']` column from the current stack.
 
-        Walks `self.roi_stack` in order, evaluating each region's own stored
-        filter definition (`_compute_filter_mask`) and stamping its id onto
-        matching pixels -- later (higher-index) regions overwrite earlier
-        ones on overlapping pixels, so stack order is priority order.
+        Evaluates each region's own stored filter definition (through
+        `self.filter_engine`, so only rows edited since the last pass touch the
+        data) and labels every pixel with the id of the last (highest-index)
+        region containing it in one vectorized pass -- stack order is
+        priority order.
         Unclaimed pixels stay 0. Also refreshes `roi_selection_mask` (which
         ROI ids are currently selected for display) and the combined
         `self.mask`.
         """
         n = self.processed.shape[0]
-        roi_values = np.zeros(n, dtype=float)
-        for entry in self.roi_stack:
-            member_mask = self._compute_filter_mask(entry['filter_df'])
-            roi_values[member_mask] = entry['id']
+        ids = [r['id'] for r in self.roi_stack]
+        roi_values = self.filter_engine.label([r['filter_df'] for r in self.roi_stack], ids)
+        self._retain_filter_cache()
 
-        self.add_columns('ROI', 'ROI', roi_values)
+        self.add_columns('ROI', 'ROI', roi_values.astype(float))
 
-        ids = [r['id'] for r in self.roi_stack]
         self.selected_rois = [i for i in self.selected_rois if i in ids]
         selected = self.selected_rois if self.selected_rois else ids
         self.roi_selection_mask = np.isin(roi_values, selected) if selected else np.ones(n, dtype=bool)
-        self.mask = self.crop_mask & self.filter_mask & self.polygon_mask & self.cluster_mask & self.roi_selection_mask
 
     def roi_percentages(self):
         """Computes, per ROI, what fraction of the map it occupies.
@@ -1871,6 +2175,8 @@ class SampleObj(QObject):
         optimal_clusters = self.k_optimal_clusters(analyte_data[mask_central])
 
         # Fit KMeans with the optimal number of clusters
+        from sklearn.cluster import KMeans
+
         kmeans = KMeans(n_clusters=optimal_clusters, random_state=42)
         cluster_labels = kmeans.fit_predict(analyte_data)
 
@@ -1920,8 +2226,8 @@ class SampleObj(QObject):
             processed data has not yet been initialized.  processed data should be created when the sample is initialized and prep_data is
             run for the first time.
         """
-        # processed is about to change, so any cached correlation matrix is now stale
-        self._correlation_cache = {}
+        # outlier clipping below touches every column, not just `field`
+        self._invalidate_columns()
 
         analyte_columns = []
         ratio_columns = []
@@ -2048,6 +2354,9 @@ class SampleObj(QObject):
             if self.processed.get_attribute(col, 'data_type') == 'coordinate' and self.processed.get_attribute(col, 'norm') is None:
                 self.processed.set_attribute(col, 'norm', 'linear')
 
+        # calculated fields follow their (re)processed inputs
+        self.refresh_calculated_fields()
+
     def k_optimal_clusters(self, data: np.ndarray, max_clusters: int=10):
         """
         Predicts the optimal number of clusters.
@@ -2091,6 +2400,8 @@ class SampleObj(QObject):
         data = np.log(np.clip(data, lower_bound, upper_bound))
         
         # Perform KMeans for cluster numbers from 1 to max_clusters
+        from sklearn.cluster import KMeans
+
         for n_clusters in range(1, max_clusters+1):
             kmeans = KMeans(n_clusters=n_clusters, random_state=42)
             kmeans.fit(data)
@@ -2221,6 +2532,8 @@ class SampleObj(QObject):
                     t_array = (max_val * (array - min_val)) / (max_val - min_val) if min_val < 0 else np.copy(array)
 
             case 'yeo-johnson transform':
+                from scipy.stats import yeojohnson
+
                 t_array, _ = yeojohnson(array)
 
         return t_array
@@ -2374,6 +2687,9 @@ class SampleObj(QObject):
         if self.sample_id == '':
             return
 
+        # analysis runs on the GUI thread; bring calculated fields up to date before reading them
+        self.refresh_calculated_fields()
+
         columns = {}
         for field_type in field_types:
             for field in self.processed.match_attributes({'data_type': field_type, 'use': True}):
@@ -2399,7 +2715,8 @@ class SampleObj(QObject):
         # Combine the two masks to create a final mask
         nan_mask = df.notna().all(axis=1) if use_fields else pd.Series(True, index=self.processed.index)
 
-        # mask nan values and add to self.mask
+        # mask nan values and add to self.mask; mask_version (and the caches keyed
+        # on it) only changes if this masks pixels that weren't masked already
         self.mask = self.mask & nan_mask.values
 
         return df, use_fields
@@ -2928,6 +3245,8 @@ class LaserSampleObj(SampleObj):
     @ref_chem.setter
     def ref_chem(self, d):
         self._ref_chem = d
+        self._invalidate_columns()
+        self.refresh_calculated_fields()
 
 @auto_log_methods(logger_key='Data')
 class XRFSampleObj(SampleObj):
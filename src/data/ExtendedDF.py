@@ -1,6 +1,333 @@
 import copy
+import weakref
+from collections.abc import MutableMapping
+import numpy as np
 import pandas as pd
 
+_MISSING = object()
+
+
+def _is_immutable(value):
+    """True for values that can't be changed in place (scalars, strings and tuples of them)."""
+    if isinstance(value, (str, bytes, int, float, complex, type(None), np.generic)):
+        return True
+    if isinstance(value, (tuple, frozenset)):
+        return all(_is_immutable(v) for v in value)
+    return False
+
+
+class AttributeTable:
+    """Column attributes of an ``AttributeDataFrame``, stored by attribute.
+
+    Each attribute holds a ``{column: value}`` dict, with the table's columns
+    (rows of the table) kept in order. Frames derived from one another by
+    pandas operations share a table until one of them writes to it
+    (copy-on-write, see ``AttributeDataFrame.__finalize__``); the table keeps
+    weak references to the frames using it, so a frame that is garbage
+    collected no longer counts as sharing it. ``match``/``groups`` answer
+    from inverted ``{value: columns}`` indexes, built per attribute on first
+    use and kept up to date by ``set`` and ``delete``. A column without an
+    attribute counts as having the value ``None``.
+
+    Set attribute values through the table (or
+    ``AttributeDataFrame.set_attribute``). A frame handing out a mutable value
+    (a list, dict, array, ...) first copies a shared table, as for a write, so
+    changing that value in place only affects the frame it was read from.
+    """
+    def __init__(self, rows=None):
+        self._columns = {}     # column -> None, in table order
+        self._data = {}        # attribute -> {column: value}
+        self._index = {}       # attribute -> {value: {column: None}}
+        self._unsorted = set() # (attribute, value) buckets no longer in table order
+        self._positions = None
+        # id(frame) -> weak reference, for each frame using the table
+        self._owners = {}
+        for column, attributes in (rows or {}).items():
+            self.set_row(column, attributes)
+
+    def __getstate__(self):
+        return {'_columns': self._columns, '_data': self._data}
+
+    def __setstate__(self, state):
+        self.__init__()
+        self._columns = state['_columns']
+        self._data = state['_data']
+
+    def __len__(self):
+        return len(self._columns)
+
+    def __contains__(self, column):
+        return column in self._columns
+
+    @property
+    def columns(self):
+        """list: Columns with attributes, in table order."""
+        return list(self._columns)
+
+    @property
+    def attributes(self):
+        """list: Attribute names, in the order they were first set."""
+        return list(self._data)
+
+    def share(self, frame):
+        """Records ``frame`` as using the table and returns the table."""
+        key = id(frame)
+        if key not in self._owners:
+            owners = self._owners
+            owners[key] = weakref.ref(frame, lambda ref, key=key: owners.get(key) is ref and owners.pop(key))
+        return self
+
+    def release(self, frame):
+        """Records ``frame`` as no longer using the table."""
+        self._owners.pop(id(frame), None)
+
+    def is_shared(self, frame):
+        """True if a frame other than ``frame`` uses the table."""
+        return len(self._owners) > (id(frame) in self._owners)
+
+    def clone(self):
+        """Independent copy (values deep-copied) for a frame about to write."""
+        table = AttributeTable()
+        table._columns = dict(self._columns)
+        table._data = copy.deepcopy(self._data)
+        return table
+
+    def subset(self, columns):
+        """Table of ``columns`` (in that order), self when unchanged."""
+        columns = [c for c in columns if c in self._columns]
+        if columns == list(self._columns):
+            return self
+        table = AttributeTable()
+        table._columns = dict.fromkeys(columns)
+        for attribute, values in self._data.items():
+            table._data[attribute] = {c: values[c] for c in columns if c in values}
+        return table
+
+    # ---- reading ----
+    def get(self, column, attribute, default=None):
+        values = self._data.get(attribute)
+        return default if values is None else values.get(column, default)
+
+    def has(self, column, attribute):
+        return column in self._data.get(attribute, ())
+
+    def row(self, column):
+        """Attributes of ``column`` as a new dict."""
+        return {a: values[column] for a, values in self._data.items() if column in values}
+
+    def attributes_of(self, column):
+        return [a for a, values in self._data.items() if column in values]
+
+    def _position(self, column):
+        if self._positions is None:
+            self._positions = {c: i for i, c in enumerate(self._columns)}
+        return self._positions[column]
+
+    def _in_order(self, columns):
+        return sorted(columns, key=self._position)
+
+    def _bucket(self, attribute, index, value):
+        bucket = index.get(value)
+        if bucket is None:
+            return ()
+        if (attribute, value) in self._unsorted:
+            self._unsorted.discard((attribute, value))
+            bucket = index[value] = dict.fromkeys(self._in_order(bucket))
+        return bucket
+
+    def _get_index(self, attribute):
+        """Inverted index of ``attribute``, or None if a value is unhashable."""
+        index = self._index.get(attribute)
+        if index is not None:
+            return index
+        values = self._data.get(attribute, {})
+        index = {}
+        try:
+            for column in self._columns:
+                index.setdefault(values.get(column), {})[column] = None
+        except TypeError:
+            return None
+        self._index[attribute] = index
+        return index
+
+    def match(self, attribute, values):
+        """Columns whose ``attribute`` equals one of ``values``, in table order."""
+        index = self._get_index(attribute)
+        if index is not None:
+            try:
+                buckets = [self._bucket(attribute, index, v) for v in values]
+            except TypeError:
+                index = None
+        if index is None:
+            return [c for c in self._columns if self.get(c, attribute) in values]
+        if len(buckets) == 1:
+            return list(buckets[0])
+        return self._in_order({c for bucket in buckets for c in bucket})
+
+    def match_all(self, attributes):
+        """Columns whose attributes equal every ``{attribute: value}`` pair, in table order."""
+        columns = None
+        for attribute, value in attributes.items():
+            matched = self.match(attribute, [value])
+            columns = set(matched) if columns is None else columns.intersection(matched)
+            if not columns:
+                return []
+        if columns is None:
+            return list(self._columns)
+        return self._in_order(columns)
+
+    def groups(self, attribute):
+        """``{value: columns}`` of ``attribute``, ordered by first appearance."""
+        index = self._get_index(attribute)
+        if index is None:
+            groups = {}
+            for column in self._columns:
+                value = self.get(column, attribute)
+                if value in groups:
+                    groups[value].append(column)
+                else:
+                    groups[value] = [column]
+            return groups
+        groups = [(value, list(self._bucket(attribute, index, value))) for value in list(index)]
+        groups = [g for g in groups if g[1]]
+        groups.sort(key=lambda g: self._position(g[1][0]))
+        return dict(groups)
+
+    # ---- writing ----
+    def _add_column(self, column):
+        if column in self._columns:
+            return
+        self._columns[column] = None
+        if self._positions is not None:
+            self._positions[column] = len(self._positions)
+        for index in self._index.values():
+            index.setdefault(None, {})[column] = None
+
+    def _reindex(self, attribute, column, old, new):
+        index = self._index.get(attribute)
+        if index is None:
+            return
+        try:
+            bucket = index.get(old)
+            if bucket is not None:
+                bucket.pop(column, None)
+            bucket = index.setdefault(new, {})
+            if bucket and self._position(next(reversed(bucket))) > self._position(column):
+                self._unsorted.add((attribute, new))
+            bucket[column] = None
+        except TypeError:
+            # unhashable value: this attribute is matched by scanning
+            del self._index[attribute]
+            self._unsorted = {k for k in self._unsorted if k[0] != attribute}
+
+    def set(self, column, attribute, value):
+        self._add_column(column)
+        values = self._data.setdefault(attribute, {})
+        old = values.get(column)
+        values[column] = value
+        self._reindex(attribute, column, old, value)
+
+    def delete(self, column, attribute):
+        values = self._data.get(attribute)
+        if values is None or column not in values:
+            raise KeyError(attribute)
+        old = values.pop(column)
+        self._reindex(attribute, column, old, None)
+
+    def set_row(self, column, attributes):
+        """Replaces every attribute of ``column`` with ``attributes``."""
+        for attribute in self.attributes_of(column):
+            if attribute not in attributes:
+                self.delete(column, attribute)
+        for attribute, value in attributes.items():
+            self.set(column, attribute, value)
+        self._add_column(column)
+
+    def remove_column(self, column):
+        if column not in self._columns:
+            raise KeyError(column)
+        del self._columns[column]
+        for values in self._data.values():
+            values.pop(column, None)
+        for index in self._index.values():
+            for bucket in index.values():
+                bucket.pop(column, None)
+        self._positions = None
+
+
+class _ColumnAttributes(MutableMapping):
+    """Dict-like view of one column's attributes, writing through to the frame."""
+    def __init__(self, frame, column):
+        self._frame = frame
+        self._column = column
+
+    def __getitem__(self, attribute):
+        value = self._frame._read(
+            lambda table: table.get(self._column, attribute, _MISSING),
+            values=lambda value: () if value is _MISSING else (value,),
+        )
+        if value is _MISSING:
+            raise KeyError(attribute)
+        return value
+
+    def __setitem__(self, attribute, value):
+        self._frame._table(write=True).set(self._column, attribute, value)
+
+    def __delitem__(self, attribute):
+        self._frame._table(write=True).delete(self._column, attribute)
+
+    def __iter__(self):
+        return iter(self._frame._table().attributes_of(self._column))
+
+    def __len__(self):
+        return len(self._frame._table().attributes_of(self._column))
+
+    def __contains__(self, attribute):
+        return self._frame._table().has(self._column, attribute)
+
+    def copy(self):
+        return self._frame._read(lambda table: table.row(self._column), values=dict.values)
+
+    def __repr__(self):
+        return repr(self.copy())
+
+
+class _AttributeMapping(MutableMapping):
+    """Dict-of-dicts view of ``AttributeDataFrame.column_attributes``."""
+    def __init__(self, frame):
+        self._frame = frame
+
+    def __getitem__(self, column):
+        if column not in self._frame._table():
+            raise KeyError(column)
+        return _ColumnAttributes(self._frame, column)
+
+    def __setitem__(self, column, attributes):
+        self._frame._table(write=True).set_row(column, dict(attributes))
+
+    def __delitem__(self, column):
+        self._frame._table(write=True).remove_column(column)
+
+    def __iter__(self):
+        return iter(self._frame._table().columns)
+
+    def __len__(self):
+        return len(self._frame._table())
+
+    def __contains__(self, column):
+        return column in self._frame._table()
+
+    def copy(self):
+        """Plain ``{column: {attribute: value}}`` dict."""
+        return self._frame._read(
+            lambda table: {column: table.row(column) for column in table.columns},
+            values=lambda rows: [v for row in rows.values() for v in row.values()],
+        )
+
+    def __repr__(self):
+        return repr(self.copy())
+
+
 class AttributeDataFrame(pd.DataFrame):
     """Creates a pandas DataFrame with custom attributes stored with each column.
 
@@ -83,25 +410,77 @@ class AttributeDataFrame(pd.DataFrame):
     #df.set_attribute('Temperature', 'range', (20, 25))
     #print(df.get_attribute('Temperature', 'range'))         # Output: (20, 25)
     """    
-    _metadata = ['column_attributes']
+    _metadata = ['_attribute_table']
 
     @property
     def _constructor(self):
         return AttributeDataFrame
 
     def __finalize__(self, other, method=None, **kwargs):
-        """Ensure ``column_attributes`` is deep-copied rather than shared by reference.
+        """Share ``other``'s attribute table until either frame writes to it.
 
         Pandas propagates ``_metadata`` attributes by reference during ``.copy()``,
-        ``copy.deepcopy()``, and other operations. Without this override, ``raw`` and
-        ``processed`` frames created from one another end up sharing the same
-        ``column_attributes`` dict, so mutating one silently mutates the other.
+        ``copy.deepcopy()``, and other operations. ``raw`` and ``processed`` frames
+        created from one another must not see each other's attribute changes, but
+        deep-copying the attributes on every propagating operation made slicing and
+        copying frames with hundreds of columns slow. The table is shared instead and
+        copied by whichever frame writes to it first (see `AttributeTable`).
         """
         super().__finalize__(other, method=method, **kwargs)
         if isinstance(other, AttributeDataFrame):
-            self.column_attributes = copy.deepcopy(other.column_attributes)
+            self._set_table(other._table())
         return self
 
+    def __setstate__(self, state):
+        # frames pickled together unpickle sharing one table, which records no users
+        super().__setstate__(state)
+        table = self.__dict__.get('_attribute_table')
+        if table is not None:
+            table.share(self)
+        if 'attribute_callback' not in self.__dict__:
+            object.__setattr__(self, 'attribute_callback', None)
+
+    def _set_table(self, table):
+        """Makes ``table`` the frame's attribute table, recording the frame as using it."""
+        old = self.__dict__.get('_attribute_table')
+        if old is not None and old is not table:
+            old.release(self)
+        self._attribute_table = table.share(self)
+
+    def _table(self, write=False):
+        """Attribute table of the frame, copied first if ``write`` and it is shared."""
+        table = self.__dict__.get('_attribute_table')
+        if table is None:
+            table = AttributeTable()
+            self._set_table(table)
+        elif write and table.is_shared(self):
+            table = table.clone()
+            self._set_table(table)
+        return table
+
+    def _read(self, read, values=lambda value: (value,)):
+        """Result of ``read(table)``, read from a private copy of a shared table
+        (as for a write) if it holds mutable ``values``, so changing them in place
+        doesn't reach the other frames."""
+        table = self._table()
+        result = read(table)
+        if table.is_shared(self) and not all(_is_immutable(v) for v in values(result)):
+            result = read(self._table(write=True))
+        return result
+
+    @property
+    def column_attributes(self):
+        """dict-like : ``{column: {attribute: value}}`` view of the column attributes.
+
+        Reads and writes go through the frame's `AttributeTable`; ``.copy()``
+        returns a plain dict of dicts.
+        """
+        return _AttributeMapping(self)
+
+    @column_attributes.setter
+    def column_attributes(self, value):
+        self._set_table(AttributeTable({c: dict(a) for c, a in (value or {}).items()}))
+
     def __init__(self, data=None, *args, **kwargs):
         super().__init__()
 
@@ -120,11 +499,7 @@ class AttributeDataFrame(pd.DataFrame):
     def __getitem__(self, key):
         result = super().__getitem__(key)
         if isinstance(result, pd.DataFrame):
-            result.column_attributes = {
-                col: self.column_attributes[col]
-                for col in result.columns
-                if col in self.column_attributes
-            }
+            result._set_table(self._table().subset(result.columns))
         return result
 
     # # Override __setitem__ to detect when data changes
@@ -177,7 +552,7 @@ class AttributeDataFrame(pd.DataFrame):
         bool
             True if the attribute exists for the column, False otherwise.
         """
-        return column in self.column_attributes and attribute in self.column_attributes[column]
+        return self._table().has(column, attribute)
 
     def show_attributes(self, column=None):
         """Displays all attributes for a specific column or for the entire DataFrame."""
@@ -218,10 +593,10 @@ class AttributeDataFrame(pd.DataFrame):
         # Output: ['Celsius', 'Pascal']
         """
         if isinstance(columns, str):  # Handle single column input
-            return self.column_attributes.get(columns, {}).get(attribute)
+            return self._read(lambda table: table.get(columns, attribute))
         
         # Handle multiple columns
-        return [self.column_attributes.get(column, {}).get(attribute) for column in columns]
+        return self._read(lambda table: [table.get(column, attribute) for column in columns], values=iter)
 
     def _set_attribute(self, column, attribute, value):
         """Set attribute of an AttributeDataFrame
@@ -245,9 +620,7 @@ class AttributeDataFrame(pd.DataFrame):
         df._set_attribute('Temperature', 'average', 22)
         df._set_attribute('Pressure', 'average', 101)
         """        
-        if column not in self.column_attributes:
-            self.column_attributes[column] = {}
-        self.column_attributes[column][attribute] = value
+        self._table(write=True).set(column, attribute, value)
 
     def set_attribute(self, columns, attribute, values):
         """
@@ -315,9 +688,9 @@ class AttributeDataFrame(pd.DataFrame):
             A list of column names that have the attribute set to the specified value.
         """
         if isinstance(value, list):
-            return [col for col, attrs in self.column_attributes.items() if attrs.get(attribute) in value]
+            return self._table().match(attribute, value)
         else:
-            return [col for col, attrs in self.column_attributes.items() if attrs.get(attribute) == value]
+            return self._table().match(attribute, [value])
 
     def match_attributes(self, attributes_dict):
         """
@@ -333,8 +706,7 @@ class AttributeDataFrame(pd.DataFrame):
         list
             A list of column names where each attribute matches its corresponding value.
         """
-        return [col for col, attrs in self.column_attributes.items()
-                if all(attrs.get(attr) == val for attr, val in attributes_dict.items())]
+        return self._table().match_all(attributes_dict)
 
     def get_attribute_dict(self, attribute_name):
         """
@@ -352,17 +724,15 @@ class AttributeDataFrame(pd.DataFrame):
             A dictionary with attribute_values and columns that match.
         """
 
-        # Initialize an empty dictionary
         attribute_dict = {}
-        for k in self.column_attributes.keys():
-            attribute = self.column_attributes[k].get(attribute_name)
+        for attribute, columns in self._table().groups(attribute_name).items():
             if attribute is None:
                 attribute = 'none'
 
             if attribute not in attribute_dict:
-                attribute_dict[attribute] = [k]
+                attribute_dict[attribute] = columns
             else:
-                attribute_dict[attribute].append(k)
+                attribute_dict[attribute] += columns
         
         return attribute_dict
 
@@ -402,7 +772,9 @@ class AttributeDataFrame(pd.DataFrame):
         attribute_dict = {}
 
         # Loop through each column in the AttributeDataFrame
-        for column, col_attributes in self.column_attributes.items():
+        table = self._table()
+        for column in table.columns:
+            col_attributes = table.row(column)
             # For each column, check if we are selecting specific attributes or including all
             for attr, value in col_attributes.items():
                 if attributes is None or attr in attributes:
@@ -461,7 +833,7 @@ class AttributeDataFrame(pd.DataFrame):
         # Copy the corresponding column attributes to the new DataFrame
         for column in columns:
             if column in self.column_attributes:
-                new_attribute_df.column_attributes[column] = copy.deepcopy(self.column_attributes[column])
+                new_attribute_df.column_attributes[column] = copy.deepcopy(self._table().row(column))
 
         return new_attribute_df
 
@@ -497,6 +869,8 @@ class AttributeDataFrame(pd.DataFrame):
         # Reorder the DataFrame and attributes accordingly
         self[:] = self.reindex(columns=new_order, copy=False)
         self.columns = new_order
-        self.column_attributes = {col: self.column_attributes[col] for col in new_order if col in self.column_attributes}
+        table = self._table()
+        if list(new_order) != table.columns:
+            self._set_table(table.subset(new_order))
 
         return self
\ No newline at end of file
@@ -0,0 +1,148 @@
+"""Bit-packed, versioned store for a sample's mask layers.
+
+A sample's ``mask`` is the intersection of its crop, filter, polygon, cluster
+and ROI-selection masks. ``MaskStack`` keeps each layer packed with
+``np.packbits`` (one bit per pixel instead of one byte) together with a
+version counter that is bumped whenever the layer is set. The combined mask is
+recomputed -- by ANDing the packed layers -- only when a layer's version has
+changed since it was last built, and is available both packed and unpacked.
+
+``MaskStack.version`` identifies the combined mask: it changes whenever the
+combined mask does and is unique across stacks, so caches of masked results
+(histogram bins, statistics) can key on it instead of hashing the mask.
+"""
+import itertools
+
+import numpy as np
+
+MASK_LAYERS = ('crop', 'filter', 'polygon', 'cluster', 'roi_selection')
+
+# combined-mask versions are drawn from one counter so they are never reused,
+# even by the stack that replaces a sample's masks when its data are reloaded
+_versions = itertools.count(1)
+
+
+class MaskStack:
+    """Mask layers of one sample, stored bit-packed with version counters.
+
+    Parameters
+    ----------
+    size : int
+        Number of pixels (rows of the sample's data).
+    layers : tuple of str, optional
+        Layer names, by default ``MASK_LAYERS``. Every layer starts all True.
+
+    Examples
+    --------
+    >>> stack = MaskStack(4)
+    >>> stack['filter'] = np.array([True, False, True, True])
+    >>> stack['polygon'] = np.array([True, True, False, True])
+    >>> stack.mask
+    array([ True, False, False,  True])
+    """
+    def __init__(self, size, layers=MASK_LAYERS):
+        self.size = int(size)
+        ones = np.packbits(np.ones(self.size, dtype=bool))
+        self._packed = {name: ones.copy() for name in layers}
+        self._layer_versions = dict.fromkeys(layers, 0)
+
+        self._combined = ones
+        self._unpacked = None
+        # layer versions the combined mask reflects
+        self._built_from = self.layer_versions
+        self._version = next(_versions)
+
+    @property
+    def version(self):
+        """int: Identifies the combined mask; changes whenever it does."""
+        self._update()
+        return self._version
+
+    @property
+    def layers(self):
+        """tuple of str: Layer names."""
+        return tuple(self._packed)
+
+    @property
+    def layer_versions(self):
+        """tuple of int: Version of each layer, in layer order."""
+        return tuple(self._layer_versions.values())
+
+    def layer_version(self, name):
+        """Number of times layer ``name`` has been set."""
+        return self._layer_versions[name]
+
+    def __getitem__(self, name):
+        """Layer ``name`` as a new boolean array."""
+        return np.unpackbits(self._packed[name], count=self.size).view(bool)
+
+    def __setitem__(self, name, value):
+        """Sets layer ``name`` from a boolean array of length ``size``."""
+        if name not in self._packed:
+            raise KeyError(f"unknown mask layer '{name}'")
+        value = np.asarray(value, dtype=bool).ravel()
+        if value.size != self.size:
+            raise ValueError(f"mask layer '{name}' has {value.size} values, expected {self.size}")
+        self._packed[name] = np.packbits(value)
+        self._layer_versions[name] += 1
+
+    def packed(self, name):
+        """Layer ``name`` packed with ``np.packbits`` (read-only)."""
+        packed = self._packed[name].view()
+        packed.flags.writeable = False
+        return packed
+
+    def _update(self):
+        versions = self.layer_versions
+        if self._built_from == versions:
+            return
+        combined = None
+        for packed in self._packed.values():
+            combined = packed.copy() if combined is None else np.bitwise_and(combined, packed, out=combined)
+        self._set_combined(combined)
+        self._built_from = versions
+
+    def _set_combined(self, packed):
+        self._combined = packed
+        self._unpacked = None
+        self._version = next(_versions)
+
+    @property
+    def packed_mask(self):
+        """numpy.ndarray: Combined mask packed with ``np.packbits`` (read-only)."""
+        self._update()
+        packed = self._combined.view()
+        packed.flags.writeable = False
+        return packed
+
+    @property
+    def mask(self):
+        """numpy.ndarray: Combined mask, the AND of all layers (read-only).
+
+        Setting it replaces the combined mask (e.g. to also exclude missing
+        values) until a layer changes; setting the mask it already is keeps
+        ``version``.
+        """
+        self._update()
+        if self._unpacked is None:
+            self._unpacked = np.unpackbits(self._combined, count=self.size).view(bool)
+            self._unpacked.flags.writeable = False
+        return self._unpacked
+
+    @mask.setter
+    def mask(self, value):
+        value = np.asarray(value, dtype=bool).ravel()
+        if value.size != self.size:
+            raise ValueError(f"mask has {value.size} values, expected {self.size}")
+        packed = np.packbits(value)
+        self._update()
+        if not np.array_equal(packed, self._combined):
+            self._set_combined(packed)
+
+    @property
+    def nbytes(self):
+        """int: Memory held by the packed layers and the combined mask."""
+        nbytes = sum(p.nbytes for p in self._packed.values()) + self._combined.nbytes
+        if self._unpacked is not None:
+            nbytes += self._unpacked.nbytes
+        return nbytes
@@ -21,7 +21,6 @@ from matplotlib.backends.backend_qtagg import FigureCanvasQTAgg as FigureCanvas
 from matplotlib.figure import Figure
 import matplotlib.colors as colors
 from matplotlib.collections import PathCollection
-from matplotlib.path import Path
 import numpy as np
 import pandas as pd
 from scipy.stats import percentileofscore
@@ -35,6 +34,7 @@ from src.common.TableFunctions import TableFcn as TableFcn
 from src.app.CustomTableWidget import ReorderableTableWidget, compute_row_reorder
 import lame_core.format as fmt
 from src.data.Polygon import PolygonManager
+from src.common.rasterize import PolygonRasterCache, intersect_rasters
 from src.control.Logger import LoggerConfig, auto_log_methods, log
 
 # Mask object
@@ -1165,6 +1165,8 @@ class PolygonTab(QWidget):
         tab_layout.addWidget(self.tableWidgetPolyPoints)
 
         self.polygon_manager = PolygonManager(parent=self, main_window=self.ui)
+        # per-polygon masks, rebuilt only when a polygon's vertices change
+        self.polygon_rasters = PolygonRasterCache()
 
         polygon_icon = QIcon(":/resources/icons/icon-polygon-new-64.svg")
         self.dock.tab_widgets.addTab(self, polygon_icon, "Polygons")
@@ -1403,51 +1405,34 @@ class PolygonTab(QWidget):
         """
         sample_id = self.ui.app_data.sample_id
 
-        # create array of all true
-        self.ui.data[sample_id].polygon_mask = np.ones_like(self.ui.data[sample_id].mask, dtype=bool)
-
         # update toolbar actions
         self.ui.lame_action.ClearFilters.setEnabled(True)
         self.ui.lame_action.PolygonMask.setEnabled(True)
         self.ui.lame_action.PolygonMask.setChecked(True)
 
-        # apply polygon mask — iterate each row in the polygon table
+        # apply polygon mask — rasterize each checked polygon in the polygon table
+        # (cached until its vertices change) and keep the pixels inside all of them
+        sample = self.ui.data[sample_id]
+        shape = tuple(sample.array_size)
+        polygons = self.polygon_manager.polygons[sample_id]
+        self.polygon_rasters.retain(
+            (sid, pid) for sid, sample_polygons in self.polygon_manager.polygons.items() for pid in sample_polygons
+        )
+
+        rasters = []
         for row in range(self.tableWidgetPolyPoints.rowCount()):
             checkBox = self.tableWidgetPolyPoints.cellWidget(row, 4)
 
             if checkBox.isChecked():
                 pid = int(self.tableWidgetPolyPoints.item(row, 0).text())
-
-                polygon_points = self.polygon_manager.polygons[sample_id][pid].verts
-                polygon_points = [(x, y) for x, y in polygon_points]
-
-                path = Path(polygon_points)
-
-                # Polygon vertices are in imshow pixel-index space (col, row).
-                # The image is produced by np.reshape(values, array_size, order=data.order).
-                # For order='F': data[k] → matrix[k % nrows, k // nrows]
-                #   → image position (col = k // nrows, row = k % nrows)
-                # For order='C': data[k] → matrix[k // ncols, k % ncols]
-                #   → image position (col = k % ncols, row = k // ncols)
-                # Using this mapping makes containment match what the user drew.
-                sample = self.ui.data[sample_id]
-                nrows, ncols = sample.array_size
-                order = sample.order
-                n = len(sample.processed)
-                k = np.arange(n, dtype=float)
-                if order == 'F':
-                    image_col = k // nrows
-                    image_row = k % nrows
-                else:
-                    image_col = k % ncols
-                    image_row = k // ncols
-                points = np.column_stack([image_col, image_row])
-                inside_polygon = path.contains_points(points)
-                self.ui.data[sample_id].polygon_mask &= inside_polygon
-
-        # recompute combined mask
-        d = self.ui.data[sample_id]
-        d.mask = d.crop_mask & d.filter_mask & d.polygon_mask & d.cluster_mask & d.roi_selection_mask
+                rasters.append(self.polygon_rasters.get((sample_id, pid), polygons[pid].verts, shape))
+
+        # Polygon vertices are in imshow pixel-index space (col, row) and the
+        # image is np.reshape(values, array_size, order=data.order), so raveling
+        # the image mask in the same order gives the data order. With no polygon
+        # checked, every pixel is kept. The combined mask is rebuilt from the
+        # changed layer when next read.
+        sample.polygon_mask = intersect_rasters(rasters, shape).ravel(order=sample.order)
 
         if update_plot:
             self.ui.schedule_update()
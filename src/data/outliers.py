@@ -103,13 +103,91 @@ def peirce_dev(N, n, m) -> float:
     return x2
 
     
-def quantile_and_difference(array: np.ndarray, pl: float, pu: float, dpl: float, dpu: float, compositional: bool=False, max_val: float|None=None):
+def _linear_quantile_indexes(count, q):
+    """Neighbouring order statistics and weight of a quantile.
+
+    Follows ``numpy.nanpercentile``'s 'linear' method for ``count`` non-NaN
+    values, so the interpolated quantile is bit-identical to it.
+
+    Parameters
+    ----------
+    count : int
+        Number of non-NaN values (> 0).
+    q : numpy.float64
+        Quantile, ``percentile / 100``.
+
+    Returns
+    -------
+    tuple
+        Indexes of the lower and upper order statistic and the weight of the upper.
+    """
+    virtual_index = (count - 1) * q
+    previous = np.floor(virtual_index)
+    following = previous + 1
+    if virtual_index >= count - 1:
+        previous = following = -1
+    elif virtual_index < 0:
+        previous = following = 0
+    gamma = float(virtual_index - int(previous))
+    # -1 stands for the largest value
+    previous, following = (int(i) if i >= 0 else count - 1 for i in (previous, following))
+    return previous, following, gamma
+
+
+def _lerp(a, b, t):
+    """numpy's quantile interpolation between order statistics ``a`` and ``b``."""
+    diff_b_a = b - a
+    if t >= 0.5:
+        return b - diff_b_a * (1 - t)
+    return a + diff_b_a * t
+
+
+def _row_percentiles(rows, percentiles, presorted=False):
+    """``numpy.nanpercentile(rows, p, axis=1)`` for each ``p`` in ``percentiles``.
+
+    Order statistics are selected with ``np.partition`` (or read directly from
+    ``rows`` when they are already sorted), one partition per group of rows
+    with the same number of NaNs.
+
+    Returns
+    -------
+    list of numpy.ndarray
+        Percentiles of each row, one array per percentile.
+    """
+    counts = rows.shape[1] - np.count_nonzero(np.isnan(rows), axis=1)
+    quantiles = [np.true_divide(p, 100) for p in percentiles]
+    results = [np.full(rows.shape[0], np.nan, dtype=rows.dtype) for _ in percentiles]
+    for count in np.unique(counts):
+        if count == 0:
+            continue
+        selected = np.flatnonzero(counts == count)
+        indexes = [_linear_quantile_indexes(int(count), q) for q in quantiles]
+        if presorted:
+            part = rows[selected]
+        else:
+            kth = sorted({i for previous, following, _ in indexes for i in (previous, following)})
+            part = np.partition(rows[selected], kth, axis=1)
+        for result, (previous, following, gamma) in zip(results, indexes):
+            result[selected] = _lerp(part[:, previous], part[:, following], gamma)
+    return results
+
+
+def quantile_and_difference(array: np.ndarray, pl: float, pu: float, dpl: float, dpu: float, compositional: bool=False, max_val: float|None=None, dtype=np.float64):
     """Outlier detection with cluster-based correction for negatives and compositional constraints, using percentile-based shifting.
 
+    Each column is log-shifted and sorted once. Values above the upper
+    percentile that also sit above a gap (difference between adjacent sorted
+    values) larger than the upper difference percentile are clipped to the
+    value just below the first such gap; values below the lower percentile are
+    clipped likewise to the value just above the last gap below it. In
+    float64 the result is bit-identical to clipping the sorted data in place
+    and restoring the original order with an inverse ``argsort``, which is
+    what the function used to do.
+
     Parameters
     ----------
     array : numpy.ndarray
-        Data to detect outliers
+        Data to detect outliers, one column per field (a 1-D array is a single field)
     pl : float
         lower percentile bound
     pu : float
@@ -122,12 +200,20 @@ def quantile_and_difference(array: np.ndarray, pl: float, pu: float, dpl: float,
         If True, enforces compositional constraint (data <= max_val), by default False
     max_val : float, optional
         Maximum value for compositional data, by default None
+    dtype : numpy.dtype, optional
+        Precision of the computation, by default ``np.float64``. ``np.float32``
+        halves memory use and is faster, but is not bit-identical.
 
     Returns
     -------
     numpy.ndarray
-        array with outliers removed
+        array with outliers removed, same shape as ``array``
     """
+    array = np.asarray(array, dtype=dtype)
+    ndim = array.ndim
+    if ndim == 1:
+        array = array[:, np.newaxis]
+    nrows = array.shape[0]
 
     # Set a small epsilon to handle zeros (if compositional data)
     epsilon = 1e-10 if compositional else 0
@@ -136,41 +222,48 @@ def quantile_and_difference(array: np.ndarray, pl: float, pu: float, dpl: float,
     v0 = np.nanmin(array, axis=0) - epsilon
     data_shifted = np.log10(array - v0 + epsilon)
 
+    # Sort each column once (as contiguous rows) and take differences between adjacent points,
+    # with a zero in front to account for the size reduction in np.diff
+    sorted_data = data_shifted.T.copy()
+    sorted_data.sort(axis=1)
+    diff_sorted_data = np.empty_like(sorted_data)
+    diff_sorted_data[:, 0] = 0
+    np.subtract(sorted_data[:, 1:], sorted_data[:, :-1], out=diff_sorted_data[:, 1:])
+
     # Quantile-based clipping (detect outliers)
-    ql_val = np.nanpercentile(data_shifted, pl, axis=0)
-    qu_val = np.nanpercentile(data_shifted, pu, axis=0)
-
-    # Sort data and calculate differences between adjacent points
-    sorted_indices = np.argsort(data_shifted, axis=0)
-    sorted_data = np.take_along_axis(data_shifted, sorted_indices, axis=0)
-    diff_sorted_data = np.diff(sorted_data, axis=0)
-
-    # Account for the size reduction in np.diff by adding a zero row at the beginning
-    diff_sorted_data = np.insert(diff_sorted_data, 0, 0, axis=0)
-    diff_array_qu_val = np.nanpercentile(diff_sorted_data, dpu, axis=0)
-    diff_array_ql_val = np.nanpercentile(diff_sorted_data, dpl, axis=0)
-
-    # Initialize array for results
-    clipped_data = np.copy(sorted_data)
-
-    # Apply upper bound clipping based on quantiles and differences
-    upper_cond = (sorted_data > qu_val) & (diff_sorted_data > diff_array_qu_val)
-    for col in range(sorted_data.shape[1]):
-        up_indices = np.where(upper_cond[:, col])[0]
-        if len(up_indices) > 0:
-            qu_outlier_index = up_indices[0]
-            clipped_data[qu_outlier_index:, col] = clipped_data[qu_outlier_index - 1, col]
-
-    # Apply lower bound clipping similarly based on lower quantile and difference
-    lower_cond = (sorted_data < ql_val) & (diff_sorted_data > diff_array_ql_val)
-    for col in range(sorted_data.shape[1]):
-        low_indices = np.where(lower_cond[:, col])[0]
-        if len(low_indices) > 0:
-            ql_outlier_index = low_indices[-1]
-            clipped_data[:ql_outlier_index + 1, col] = clipped_data[ql_outlier_index + 1, col]
-
-    # Restore original data order and undo the log transformation
-    clipped_data = np.take_along_axis(clipped_data, np.argsort(sorted_indices, axis=0), axis=0)
+    ql_val, qu_val = _row_percentiles(sorted_data, [pl, pu], presorted=True)
+    diff_array_ql_val, diff_array_qu_val = _row_percentiles(diff_sorted_data, [dpl, dpu])
+
+    # First sorted position above the upper quantile and difference bounds, last one below the lower
+    upper_cond = (sorted_data > qu_val[:, np.newaxis]) & (diff_sorted_data > diff_array_qu_val[:, np.newaxis])
+    lower_cond = (sorted_data < ql_val[:, np.newaxis]) & (diff_sorted_data > diff_array_ql_val[:, np.newaxis])
+    columns = np.arange(sorted_data.shape[0])
+    qu_outlier_index = upper_cond.argmax(axis=1)
+    has_upper = upper_cond[columns, qu_outlier_index]
+    ql_outlier_index = nrows - 1 - lower_cond[:, ::-1].argmax(axis=1)
+    has_lower = lower_cond[columns, ql_outlier_index]
+    del upper_cond, lower_cond, diff_sorted_data
+
+    # Positions from qu_outlier_index on take the value below it, positions up to
+    # ql_outlier_index the (upper-clipped) value above it. A gap is never between
+    # equal values, so the clipped positions are exactly the values (and, above,
+    # NaNs) beyond each position's value, and no permutation is needed to map
+    # them back onto the original order.
+    upper_fill = sorted_data[columns, qu_outlier_index - 1]
+    lower_next = np.where(has_lower, ql_outlier_index + 1, 0)
+    lower_fill = np.where(has_upper & (lower_next >= qu_outlier_index), upper_fill, sorted_data[columns, lower_next])
+    upper_bound = np.where(has_upper, sorted_data[columns, qu_outlier_index], np.nan)
+    lower_bound = np.where(has_lower, sorted_data[columns, ql_outlier_index], np.nan)
+    del sorted_data
+
+    clipped_data = data_shifted
+    upper_mask = (clipped_data >= upper_bound) | (np.isnan(clipped_data) & has_upper)
+    lower_mask = clipped_data <= lower_bound
+    np.copyto(clipped_data, upper_fill, where=upper_mask)
+    np.copyto(clipped_data, lower_fill, where=lower_mask)
+    del upper_mask, lower_mask
+
+    # Undo the log transformation
     clipped_data = 10**clipped_data + v0 - epsilon
 
     # Enforce upper bound (compositional constraint) to ensure data <= max_val
@@ -180,4 +273,4 @@ def quantile_and_difference(array: np.ndarray, pl: float, pu: float, dpl: float,
     # Ensure non-negative values and avoid exact zeros by shifting slightly if needed
     clipped_data = np.maximum(clipped_data, epsilon)
 
-    return clipped_data
\ No newline at end of file
+    return clipped_data[:, 0] if ndim == 1 else clipped_data
@@ -0,0 +1,397 @@
+"""Background import pipeline for ``MapImporter``.
+
+``MapImporter.import_la_icp_ms_data`` used to read every file on the GUI
+thread, pumping ``QApplication.processEvents()`` between files to keep the
+progress bar alive, then stitch each sample together with repeated
+``pd.concat``. This module moves that work off the GUI thread:
+
+* the dialog turns its metadata table into plain ``SampleImportJob`` specs
+  (no Qt widgets are touched once the worker starts),
+* ``MapImportWorker`` runs in a ``QThread`` and imports several samples at
+  once, each sample's files read concurrently on a shared thread pool
+  (CSV/XLSX/image reads are I/O bound and release the GIL for most of their
+  time),
+* each sample is assembled into a single preallocated array rather than a
+  chain of DataFrame concatenations,
+* cancellation and per-file failures are reported back through signals
+  instead of modal message boxes raised mid-import.
+
+The readers here are the same transforms ``MapImporter.read_raw_folder`` /
+``read_matrix_folder`` have always applied; those methods now delegate to
+them so the two can never diverge.
+"""
+from __future__ import annotations
+
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+from PIL import Image
+from PyQt6.QtCore import QObject, pyqtSignal
+
+# Image formats read_matrix_array() accepts. MapImporter re-exports this as
+# part of its recognized-extension lists, so the readers and the file dialog
+# share a single definition.
+IMAGE_EXTENSIONS = ('png', 'tif', 'tiff', 'bmp', 'jpg', 'jpeg')
+
+
+class ImportCancelled(Exception):
+    """Raised inside a sample import when the user cancels the worker."""
+
+
+@dataclass
+class ImportFileSpec:
+    """A single file to read for a sample.
+
+    ``label`` is the line number for line data, or the analyte name (e.g.
+    ``'Fe57'`` or ``'Fe57 / Mg24'``) for matrix data.
+    """
+    file_path: str
+    label: str
+
+
+@dataclass
+class SampleImportJob:
+    """Everything the worker needs to import one sample, detached from the dialog's widgets."""
+    sample_id: str
+    save_path: str
+    is_line_data: bool
+    files: list[ImportFileSpec] = field(default_factory=list)
+    swap_xy: bool = False
+    reverse_x: bool = False
+    reverse_y: bool = False
+    dx: float | None = None
+    dy: float | None = None
+    raster_length: float | None = None
+    raster_width: float | None = None
+
+
+# ------------------------------------------------------------------
+# Readers
+# ------------------------------------------------------------------
+def read_line_file(line_no, file_path, swap_xy, dx, dy, length=None):
+    """Reads a single raster line holding all analytes.
+
+    Parameters
+    ----------
+    line_no : int or str
+        Line number (1-based).
+    file_path : str
+        Full file path and name to be parsed.
+    swap_xy : bool
+        Flag indicating whether to swap the orientation of the file (``False`` = no swap).
+    dx, dy : float
+        Size of pixel in x- and y-directions.
+    length : float, optional
+        Physical length of this raster line in µm (TOF instruments report this
+        directly). When given, ``dx`` is derived from it instead of being used as-is.
+
+    Returns
+    -------
+    pandas.DataFrame
+        Data in ``file_path`` with ``Xc`` and ``Yc`` columns prepended.
+    """
+    df = pd.read_csv(file_path, skiprows=3)
+    if length is not None and len(df):
+        dx = length / len(df)
+    if swap_xy:
+        df.insert(1,'Yc',(int(line_no)-1)*dy)
+        df.insert(0,'Xc',np.arange(len(df))*dx)
+    else:
+        df.insert(0,'Xc',(int(line_no)-1)*dx)
+        df.insert(1,'Yc',np.arange(len(df))*dy)
+    return df
+
+
+def read_matrix_array(file_path):
+    """Reads a matrix-form analyte file as a 2D float array (rows=Y, columns=X).
+
+    Rows and columns that are entirely NaN are dropped, as before.
+
+    Raises
+    ------
+    ValueError
+        If ``file_path`` is not a csv, xls(x) or supported image file.
+    """
+    if file_path.endswith('.csv'):
+        df = pd.read_csv(file_path, header=None).dropna(how='all', axis=0).dropna(how='all', axis=1)
+    elif file_path.endswith('.xlsx') or file_path.endswith('.xls'):
+        df = pd.read_excel(file_path, header=None).dropna(how='all', axis=0).dropna(how='all', axis=1)
+    elif file_path.lower().endswith(tuple('.' + ext for ext in IMAGE_EXTENSIONS)):
+        # XRF core-scanner image export: one raster per element, pixel
+        # brightness as a *relative* intensity proxy only (not calibrated to
+        # real concentration units) -- grayscale-average the image, then
+        # rescale 0-255 -> 0-100 to match this app's existing value range.
+        gray = np.array(Image.open(file_path).convert('L'), dtype=float)
+        return gray / 255 * 100
+    else:
+        raise ValueError(
+            f"Could not load {os.path.basename(file_path)}, must be a *.csv, *.xls, *.xlsx, "
+            "or common image (*.png, *.tif, *.bmp, *.jpg) file type."
+        )
+    return df.to_numpy()
+
+
+def orient_matrix(values, swap_xy, reverse_x, reverse_y):
+    """Flattens a matrix-form array into a column in LaME's pixel order.
+
+    Reverses are applied in the file's native orientation, then the array is
+    flattened row-major (or column-major when ``swap_xy``, i.e. transposed).
+    """
+    if swap_xy:
+        if reverse_x:
+            values = values[:, ::-1]
+        if reverse_y:
+            values = values[::-1, :]
+        return values.T.flatten()
+
+    if reverse_x:
+        values = values[::-1, :]
+    if reverse_y:
+        values = values[:, ::-1]
+    return values.flatten()
+
+
+def matrix_coordinates(shape, swap_xy, dx=None, dy=None, length=None, width=None):
+    """Returns flattened ``(Xc, Yc)`` columns for a matrix of ``shape``, or ``None``.
+
+    ``dx``/``dy`` are derived from ``length``/``width`` (TOF) and the grid's
+    pixel counts when not given explicitly. Returns ``None`` when no spacing
+    can be determined, matching files after the first in a matrix import,
+    which don't carry coordinates.
+    """
+    M, N = shape
+    if dx is None and length is not None and width is not None:
+        dx = length / N
+        dy = width / M
+    if dx is None:
+        return None
+
+    col_values = np.tile(np.arange(1, N + 1), (M, 1))*dx
+    row_values = np.tile(np.arange(1, M + 1).reshape(M, 1), (1, N))*dy
+    if swap_xy:
+        X, Y = col_values, row_values
+    else:
+        X, Y = row_values, col_values
+    return X.flatten('F'), Y.flatten('F')
+
+
+def read_matrix_file(analyte, file_path, swap_xy, reverse_x, reverse_y, dx=None, dy=None, length=None, width=None):
+    """Reads analyte data in matrix form into a single-analyte DataFrame.
+
+    See ``MapImporter.read_matrix_folder`` for parameter descriptions.
+    """
+    values = read_matrix_array(file_path)
+    new_df = pd.DataFrame(orient_matrix(values, swap_xy, reverse_x, reverse_y), columns=[analyte])
+
+    coords = matrix_coordinates(values.shape, swap_xy, dx, dy, length, width)
+    if coords is not None:
+        new_df.insert(0,'Xc', coords[0])
+        new_df.insert(1,'Yc', coords[1])
+    return new_df
+
+
+# ------------------------------------------------------------------
+# Assembly
+# ------------------------------------------------------------------
+def assemble_line_data(frames, reverse_x=False, reverse_y=False):
+    """Stacks per-line DataFrames into one map.
+
+    When every line shares the same numeric columns (the normal case) the
+    rows are copied into one preallocated array; anything irregular falls
+    back to ``pd.concat``, which aligns mismatched columns. Coordinates are
+    reversed if requested and shifted so the upper left corner is (0, 0).
+    """
+    columns = frames[0].columns
+    regular = all(
+        f.columns.equals(columns) and all(pd.api.types.is_numeric_dtype(t) for t in f.dtypes)
+        for f in frames
+    )
+    if regular:
+        data = np.empty((sum(len(f) for f in frames), len(columns)), dtype=float)
+        start = 0
+        for f in frames:
+            data[start:start + len(f)] = f.to_numpy(dtype=float)
+            start += len(f)
+        final_data = pd.DataFrame(data, columns=columns)
+    else:
+        final_data = pd.concat(frames, ignore_index=True)
+
+    # reverse x and/or y if needed
+    if reverse_x:
+        final_data['Xc'] = -final_data['Xc']
+    if reverse_y:
+        final_data['Yc'] = -final_data['Yc']
+
+    # Adjust coordinates based on the reading direction and make upper left corner as (0,0)
+    final_data['Xc'] = final_data['Xc'] - final_data['Xc'].min()
+    final_data['Yc'] = final_data['Yc'] - final_data['Yc'].min()
+    return final_data
+
+
+# ------------------------------------------------------------------
+# Worker
+# ------------------------------------------------------------------
+class MapImportWorker(QObject):
+    """Imports a batch of samples on a background thread.
+
+    Move to a ``QThread`` and connect ``thread.started`` to ``run``. All
+    signals are emitted from worker threads, so receivers living in the GUI
+    thread get them through queued connections.
+
+    Parameters
+    ----------
+    jobs : list[SampleImportJob]
+        Samples to import.
+    max_file_workers : int, optional
+        Size of the shared file-reading pool, by default ``min(8, cpu_count + 4)``.
+    max_sample_workers : int, optional
+        Number of samples imported at once, by default ``min(4, len(jobs))``.
+    """
+    fileImported = pyqtSignal(str, str)        # sample_id, file_path
+    fileFailed = pyqtSignal(str, str, str)     # sample_id, file_path, message
+    sampleStarted = pyqtSignal(str)            # sample_id
+    sampleImported = pyqtSignal(str, str)      # sample_id, saved csv path
+    sampleFailed = pyqtSignal(str, str)        # sample_id, message
+    finished = pyqtSignal(int, bool)           # number imported, cancelled
+
+    def __init__(self, jobs, max_file_workers=None, max_sample_workers=None):
+        super().__init__()
+        self.jobs = list(jobs)
+        self.max_file_workers = max_file_workers or min(8, (os.cpu_count() or 1) + 4)
+        self.max_sample_workers = max_sample_workers or max(1, min(4, len(self.jobs)))
+        self._cancel_event = threading.Event()
+
+    def cancel(self):
+        """Requests cancellation; in-flight reads finish, nothing further is read or saved."""
+        self._cancel_event.set()
+
+    @property
+    def cancelled(self):
+        return self._cancel_event.is_set()
+
+    def run(self):
+        """Imports all jobs, emitting ``finished`` exactly once when done."""
+        num_imported = 0
+        with ThreadPoolExecutor(max_workers=self.max_file_workers) as file_pool, \
+                ThreadPoolExecutor(max_workers=self.max_sample_workers) as sample_pool:
+            futures = {sample_pool.submit(self.import_sample, job, file_pool): job for job in self.jobs}
+            for future in as_completed(futures):
+                job = futures[future]
+                try:
+                    if future.result():
+                        num_imported += 1
+                except ImportCancelled:
+                    pass
+                except Exception as e:
+                    self.sampleFailed.emit(job.sample_id, str(e))
+
+        self.finished.emit(num_imported, self.cancelled)
+
+    def import_sample(self, job, file_pool):
+        """Reads, assembles and saves one sample.
+
+        Returns
+        -------
+        bool
+            ``True`` if ``<sample_id>.lame.csv`` was written.
+        """
+        self._check_cancelled()
+        self.sampleStarted.emit(job.sample_id)
+
+        if job.is_line_data:
+            final_data = self._import_line_data(job, file_pool)
+        else:
+            final_data = self._import_matrix_data(job, file_pool)
+
+        if final_data is None:
+            return False
+
+        self._check_cancelled()
+        file_name = os.path.join(job.save_path, job.sample_id+'.lame.csv')
+        final_data.to_csv(file_name, index=False)
+        self.sampleImported.emit(job.sample_id, file_name)
+        return True
+
+    def _check_cancelled(self):
+        if self._cancel_event.is_set():
+            raise ImportCancelled()
+
+    def _gather(self, job, futures):
+        """Yields ``(index, result)`` for each successful read, as reads complete.
+
+        Failed reads are reported through ``fileFailed`` and skipped; on
+        cancellation, reads that haven't started are dropped.
+        """
+        try:
+            for future in as_completed(futures):
+                self._check_cancelled()
+                spec_idx = futures[future]
+                spec = job.files[spec_idx]
+                try:
+                    result = future.result()
+                except Exception as e:
+                    self.fileFailed.emit(job.sample_id, spec.file_path, str(e))
+                    continue
+                self.fileImported.emit(job.sample_id, spec.file_path)
+                yield spec_idx, result
+        finally:
+            if self._cancel_event.is_set():
+                for future in futures:
+                    future.cancel()
+
+    def _import_line_data(self, job, file_pool):
+        length = job.raster_length
+        futures = {
+            file_pool.submit(read_line_file, spec.label, spec.file_path, job.swap_xy, job.dx, job.dy, length=length): idx
+            for idx, spec in enumerate(job.files)
+        }
+        frames = [None] * len(job.files)
+        for idx, df in self._gather(job, futures):
+            frames[idx] = df
+
+        # keep file order, as a serial read would have produced
+        frames = [f for f in frames if f is not None]
+        if not frames:
+            return None
+        return assemble_line_data(frames, job.reverse_x, job.reverse_y)
+
+    def _import_matrix_data(self, job, file_pool):
+        futures = {file_pool.submit(read_matrix_array, spec.file_path): idx for idx, spec in enumerate(job.files)}
+
+        # Reads complete in any order, so the maps are only checked against
+        # each other once all are in: the first readable file in table order
+        # sets the expected pixel count and supplies Xc/Yc, whatever the
+        # thread timing. Columns are then written into one preallocated
+        # (pixels x analytes) block, releasing each map as it is copied.
+        arrays = dict(self._gather(job, futures))
+        if not arrays:
+            return None
+
+        expected = arrays[min(arrays)].size
+        data = np.full((expected, len(job.files)), np.nan)
+        shapes = {}
+        for idx in sorted(arrays):
+            values = arrays.pop(idx)
+            if values.size != expected:
+                self.fileFailed.emit(
+                    job.sample_id, job.files[idx].file_path,
+                    f"map has {values.size} pixels, expected {expected}"
+                )
+                continue
+            data[:, idx] = orient_matrix(values, job.swap_xy, job.reverse_x, job.reverse_y)
+            shapes[idx] = values.shape
+
+        read_idx = sorted(shapes)
+        final_data = pd.DataFrame(data[:, read_idx], columns=[job.files[i].label for i in read_idx])
+
+        coords = matrix_coordinates(
+            shapes[read_idx[0]], job.swap_xy, job.dx, job.dy, job.raster_length, job.raster_width
+        )
+        if coords is not None:
+            final_data.insert(0,'Xc', coords[0])
+            final_data.insert(1,'Yc', coords[1])
+        return final_data
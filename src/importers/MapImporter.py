@@ -10,12 +10,15 @@ from PyQt6.QtWidgets import (
     QWidget, QCheckBox, QHeaderView, QProgressBar, QLineEdit, QMessageBox, QVBoxLayout, QPushButton, QHBoxLayout
 )
 from PyQt6.QtGui import QIcon
-from PyQt6.QtCore import Qt, QUrl
+from PyQt6.QtCore import Qt, QUrl, QThread
 from lame_core.CustomWidgets import CustomAction
 import src.common.csvdict as csvdict
 from src.plotting.CustomMplCanvas import SimpleMplCanvas
 from src.importers.MapImportDialog import Ui_MapImportDialog
 from src.importers.FileSelectorDialog import Ui_FileSelectorDialog
+from src.importers.MapImportWorker import (
+    IMAGE_EXTENSIONS, ImportFileSpec, MapImportWorker, SampleImportJob, read_line_file, read_matrix_file
+)
 from lame_core.config import BASEDIR, ICONPATH
 
 # Recognized data-file extensions, shared between parse_filenames() (guesses
@@ -23,7 +26,7 @@ from lame_core.config import BASEDIR, ICONPATH
 # dialog itself) -- both used to filter independently and could drift out of
 # sync, which is exactly what silently hid XRF's image files from the import
 # dialog after parse_filenames() was taught about them but this wasn't.
-IMAGE_EXTENSIONS = ('png', 'tif', 'tiff', 'bmp', 'jpg', 'jpeg')
+# IMAGE_EXTENSIONS lives with the file readers in MapImportWorker.
 TABULAR_EXTENSIONS = ('csv', 'xlsx', 'xls')
 
 # Valid extensions differ by data type -- e.g. XRF's 'image' method reads per-
@@ -120,9 +123,14 @@ class MapImporter(QDialog, Ui_MapImportDialog):
         self.pushButtonLoad.clicked.connect(self.load_metadata)
         self.pushButtonSave.clicked.connect(self.save_metadata)
         self.pushButtonSave.setEnabled(False)
-        self.pushButtonCancel.clicked.connect(self.reject)
+        self.pushButtonCancel.clicked.connect(self.cancel_clicked)
         self.pushButtonCancel.setEnabled(True)
 
+        # background import (see import_la_icp_ms_data)
+        self.import_thread = None
+        self.import_worker = None
+        self.close_after_import = False
+
         self.tableWidgetMetadata.currentItemChanged.connect(self.on_item_changed)
 
         # Computed dX/dY preview columns, added at runtime (rather than in
@@ -1294,24 +1302,54 @@ class MapImporter(QDialog, Ui_MapImportDialog):
                 # matrix data -- so the same importer applies unchanged.
                 self.import_la_icp_ms_data(save_path)
 
+        # import_la_icp_ms_data() runs in the background and calls
+        # finish_import() itself once the worker is done; self.ok is only
+        # already set here when the import completed synchronously.
         if self.ok:
-            # Reimporting a sample that's already loaded overwrites its
-            # .lame.csv file on disk, but if the set of sample IDs in the
-            # directory is unchanged (the common case), neither
-            # AppData.sample_list's nor .sample_id's setter fires a change
-            # notification -- both explicitly no-op when the *identifiers*
-            # haven't changed, even though the underlying file content has.
-            # The stale in-memory SampleObj cached from the previous load
-            # would otherwise never get refreshed. Evict any reimported
-            # sample from the cache so change_sample() (which only reloads
-            # a sample when it isn't already in self.data) re-reads it.
-            for sample_id in self.sample_ids:
-                self.parent.data.pop(sample_id, None)
-
-            self.parent.project_manager.add_samples([self.root_path])
-
-            if self.parent.app_data.sample_id in self.sample_ids:
-                self.parent.change_sample()
+            self.finish_import()
+
+    def finish_import(self):
+        """Hands successfully imported samples to the project once an import completes."""
+        # Reimporting a sample that's already loaded overwrites its
+        # .lame.csv file on disk, but if the set of sample IDs in the
+        # directory is unchanged (the common case), neither
+        # AppData.sample_list's nor .sample_id's setter fires a change
+        # notification -- both explicitly no-op when the *identifiers*
+        # haven't changed, even though the underlying file content has.
+        # The stale in-memory SampleObj cached from the previous load
+        # would otherwise never get refreshed. Evict any reimported
+        # sample from the cache so change_sample() (which only reloads
+        # a sample when it isn't already in self.data) re-reads it.
+        for sample_id in self.sample_ids:
+            self.parent.data.pop(sample_id, None)
+
+        self.parent.project_manager.add_samples([self.root_path])
+
+        if self.parent.app_data.sample_id in self.sample_ids:
+            self.parent.change_sample()
+
+    def cancel_clicked(self):
+        """Cancels a running import, otherwise closes the dialog."""
+        if self.import_worker is not None:
+            self.import_worker.cancel()
+            self.statusBar.showMessage('Cancelling import...')
+            self.pushButtonCancel.setEnabled(False)
+        else:
+            self.reject()
+
+    def reject(self):
+        """Closes the dialog, first cancelling a running import.
+
+        ``QDialog.closeEvent`` and the Escape key both go through ``reject``.
+        While the import worker is running the dialog stays open; the import is
+        cancelled and the dialog closes from ``on_import_finished`` once the
+        worker thread has stopped.
+        """
+        if self.import_worker is not None:
+            self.close_after_import = True
+            self.cancel_clicked()
+            return
+        super().reject()
 
     def import_la_icp_ms_data(self, save_path):
         """Reads LA-ICP-MS (or XRF 'image') data into a DataFrame
@@ -1321,26 +1359,29 @@ class MapImporter(QDialog, Ui_MapImportDialog):
         this importer applies unchanged (``method`` just reads as ``'image'``
         instead of ``'quadrupole'``/``'TOF'``/``'SF'`` from the combobox).
 
+        The metadata table is read here, on the GUI thread, into one
+        ``SampleImportJob`` per sample; the files themselves are read and
+        assembled by a ``MapImportWorker`` on a background thread, several
+        samples at a time. Progress, per-file errors and completion come back
+        through the worker's signals, and ``finish_import`` runs once the
+        worker is done.
+
         Parameters
         ----------
         save_path : str
             Location to save DataFrame reformatted into CSV for use in LaME
         """
+        if self.import_worker is not None:
+            return
+
         # The total number of files to parse are the number of selected files for samples with the import checkbox set to True.
         total_files = self.metadata['directory_data'].loc[self.metadata['directory_data']['Import'],'Select files'].sum()
         if total_files == 0:
             return
-        
-        # Initialize progress bar
-        current_progress = 0
-        self.progressBar.setMaximum(total_files)
 
         method = self.comboBoxMethod.currentText()
-        
-        final_data = pd.DataFrame([])
-        num_imported = 0
 
-#        try:
+        jobs = []
         # import all directories with samples
         for i,path in enumerate(self.paths):
             # if Import is False, skip directory
@@ -1388,8 +1429,6 @@ class MapImporter(QDialog, Ui_MapImportDialog):
                 dx = dy
                 dy = tmp
 
-            data_frames = []
-
             # Convert to numeric, coercing errors (non-numeric values become NaN)
             numeric_check = pd.to_numeric(self.metadata[sample_id]['Analyte 1'], errors='coerce')
 
@@ -1419,98 +1458,116 @@ class MapImporter(QDialog, Ui_MapImportDialog):
             except Exception as e:
                 QMessageBox.warning(self,'Error',f"Could not save LaME metadata file associated with sample {sample_id}.\n{e}")
 
-
-            first = True
-            for i, file in enumerate(self.metadata[sample_id]['Filename']):
-                if not self.metadata[sample_id]['Import'][i]:
+            files = []
+            for j, file in enumerate(self.metadata[sample_id]['Filename']):
+                if not self.metadata[sample_id]['Import'][j]:
                     continue
-
-                file_path = os.path.join(path, file)
                 if any(std in file for std in self.standard_list):
                     continue  # skip standard files
 
-                analyte1 = self.metadata[sample_id]['Analyte 1'][i]
-                analyte2 = self.metadata[sample_id]['Analyte 2'][i]
-                if is_numeric:
-                    # line data
-                    if method == 'TOF' and raster_length is not None:
-                        df = self.read_raw_folder(analyte1, file_path, swap_xy, dx, dy, length=raster_length)
-                    else:
-                        df = self.read_raw_folder(analyte1, file_path, swap_xy, dx, dy)
-                    data_frames.append(df)
+                analyte1 = self.metadata[sample_id]['Analyte 1'][j]
+                analyte2 = self.metadata[sample_id]['Analyte 2'][j]
+                if is_numeric or not analyte2:
+                    label = analyte1
                 else:
-                    # matrix data
-                    if not analyte2:
-                        analyte = analyte1
-                    else:
-                        analyte = f"{analyte1} / {analyte2}"
-
-                    if first:
-                        if method == 'TOF' and raster_length is not None and raster_width is not None:
-                            df = self.read_matrix_folder(analyte, file_path, swap_xy, reverse_x, reverse_y, length=raster_length, width=raster_width)
-                        else:
-                            df = self.read_matrix_folder(analyte, file_path, swap_xy, reverse_x, reverse_y, dx, dy)
-                        first = False
-                    else:
-                        df = self.read_matrix_folder(analyte, file_path, swap_xy, reverse_x, reverse_y)
-
-                    data_frames.append(df)
-
-                current_progress += 1
-                self.progressBar.setValue(current_progress)
-                self.statusBar.showMessage(f"{sample_id}: {current_progress}/{total_files} files imported.")
-                QApplication.processEvents()  # Process GUI events to update the progress bar
-
-            if not data_frames:
-                continue
+                    label = f"{analyte1} / {analyte2}"
+                files.append(ImportFileSpec(os.path.join(path, file), label))
 
-            self.statusBar.showMessage(f'Formatting {sample_id}...')
-            QApplication.processEvents()  # Process GUI events to update the progress bar
-            if is_numeric:
-                final_data = pd.concat(data_frames, ignore_index=True)
-                
-                # reverse x and/or y if needed
-                if reverse_x:
-                    final_data['Xc'] = -final_data['Xc']
-                if reverse_y:
-                    final_data['Yc'] = -final_data['Yc']
-                
-                # Adjust coordinates based on the reading direction and make upper left corner as (0,0)
-                final_data['Xc'] = final_data['Xc'] - final_data['Xc'].min()
-                final_data['Yc'] = final_data['Yc'] - final_data['Yc'].min()
-            else:
-                final_data = pd.concat(data_frames, axis = 1)
-            
-            if not data_frames:
+            if not files:
                 continue
 
-            self.statusBar.showMessage(f'Formatting {sample_id}...')
-            QApplication.processEvents()
-            if is_numeric:
-                final_data = pd.concat(data_frames, ignore_index=True)
-                final_data['Xc'] -= final_data['Xc'].min() if reverse_x else 0
-                final_data['Yc'] -= final_data['Yc'].min() if reverse_y else 0
-            else:
-                final_data = pd.concat(data_frames, axis=1)
-
-            file_name = os.path.join(save_path, sample_id+'.lame.csv')
-            self.statusBar.showMessage(f'Saving {sample_id}.lame.csv...')
-            QApplication.processEvents()  # Process GUI events to update the progress bar
-            final_data.to_csv(file_name, index= False)
-            num_imported += 1
+            # TOF matrix data derives dx/dy from the raster length/width and the
+            # grid size; line data only uses the length, per line.
+            tof_extent = method == 'TOF' and raster_length is not None
+            if not is_numeric and tof_extent and raster_width is not None:
+                dx = dy = None
+
+            jobs.append(SampleImportJob(
+                sample_id=sample_id,
+                save_path=save_path,
+                is_line_data=is_numeric,
+                files=files,
+                swap_xy=swap_xy,
+                reverse_x=reverse_x,
+                reverse_y=reverse_y,
+                dx=dx,
+                dy=dy,
+                raster_length=raster_length if tof_extent else None,
+                raster_width=raster_width if tof_extent else None,
+            ))
+
+        if not jobs:
+            return
 
-        # except Exception as e:
-        #     self.statusBar.showMessage(f"Error during import: {str(e)}")
-        #     return
-        # self.statusBar.showMessage("Import completed successfully!")
+        # Initialize progress bar
+        self.import_progress = 0
+        self.import_total = sum(len(job.files) for job in jobs)
+        self.import_errors = []
+        self.progressBar.setMaximum(self.import_total)
+        self.progressBar.setValue(0)
+        self.pushButtonImport.setEnabled(False)
+        self.statusBar.showMessage(f'Importing {len(jobs)} samples...')
+
+        self.import_thread = QThread(self)
+        self.import_worker = MapImportWorker(jobs)
+        self.import_worker.moveToThread(self.import_thread)
+
+        self.import_thread.started.connect(self.import_worker.run)
+        self.import_worker.fileImported.connect(self.on_import_file_done)
+        self.import_worker.fileFailed.connect(self.on_import_file_failed)
+        self.import_worker.sampleFailed.connect(self.on_import_sample_failed)
+        self.import_worker.finished.connect(self.on_import_finished)
+        self.import_worker.finished.connect(self.import_thread.quit)
+        self.import_thread.finished.connect(self.import_worker.deleteLater)
+        self.import_thread.finished.connect(self.import_thread.deleteLater)
+
+        self.import_thread.start()
+
+    def on_import_file_done(self, sample_id, file_path):
+        """Advances the progress bar as the import worker finishes each file."""
+        self.import_progress += 1
+        self.progressBar.setValue(self.import_progress)
+        self.statusBar.showMessage(f"{sample_id}: {self.import_progress}/{self.import_total} files imported.")
+
+    def on_import_file_failed(self, sample_id, file_path, message):
+        """Records a file the import worker could not read; the rest of the sample still imports."""
+        self.import_errors.append(f"{sample_id}: {os.path.basename(file_path)} -- {message}")
+        self.on_import_file_done(sample_id, file_path)
+
+    def on_import_sample_failed(self, sample_id, message):
+        """Records a sample that could not be assembled or saved."""
+        self.import_errors.append(f"{sample_id}: {message}")
+
+    def on_import_finished(self, num_imported, cancelled):
+        """Reports the outcome of a background import and hands the results to the project."""
+        thread = self.import_thread
+        self.import_worker = None
+        self.import_thread = None
+        self.pushButtonImport.setEnabled(True)
+        self.pushButtonCancel.setEnabled(True)
 
-        self.statusBar.showMessage(f'Successfully imported {num_imported} samples.')
+        if cancelled:
+            self.statusBar.showMessage(f'Import cancelled, {num_imported} samples imported.')
+        else:
+            self.statusBar.showMessage(f'Successfully imported {num_imported} samples.')
+            self.progressBar.setValue(self.import_total)  # Ensure the progress bar reaches full upon completion
         self.pushButtonCancel.setText('Close')
         self.pushButtonCancel.setDefault(True)
-        self.progressBar.setValue(total_files)  # Ensure the progress bar reaches full upon completion
 
-        self.ok = True
-            
+        if self.import_errors:
+            QMessageBox.warning(self, 'Import errors', "Some files could not be imported:\n\n" + "\n".join(self.import_errors))
+
+        if num_imported:
+            self.ok = True
+            self.finish_import()
+
+        if self.close_after_import:
+            # the worker's run() has returned; stop its thread before the dialog goes
+            self.close_after_import = False
+            thread.quit()
+            thread.wait()
+            self.reject()
+
     def read_raw_folder(self,line_no,file_path, swap_xy, dx, dy, length=None):
         """Reads laser data formatted into files with separate lines, each with all analytes.
 
@@ -1535,16 +1592,7 @@ class MapImporter(QDialog, Ui_MapImportDialog):
         pd.DataFrame
             Data in the current file, ``file_path``.
         """
-        df = pd.read_csv(file_path, skiprows=3)
-        if length is not None and len(df):
-            dx = length / len(df)
-        if swap_xy:
-            df.insert(1,'Yc',(int(line_no)-1)*dy)
-            df.insert(0,'Xc',np.arange(len(df))*dx)
-        else:
-            df.insert(0,'Xc',(int(line_no)-1)*dx)
-            df.insert(1,'Yc',np.arange(len(df))*dy)
-        return df
+        return read_line_file(line_no, file_path, swap_xy, dx, dy, length=length)
    
     def read_matrix_folder(self, analyte, file_path, swap_xy, reverse_x, reverse_y, dx=None, dy=None, length=None, width=None):
         """Reads analyte data in matrix form
@@ -1569,93 +1617,14 @@ class MapImporter(QDialog, Ui_MapImportDialog):
         Returns
         -------
         pandas.DataFrame
-            Results from a single analyte with X and Y values if dx and dy are not None
+            Results from a single analyte with X and Y values if dx and dy are not None,
+            or ``None`` if the file type is not supported.
         """
-        # match = re.search(r' (\w+)_ppm', file_name)
-        # match2 = re.search(r'(\D+)(\d+).csv', file_name) or re.search(r'(\d+)(\D+).csv', file_name)
-        # if match:
-        #     analyte_name =  match.group(1)  # Returns the captured group, which is the text of interest
-        # elif  match2:
-        #     name = match2.group(2)  # First group: analyte name
-        #     number = match2.group(1)  # Second group: analyte number
-        #     # Create the variable combining name and number
-        #     analyte_name = f"{name}{number}"
-        # else:
-        #     self.statusBar.showMessage('Analyte name not part of filename')
-        #     return []
-
-        # if analyte has isotope mass first and symbol second, swap order
-        # test = re.search(r'(\d+)(\D+)', analyte)
-        # if test:
-        #     analyte = f"{test.group(2)}{test.group(1)}"
-        
-        # drop rows and columns with all nans
-        if file_path.endswith('.csv'):
-            df = pd.read_csv(file_path, header=None).dropna(how='all', axis=0).dropna(how='all', axis=1)
-        elif file_path.endswith('.xlsx') or file_path.endswith('.xls'):
-            df = pd.read_excel(file_path, header=None).dropna(how='all', axis=0).dropna(how='all', axis=1)
-        elif file_path.lower().endswith(tuple('.' + ext for ext in IMAGE_EXTENSIONS)):
-            # XRF core-scanner image export: one raster per element, pixel
-            # brightness as a *relative* intensity proxy only (not calibrated to
-            # real concentration units) -- grayscale-average the image, then
-            # rescale 0-255 -> 0-100 to match this app's existing value range.
-            gray = np.array(Image.open(file_path).convert('L'), dtype=float)
-            df = pd.DataFrame(gray / 255 * 100)
-        else:
-            QMessageBox.warning(self,'Error','Could not load file, must be a *.csv, *.xls, *.xlsx, or common image (*.png, *.tif, *.bmp, *.jpg) file type.')
-       
-        #print(df.shape)
-        # produce X and Y values
-        if dx is None and length is not None and width is not None:
-            # TOF instruments report the raster's physical length/width directly;
-            # derive per-pixel spacing from the map extent and the grid's pixel counts.
-            M, N = df.shape
-            dx = length / N
-            dy = width / M
-
-        if dx is not None:
-            M, N = df.shape
-
-            # Create an array with constant column values from 1 to N
-            col_values = np.tile(np.arange(1, N + 1), (M, 1))*dx
-
-            # Create an array with constant row values from 1 to M, multiply by dy
-            row_values = np.tile(np.arange(1, M + 1).reshape(M, 1), (1, N))*dy
-
-        # swap x and y (transpose matrix)
-        if swap_xy:
-            # reverse x-direction
-            if reverse_x:
-                df = df[df.columns[::-1]]
-            # reverse y-direction
-            if reverse_y:
-                df = df.iloc[::-1].reset_index(drop=True)
-
-            # swap x and y
-            if dx is not None:
-                Y = row_values
-                X = col_values
-
-            new_df = pd.DataFrame(df.values.T.flatten(), columns=[analyte])
-        else:
-            # reverse x-direction
-            if reverse_x:
-                df = df.iloc[::-1].reset_index(drop=True)
-            # reverse y-direction
-            if reverse_y:
-                df = df[df.columns[::-1]]
-
-            if dx is not None:
-                Y = col_values
-                X = row_values
-
-            new_df = pd.DataFrame(df.values.flatten(), columns=[analyte])
-
-        if dx is not None:
-            new_df.insert(0,'Xc', X.flatten('F'))
-            new_df.insert(1,'Yc', Y.flatten('F'))
-
-        return new_df
+        try:
+            return read_matrix_file(analyte, file_path, swap_xy, reverse_x, reverse_y, dx, dy, length, width)
+        except ValueError as e:
+            QMessageBox.warning(self,'Error',str(e))
+            return None
    
     def read_ladr_ppm_folder(self,file_name,file_path):
         match = re.search(r' (\w+)_ppm', file_name)
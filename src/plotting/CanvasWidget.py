@@ -20,6 +20,7 @@ from matplotlib.backends.backend_qt import NavigationToolbar2QT as NavigationToo
 
 from src.plotting.CustomMplCanvas import MplCanvas, make_compact_nav_toolbar
 from src.plotting.LamePlot import plot_small_histogram
+from src.plotting.QuickView import QuickViewRenderer, QuickViewThumbnail
 import src.common.csvdict as csvdict
 from src.common.TableFunctions import TableFcn as TableFcn
 import src.app.CustomTableWidget as TW
@@ -38,6 +39,12 @@ class CanvasWidget(QWidget):
         self.duplicate_plot_info = None
         self.lasermaps = {}
 
+        # Quick View thumbnails are rendered in the background, see display_QV
+        self.qv_renderer = QuickViewRenderer(self)
+        self.qv_renderer.thumbnailReady.connect(self.qv_thumbnail_ready)
+        self.qv_renderer.thumbnailFailed.connect(self.qv_thumbnail_failed)
+        self.qv_thumbnails = {}
+
         self.QV_analyte_list = {}
         try:
             self.QV_analyte_list = csvdict.import_csv_to_dict(APPDATA_PATH / 'qv_lists.csv')
@@ -74,7 +81,7 @@ class CanvasWidget(QWidget):
         self.single_view = SingleViewTab(self.canvasWindow)
         self.multi_view = MultiViewTab(self.canvasWindow, canvas_widget=self)
 
-        # quick_view holds the grid of canvases; it's wrapped in a scroll area
+        # quick_view holds the grid of thumbnails; it's wrapped in a scroll area
         # so the grid can grow taller than the viewport as columns are added
         self.quick_view = QuickViewTab()
         quick_view_scroll = QScrollArea(self.canvasWindow)
@@ -358,44 +365,37 @@ class CanvasWidget(QWidget):
 
         # clear the quickView layout
         self.clear_layout(self.quick_view.layout())
+        self.qv_thumbnails = {}
+
+        data = self.ui.data[self.ui.app_data.sample_id]
+        layout = self.quick_view.layout()
+        fields = []
         for i, field in enumerate(qv_fields):
             field_type = 'Analyte' if field in analyte_fields else 'Ratio'
+            fields.append((field_type, field))
 
-            # create plot canvas
-            canvas = MplCanvas(parent=self.ui)
-
-            # determine location of plot
-            col = i % ncol
-            row = i // ncol
-
-            # get data for current field
-            current_plot_df = self.ui.data[self.ui.app_data.sample_id].get_map_data(field, field_type)
-            reshaped_array = np.reshape(current_plot_df['array'].values, self.ui.data[self.ui.app_data.sample_id].array_size, order=self.ui.data[self.ui.app_data.sample_id].order)
-
-            # add image to canvas
-            cmap = self.ui.style_data.get_colormap()
-            cax = canvas.axes.imshow(reshaped_array, cmap=cmap,  aspect=self.ui.data[self.ui.app_data.sample_id].aspect_ratio, interpolation='none')
-            font = {'family': 'sans-serif', 'stretch': 'condensed', 'size': 8, 'weight': 'semibold'}
-            canvas.axes.text( 0.025*self.ui.data[self.ui.app_data.sample_id].array_size[0],
-                    0.1*self.ui.data[self.ui.app_data.sample_id].array_size[1],
-                    field,
-                    fontdict=font,
-                    color=self.ui.style_data.overlay_color,
-                    ha='left', va='top' )
-            canvas.axes.set_axis_off()
-            canvas.fig.tight_layout()
-
-            # add canvas to quickView grid layout
-            if self.quick_view.layout() is None:
-                layout_quick_view = QGridLayout()
-                layout_quick_view.setSpacing(0)
-                layout_quick_view.setContentsMargins(0, 0, 0, 0)
-                self.quick_view.setLayout(layout_quick_view)
-
-            # add canvas to layout
-            layout = self.quick_view.layout()
-            if layout is not None:
-                layout.addWidget(canvas,row,col)
+            # placeholders are laid out now and filled in as thumbnails render
+            thumbnail = QuickViewThumbnail(field, aspect_ratio=data.aspect_ratio, label_color=self.ui.style_data.overlay_color)
+            self.qv_thumbnails[i] = thumbnail
+            layout.addWidget(thumbnail, i // ncol, i % ncol)
+
+        # one normalization across the grid, so thumbnails can be compared
+        scale = 'log' if self.ui.style_data.cscale == 'log' else 'linear'
+        self.qv_renderer.render(data, fields, self.ui.style_data.get_colormap(), scale=scale)
+
+    @no_log
+    def qv_thumbnail_ready(self, generation, index, field, rgba):
+        """Shows a rendered Quick View thumbnail, unless it belongs to an earlier ``display_QV``."""
+        if generation != self.qv_renderer.generation:
+            return
+        thumbnail = self.qv_thumbnails.get(index)
+        if thumbnail is not None:
+            thumbnail.set_image(rgba)
+
+    def qv_thumbnail_failed(self, generation, index, field, message):
+        """Logs a Quick View field that could not be rendered."""
+        if generation == self.qv_renderer.generation:
+            log(f"Quick View could not render {field}: {message}", prefix='Canvas')
 
     def clear_layout(self, layout):
         """Clears a widget that contains plots.
@@ -430,12 +430,6 @@ class CanvasWidget(QWidget):
                     if cached_canvas is widget:
                         keep_widget = True
                         break
-                # Also check plot metadata figures
-                if not keep_widget:
-                    for plot_data in plot_registry.plots.values():
-                        if isinstance(plot_data, dict) and plot_data.get('figure') is widget:
-                            keep_widget = True
-                            break
 
             # Fallback: check tree items the old way
             if not keep_widget and plot_tree is not None:
@@ -536,6 +530,22 @@ class CanvasWidget(QWidget):
             # clear plot list in comboBox
             self.toolbar.mv.comboBoxMVPlots.clear()       
 
+    def set_single_view_plot(self, plot_info):
+        """Records ``plot_info`` as the plot shown in SingleView.
+
+        Used by ``add_canvas_to_window`` and when the SingleView canvas is
+        updated in place for another field (see ``MainWindow.update_SV``), so
+        the SingleView/MultiView duplicate checks compare against the plot on
+        screen.
+
+        Parameters
+        ----------
+        plot_info : dict
+            A dictionary with details about the plot
+        """
+        plot_info['view'][0] = True
+        self.SV_plot_name = f"{plot_info['sample_id']}:{plot_info['plot_type']}:{plot_info['plot_name']}"
+
     def add_canvas_to_window(self, plot_info, position=None):
         """Adds plot to selected view.
 
@@ -562,10 +572,7 @@ class CanvasWidget(QWidget):
             self.clear_layout(self.single_view.layout())
             self.sv_widget = plot_info['figure']
             
-            
-            plot_info['view'][0] = True
-            
-            self.SV_plot_name = f"{plot_info['sample_id']}:{plot_info['plot_type']}:{plot_info['plot_name']}"
+            self.set_single_view_plot(plot_info)
             #self.labelPlotInfo.
 
             for index in range(self.toolbar.mv.comboBoxMVPlots.count()):
@@ -711,7 +718,9 @@ class CanvasWidget(QWidget):
             return
 
         self.canvasWindow.setCurrentIndex(self.tab_dict['mv'])
-        self.add_canvas_to_window(plot_info, position=(row, col))
+        # MainWindow.add_canvas_to_window takes the canvas from the registry,
+        # redrawing it if it was evicted
+        self.ui.add_canvas_to_window(plot_info, position=(row, col))
 
     def save_current_plot_to_tree(self):
         """Save the current plot displayed on canvas to the plot tree and registry."""
@@ -849,6 +858,7 @@ class CanvasWidget(QWidget):
 
     def closeEvent(self, event):
         """Properly cleanup matplotlib resources to avoid 'wrapped C/C++ object deleted' errors."""
+        self.qv_renderer.shutdown()
         try:
             # Clean up mpl_toolbar if it exists
             if hasattr(self, 'mpl_toolbar') and self.mpl_toolbar is not None:
@@ -1003,10 +1013,10 @@ class MultiViewTab(QWidget):
         event.acceptProposedAction()
 
 class QuickViewTab(QWidget):
-    """Holds the grid of Quick View canvases.
+    """Holds the grid of Quick View thumbnails.
 
     Lives inside a ``QScrollArea`` (see ``CanvasWidget.setupUI``) rather than
-    being added to ``canvasWindow`` directly, since the number of canvases
+    being added to ``canvasWindow`` directly, since the number of thumbnails
     (and thus rows) can exceed the visible height once a column count is set.
     """
     def __init__(self, parent=None):
@@ -1,7 +1,6 @@
 import numpy as np
 import pandas as pd
 import traceback
-from scipy.stats import gaussian_kde
 
 from PyQt6.QtGui import QFont
 from PyQt6.QtWidgets import QLabel, QVBoxLayout
@@ -23,6 +22,10 @@ from lame_core.ColorManager import convert_color
 from global_geochemistry.geochem.plotting.spider import plot_spider_norm
 from global_geochemistry.plotting.radar import radar_prep, radarplot
 from src.plotting.scalebar import scalebar
+from src.common.pyramid import ImagePyramid, ImagePyramidBinding
+from src.common.binning import (
+    BinCountCache, array_digest, hist1d_counts, hist2d_counts, hist_from_counts, histogram_edges
+)
 from global_geochemistry.plotting.ternary import ternary
 from src.control.Logger import LoggerConfig, log_call, log
 
@@ -122,6 +125,88 @@ def create_plot(parent, data, app_data, style_data):
         
     return canvas, plot_info
 
+def field_map_frames(data, app_data, field_type, field):
+    """Gets the data for a field map, before and after color scale equalization.
+
+    Parameters
+    ----------
+    data : SampleObj
+        Sample data object.
+    app_data : AppData
+        Application data, for ``equalize_color_scale``.
+    field_type : str
+        Type of field to plot.
+    field : str
+        Field to plot.
+
+    Returns
+    -------
+    raw_df : pandas.DataFrame
+        Map data as returned by ``data.get_map_data``, kept for export.
+    map_df : pandas.DataFrame
+        Map data to plot; the ``'array'`` column is replaced by its CDF when the
+        color scale is equalized, otherwise the same values as ``raw_df``.
+    """
+    map_df = data.get_map_data(field, field_type)
+    raw_df = map_df.copy()
+
+    # equalized color bins to CDF function
+    if app_data.equalize_color_scale:
+        sorted_data = map_df['array'].sort_values()
+        cum_sum = sorted_data.cumsum()
+        cdf = cum_sum / cum_sum.iloc[-1]
+        map_df.loc[sorted_data.index, 'array'] = cdf.values
+
+    return raw_df, map_df
+
+def map_clim(style_data):
+    """Returns the color limits for a field map, or ``None`` if the color scale doesn't support them."""
+    match style_data.cscale:
+        case 'linear' | 'log':
+            return style_data.clim
+        case 'logit':
+            print('Color limits for logit are not currently implemented')
+        case 'symlog':
+            print('Color limits for symlog are not currently implemented')
+    return None
+
+def mask_overlay_rgba(data):
+    """Builds the grey RGBA layer drawn over masked pixels of a field map.
+
+    Parameters
+    ----------
+    data : SampleObj
+        Sample data object, provides ``mask``, ``array_size`` and ``order``.
+
+    Returns
+    -------
+    numpy.ndarray
+        Array of shape ``(*array_size, 4)``, 50% grey where masked and
+        transparent elsewhere.
+    """
+    mask = data.mask.astype(float)
+    reshaped_mask = np.reshape(mask, data.array_size, order=data.order)
+    masked_count = int((reshaped_mask == 0).sum())
+    log(f"plot_map_mpl: masking {masked_count}/{mask.size} pixels ({100*masked_count/mask.size:.2f}%)", prefix='Mask')
+
+    overlay = np.zeros((*reshaped_mask.shape, 4), dtype=float)
+    overlay[..., :3] = 0.5  # grey
+    overlay[..., 3] = np.where(reshaped_mask == 0, 0.5, 0)  # 50% alpha where masked, transparent elsewhere
+    return overlay
+
+def is_categorical_map(field_type, array):
+    """Whether a field map holds labels (clusters, ROIs or integer codes) rather than measurements."""
+    return field_type in ('Cluster', 'ROI') or array.dtype.kind in 'biu'
+
+def map_pyramid(data, app_data, field_type, field, reshaped_array):
+    """Returns the image pyramid for a reshaped field map, using the sample's cached levels when current.
+
+    Label maps are downsampled by block mode so coarse levels only show labels
+    that exist (see ``src.common.pyramid.ImagePyramid``).
+    """
+    key = (field_type, field, bool(app_data.equalize_color_scale))
+    return data.get_map_pyramid(key, reshaped_array, categorical=is_categorical_map(field_type, reshaped_array))
+
 @log_call(logger_key='Plot')
 def plot_map_mpl(parent, data, app_data, style_data, field_type, field, add_histogram=False):
     """
@@ -166,7 +251,7 @@ def plot_map_mpl(parent, data, app_data, style_data, field_type, field, add_hist
 
     # get data for current map
     #scale = data.processed.get_attribute(field, 'norm')
-    map_df = data.get_map_data(field, field_type)
+    raw_df, map_df = field_map_frames(data, app_data, field_type, field)
 
     array_size = data.array_size
     # style_data.aspect_ratio is None until first synced (see
@@ -176,14 +261,7 @@ def plot_map_mpl(parent, data, app_data, style_data, field_type, field, add_hist
     aspect_ratio = style_data.aspect_ratio if style_data.aspect_ratio is not None else data.aspect_ratio
 
     # store map_df to save_data if data needs to be exported
-    canvas.data = map_df.copy()
-
-    # equalized color bins to CDF function
-    if app_data.equalize_color_scale:
-        sorted_data = map_df['array'].sort_values()
-        cum_sum = sorted_data.cumsum()
-        cdf = cum_sum / cum_sum.iloc[-1]
-        map_df.loc[sorted_data.index, 'array'] = cdf.values
+    canvas.data = raw_df
 
     # plot map
     reshaped_array = np.reshape(map_df['array'].values, array_size, order=data.order)
@@ -200,30 +278,26 @@ def plot_map_mpl(parent, data, app_data, style_data, field_type, field, add_hist
     canvas.color_units = data.processed.column_attributes[field]['units']
     canvas.distance_units = data.processed.column_attributes['Xc']['units']
 
-    add_colorbar(style_data, canvas, cax)
-    match style_data.cscale:
-        case 'linear':
-            clim = style_data.clim
-        case 'log':
-            clim = style_data.clim
-            #clim = np.log10(style_data.clim)
-        case 'logit':
-            print('Color limits for logit are not currently implemented')
-        case 'symlog':
-            print('Color limits for symlog are not currently implemented')
-
-    cax.set_clim(clim[0], clim[1])
+    cbar = add_colorbar(style_data, canvas, cax)
+    clim = map_clim(style_data)
+    if clim is not None:
+        cax.set_clim(clim[0], clim[1])
 
     # use mask to create an alpha layer — grey RGBA overlay on masked pixels
-    mask = data.mask.astype(float)
-    reshaped_mask = np.reshape(mask, array_size, order=data.order)
-    masked_count = int((reshaped_mask == 0).sum())
-    log(f"plot_map_mpl: masking {masked_count}/{mask.size} pixels ({100*masked_count/mask.size:.2f}%)", prefix='Mask')
+    overlay = mask_overlay_rgba(data)
+    overlay_image = canvas.axes.imshow(overlay, aspect=aspect_ratio, interpolation='none')
 
-    overlay = np.zeros((*reshaped_mask.shape, 4), dtype=float)
-    overlay[..., :3] = 0.5  # grey
-    overlay[..., 3] = np.where(reshaped_mask == 0, 0.5, 0)  # 50% alpha where masked, transparent elsewhere
-    canvas.axes.imshow(overlay, aspect=aspect_ratio, interpolation='none')
+    # large maps are drawn from the pyramid level matching the on-screen size,
+    # switching to finer levels as the user zooms in
+    pyramid_binding = ImagePyramidBinding(canvas.axes)
+    pyramid_binding.add(cax, map_pyramid(data, app_data, field_type, field, reshaped_array))
+    pyramid_binding.add(overlay_image, ImagePyramid(overlay, categorical=True))
+
+    # handles for in-place updates (see src.plotting.MapView.FieldMapView)
+    canvas.map_image = cax
+    canvas.mask_image = overlay_image
+    canvas.colorbar = cbar
+    canvas.pyramid_binding = pyramid_binding
 
     canvas.axes.tick_params(direction=None,
         labelbottom=False, labeltop=False, labelright=False, labelleft=False,
@@ -335,7 +409,8 @@ def plot_map_pg(parent, sample_id, field_type, field, add_histogram=False):
     # layout.addWidget(graphicWidget)
 
     # Create the ImageItem
-    img_item = ImageItem(image=parent.array, antialias=False)
+    # autoDownsample draws large maps at roughly screen resolution
+    img_item = ImageItem(image=parent.array, antialias=False, autoDownsample=True)
 
     #set aspect ratio of rectangle
     img_item.setRect(parent.data[parent.app_data.sample_id].x.min(),
@@ -567,6 +642,8 @@ def _plot_kde_overlay(ax, values, color, peak_label=True):
     if len(values) < 2 or np.std(values) == 0:
         return
     try:
+        from scipy.stats import gaussian_kde
+
         kde = gaussian_kde(values)
     except Exception:
         return
@@ -582,6 +659,20 @@ def _plot_kde_overlay(ax, values, color, peak_label=True):
                      textcoords='offset points', xytext=(0, 6), fontsize=7,
                      color=color, ha='center')
 
+def histogram_cache_key(data, x, norm, edges, processed=True):
+    """Cache key for bin counts of the vector ``x`` (from ``get_scatter_data``) over ``edges``.
+
+    Vectors are already reduced to ``data.mask``, and their values only change
+    with ``norm``, ``data.processed_version`` and ``data.mask_version``, so
+    those (rather than the values) identify the counts.
+    """
+    return (
+        x['type'], x['field'], norm, processed,
+        BinCountCache.edges_key(edges),
+        data.processed_version,
+        data.mask_version,
+    )
+
 @log_call(logger_key='Plot')
 def plot_histogram(parent, data, app_data, style_data):
     """Plots a histogramn in the canvas window.
@@ -615,14 +706,15 @@ def plot_histogram(parent, data, app_data, style_data):
     #    analyte_2 = field.split(' / ')[1]
 
     x = dict()
-    if app_data.hist_plot_style == 'log-scaling' and app_data.c_field_type == 'Analyte':
+    processed = not (app_data.hist_plot_style == 'log-scaling' and app_data.c_field_type == 'Analyte')
+    if not processed:
         print('raw_data for log-scaling')
-        scatter_data = get_scatter_data(data, app_data, style_data, processed=False)
-        x = scatter_data['x'] if scatter_data and 'x' in scatter_data else None
     else:
         print('processed_data for histogram')
-        scatter_data = get_scatter_data(data, app_data, style_data, processed=True)
-        x = scatter_data['x'] if scatter_data and 'x' in scatter_data else None
+    # scale the vector was fetched with, for the bin count cache key
+    fetch_norm = style_data.xscale
+    scatter_data = get_scatter_data(data, app_data, style_data, processed=processed)
+    x = scatter_data['x'] if scatter_data and 'x' in scatter_data else None
     
     # Check if x data was successfully retrieved
     if x is None or 'array' not in x or x['array'] is None:
@@ -695,10 +787,15 @@ def plot_histogram(parent, data, app_data, style_data):
                 clusters = sorted(cluster_group.dropna().unique().astype(int).tolist())
 
         hist_dfs = []
-        # Plot histogram for all clusters
-        for i in clusters:
-            cluster_data = x['array'][cluster_group == i]
+        if app_data.hist_plot_style != 'log-scaling':
+            # bin every cluster in one pass; cached so style-only redraws skip re-binning
+            group_labels = np.asarray(cluster_group, dtype=float)
+            key = histogram_cache_key(data, x, fetch_norm, edges, processed) + (
+                app_data.c_field_type, app_data.c_field, tuple(clusters), array_digest(group_labels))
+            group_counts = data.binning_cache.get(key, lambda: hist1d_counts(x['array'], edges, group_labels, clusters))
 
+        # Plot histogram for all clusters
+        for k, i in enumerate(clusters):
             bar_color = cluster_color[int(i)]
             if htype == 'step':
                 ecolor = bar_color
@@ -706,10 +803,9 @@ def plot_histogram(parent, data, app_data, style_data):
                 ecolor = None
 
             if app_data.hist_plot_style != 'log-scaling' :
-                plot_data = canvas.axes.hist( cluster_data,
+                plot_data = hist_from_counts(canvas.axes, group_counts[k], edges,
                         cumulative=cumflag,
                         histtype=htype,
-                        bins=edges,
                         color=bar_color, edgecolor=ecolor,
                         linewidth=lw,
                         label=cluster_label[int(i)],
@@ -719,7 +815,7 @@ def plot_histogram(parent, data, app_data, style_data):
                 # plot_data: (n, bins, patches)
                 counts, bin_edges, _ = plot_data
                 if app_data.hist_show_kde and not cumflag:
-                    _plot_kde_overlay(canvas.axes, cluster_data, bar_color)
+                    _plot_kde_overlay(canvas.axes, x['array'][cluster_group == i], bar_color)
                 # Store histogram data for each cluster
                 df = pd.DataFrame({
                     'bin_left': bin_edges[:-1],
@@ -730,6 +826,8 @@ def plot_histogram(parent, data, app_data, style_data):
                 df['cluster'] = cluster_label[int(i)]
                 hist_dfs.append(df)
             else:
+                cluster_data = x['array'][cluster_group == i]
+
                 # Filter out NaN and zero values
                 filtered_data = cluster_data[~np.isnan(cluster_data) & (cluster_data > 0)]
 
@@ -777,10 +875,11 @@ def plot_histogram(parent, data, app_data, style_data):
             ecolor = None
 
         if app_data.hist_plot_style != 'log-scaling' :
-            plot_data = canvas.axes.hist( x['array'],
+            key = histogram_cache_key(data, x, fetch_norm, edges, processed)
+            bin_counts = data.binning_cache.get(key, lambda: hist1d_counts(x['array'], edges))
+            plot_data = hist_from_counts(canvas.axes, bin_counts, edges,
                     cumulative=cumflag,
                     histtype=htype,
-                    bins=edges,
                     color=bar_color, edgecolor=ecolor,
                     linewidth=lw,
                     alpha=style_data.marker_alpha/100,
@@ -942,7 +1041,14 @@ def logax(ax, lim, axis='y', label='', tick_label_rotation=0):
         print('Incorrect axis argument. Please use "x" or "y".')
 
 def add_colorbar(style_data, canvas, cax, cbartype='continuous', grouplabels=None, groupcolors=None, alpha=1):
-    """Adds a colorbar to a MPL figure
+    """Adds a colorbar or group legend to a MPL figure and returns the colorbar
+
+    For continuous color scales a colorbar for ``cax`` is added in the
+    ``style_data.cbar_dir`` direction and returned, so callers can later update
+    it in place (e.g. ``Colorbar.update_normal`` when the map's norm or limits
+    change, see ``src.plotting.MapView.FieldMapView``). For discrete color
+    scales the groups are drawn as a legend instead. Nothing is added when
+    ``style_data.cbar_dir`` is ``'none'``.
 
     Parameters
     ----------
@@ -950,8 +1056,8 @@ def add_colorbar(style_data, canvas, cax, cbartype='continuous', grouplabels=Non
         StyleData object containing style settings for the plot.
     canvas : MplCanvas
         canvas object
-    cax : axes
-        color axes object
+    cax : matplotlib.cm.ScalarMappable
+        Mappable the colorbar describes, e.g. the map's ``AxesImage``.
     cbartype : str
         Type of colorbar, ``dicrete`` or ``continuous``, Defaults to continuous
     grouplabels : list of str, optional
@@ -960,6 +1066,12 @@ def add_colorbar(style_data, canvas, cax, cbartype='continuous', grouplabels=Non
         List of colors for each group/category, used for discrete colorbars.
     alpha : float, optional
         Transparency of the colorbar, defaults to 1 (opaque).
+
+    Returns
+    -------
+    matplotlib.colorbar.Colorbar or None
+        The colorbar, or ``None`` for discrete legends or when
+        ``style_data.cbar_dir`` is ``'none'``.
     """
     #print("add_colorbar")
     # Add a colorbar
@@ -1040,6 +1152,8 @@ def add_colorbar(style_data, canvas, cax, cbartype='continuous', grouplabels=Non
     #else:
     #    print('(add_colorbar) Unknown type: '+cbartype)
 
+    return cbar
+
 @log_call(logger_key='Plot')
 def add_scalebar(data, app_data, style_data, ax):
     """Add a scalebar to a map
@@ -1106,18 +1220,20 @@ def plot_correlation(parent, data, app_data, style_data):
     # get the data for computing correlations
     df_filtered, analytes = data.get_processed_data()
 
-    # Calculate the correlation matrix
+    # Calculate the correlation matrix; columns unchanged since the last plot
+    # are not recomputed (see SampleObj.get_correlation_matrix)
     method = app_data.corr_method.lower()
     if app_data.cluster_method not in data.processed.columns:
-        correlation_matrix = df_filtered.corr(method=method)
+        correlation_matrix = data.get_correlation_matrix(method, values=df_filtered)
     else:
         algorithm = app_data.cluster_method
         cluster_group = data.processed.loc[:,algorithm]
         selected_clusters = app_data.cluster_dict[algorithm]['selected_clusters']
 
         ind = np.isin(cluster_group, selected_clusters)
+        rows_key = (algorithm, data.column_version(algorithm), tuple(selected_clusters))
 
-        correlation_matrix = df_filtered[ind].corr(method=method)
+        correlation_matrix = data.get_correlation_matrix(method, values=df_filtered, rows=ind, rows_key=rows_key)
     
     columns = correlation_matrix.columns
 
@@ -1836,8 +1952,13 @@ def hist2dbiplot(canvas, data, app_data, style_data, x, y):
     """
     # color by field
     norm = style_data.color_norm()
-    h = canvas.axes.hist2d(x['array'], y['array'], bins=style_data.resolution, norm=norm, cmap=style_data.get_colormap())
-    add_colorbar(style_data, canvas, h[3])
+    xedges = histogram_edges(x['array'], style_data.resolution)
+    yedges = histogram_edges(y['array'], style_data.resolution)
+    key = histogram_cache_key(data, x, style_data.xscale, xedges) + (y['type'], y['field'], style_data.yscale, BinCountCache.edges_key(yedges))
+    counts = data.binning_cache.get(key, lambda: hist2d_counts(x['array'], y['array'], xedges, yedges))
+    # what axes.hist2d draws, from the cached counts
+    mesh = canvas.axes.pcolormesh(xedges, yedges, counts.T, norm=norm, cmap=style_data.get_colormap())
+    add_colorbar(style_data, canvas, mesh)
 
     # axes
     xmin, xmax, xscale, xlbl = style_data.get_axis_values(data, x['field'])
@@ -0,0 +1,192 @@
+"""Retained-mode field map for the SingleView canvas.
+
+``plot_map_mpl`` builds a complete figure on every call -- a new ``MplCanvas``,
+two ``imshow`` calls (data plus the grey mask overlay), a colorbar, a
+scalebar and ``tight_layout``. When the user steps through analytes or
+changes the colormap, color limits or mask, none of that layout changes.
+
+``FieldMapView`` keeps the last field map canvas and, as long as nothing that
+affects the figure layout has changed, updates its ``AxesImage`` artists in
+place (new image pyramids, ``set_cmap``/``set_norm``/``set_clim``). If the colorbar
+is unaffected the axes are redrawn with blitting; otherwise the colorbar is
+refreshed and the canvas redrawn without rebuilding the figure. Any layout
+change falls back to a full ``plot_map_mpl`` rebuild.
+"""
+import numpy as np
+
+from src.common.pyramid import ImagePyramid
+from src.plotting.LamePlot import field_map_frames, map_clim, map_pyramid, mask_overlay_rgba, plot_map_mpl
+
+
+class FieldMapView:
+    """Persistent field map canvas, updated in place when only the data or color mapping changes.
+
+    Attributes
+    ----------
+    canvas : MplCanvas or None
+        Canvas of the last field map built or updated by this view.
+    plot_info : dict or None
+        Plot information for the map currently on ``canvas``.
+    map_df : pandas.DataFrame or None
+        Plotted map data (after color scale equalization) for the map on
+        ``canvas``, e.g. for the Preprocess tab's histogram.
+    """
+    def __init__(self):
+        self.canvas = None
+        self.plot_info = None
+        self.map_df = None
+
+        self._layout_key = None
+        self._colorbar_key = None
+        self._drawn_canvas = None
+
+    def invalidate(self):
+        """Forgets the retained canvas, so the next update rebuilds the figure."""
+        self.canvas = None
+        self.plot_info = None
+        self.map_df = None
+        self._layout_key = None
+        self._colorbar_key = None
+        self._drawn_canvas = None
+
+    def layout_key(self, data, app_data, style_data):
+        """Settings that determine the figure layout; any change requires a full rebuild."""
+        aspect_ratio = style_data.aspect_ratio if style_data.aspect_ratio is not None else data.aspect_ratio
+        return (
+            app_data.sample_id,
+            data.processed_version,
+            tuple(data.array_size),
+            data.order,
+            data.dx,
+            data.dy,
+            aspect_ratio,
+            style_data.cscale,
+            style_data.cbar_dir,
+            style_data.font_size,
+            style_data.scale_dir,
+            style_data.scale_length,
+            style_data.scale_location,
+            style_data.overlay_color,
+            tuple(style_data.xlim) if style_data.xlim else None,
+            tuple(style_data.ylim) if style_data.ylim else None,
+        )
+
+    def colorbar_key(self, style_data, clim, cmap):
+        """Settings drawn in the colorbar; when unchanged the map axes can be blitted alone."""
+        return (
+            cmap.name,
+            tuple(clim) if clim is not None else None,
+            style_data.clabel,
+        )
+
+    def update(self, parent, data, app_data, style_data, field_type, field, reuse=True):
+        """Plots a field map, reusing the retained canvas when possible.
+
+        Parameters
+        ----------
+        parent : QWidget
+            Parent for a newly built ``MplCanvas``.
+        data : SampleObj
+            Sample data object.
+        app_data : AppData
+            Application data.
+        style_data : StyleData
+            Plot style.
+        field_type : str
+            Type of field to plot.
+        field : str
+            Field to plot.
+        reuse : bool, optional
+            Whether the retained canvas may be updated in place, by default True.
+            Callers pass ``False`` when the canvas is no longer the one on
+            screen or has been saved elsewhere (e.g. to the plot tree).
+
+        Returns
+        -------
+        canvas : MplCanvas
+            Canvas showing the map.
+        plot_info : dict
+            Plot information, as returned by ``plot_map_mpl``.
+        rebuilt : bool
+            ``True`` if a new canvas was built, ``False`` if the retained canvas
+            was updated in place (and is therefore already on screen).
+        """
+        layout_key = self.layout_key(data, app_data, style_data)
+        if not (reuse and self.canvas is not None and layout_key == self._layout_key):
+            return (*self._rebuild(parent, data, app_data, style_data, field_type, field, layout_key), True)
+
+        canvas = self.canvas
+        raw_df, map_df = field_map_frames(data, app_data, field_type, field)
+        reshaped_array = np.reshape(map_df['array'].values, data.array_size, order=data.order)
+
+        cmap = style_data.get_colormap()
+        clim = map_clim(style_data)
+
+        image = canvas.map_image
+        binding = canvas.pyramid_binding
+        binding.set_pyramid(image, map_pyramid(data, app_data, field_type, field, reshaped_array))
+        binding.set_pyramid(canvas.mask_image, ImagePyramid(mask_overlay_rgba(data), categorical=True))
+        image.set_cmap(cmap)
+        image.set_norm(style_data.color_norm())
+        # scale from the full map, as imshow does, not the (smoothed) level on display
+        image.norm.autoscale_None(np.ma.masked_invalid(reshaped_array))
+        if clim is not None:
+            image.set_clim(clim[0], clim[1])
+
+        canvas.data = raw_df
+        canvas.array = reshaped_array
+        canvas.color_units = data.processed.column_attributes[field]['units']
+        canvas.plot_name = field
+
+        colorbar_key = self.colorbar_key(style_data, clim, cmap)
+        # blitting reuses the rest of the last full draw, so it needs one
+        if colorbar_key == self._colorbar_key and self._drawn_canvas is canvas:
+            self._blit(canvas)
+        else:
+            if canvas.colorbar is not None:
+                canvas.colorbar.update_normal(image)
+                canvas.colorbar.set_label(style_data.clabel, size=style_data.font_size)
+            canvas.draw_idle()
+        self._colorbar_key = colorbar_key
+
+        self.map_df = map_df
+        self.plot_info = self._plot_info(canvas, app_data, style_data, field_type, field)
+        return canvas, self.plot_info, False
+
+    def _rebuild(self, parent, data, app_data, style_data, field_type, field, layout_key):
+        canvas, _, _ = plot_map_mpl(parent, data, app_data, style_data, field_type, field)
+
+        self.canvas = canvas
+        self.map_df = field_map_frames(data, app_data, field_type, field)[1] if app_data.equalize_color_scale else canvas.data
+        self.plot_info = self._plot_info(canvas, app_data, style_data, field_type, field)
+        self._layout_key = layout_key
+        self._colorbar_key = self.colorbar_key(style_data, map_clim(style_data), canvas.map_image.get_cmap())
+        self._drawn_canvas = None
+        canvas.mpl_connect('draw_event', self._on_draw)
+        return canvas, self.plot_info
+
+    def _on_draw(self, event):
+        if event.canvas is self.canvas:
+            self._drawn_canvas = event.canvas
+
+    def _blit(self, canvas):
+        """Redraws only the map axes and copies them to the screen."""
+        canvas.axes.redraw_in_frame()
+        canvas.blit(canvas.axes.bbox)
+
+    def _plot_info(self, canvas, app_data, style_data, field_type, field):
+        # a fresh dict each update -- consumers (plot tree, info dock) may keep it
+        return {
+            'tree': field_type,
+            'sample_id': app_data.sample_id,
+            'plot_name': field,
+            'plot_type': 'field map',
+            'field_type': field_type,
+            'field': field,
+            'figure': canvas,
+            'style': style_data.style_dict[style_data.plot_type],
+            'cluster_groups': None,
+            'view': [True,False],
+            'position': None,
+            'data': canvas.data
+            }
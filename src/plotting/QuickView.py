@@ -0,0 +1,376 @@
+"""Background thumbnail rendering for the Quick View tab.
+
+Building a Matplotlib canvas per field (``imshow`` plus ``tight_layout``) on
+the GUI thread makes Quick View take seconds to open for long analyte lists.
+Instead, ``QuickViewRenderer`` colormaps each field straight to a small RGBA
+array in a thread pool and hands it to a lightweight ``QuickViewThumbnail``
+widget, so the grid fills in progressively as thumbnails finish. All
+thumbnails of a list share one normalization, so their colors can be compared.
+Rendered thumbnails are cached on (sample, field, colormap, normalization,
+processed version), so reopening Quick View, or switching back to an earlier
+list, is immediate.
+
+Sample data are only read on the GUI thread: ``render`` fetches each map and
+its value range there, and the pool is handed plain arrays, a few at a time so
+only a bounded number of full-resolution maps are held at once.
+"""
+import threading
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from matplotlib.colors import LogNorm, Normalize
+from PyQt6.QtCore import QObject, QRectF, QSize, Qt, pyqtSignal
+from PyQt6.QtGui import QColor, QFont, QImage, QPainter
+from PyQt6.QtWidgets import QSizePolicy, QWidget
+
+from src.common.pyramid import block_mean
+
+
+def quick_view_thumbnail(array, cmap, max_size=400, vmin=None, vmax=None, scale='linear'):
+    """Colormaps a map to an RGBA thumbnail.
+
+    The map is block-mean downsampled until neither dimension exceeds
+    ``max_size`` and normalized between ``vmin`` and ``vmax``; limits left as
+    ``None`` are taken from the map itself (as ``imshow`` does by default).
+    NaNs, and non-positive values on a log scale, take the colormap's "bad"
+    color.
+
+    Parameters
+    ----------
+    array : numpy.ndarray
+        Reshaped map, shape ``array_size``.
+    cmap : matplotlib.colors.Colormap
+        Colormap.
+    max_size : int, optional
+        Largest thumbnail dimension in pixels, by default 400.
+    vmin, vmax : float, optional
+        Color limits, by default the map's own range.
+    scale : str, optional
+        ``'linear'`` or ``'log'``, by default ``'linear'``.
+
+    Returns
+    -------
+    numpy.ndarray
+        C-contiguous uint8 array of shape ``(rows, cols, 4)``.
+    """
+    factor = 1
+    while max(array.shape) > factor * max_size:
+        factor *= 2
+    if factor > 1:
+        array = block_mean(array, factor)
+
+    masked = np.ma.masked_invalid(array)
+    if scale == 'log':
+        masked = np.ma.masked_less_equal(masked, 0)
+        norm = LogNorm(vmin, vmax)
+    else:
+        norm = Normalize(vmin, vmax)
+    norm.autoscale_None(masked)
+    return np.ascontiguousarray(cmap(norm(masked), bytes=True))
+
+
+def value_range(array):
+    """Finite minimum, maximum and smallest positive value of a map, ``None`` where there are none."""
+    finite = array[np.isfinite(array)]
+    if finite.size == 0:
+        return None, None, None
+    positive = finite[finite > 0]
+    return float(finite.min()), float(finite.max()), float(positive.min()) if positive.size else None
+
+
+def shared_limits(ranges, scale='linear'):
+    """Color limits spanning every map's ``value_range``, for a common normalization.
+
+    Parameters
+    ----------
+    ranges : list of tuple
+        ``value_range`` of each map.
+    scale : str, optional
+        ``'linear'`` or ``'log'``; a log scale starts at the smallest positive
+        value, by default ``'linear'``.
+
+    Returns
+    -------
+    tuple of float or None
+        ``(vmin, vmax)``; ``None`` where no map has data.
+    """
+    lows = [r[2] if scale == 'log' else r[0] for r in ranges]
+    lows = [v for v in lows if v is not None]
+    highs = [r[1] for r in ranges if r[1] is not None]
+    return (min(lows) if lows else None), (max(highs) if highs else None)
+
+
+class QuickViewRenderer(QObject):
+    """Renders Quick View thumbnails in a thread pool, caching the results.
+
+    Each call to ``render`` starts a new generation. Unstarted thumbnails
+    from an earlier generation are dropped, and receivers compare the
+    emitted generation with ``generation`` to ignore any that were already
+    in flight, so changing the list or sample while rendering never shows
+    stale maps.
+
+    Maps are read from the sample on the GUI thread (in ``render`` and as
+    workers free up); the pool only colormaps the arrays it is given.
+
+    Parameters
+    ----------
+    parent : QObject, optional
+        Parent object, by default None.
+    max_workers : int, optional
+        Size of the thread pool, by default chosen by ``ThreadPoolExecutor``.
+    cache_budget : int, optional
+        Memory held by cached thumbnails, in bytes, by default 128 MB.
+    max_in_flight : int, optional
+        Most full-resolution maps handed to the pool at once, by default
+        twice the number of workers.
+
+    Signals
+    -------
+    thumbnailReady(int, int, str, object)
+        Generation, index in the field list, field and RGBA array.
+    thumbnailFailed(int, int, str, str)
+        Generation, index, field and error message.
+    """
+    thumbnailReady = pyqtSignal(int, int, str, object)
+    thumbnailFailed = pyqtSignal(int, int, str, str)
+    _workerDone = pyqtSignal()
+
+    def __init__(self, parent=None, max_workers=None, cache_budget=128 * 2**20, max_in_flight=None):
+        super().__init__(parent)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='QuickView')
+        self._max_in_flight = max_in_flight or 2 * self._executor._max_workers
+        self._cache = OrderedDict()
+        self._cache_bytes = 0
+        self._cache_budget = cache_budget
+        self._lock = threading.Lock()
+        self.generation = 0
+
+        # value ranges per (sample, field, processed version), so a cached list
+        # needs no map reads to recompute its shared limits
+        self._ranges = OrderedDict()
+        self._queue = deque()
+        self._arrays = {}
+        self._job = None
+        self._in_flight = 0
+        # workers finish on pool threads; the next map is read back on this object's (GUI) thread
+        self._workerDone.connect(self._worker_done, Qt.ConnectionType.QueuedConnection)
+
+    def render(self, data, fields, cmap, max_size=400, scale='linear'):
+        """Starts rendering thumbnails for ``fields``.
+
+        The shared color limits are computed first, from every field's value
+        range. Cached thumbnails are then emitted immediately; the rest are
+        rendered in the pool and emitted as they finish, in no particular
+        order.
+
+        Parameters
+        ----------
+        data : SampleObj
+            Sample data; only read on the calling (GUI) thread.
+        fields : list of (str, str)
+            ``(field_type, field)`` pairs, in display order.
+        cmap : matplotlib.colors.Colormap
+            Colormap shared by every thumbnail.
+        max_size : int, optional
+            Largest thumbnail dimension in pixels, by default 400.
+        scale : str, optional
+            Shared color scale, ``'linear'`` or ``'log'``, by default ``'linear'``.
+
+        Returns
+        -------
+        int
+            Generation of this request, to match against emitted signals.
+        """
+        self.cancel()
+        generation = self.generation
+
+        # colormaps build their lookup table lazily on first call; do it here
+        # rather than racing to do so in several workers
+        cmap(0.0)
+
+        ranges = []
+        arrays = {}
+        failed = set()
+        for index, (field_type, field) in enumerate(fields):
+            range_key = (data.sample_id, field_type, field, data.processed_version)
+            field_range = self._ranges.get(range_key)
+            if field_range is None:
+                try:
+                    array = self.map_array(data, field_type, field)
+                except Exception as e:
+                    self.thumbnailFailed.emit(generation, index, field, str(e))
+                    failed.add(index)
+                    continue
+                field_range = value_range(array)
+                self._ranges[range_key] = field_range
+                while len(self._ranges) > 4096:
+                    self._ranges.popitem(last=False)
+                if len(arrays) < self._max_in_flight:
+                    arrays[index] = array
+            ranges.append(field_range)
+        norm = (*shared_limits(ranges, scale), scale)
+
+        pending = deque()
+        for index, (field_type, field) in enumerate(fields):
+            if index in failed:
+                continue
+            key = self.cache_key(data, field_type, field, cmap, max_size, norm)
+            with self._lock:
+                rgba = self._cache.get(key)
+                if rgba is not None:
+                    self._cache.move_to_end(key)
+            if rgba is not None:
+                self.thumbnailReady.emit(generation, index, field, rgba)
+            else:
+                pending.append((index, field_type, field, key))
+
+        self._queue = pending
+        self._arrays = {index: arrays[index] for index, *_ in pending if index in arrays}
+        self._job = (generation, data, cmap, max_size, norm)
+        self._dispatch()
+        return generation
+
+    def cancel(self):
+        """Drops any thumbnails still being rendered."""
+        self.generation += 1
+        self._queue.clear()
+        self._arrays.clear()
+        self._job = None
+
+    def shutdown(self):
+        """Cancels outstanding work and stops the thread pool."""
+        self.cancel()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    @staticmethod
+    def cache_key(data, field_type, field, cmap, max_size, norm):
+        """Identifies a rendered thumbnail; stale once the sample's processed data or the shared limits change."""
+        return (data.sample_id, field_type, field, cmap.name, data.processed_version, max_size, norm)
+
+    @staticmethod
+    def map_array(data, field_type, field):
+        """Reads a field's map from the sample, reshaped to ``array_size``."""
+        map_df = data.get_map_data(field, field_type)
+        return np.reshape(map_df['array'].values, tuple(data.array_size), order=data.order)
+
+    def _dispatch(self):
+        """Hands the pool the next maps, up to ``max_in_flight`` at a time."""
+        if self._job is None:
+            return
+        generation, data, cmap, max_size, norm = self._job
+        while self._queue and self._in_flight < self._max_in_flight:
+            index, field_type, field, key = self._queue.popleft()
+            array = self._arrays.pop(index, None)
+            if array is None:
+                try:
+                    array = self.map_array(data, field_type, field)
+                except Exception as e:
+                    self.thumbnailFailed.emit(generation, index, field, str(e))
+                    continue
+            self._in_flight += 1
+            self._executor.submit(self._render_one, generation, index, field, key, array, cmap, max_size, norm)
+
+    def _worker_done(self):
+        self._in_flight -= 1
+        self._dispatch()
+
+    def _render_one(self, generation, index, field, key, array, cmap, max_size, norm):
+        try:
+            if generation != self.generation:
+                return
+            try:
+                rgba = quick_view_thumbnail(array, cmap, max_size, *norm)
+            except Exception as e:
+                self.thumbnailFailed.emit(generation, index, field, str(e))
+                return
+            with self._lock:
+                self._add_to_cache(key, rgba)
+            self.thumbnailReady.emit(generation, index, field, rgba)
+        finally:
+            self._workerDone.emit()
+
+    def _add_to_cache(self, key, rgba):
+        if key in self._cache:
+            self._cache_bytes -= self._cache.pop(key).nbytes
+        self._cache[key] = rgba
+        self._cache_bytes += rgba.nbytes
+        while self._cache_bytes > self._cache_budget and len(self._cache) > 1:
+            _, evicted = self._cache.popitem(last=False)
+            self._cache_bytes -= evicted.nbytes
+
+
+class QuickViewThumbnail(QWidget):
+    """Draws one Quick View thumbnail, scaled to fit and labeled with its field.
+
+    Shows only the label until ``set_image`` is called, so the grid can be
+    laid out before any thumbnail has rendered.
+
+    Parameters
+    ----------
+    field : str
+        Field name drawn in the top left corner.
+    aspect_ratio : float, optional
+        Height/width of a map pixel, by default 1.
+    label_color : str, optional
+        Color of the field label, by default ``'white'``.
+    parent : QWidget, optional
+        Parent widget, by default None.
+    """
+    def __init__(self, field, aspect_ratio=1.0, label_color='white', parent=None):
+        super().__init__(parent)
+        self.field = field
+        self.aspect_ratio = aspect_ratio or 1.0
+        self.label_color = QColor(label_color)
+        self.rgba = None
+        self._image = None
+
+        policy = QSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Preferred)
+        policy.setHeightForWidth(True)
+        self.setSizePolicy(policy)
+        self.setMinimumSize(QSize(80, 80))
+
+    def set_image(self, rgba):
+        """Shows an RGBA thumbnail from ``quick_view_thumbnail``."""
+        # QImage wraps the buffer without copying, so keep the array alive with it
+        self.rgba = rgba
+        rows, cols = rgba.shape[:2]
+        self._image = QImage(rgba.data, cols, rows, 4*cols, QImage.Format.Format_RGBA8888)
+        self.updateGeometry()
+        self.update()
+
+    def _map_aspect(self):
+        """Height/width of the whole map as displayed."""
+        if self.rgba is None:
+            return 1.0
+        rows, cols = self.rgba.shape[:2]
+        return self.aspect_ratio * rows / cols
+
+    def hasHeightForWidth(self):
+        return True
+
+    def heightForWidth(self, width):
+        return int(round(width * self._map_aspect()))
+
+    def sizeHint(self):
+        return QSize(300, self.heightForWidth(300))
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        aspect = self._map_aspect()
+        width = min(self.width(), self.height() / aspect)
+        height = width * aspect
+        target = QRectF((self.width() - width) / 2, (self.height() - height) / 2, width, height)
+
+        if self._image is not None:
+            painter.setRenderHint(QPainter.RenderHint.SmoothPixmapTransform, True)
+            painter.drawImage(target, self._image)
+
+        font = QFont()
+        font.setPointSize(8)
+        font.setWeight(QFont.Weight.DemiBold)
+        font.setStretch(QFont.Stretch.Condensed)
+        painter.setFont(font)
+        painter.setPen(self.label_color)
+        painter.drawText(target.adjusted(4, 4, -4, -4), Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignTop, self.field)
+        painter.end()
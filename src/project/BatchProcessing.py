@@ -0,0 +1,360 @@
+"""Headless batch processing of a project's samples.
+
+Applying a project's saved processing state (filters and computed fields,
+see `SampleProcessingState`) or a set of calculator formulas to every sample
+otherwise means selecting each sample in the GUI in turn, which loads it
+through `LameIO.initialize_sample_object`. `run_project_batch` does the same
+work without a window: each sample is loaded into a `LaserSampleObj`, its
+processing state and the requested formulas are replayed through
+`SampleObj.apply_processing_state` (the same code path a project load
+uses), the processed data are written to ``<output_dir>/<sample_id>.processed.csv``
+(the sample's own data file is never modified), and the sample's project
+entry is updated with the state that was applied.
+
+Samples run in separate worker processes. Each worker handles
+``tasks_per_worker`` samples before it is replaced, so memory a sample
+leaves behind (large intermediate arrays, allocator fragmentation) is
+returned to the system, and ``memory_limit_mb`` caps each worker's address
+space where the platform supports it. A sample that fails -- an exception,
+or a worker killed outright, e.g. on running out of memory -- is reported
+in its `BatchResult` without stopping the rest of the batch.
+
+The Qt-dependent data layer is only imported inside the worker, so this
+module itself stays importable (and testable) without a ``QApplication``.
+"""
+import copy
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, field
+from datetime import datetime
+from multiprocessing import get_context
+from pathlib import Path
+from typing import Callable, Optional
+
+from src.project.ProjectModel import ComputedFieldSpec, ProcessingLogEntry, SampleProcessingState
+
+DEFAULT_OUTLIER_METHOD = 'Chauvenet criterion'
+DEFAULT_NEGATIVE_METHOD = 'ignore negatives'
+
+
+@dataclass
+class BatchTask:
+    """Everything a worker needs to process one sample (all picklable)."""
+    sample_id: str
+    sample_path: Path
+    processing: SampleProcessingState
+    output_path: Path
+    ref_chem: object = None
+    outlier_method: str = DEFAULT_OUTLIER_METHOD
+    negative_method: str = DEFAULT_NEGATIVE_METHOD
+
+
+@dataclass
+class BatchResult:
+    """Outcome of one sample of a batch.
+
+    Parameters
+    ----------
+    sample_id : str
+    ok : bool
+        ``True`` if the sample loaded and every computed field was produced.
+    output_path : Path, optional
+        Processed data (or, for a workflow run, the output directory)
+        written for the sample, if any.
+    processing : SampleProcessingState, optional
+        State exported from the processed sample, written back to its project entry.
+    error : str, optional
+        What went wrong, for a failed sample.
+    failed_fields : list of str
+        Computed fields that could not be evaluated on this sample.
+    outputs : list of Path
+        Every file written for the sample.
+    elapsed_s : float
+        Wall time spent on the sample.
+    peak_memory_mb : float, optional
+        Peak resident memory of the worker process, where available.
+    """
+    sample_id: str
+    ok: bool
+    output_path: Optional[Path] = None
+    processing: Optional[SampleProcessingState] = None
+    error: Optional[str] = None
+    failed_fields: list = field(default_factory=list)
+    outputs: list = field(default_factory=list)
+    elapsed_s: float = 0.0
+    peak_memory_mb: Optional[float] = None
+
+
+def merge_formulas(processing, formulas):
+    """A copy of `processing` with `formulas` added to its computed fields.
+
+    Parameters
+    ----------
+    processing : SampleProcessingState
+    formulas : dict or list of ComputedFieldSpec
+        ``{field: formula}`` or specs; a formula for a field the state
+        already computes replaces the saved one.
+
+    Returns
+    -------
+    SampleProcessingState
+    """
+    state = copy.deepcopy(processing)
+    if isinstance(formulas, dict):
+        formulas = [ComputedFieldSpec(field=f, formula=formula) for f, formula in formulas.items()]
+    for spec in formulas or []:
+        state.computed_fields = [c for c in state.computed_fields if c.field != spec.field]
+        state.computed_fields.append(ComputedFieldSpec(field=spec.field, formula=spec.formula))
+    return state
+
+
+def peak_memory_mb():
+    """Peak resident memory of the current process in MB, or ``None`` where unavailable."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    # ru_maxrss is in kilobytes on Linux, bytes on macOS
+    scale = 1 / 2**20 if os.uname().sysname == 'Darwin' else 1 / 2**10
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+
+
+def _limit_worker_memory(memory_limit_mb):
+    """Worker initializer: caps the process's address space (POSIX only)."""
+    if memory_limit_mb is None:
+        return
+    try:
+        import resource
+    except ImportError:
+        return
+    limit = int(memory_limit_mb * 2**20)
+    _, hard = resource.getrlimit(resource.RLIMIT_AS)
+    if hard != resource.RLIM_INFINITY:
+        limit = min(limit, hard)
+    resource.setrlimit(resource.RLIMIT_AS, (limit, hard))
+
+
+def process_sample(task):
+    """Loads one sample, replays its processing state and writes the processed data.
+
+    The worker-side half of `run_project_batch`; also usable directly to
+    process a single sample in the current process.
+
+    Parameters
+    ----------
+    task : BatchTask
+
+    Returns
+    -------
+    BatchResult
+    """
+    import src.app.config  # noqa: F401 -- runs lame_core.config.setup() in the worker
+    from src.common.Calculator import CustomFieldCalculator
+    from src.data.DataHandling import LaserSampleObj
+
+    start = time.perf_counter()
+    data = LaserSampleObj(
+        sample_id=task.sample_id,
+        file_path=str(task.sample_path),
+        outlier_method=task.outlier_method,
+        negative_method=task.negative_method,
+        ref_chem=task.ref_chem,
+    )
+    data.apply_processing_state(task.processing, ref_chem=task.ref_chem, field_calculator=CustomFieldCalculator())
+    failed_fields = [c.field for c in task.processing.computed_fields if c.field not in data.processed.columns]
+
+    output = data.processed.copy()
+    output['mask'] = data.mask
+    task.output_path.parent.mkdir(parents=True, exist_ok=True)
+    output.to_csv(task.output_path, index=False)
+
+    processing = data.export_processing_state()
+    processing.workflow_ref = task.processing.workflow_ref
+    processing.processing_log = list(task.processing.processing_log) + [
+        ProcessingLogEntry(
+            timestamp=datetime.now().isoformat(timespec='seconds'),
+            action='batch_processed',
+            details={'output': str(task.output_path), 'failed_fields': failed_fields},
+        )
+    ]
+    return BatchResult(
+        sample_id=task.sample_id,
+        ok=not failed_fields,
+        output_path=task.output_path,
+        processing=processing,
+        error=f"could not compute {', '.join(failed_fields)}" if failed_fields else None,
+        failed_fields=failed_fields,
+        outputs=[task.output_path],
+        elapsed_s=time.perf_counter() - start,
+        peak_memory_mb=peak_memory_mb(),
+    )
+
+
+def _run_task(worker, task):
+    """Runs `worker` on `task`, turning an exception into a failed result."""
+    start = time.perf_counter()
+    try:
+        return worker(task)
+    except Exception as e:
+        return BatchResult(
+            sample_id=task.sample_id, ok=False, error=f"{type(e).__name__}: {e}",
+            elapsed_s=time.perf_counter() - start, peak_memory_mb=peak_memory_mb(),
+        )
+
+
+def _run_tasks(worker, tasks):
+    """Pool entry point: runs one worker process's share of the samples."""
+    return [_run_task(worker, task) for task in tasks]
+
+
+def _run_pool(worker, chunks, max_workers, memory_limit_mb, on_result):
+    """Runs `chunks` of tasks in fresh worker processes, one chunk per process.
+
+    Returns the results of the chunks that completed, and the tasks of the
+    chunks lost to a worker process that died.
+    """
+    results = []
+    lost = []
+    # one chunk per process (max_tasks_per_child=1) rather than letting a
+    # process take several tasks: pools recycling processes after more than
+    # one task can hang on Python 3.11
+    with ProcessPoolExecutor(
+        max_workers=max_workers,
+        mp_context=get_context('spawn'),
+        max_tasks_per_child=1,
+        initializer=_limit_worker_memory,
+        initargs=(memory_limit_mb,),
+    ) as pool:
+        futures = {pool.submit(_run_tasks, worker, chunk): chunk for chunk in chunks}
+        for future in as_completed(futures):
+            try:
+                chunk_results = future.result()
+            except BrokenProcessPool:
+                lost.extend(futures[future])
+                continue
+            results.extend(chunk_results)
+            if on_result is not None:
+                for result in chunk_results:
+                    on_result(result)
+    return results, lost
+
+
+def run_batch(tasks, worker, max_workers=None, tasks_per_worker=1, memory_limit_mb=None, on_result=None):
+    """Runs `worker` on every task in fresh worker processes.
+
+    The pool behind `run_project_batch`, also used by the headless workflow
+    runner (``src.workflow.BatchRunner``).
+
+    Parameters
+    ----------
+    tasks : list
+        Picklable tasks, each with a unique ``sample_id``.
+    worker : callable
+        Module-level function run on each task, returning a `BatchResult`;
+        an exception it raises becomes a failed result.
+    max_workers, tasks_per_worker, memory_limit_mb, on_result
+        As `run_project_batch`.
+
+    Returns
+    -------
+    dict
+        `BatchResult` by sample id, in task order.
+    """
+    chunks = [tasks[i:i + tasks_per_worker] for i in range(0, len(tasks), tasks_per_worker)]
+    completed, lost = _run_pool(worker, chunks, max_workers, memory_limit_mb, on_result)
+    # a worker process that dies takes the whole pool down with it, so the
+    # samples it lost are not necessarily the culprit: rerun each on its own,
+    # and only a sample that kills its worker alone is reported as failed
+    for task in lost:
+        retried, crashed = _run_pool(worker, [[task]], 1, memory_limit_mb, on_result)
+        completed.extend(retried)
+        if crashed:
+            result = BatchResult(sample_id=task.sample_id, ok=False, error='worker process terminated unexpectedly')
+            completed.append(result)
+            if on_result is not None:
+                on_result(result)
+
+    results = {result.sample_id: result for result in completed}
+    return {task.sample_id: results[task.sample_id] for task in tasks}
+
+
+def run_project_batch(
+    project,
+    output_dir,
+    formulas=None,
+    sample_ids=None,
+    ref_chem=None,
+    outlier_method=DEFAULT_OUTLIER_METHOD,
+    negative_method=DEFAULT_NEGATIVE_METHOD,
+    max_workers=None,
+    tasks_per_worker=1,
+    memory_limit_mb=None,
+    on_result: Optional[Callable] = None,
+    worker: Callable = process_sample,
+):
+    """Processes a project's samples headlessly in parallel worker processes.
+
+    Parameters
+    ----------
+    project : Project
+        Project whose samples are processed. Each processed sample's
+        ``processing`` entry is replaced with the state that was applied
+        (plus a ``batch_processed`` log entry), and the project is marked
+        dirty; saving the manifest is left to the caller.
+    output_dir : str or Path
+        Directory receiving ``<sample_id>.processed.csv`` for every sample.
+    formulas : dict or list of ComputedFieldSpec, optional
+        Calculator formulas applied to every sample in addition to (or
+        replacing, by field name) its saved computed fields.
+    sample_ids : list of str, optional
+        Samples to process, by default all of them.
+    ref_chem : pandas.Series, optional
+        Reference chemistry for normalized field references (``AppData.ref_chem``).
+    outlier_method, negative_method : str, optional
+        Preprocessing methods each sample is loaded with.
+    max_workers : int, optional
+        Worker processes, by default ``os.cpu_count()``.
+    tasks_per_worker : int, optional
+        Samples handed to each worker process, which exits after
+        processing them, by default 1 (a fresh process per sample).
+    memory_limit_mb : float, optional
+        Address-space limit for each worker (POSIX only); a sample
+        exceeding it fails with a ``MemoryError`` instead of exhausting
+        the machine.
+    on_result : callable, optional
+        Called with each `BatchResult` as it completes, e.g. for progress.
+    worker : callable, optional
+        Function run on each `BatchTask`, by default `process_sample`; must
+        be picklable (a module-level function).
+
+    Returns
+    -------
+    dict
+        `BatchResult` by sample id, in the order samples were requested.
+    """
+    output_dir = Path(output_dir)
+    sample_ids = list(project.samples) if sample_ids is None else list(sample_ids)
+    tasks = {}
+    for sample_id in sample_ids:
+        entry = project.samples[sample_id]
+        tasks[sample_id] = BatchTask(
+            sample_id=sample_id,
+            sample_path=Path(entry.sample_path),
+            processing=merge_formulas(entry.processing, formulas),
+            output_path=output_dir / f"{sample_id}.processed.csv",
+            ref_chem=ref_chem,
+            outlier_method=outlier_method,
+            negative_method=negative_method,
+        )
+
+    results = run_batch(
+        [tasks[sample_id] for sample_id in sample_ids], worker, max_workers=max_workers,
+        tasks_per_worker=tasks_per_worker, memory_limit_mb=memory_limit_mb, on_result=on_result,
+    )
+    for sample_id, result in results.items():
+        if result.processing is not None:
+            project.samples[sample_id].processing = result.processing
+            project.dirty = True
+    return results
@@ -3,18 +3,222 @@ Plot Registry System for Managing Plot Metadata and Canvas Lifecycle
 
 This module provides centralized management for plot metadata and canvas instances,
 separating plot data from Qt widgets to improve memory management and prevent crashes.
+
+Registered plots are kept as lightweight metadata plus a ``PlotRecipe`` (plot
+type, sample, style dictionary -- which holds the plotted fields -- the app
+settings the plot type reads and the sample's data version); the rendered
+canvases, with the data frames they hold, live only in an LRU cache bounded by
+both a count and a memory budget. A plot whose canvas was evicted is drawn
+again from its recipe when it is next shown. Plots ``create_plot`` cannot draw
+again (see ``RECIPE_STATE``) keep their canvas.
 """
 
+import copy
+from dataclasses import dataclass, field
 from datetime import datetime
-from typing import Dict, List, Optional, Any
+from typing import Callable, Dict, List, Optional, Any
 import uuid
 from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
 from PyQt6.QtCore import QObject, pyqtSignal
 
 from src.plotting.CustomMplCanvas import MplCanvas
 from src.control.Logger import auto_log_methods, log
 
 
+# plot_info entries that hold the rendered canvas or its data; they are kept
+# in the canvas cache, not in the registered metadata
+HEAVY_KEYS = ('figure', 'data')
+
+# AppData settings, besides the sample and the plot type's style dictionary,
+# that create_plot reads for each plot type it can draw. Plot types missing
+# here can't be drawn again from a recipe, so their canvases are never evicted.
+RECIPE_STATE = {
+    'field map': ('equalize_color_scale',),
+    'correlation': ('corr_method', 'corr_squared', 'cluster_method', 'cluster_dict'),
+    'histogram': ('hist_plot_style', 'hist_num_bins', 'hist_show_kde', 'cluster_dict'),
+    'scatter': ('cluster_dict',),
+    'heatmap': ('cluster_dict',),
+    'ternary map': (),
+    'TEC': ('ndim_list', 'ndim_quantile_index', 'ref_index', 'cluster_dict'),
+    'radar': ('ndim_list', 'ndim_quantile_index', 'ref_index', 'cluster_dict'),
+    'variance': ('dim_red_method', 'dim_red_x', 'dim_red_y', 'update_pca_flag'),
+    'basis vectors': ('dim_red_method', 'dim_red_x', 'dim_red_y', 'update_pca_flag'),
+    'dimension scatter': ('dim_red_method', 'dim_red_x', 'dim_red_y', 'update_pca_flag'),
+    'dimension heatmap': ('dim_red_method', 'dim_red_x', 'dim_red_y', 'update_pca_flag'),
+    'dimension score map': ('dim_red_method', 'dim_red_x', 'dim_red_y', 'update_pca_flag'),
+    'cluster map': ('cluster_method', 'cluster_dict'),
+    'cluster score map': ('cluster_method', 'cluster_dict'),
+    'cluster performance': ('cluster_method', 'cluster_dict', 'max_clusters'),
+    'roi map': (),
+    'isochron': ('cluster_dict',),
+}
+
+
+def _state_attribute(app_data, name):
+    """Attribute holding the AppData setting ``name``, the private one behind a
+    property if there is one, so restoring it runs no setter side effects."""
+    private = f'_{name}'
+    return private if hasattr(app_data, private) else name
+
+
+def estimate_nbytes(obj) -> int:
+    """Approximate memory held by a data object, in bytes.
+
+    Parameters
+    ----------
+    obj : pandas.DataFrame, pandas.Series, numpy.ndarray, dict, list or None
+        Object to measure; containers are measured recursively.
+
+    Returns
+    -------
+    int
+        Size in bytes, 0 for ``None`` and for objects of other types.
+    """
+    if obj is None:
+        return 0
+    if isinstance(obj, (pd.DataFrame, pd.Series)):
+        return int(np.sum(obj.memory_usage(deep=True)))
+    if isinstance(obj, np.ndarray):
+        return int(obj.nbytes)
+    if isinstance(obj, dict):
+        return sum(estimate_nbytes(v) for v in obj.values())
+    if isinstance(obj, (list, tuple)):
+        return sum(estimate_nbytes(v) for v in obj)
+    return 0
+
+
+def canvas_nbytes(canvas) -> int:
+    """Approximate memory held by a rendered canvas, in bytes.
+
+    Counts the data frame and map array attached to the canvas, the arrays
+    of the images drawn on its axes and the canvas's RGBA render buffer.
+
+    Parameters
+    ----------
+    canvas : MplCanvas
+        Rendered canvas.
+
+    Returns
+    -------
+    int
+        Size in bytes.
+    """
+    nbytes = estimate_nbytes(getattr(canvas, 'data', None)) + estimate_nbytes(getattr(canvas, 'array', None))
+    figure = getattr(canvas, 'figure', None)
+    if figure is None:
+        return nbytes
+    width, height = figure.bbox.size
+    nbytes += int(width * height) * 4
+    for ax in figure.axes:
+        for image in ax.get_images():
+            nbytes += estimate_nbytes(np.asarray(image.get_array()))
+    return nbytes
+
+
+@dataclass
+class PlotRecipe:
+    """Everything needed to draw a registered plot again.
+
+    Attributes
+    ----------
+    sample_id : str
+        Sample the plot was drawn from.
+    plot_type : str
+        ``StyleData.plot_type`` of the plot.
+    style : dict
+        Copy of ``StyleData.style_dict[plot_type]`` when the plot was drawn,
+        including its fields (``'XField'``, ``'CFieldType'``, ...).
+    app_state : dict
+        Copies of the ``AppData`` settings the plot type reads (see
+        ``RECIPE_STATE``) when the plot was drawn.
+    data_version : int, optional
+        ``SampleObj.processed_version`` the plot was drawn at.
+    """
+    sample_id: str
+    plot_type: str
+    style: dict = field(default_factory=dict)
+    app_state: dict = field(default_factory=dict)
+    data_version: Optional[int] = None
+
+    @property
+    def restorable(self) -> bool:
+        """bool : Whether ``create_plot`` can draw the plot again from this recipe."""
+        return self.plot_type in RECIPE_STATE
+
+    @classmethod
+    def from_plot_info(cls, plot_info: Dict[str, Any], sample_obj=None, app_data=None) -> 'PlotRecipe':
+        """Recipe of a freshly drawn plot (``plot_info`` as returned by the plotting functions),
+        with the settings of ``app_data`` it was drawn with."""
+        plot_type = plot_info.get('plot_type', '')
+        app_state = {
+            name: copy.deepcopy(getattr(app_data, name))
+            for name in RECIPE_STATE.get(plot_type, ())
+            if hasattr(app_data, name)
+        }
+        return cls(
+            sample_id=plot_info.get('sample_id', ''),
+            plot_type=plot_type,
+            style=copy.deepcopy(plot_info.get('style') or {}),
+            app_state=app_state,
+            data_version=getattr(sample_obj, 'processed_version', None),
+        )
+
+
+def render_recipe(recipe: PlotRecipe, sample_obj, ui):
+    """Draws a plot from its recipe with the app's plotting functions.
+
+    Temporarily applies the recipe's plot type and style (with signals
+    blocked, so no control reacts) to ``ui.style_data`` and its sample and
+    settings to ``ui.app_data``, calls ``create_plot`` and restores both.
+
+    Parameters
+    ----------
+    recipe : PlotRecipe
+        Plot to draw.
+    sample_obj : SampleObj
+        The recipe's sample.
+    ui : MainWindow
+        Owner of ``app_data`` and ``style_data``.
+
+    Returns
+    -------
+    MplCanvas or None
+        The new canvas, or None if the plot could not be drawn.
+    """
+    from src.plotting.LamePlot import create_plot
+
+    app_data, style_data = ui.app_data, ui.style_data
+    saved_plot_type = style_data.plot_type
+    saved_style = style_data.style_dict.get(recipe.plot_type)
+    saved_sample_id = app_data.sample_id
+    state = {name: _state_attribute(app_data, name) for name in recipe.app_state}
+    saved_state = {name: getattr(app_data, attribute) for name, attribute in state.items()}
+    app_signals = app_data.blockSignals(True)
+    style_signals = style_data.blockSignals(True)
+    try:
+        app_data.sample_id = recipe.sample_id
+        for name, attribute in state.items():
+            setattr(app_data, attribute, copy.deepcopy(recipe.app_state[name]))
+        style_data.plot_type = recipe.plot_type
+        style_data.style_dict[recipe.plot_type] = copy.deepcopy(recipe.style)
+        canvas, _ = create_plot(ui, sample_obj, app_data, style_data)
+    finally:
+        if saved_style is None:
+            style_data.style_dict.pop(recipe.plot_type, None)
+        else:
+            style_data.style_dict[recipe.plot_type] = saved_style
+        style_data.plot_type = saved_plot_type
+        for name, attribute in state.items():
+            setattr(app_data, attribute, saved_state[name])
+        app_data.sample_id = saved_sample_id
+        style_data.blockSignals(style_signals)
+        app_data.blockSignals(app_signals)
+    return canvas
+
+
 @auto_log_methods(logger_key='Registry')
 class PlotRegistry(QObject):
     """
@@ -22,6 +226,22 @@ class PlotRegistry(QObject):
     
     Manages plot metadata separately from Qt widgets and provides
     canvas caching with LRU eviction policy.
+
+    Parameters
+    ----------
+    app_data : AppData
+        Application data; ``app_data.data`` holds the sample objects and
+        ``app_data.ui`` the window the plotting functions draw for.
+    max_cached_canvases : int, optional
+        Most canvases kept rendered, by default 10.
+    memory_budget_mb : float, optional
+        Most memory (see ``canvas_nbytes``) the cached canvases may hold,
+        by default 512 MB. The most recently used canvas, canvases currently
+        on screen and canvases of plots that can't be drawn again from their
+        recipe are never evicted.
+    renderer : callable, optional
+        ``renderer(recipe, sample_obj)`` returning a new canvas for an
+        evicted plot, by default ``render_recipe`` with ``app_data.ui``.
     """
     
     # Signals for plot lifecycle events
@@ -30,19 +250,28 @@ class PlotRegistry(QObject):
     canvasCreated = pyqtSignal(str)  # plot_id
     canvasEvicted = pyqtSignal(str)  # plot_id
     
-    def __init__(self, app_data, max_cached_canvases=10):
+    def __init__(self, app_data, max_cached_canvases=10, memory_budget_mb=512,
+                 renderer: Optional[Callable] = None):
         super().__init__()
         self.logger_key = 'Registry'
         
         self.app_data = app_data
         self.max_cached_canvases = max_cached_canvases
+        self.memory_budget_mb = memory_budget_mb
+        self.renderer = renderer
         
         # Core storage
-        self.plots = {}  # plot_id -> plot_metadata
+        self.plots = {}  # plot_id -> plot_metadata (without HEAVY_KEYS), with a 'recipe'
         self.tree_keys = {}  # tree_key -> plot_id mapping
         
         # Canvas cache (LRU)
         self.canvas_cache = OrderedDict()  # plot_id -> MplCanvas
+        self.canvas_nbytes = {}  # plot_id -> estimated bytes held by the cached canvas
+
+    @property
+    def cache_nbytes(self) -> int:
+        """Estimated bytes held by all cached canvases."""
+        return sum(self.canvas_nbytes.values())
         
     def register_plot(self, plot_metadata: Dict[str, Any]) -> str:
         """
@@ -62,7 +291,12 @@ class PlotRegistry(QObject):
         plot_metadata['plot_id'] = plot_id
         plot_metadata['registered_at'] = datetime.now()
 
-        self.plots[plot_id] = plot_metadata.copy()
+        # keep only what describes the plot; the canvas (and its data) go to the cache
+        metadata = {k: v for k, v in plot_metadata.items() if k not in HEAVY_KEYS}
+        metadata['style'] = copy.deepcopy(plot_metadata.get('style'))
+        sample_obj = self.app_data.data.get(plot_metadata.get('sample_id')) if hasattr(self.app_data, 'data') else None
+        metadata['recipe'] = PlotRecipe.from_plot_info(plot_metadata, sample_obj, self.app_data)
+        self.plots[plot_id] = metadata
 
         # Cache the figure
         figure = plot_metadata.get('figure')
@@ -76,8 +310,37 @@ class PlotRegistry(QObject):
         return plot_id
     
     def get_plot_metadata(self, plot_id: str) -> Optional[Dict[str, Any]]:
-        """Get plot metadata by ID."""
+        """Get plot metadata by ID (without the canvas, see ``get_plot_info``)."""
         return self.plots.get(plot_id)
+
+    def get_plot_info(self, plot_id: str) -> Optional[Dict[str, Any]]:
+        """Get a full ``plot_info`` dictionary for a registered plot.
+
+        A copy of the plot's metadata with ``'figure'`` and ``'data'`` filled
+        in from its canvas, which is re-rendered from the plot's recipe if it
+        was evicted (``'figure'`` is None if that isn't possible), so use it
+        only for a plot that is about to be shown; ``get_plot_metadata`` and
+        ``get_plot_by_tree_key`` never draw. Changes to the returned
+        dictionary don't affect the registry.
+
+        Parameters
+        ----------
+        plot_id : str
+            Plot ID.
+
+        Returns
+        -------
+        Optional[Dict[str, Any]]
+            The plot_info, or None if the plot isn't registered.
+        """
+        metadata = self.plots.get(plot_id)
+        if metadata is None:
+            return None
+        canvas = self.get_or_create_canvas(plot_id)
+        plot_info = dict(metadata)
+        plot_info['figure'] = canvas
+        plot_info['data'] = getattr(canvas, 'data', None)
+        return plot_info
     
     def remove_plot(self, plot_id: str) -> bool:
         """
@@ -99,6 +362,7 @@ class PlotRegistry(QObject):
         # Remove from canvas cache if present
         if plot_id in self.canvas_cache:
             canvas = self.canvas_cache.pop(plot_id)
+            self.canvas_nbytes.pop(plot_id, None)
             self._cleanup_canvas(canvas)
         
         # Remove plot metadata
@@ -117,7 +381,7 @@ class PlotRegistry(QObject):
         self.tree_keys[tree_key] = plot_id
     
     def get_plot_by_tree_key(self, tree_key: str) -> Optional[Dict[str, Any]]:
-        """Get plot metadata using tree location key."""
+        """Get plot metadata (without the canvas) using tree location key."""
         plot_id = self.tree_keys.get(tree_key)
         return self.plots.get(plot_id) if plot_id else None
     
@@ -159,35 +423,35 @@ class PlotRegistry(QObject):
         return canvas
     
     def _create_canvas(self, plot_id: str, plot_metadata: Dict[str, Any]) -> Optional[MplCanvas]:
-        """Create canvas from plot metadata."""
+        """Re-render an evicted canvas from the plot's recipe."""
         try:
-            # Get sample object for signal connections
+            recipe = plot_metadata.get('recipe')
             sample_id = plot_metadata['sample_id']
             sample_obj = self.app_data.data.get(sample_id)
             
             if not sample_obj:
                 log(f"Sample object not found: {sample_id}", "WARNING")
                 return None
-            
-            # Create canvas with registry integration parameters
-            canvas = MplCanvas(
-                parent=self.app_data.ui if hasattr(self.app_data, 'ui') else None,
-                ui=self.app_data.ui if hasattr(self.app_data, 'ui') else None,
-                plot_id=plot_id,
-                sample_obj=sample_obj
-            )
-            
-            # Set up plot-specific properties
+            if recipe is None:
+                log(f"No recipe to re-render plot: {plot_id}", "WARNING")
+                return None
+
+            if self.renderer is not None:
+                canvas = self.renderer(recipe, sample_obj)
+            else:
+                canvas = render_recipe(recipe, sample_obj, self.app_data.ui)
+            if canvas is None:
+                return None
+
+            # Registry integration parameters, as for a canvas registered when drawn
+            canvas.plot_id = plot_id
+            canvas.sample_obj = sample_obj
             canvas.plot_name = plot_metadata.get('plot_name', '')
-            
-            # Set up data properties if available
-            if 'field_type' in plot_metadata and plot_metadata['field_type'] in ['Analyte', 'Ratio']:
-                canvas.map_flag = True
-                
-            # Copy other relevant properties from plot_metadata
-            for key in ['dx', 'dy', 'array', 'color_units', 'distance_units']:
-                if key in plot_metadata:
-                    setattr(canvas, key, plot_metadata[key])
+
+            data_version = getattr(sample_obj, 'processed_version', None)
+            if data_version != recipe.data_version:
+                log(f"Re-rendered {plot_id} from current data (recipe data version {recipe.data_version}, now {data_version})", "NOTE")
+                recipe.data_version = data_version
             
             return canvas
             
@@ -196,15 +460,39 @@ class PlotRegistry(QObject):
             return None
     
     def _cache_canvas(self, plot_id: str, canvas: MplCanvas):
-        """Add canvas to cache, evicting oldest if needed."""
-        # Remove oldest if at capacity
-        while len(self.canvas_cache) >= self.max_cached_canvases:
-            oldest_id, oldest_canvas = self.canvas_cache.popitem(last=False)
-            self._cleanup_canvas(oldest_canvas)
-            log(f"Evicted canvas from cache: {oldest_id}", "INFO")
-            self.canvasEvicted.emit(oldest_id)
+        """Add canvas to cache, evicting least recently used canvases while
+        over the count limit or the memory budget."""
+        nbytes = canvas_nbytes(canvas)
+        budget = self.memory_budget_mb * 2**20 if self.memory_budget_mb is not None else None
+        for old_id in list(self.canvas_cache):
+            over_count = len(self.canvas_cache) >= self.max_cached_canvases
+            over_budget = budget is not None and self.cache_nbytes + nbytes > budget
+            if not (over_count or over_budget):
+                break
+            if self._is_on_screen(self.canvas_cache[old_id]) or not self._is_restorable(old_id):
+                continue
+            self._evict(old_id)
         
         self.canvas_cache[plot_id] = canvas
+        self.canvas_nbytes[plot_id] = nbytes
+
+    def _evict(self, plot_id: str):
+        canvas = self.canvas_cache.pop(plot_id)
+        nbytes = self.canvas_nbytes.pop(plot_id, 0)
+        self._cleanup_canvas(canvas)
+        log(f"Evicted canvas from cache: {plot_id} ({nbytes / 2**20:.1f} MB)", "INFO")
+        self.canvasEvicted.emit(plot_id)
+
+    def _is_restorable(self, plot_id: str) -> bool:
+        recipe = self.plots.get(plot_id, {}).get('recipe')
+        return recipe is not None and recipe.restorable
+
+    def _is_on_screen(self, canvas) -> bool:
+        try:
+            return canvas.isVisible()
+        except (RuntimeError, AttributeError):
+            # canvas already deleted by Qt
+            return False
     
     def _cleanup_canvas(self, canvas: MplCanvas):
         """Safely cleanup canvas resources."""
@@ -282,6 +570,7 @@ class PlotRegistry(QObject):
             self.canvasEvicted.emit(plot_id)
         
         self.canvas_cache.clear()
+        self.canvas_nbytes.clear()
         log("Cleared canvas cache", "INFO")
     
     def get_plots_for_sample(self, sample_id: str) -> List[Dict[str, Any]]:
@@ -411,7 +411,8 @@ class PlotTree(CustomDockWidget):
         Returns
         -------
         dict, bool
-            Plot_info dictionary with plot widget and information about the plot construction, 
+            Registered metadata of the plot (information about the plot construction,
+            without the plot widget, see ``PlotRegistry.get_plot_info``),
             returns True if the branch exists
         """
         if not self.plot_registry:
@@ -579,9 +580,11 @@ class PlotTree(CustomDockWidget):
         # Get tree key from clicked item
         tree_key = tree_index.data(Qt.ItemDataRole.UserRole)
 
-        # Get plot info from registry using tree key (if it exists)
+        # Get plot info from registry using tree key (if it exists); the plot is
+        # shown, so its canvas is redrawn if it was evicted
         if tree_key:
-            self.plot_info = self.plot_registry.get_plot_by_tree_key(tree_key)
+            metadata = self.plot_registry.get_plot_by_tree_key(tree_key)
+            self.plot_info = self.plot_registry.get_plot_info(metadata['plot_id']) if metadata else None
         else:
             # No tree_key means this is a persistent leaf item for quick map creation
             self.plot_info = None
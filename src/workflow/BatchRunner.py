@@ -0,0 +1,281 @@
+"""Command-line runner for saved workflows: one workflow, many samples, no GUI.
+
+Runs the Python that Blockly generated for a workflow (stored in the
+workflow file as ``python_code`` when it is saved from the Workflow dock,
+see ``WorkflowFile``) once per sample, provided the code was generated from
+the workflow's current blocks, each in its own worker process with
+a headless execution context (``HeadlessBlockly``). Every figure the
+workflow displays, and everything its ``save_plot`` blocks save, goes to
+``<output>/<sample_id>/`` together with a ``run.log`` of the run's output
+and status messages.
+
+A workflow is recorded against one sample, so the sample selections in its
+code (``select_samples`` blocks) are redirected to the sample being run,
+and its load blocks are skipped -- each run loads its sample up front.
+Blocks that need the GUI (the analyte/field selector dialogs) fail that
+sample's run.
+
+Usage::
+
+    python -m src.workflow.BatchRunner WORKFLOW.json SAMPLE_OR_DIR [...] -o OUTPUT [-j JOBS]
+    python -m src.workflow.BatchRunner WORKFLOW.json --project PROJECT.lame_project.json -o OUTPUT
+
+With ``--project`` each sample's saved processing state (filters, masks,
+computed fields) is applied before the workflow runs, as it is when the
+sample is opened in the GUI.
+"""
+import argparse
+import contextlib
+import io
+import re
+import sys
+import time
+import traceback
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Optional
+
+_PROJECT_ROOT = Path(__file__).resolve().parents[2]
+if str(_PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(_PROJECT_ROOT))
+
+from src.project.BatchProcessing import BatchResult, peak_memory_mb, run_batch
+from src.project.ProjectModel import SampleProcessingState, load_project
+from src.workflow.WorkflowFile import load_workflow_file, python_code_is_current
+
+# ``select_samples`` blocks generate ``self.change_sample(self.app_data.sample_list.index('<id>'))``
+_SAMPLE_INDEX_RE = re.compile(r"self\.app_data\.sample_list\.index\([^()]*\)")
+
+
+@dataclass
+class WorkflowTask:
+    """One sample of a workflow batch (all picklable)."""
+    sample_id: str
+    sample_path: Path
+    code: str
+    output_dir: Path
+    processing: Optional[SampleProcessingState] = None
+
+
+def load_workflow_code(path):
+    """Reads the generated Python stored in a workflow file.
+
+    Parameters
+    ----------
+    path : str or Path
+        Workflow file.
+
+    Returns
+    -------
+    str
+
+    Raises
+    ------
+    FileNotFoundError
+        If the file doesn't exist.
+    ValueError
+        If the file has no generated code (it was written before workflows
+        stored their code, or only by action capture), or its code was not
+        generated from its current blocks (blocks were added by action capture
+        since, or the file was edited by hand); saving it again from the
+        Workflow dock regenerates it.
+    """
+    path = Path(path)
+    if not path.exists():
+        raise FileNotFoundError(f"workflow file not found: {path}")
+    payload = load_workflow_file(path)
+    code = payload.get('python_code')
+    if not code or not code.strip():
+        raise ValueError(f"{path.name} has no generated code; open it in the Workflow dock and save it again.")
+    if not python_code_is_current(payload):
+        raise ValueError(
+            f"{path.name}: the generated code does not match the workflow's blocks "
+            "(they changed after the code was generated); open it in the Workflow dock and save it again."
+        )
+    return code
+
+
+def retarget_code(code):
+    """Points every sample selection in generated code at the sample being run.
+
+    Each run's context holds exactly one sample, so ``sample_list.index(<id>)``
+    becomes ``0`` whichever sample the workflow was recorded on.
+    """
+    return _SAMPLE_INDEX_RE.sub('0', code)
+
+
+def find_samples(paths):
+    """Sample files named on the command line, by sample id.
+
+    Parameters
+    ----------
+    paths : list of (str or Path)
+        ``.lame.csv`` files and/or directories, scanned non-recursively for
+        ``*.lame.csv`` as ``ProjectManager.add_samples`` does.
+
+    Returns
+    -------
+    dict
+        Sample path by sample id, in the order given.
+    """
+    samples = {}
+    for p in map(Path, paths):
+        if p.is_dir():
+            files = sorted(f for f in p.iterdir() if f.is_file() and f.name.endswith('.lame.csv'))
+        elif p.is_file() and p.suffix == '.csv':
+            files = [p]
+        else:
+            raise FileNotFoundError(f"not a sample file or directory: {p}")
+        for f in files:
+            samples.setdefault(f.stem.replace('.lame', ''), f.resolve())
+    return samples
+
+
+def run_workflow_sample(task):
+    """Runs a workflow on one sample in the current process.
+
+    The worker of `run_workflow_batch`. Output of the generated code and the
+    status messages it produces are written to ``run.log`` in the sample's
+    output directory, including the traceback of a failed run.
+
+    Parameters
+    ----------
+    task : WorkflowTask
+
+    Returns
+    -------
+    BatchResult
+        ``output_path`` is the sample's output directory and ``outputs`` the
+        files written.
+    """
+    start = time.perf_counter()
+    from src.workflow.HeadlessBlockly import HeadlessBlockly, create_app
+
+    create_app()
+    task.output_dir.mkdir(parents=True, exist_ok=True)
+    context = HeadlessBlockly(task.sample_id, task.sample_path, task.output_dir, processing=task.processing)
+
+    output = io.StringIO()
+    error = None
+    try:
+        with contextlib.redirect_stdout(output):
+            context.run(task.code)
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+        output.write(traceback.format_exc())
+
+    log_path = task.output_dir / 'run.log'
+    log_path.write_text(output.getvalue() + ''.join(f"status: {m}\n" for m in context.messages))
+    return BatchResult(
+        sample_id=task.sample_id,
+        ok=error is None,
+        output_path=task.output_dir,
+        error=error,
+        outputs=context.outputs + [log_path],
+        elapsed_s=time.perf_counter() - start,
+        peak_memory_mb=peak_memory_mb(),
+    )
+
+
+def run_workflow_batch(
+    workflow,
+    samples,
+    output_dir,
+    processing=None,
+    max_workers=None,
+    tasks_per_worker=1,
+    memory_limit_mb=None,
+    on_result: Optional[Callable] = None,
+    worker: Callable = run_workflow_sample,
+):
+    """Runs a saved workflow on every sample in parallel worker processes.
+
+    Parameters
+    ----------
+    workflow : str or Path
+        Workflow file (see `load_workflow_code`).
+    samples : dict
+        Sample path by sample id (e.g. from `find_samples`).
+    output_dir : str or Path
+        Receives one ``<sample_id>/`` directory per sample.
+    processing : dict, optional
+        `SampleProcessingState` by sample id, applied to a sample before
+        the workflow runs on it.
+    max_workers, tasks_per_worker, memory_limit_mb, on_result, worker
+        As ``BatchProcessing.run_project_batch``.
+
+    Returns
+    -------
+    dict
+        `BatchResult` by sample id, in the order of `samples`.
+    """
+    code = retarget_code(load_workflow_code(workflow))
+    output_dir = Path(output_dir)
+    processing = processing or {}
+    tasks = [
+        WorkflowTask(
+            sample_id=sample_id,
+            sample_path=Path(sample_path),
+            code=code,
+            output_dir=output_dir / sample_id,
+            processing=processing.get(sample_id),
+        )
+        for sample_id, sample_path in samples.items()
+    ]
+    return run_batch(
+        tasks, worker, max_workers=max_workers, tasks_per_worker=tasks_per_worker,
+        memory_limit_mb=memory_limit_mb, on_result=on_result,
+    )
+
+
+def _report(result):
+    status = 'ok' if result.ok else f"FAILED ({result.error})"
+    print(f"{result.sample_id}: {status} [{result.elapsed_s:.1f} s]", flush=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='python -m src.workflow.BatchRunner',
+        description='Run a saved LaME workflow on many samples without the GUI.',
+    )
+    parser.add_argument('workflow', type=Path, help='workflow file (.json) saved from the Workflow dock')
+    parser.add_argument('samples', nargs='*', type=Path, help='.lame.csv files and/or directories of them')
+    parser.add_argument('--project', type=Path, help='run on the samples of a project, with their processing state')
+    parser.add_argument('--sample', action='append', dest='sample_ids', help='only this sample id (repeatable)')
+    parser.add_argument('-o', '--output', type=Path, required=True, help='output directory')
+    parser.add_argument('-j', '--jobs', type=int, default=None, help='worker processes (default: CPU count)')
+    parser.add_argument('--tasks-per-worker', type=int, default=1, help='samples per worker process (default: 1)')
+    parser.add_argument('--memory-limit-mb', type=float, default=None, help='address-space limit per worker')
+    args = parser.parse_args(argv)
+
+    try:
+        processing = {}
+        samples = find_samples(args.samples)
+        if args.project is not None:
+            project = load_project(args.project)
+            for sample_id, entry in project.samples.items():
+                samples.setdefault(sample_id, Path(entry.sample_path))
+                processing[sample_id] = entry.processing
+        if args.sample_ids:
+            missing = set(args.sample_ids) - set(samples)
+            if missing:
+                parser.error(f"unknown sample id(s): {', '.join(sorted(missing))}")
+            samples = {sample_id: samples[sample_id] for sample_id in args.sample_ids}
+        if not samples:
+            parser.error('no samples given')
+
+        results = run_workflow_batch(
+            args.workflow, samples, args.output, processing=processing, max_workers=args.jobs,
+            tasks_per_worker=args.tasks_per_worker, memory_limit_mb=args.memory_limit_mb, on_result=_report,
+        )
+    except (OSError, ValueError) as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 2
+
+    failed = [r.sample_id for r in results.values() if not r.ok]
+    print(f"{len(results) - len(failed)} of {len(results)} sample(s) completed; output in {args.output}")
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
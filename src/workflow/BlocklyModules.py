@@ -18,7 +18,6 @@ import cmcrameri as cmc
 from scipy.stats import yeojohnson, percentileofscore
 from sklearn.cluster import KMeans
 from sklearn.metrics import silhouette_score
-import skfuzzy as fuzz
 from sklearn.preprocessing import StandardScaler
 from sklearn.decomposition import PCA
 from global_geochemistry.plotting.ternary import ternary
@@ -115,6 +114,35 @@ class LameBlockly(QObject):
         """
         super().__init__(parent, *args, **kwargs)
 
+        self.parent = parent
+        self.blockly  = parent.web_view.page() # This is the QWebEngineView that displays the Blockly interface
+        self.statusLabel = parent.statusLabel
+        # Workflow dock
+        self.workflow_dock = parent
+
+        self.init_state()
+
+        # Create a popup dialog
+        popup = QDialog(parent)
+        popup.setWindowTitle("Plot Viewer")
+        layout = QVBoxLayout(popup)
+        # Pass popup as the parent to CanvasWidget
+        self.canvas_widget = CanvasWidget(ui=self, parent=popup)
+        layout.addWidget(self.canvas_widget)
+        popup.setLayout(layout)
+
+    def init_state(self):
+        """
+        Create the data, style and analysis state generated code runs against
+
+        Everything the execution context needs apart from its widgets (the
+        Blockly page, status label and plot viewer popup), so a headless
+        context (``src.workflow.BatchRunner``) can share it.
+
+        Returns
+        -------
+        None
+        """
         self.logger_options = {
                 'IO': False,
                 'Data': False,
@@ -135,7 +163,6 @@ class LameBlockly(QObject):
         self.lasermaps = {}
         self.outlier_method = 'none'
         self.negative_method = 'ignore negatives'
-        self.parent = parent
         self.calc_dict = {}
         self.csv_files = []
         self.laser_map_dict = {}
@@ -146,29 +173,16 @@ class LameBlockly(QObject):
 
         self.app_data = AppData(self)
 
-        self.blockly  = parent.web_view.page() # This is the QWebEngineView that displays the Blockly interface
-        
         # set up status message manager
-        self.statusLabel = parent.statusLabel
         self.status_manager = StatusMessageManager(self)
         self.sort_method = 'mass'
         self.plot_info = {}
          # preferences
         self.default_preferences = {'Units':{'Concentration': 'ppm', 'Distance': 'µm', 'Temperature':'°C', 'Pressure':'MPa', 'Date':'Ma', 'FontSize':11, 'TickDir':'out'}}
         self.preferences = copy.deepcopy(self.default_preferences)
-        # Workflow dock
-        self.workflow_dock = parent
         self.io = LameIO(self, connect_actions=False)
         # Initialise class from StyleData
         self.style_data = StyleData(self)
-        # Create a popup dialog
-        popup = QDialog(parent)
-        popup.setWindowTitle("Plot Viewer")
-        layout = QVBoxLayout(popup)
-        # Pass popup as the parent to CanvasWidget
-        self.canvas_widget = CanvasWidget(ui=self, parent=popup)
-        layout.addWidget(self.canvas_widget)
-        popup.setLayout(layout)
         self.display_figures = True  # show popup with controls & pause; False = embed and continue
         self.record_notes = False  # whether recorded actions get written to Notes/.rst during a run; set via the "Record notes" Global Settings block
         self.update_bins = False
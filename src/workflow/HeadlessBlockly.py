@@ -0,0 +1,188 @@
+"""Execution context for Blockly-generated workflow code without a GUI.
+
+``LameBlockly`` runs generated code against the Workflow dock: figures go to
+a popup plot viewer that waits for the user, status messages to the dock's
+label, and dropdown refreshes to the Blockly page. ``HeadlessBlockly`` keeps
+the same data, style and analysis state (``LameBlockly.init_state``) but
+replaces those widgets: every figure the workflow displays is written to the
+sample's output directory instead, ``save_plot`` blocks save there too,
+status messages are collected for the run log, and Blockly page updates are
+dropped.
+
+Plots are still drawn on the plotting layer's matplotlib canvases, so a
+``QApplication`` must exist (``create_app``, on the ``offscreen`` platform
+unless one is configured) -- but no window is ever shown and the figures are
+rendered by Agg.
+"""
+import os
+import re
+import sys
+from pathlib import Path
+
+from PyQt6.QtCore import QObject
+
+from src.app.LameIO import LameIO
+from src.common.Calculator import CustomFieldCalculator
+from src.data.DataHandling import LaserSampleObj
+import src.workflow.BlocklyModules as blockly_modules
+from src.workflow.BlocklyModules import LameBlockly
+
+
+def create_app():
+    """Returns the running ``QApplication``, creating an offscreen one if needed."""
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    from PyQt6.QtWidgets import QApplication
+
+    return QApplication.instance() or QApplication(sys.argv[:1])
+
+
+class _StatusLog:
+    """Stands in for the Workflow dock's status label, keeping every message."""
+    def __init__(self):
+        self.messages = []
+
+    def setText(self, message):
+        if message:
+            self.messages.append(message)
+
+
+class _NoBlocklyPage:
+    """Stands in for the Blockly page; there are no dropdowns to refresh."""
+    def runJavaScript(self, *args, **kwargs):
+        pass
+
+
+class HeadlessIO(LameIO):
+    """``LameIO`` for a headless run: the sample is loaded up front and plots
+    are saved under the run's output directory without any dialog."""
+    def open_directory(self, path=None):
+        pass
+
+    def open_sample(self, path=None):
+        pass
+
+    def initialize_sample_object(self, outlier_method, negative_method):
+        pass
+
+    def save_plot(self, canvas, save_figure_flag=True, save_data_flag=True, parent=None, settings=None):
+        """Saves a ``save_plot`` block's figure and/or data under the output
+        directory, whatever directory the block names."""
+        if canvas is None:
+            return
+        settings = dict(settings or {})
+        basename = settings.get('basename') or canvas.plot_name or 'plot'
+        if save_figure_flag:
+            self.ui.save_output(canvas.figure, 'figures', f"{basename}.{settings.get('fig_type') or 'png'}")
+        if save_data_flag and getattr(canvas, 'data', None) is not None:
+            self.ui.save_output(canvas.data, 'data', f"{basename}.{settings.get('data_type') or 'csv'}")
+
+
+class HeadlessBlockly(LameBlockly):
+    """Runs a workflow's generated code on one sample, writing to ``output_dir``.
+
+    Parameters
+    ----------
+    sample_id : str
+        Sample the workflow runs on; every sample selection in the code
+        refers to it (see ``BatchRunner.retarget_code``).
+    sample_path : str or Path
+        The sample's ``.lame.csv`` file.
+    output_dir : str or Path
+        Directory receiving ``figures/``, ``data/`` and ``run.log``.
+    processing : SampleProcessingState, optional
+        Project processing state replayed onto the sample after loading, as
+        ``LameIO.initialize_sample_object`` does for a project sample.
+    """
+    def __init__(self, sample_id, sample_path, output_dir, processing=None):
+        QObject.__init__(self)
+
+        self.parent = None
+        self.blockly = _NoBlocklyPage()
+        self.statusLabel = _StatusLog()
+        self.workflow_dock = None
+        self.canvas_widget = None
+
+        self.init_state()
+        self.io = HeadlessIO(self, connect_actions=False)
+        self.display_figures = False
+
+        self.output_dir = Path(output_dir)
+        self.outputs = []
+        self.figure_count = 0
+
+        self.app_data.sample_list = [sample_id]
+        self.data[sample_id] = LaserSampleObj(
+            sample_id=sample_id,
+            file_path=str(sample_path),
+            outlier_method=self.outlier_method,
+            negative_method=self.negative_method,
+            ref_chem=self.app_data.ref_chem,
+            ui=self,
+        )
+        if processing is not None:
+            self.data[sample_id].apply_processing_state(
+                processing, ref_chem=self.app_data.ref_chem, field_calculator=CustomFieldCalculator()
+            )
+
+    @property
+    def messages(self):
+        """Status messages shown during the run."""
+        return self.statusLabel.messages
+
+    def save_output(self, obj, folder, filename):
+        """Writes a figure or data frame to ``output_dir/folder/filename``.
+
+        Parameters
+        ----------
+        obj : matplotlib.figure.Figure or pandas.DataFrame
+            What to save.
+        folder : str
+            Subdirectory, ``'figures'`` or ``'data'``.
+        filename : str
+            File name; the extension selects the format.
+
+        Returns
+        -------
+        Path
+            The file written.
+        """
+        # plot names can hold field names like 'Fe57 / Mg24'
+        path = self.output_dir / folder / re.sub(r'[\\/:*?"<>|]', '_', filename)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        if folder == 'figures':
+            obj.savefig(path)
+        else:
+            match path.suffix:
+                case '.xlsx':
+                    obj.to_excel(path, index=False)
+                case '.parquet':
+                    obj.to_parquet(path, index=False)
+                case _:
+                    obj.to_csv(path, index=False)
+        self.outputs.append(path)
+        return path
+
+    def set_display_policy(self, canvas):
+        """Saves each figure the workflow displays as ``figures/<nn>_<plot name>.png``."""
+        if canvas is None:
+            return
+        self.mpl_canvas = canvas
+        self.figure_count += 1
+        plot_name = (self.plot_info or {}).get('plot_name') or getattr(canvas, 'plot_name', None) or 'figure'
+        self.save_output(canvas.figure, 'figures', f"{self.figure_count:02d}_{plot_name}.png")
+
+    def open_select_analyte_dialog(self):
+        raise RuntimeError("the workflow opens the analyte selector, which needs the GUI.")
+
+    def open_field_selector_dialog(self):
+        raise RuntimeError("the workflow opens the field selector, which needs the GUI.")
+
+    def run(self, code):
+        """Executes generated code with this context as ``self``.
+
+        The code sees ``BlocklyModules``' names (``create_plot`` etc.), as it
+        does when ``LameBlockly.execute_code`` runs it.
+        """
+        namespace = dict(vars(blockly_modules))
+        namespace['self'] = self
+        exec(compile(code, '<workflow>', 'exec'), namespace)
@@ -11,6 +11,7 @@ from lame_core.config import BASEDIR
 from lame_core.CustomWidgets import CustomDockWidget, CustomAction
 import numpy as np
 from src.workflow.BlocklyModules import LameBlockly
+from src.workflow.WorkflowFile import set_python_code
 os.environ["QTWEBENGINE_REMOTE_DEBUGGING"]="9222" #uncomment to debug in chrome  
 os.environ["QTWEBENGINE_CHROMIUM_FLAGS"] = "--disable-gpu"
 
@@ -725,7 +726,14 @@ class Workflow(CustomDockWidget):
             except (TypeError, ValueError):
                 self.statusLabel.setText("Save failed: invalid workspace state.")
                 return
-            payload = {"lame_workflow_version": 1, "blockly_state": blockly_state}
+            # the generated code is stored alongside the workspace, with the hash of
+            # the state it was generated from, so the file can be run without
+            # Blockly (see src.workflow.BatchRunner)
+            payload = {
+                "lame_workflow_version": 1,
+                "blockly_state": blockly_state,
+            }
+            set_python_code(payload, self.output_text_edit.toPlainText())
             with open(path, "w") as f:
                 json.dump(payload, f, indent=2)
             self.main_window.app_data.active_workflow_file = Path(path)
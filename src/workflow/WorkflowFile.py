@@ -3,7 +3,12 @@
 A workflow file is JSON: ``{"lame_workflow_version": 1, "blockly_state": {...}}``,
 where ``blockly_state`` is exactly what Blockly's ``Blockly.serialization.workspaces.save()``
 produces in the browser (see ``blockly/src/app.js``'s ``getWorkspaceStateJSON``/
-``loadWorkspaceStateJSON``).
+``loadWorkspaceStateJSON``). Files saved from the Workflow dock also carry
+``python_code``, the Python that Blockly generated for the workspace at save
+time, which is what the headless runner (``src.workflow.BatchRunner``) executes,
+and ``python_code_state_hash``, the `blockly_state_hash` of the workspace that
+code was generated from. Changing the blocks without regenerating the code
+(e.g. `append_block`) drops both, so stale code is never run.
 
 These helpers let Python append to and read a workflow file directly on disk,
 with no live Blockly workspace (a ``QWebEngineView``) involved. That's what lets
@@ -12,6 +17,7 @@ work even while the Workflow dock is closed. When the dock *is* open,
 ``Workflow.reload_active_file`` re-reads the same file into the live JS workspace
 so the visible workspace and the file stay in sync.
 """
+import hashlib
 import json
 import uuid
 from datetime import datetime
@@ -82,9 +88,64 @@ def save_workflow_file(path, payload):
         json.dump(payload, f, indent=2, default=str)
 
 
+def blockly_state_hash(blockly_state):
+    """SHA-256 of a Blockly workspace state, independent of key order and whitespace.
+
+    Parameters
+    ----------
+    blockly_state : dict
+        Serialized workspace, as stored under ``blockly_state``.
+
+    Returns
+    -------
+    str
+        Hex digest.
+    """
+    text = json.dumps(blockly_state, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+def set_python_code(payload, code):
+    """Store the Python generated for a payload's current Blockly state, in place.
+
+    Parameters
+    ----------
+    payload : dict
+        A payload as returned by `load_workflow_file`/`new_workflow_payload`.
+    code : str
+        Python that Blockly generated for ``payload['blockly_state']``.
+
+    Returns
+    -------
+    dict
+        The same `payload`, for chaining.
+    """
+    payload['python_code'] = code
+    payload['python_code_state_hash'] = blockly_state_hash(payload['blockly_state'])
+    return payload
+
+
+def python_code_is_current(payload):
+    """Whether a payload's ``python_code`` was generated from its current ``blockly_state``.
+
+    Returns
+    -------
+    bool
+        ``False`` if there is no code, no recorded hash, or the blocks have
+        changed since the code was generated.
+    """
+    recorded = payload.get('python_code_state_hash')
+    if not payload.get('python_code') or not recorded:
+        return False
+    return recorded == blockly_state_hash(payload.get('blockly_state', {}))
+
+
 def append_block(payload, block_type, fields):
     """Append a top-level block to a workflow payload's Blockly state, in place.
 
+    The payload's generated ``python_code`` no longer matches its blocks, so
+    it is dropped; saving the workflow from the Workflow dock regenerates it.
+
     Parameters
     ----------
     payload : dict
@@ -107,6 +168,8 @@ def append_block(payload, block_type, fields):
         'y': 20 + 60 * len(blocks),
         'fields': dict(fields),
     })
+    payload.pop('python_code', None)
+    payload.pop('python_code_state_hash', None)
     return payload
 
 
@@ -0,0 +1,139 @@
+"""Column attributes of ``AttributeDataFrame`` (``src.data.ExtendedDF``).
+
+Lookups are checked against linear scans of a plain ``{column: {attribute:
+value}}`` dict kept alongside the frame, which is how attributes were stored
+before the columnar ``AttributeTable``.
+"""
+import copy
+import gc
+import pickle
+import sys
+from pathlib import Path
+
+import numpy as np
+
+project_root = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.data.ExtendedDF import AttributeDataFrame
+
+ATTRIBUTES = ['data_type', 'units', 'use', 'norm']
+VALUES = ['Analyte', 'Ratio', 'ppm', None, True, False, 'log', 'linear']
+
+
+def _frame(ncols=6):
+    columns = [f'C{i}' for i in range(ncols)]
+    return AttributeDataFrame({c: np.arange(3.0) for c in columns}), columns
+
+
+def _scan_match(model, attribute, values):
+    return [c for c, attrs in model.items() if attrs.get(attribute) in values]
+
+
+def test_lookups_match_linear_scans_under_random_edits():
+    rng = np.random.default_rng(0)
+    df, columns = _frame(12)
+    model = {}
+    for step in range(600):
+        column = columns[rng.integers(len(columns))]
+        attribute = ATTRIBUTES[rng.integers(len(ATTRIBUTES))]
+        if rng.random() < 0.1 and column in model and attribute in model[column]:
+            del df.column_attributes[column][attribute]
+            del model[column][attribute]
+        elif rng.random() < 0.03 and column in model:
+            del df.column_attributes[column]
+            del model[column]
+        else:
+            value = VALUES[rng.integers(len(VALUES))]
+            df.set_attribute(column, attribute, value)
+            model.setdefault(column, {})[attribute] = value
+
+        if step % 10 == 0:
+            value = VALUES[rng.integers(len(VALUES))]
+            assert df.match_attribute(attribute, value) == _scan_match(model, attribute, [value])
+            assert df.match_attribute(attribute, ['Ratio', None]) == _scan_match(model, attribute, ['Ratio', None])
+            query = {'data_type': 'Analyte', 'use': True}
+            assert df.match_attributes(query) == [
+                c for c, attrs in model.items() if all(attrs.get(a) == v for a, v in query.items())
+            ]
+            groups = {}
+            for c, attrs in model.items():
+                groups.setdefault('none' if attrs.get(attribute) is None else attrs.get(attribute), []).append(c)
+            assert df.get_attribute_dict(attribute) == groups
+    assert df.column_attributes.copy() == model
+
+
+def test_derived_frames_share_attributes_until_written():
+    df, columns = _frame()
+    df.set_attribute(columns, 'units', 'ppm')
+    copied = df.copy()
+    sliced = df[columns[:3]]
+    assert copied._table() is df._table()
+
+    copied.set_attribute(columns[0], 'units', 'wt%')
+    sliced.column_attributes[columns[1]]['units'] = 'ppb'
+    deep = copy.deepcopy(df)
+    deep.column_attributes[columns[2]] = {'units': 'cps'}
+
+    assert df.get_attribute(columns[:3], 'units') == ['ppm', 'ppm', 'ppm']
+    assert copied.get_attribute(columns[0], 'units') == 'wt%'
+    assert sliced.get_attribute(columns[1], 'units') == 'ppb'
+    assert list(sliced.column_attributes) == columns[:3]
+    assert deep.get_attribute(columns[2], 'units') == 'cps'
+
+
+def test_attributes_survive_pickling_and_arithmetic():
+    df, columns = _frame()
+    df.set_attribute(columns, 'data_type', 'Analyte')
+    df.set_attribute(columns[0], 'norm', 'log')
+    restored = pickle.loads(pickle.dumps(df))
+    assert restored.column_attributes.copy() == df.column_attributes.copy()
+    assert restored.match_attribute('norm', 'log') == [columns[0]]
+    assert (df * 2).match_attribute('data_type', 'Analyte') == columns
+
+
+def test_frames_pickled_together_stay_independent():
+    df, columns = _frame()
+    df.set_attribute(columns, 'units', 'ppm')
+    original, copied = pickle.loads(pickle.dumps((df, df.copy())))
+    assert copied._table() is original._table()
+
+    copied.set_attribute(columns[0], 'units', 'wt%')
+    original.set_attribute(columns[1], 'units', 'ppb')
+    assert original.get_attribute(columns[:2], 'units') == ['ppm', 'ppb']
+    assert copied.get_attribute(columns[:2], 'units') == ['wt%', 'ppm']
+
+
+def test_collected_frames_no_longer_share_the_table():
+    df, columns = _frame()
+    table = df._table()
+    copied = df.copy()
+    assert table.is_shared(df)
+
+    del copied
+    gc.collect()
+    assert not table.is_shared(df)
+    df.set_attribute(columns[0], 'units', 'ppm')
+    assert df._table() is table
+
+
+def test_mutable_values_changed_in_place_stay_with_their_frame():
+    df, columns = _frame()
+    df.column_attributes[columns[0]] = {'range': [0, 1]}
+    copied = df.copy()
+
+    copied.column_attributes[columns[0]]['range'].append(5)
+    df.get_attribute(columns[0], 'range').append(7)
+    assert copied.get_attribute(columns[0], 'range') == [0, 1, 5]
+    assert df.get_attribute(columns[0], 'range') == [0, 1, 7]
+
+
+def test_dict_style_access():
+    df, columns = _frame(2)
+    df.column_attributes = {columns[0]: {'units': 'ppm'}}
+    attrs = df.column_attributes[columns[0]]
+    attrs['label'] = 'Fe'
+    assert dict(df.column_attributes.get(columns[0], {})) == {'units': 'ppm', 'label': 'Fe'}
+    assert columns[1] not in df.column_attributes
+    assert df.show_attributes(columns[1]) == {}
+    assert df.is_attribute(columns[0], 'label') and not df.is_attribute(columns[1], 'label')
@@ -0,0 +1,94 @@
+"""Headless project batch processing (``src.project.BatchProcessing``).
+
+The real worker loads samples through the Qt data layer; these tests drive
+the pool, failure handling and project write-back with module-level stand-in
+workers instead, so no QApplication is needed.
+"""
+import os
+import sys
+from pathlib import Path
+
+project_root = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.project.BatchProcessing import BatchResult, merge_formulas, run_project_batch
+from src.project.ProjectModel import (
+    ComputedFieldSpec, Project, ProjectSampleEntry, SampleProcessingState,
+)
+
+
+def _write_worker(task):
+    task.output_path.parent.mkdir(parents=True, exist_ok=True)
+    task.output_path.write_text(','.join(c.field for c in task.processing.computed_fields))
+    return BatchResult(sample_id=task.sample_id, ok=True, output_path=task.output_path, processing=task.processing)
+
+
+def _failing_worker(task):
+    if task.sample_id == 'bad':
+        raise ValueError('cannot read sample')
+    return _write_worker(task)
+
+
+def _crashing_worker(task):
+    if task.sample_id == 'bad':
+        os._exit(1)  # stands in for a worker killed by the OOM killer
+    return _write_worker(task)
+
+
+def _pid_worker(task):
+    return BatchResult(sample_id=task.sample_id, ok=True, error=str(os.getpid()))
+
+
+def _project(*sample_ids):
+    project = Project(name='campaign')
+    for sample_id in sample_ids:
+        project.samples[sample_id] = ProjectSampleEntry(
+            sample_path=f"{sample_id}.lame.csv",
+            processing=SampleProcessingState(computed_fields=[ComputedFieldSpec('Fe_ppm', '{Analyte.Fe57} * 2')]),
+        )
+    return project
+
+
+def test_merge_formulas_adds_and_replaces_by_field():
+    state = SampleProcessingState(computed_fields=[ComputedFieldSpec('A', '1'), ComputedFieldSpec('B', '2')])
+    merged = merge_formulas(state, {'B': '3', 'C': '{Analyte.Si29}'})
+    assert [(c.field, c.formula) for c in merged.computed_fields] == [('A', '1'), ('B', '3'), ('C', '{Analyte.Si29}')]
+    assert [c.formula for c in state.computed_fields] == ['1', '2']
+
+
+def test_batch_writes_outputs_and_updates_project(tmp_path):
+    project = _project('s1', 's2', 's3')
+    seen = []
+    results = run_project_batch(
+        project, tmp_path, formulas={'Mg_norm': '{Analyte.Mg24_N}'}, max_workers=2,
+        on_result=seen.append, worker=_write_worker,
+    )
+    assert list(results) == ['s1', 's2', 's3']
+    assert sorted(r.sample_id for r in seen) == ['s1', 's2', 's3']
+    for sample_id, result in results.items():
+        assert result.ok
+        assert result.output_path == tmp_path / f"{sample_id}.processed.csv"
+        assert result.output_path.read_text() == 'Fe_ppm,Mg_norm'
+        assert [c.field for c in project.samples[sample_id].processing.computed_fields] == ['Fe_ppm', 'Mg_norm']
+    assert project.dirty
+
+
+def test_failing_sample_does_not_stop_the_batch(tmp_path):
+    project = _project('good', 'bad')
+    results = run_project_batch(project, tmp_path, max_workers=2, worker=_failing_worker)
+    assert results['good'].ok
+    assert not results['bad'].ok and 'cannot read sample' in results['bad'].error
+    assert project.samples['bad'].processing.computed_fields == [ComputedFieldSpec('Fe_ppm', '{Analyte.Fe57} * 2')]
+
+
+def test_crashed_worker_is_retried_then_reported(tmp_path):
+    project = _project('a', 'bad', 'b')
+    results = run_project_batch(project, tmp_path, max_workers=1, worker=_crashing_worker)
+    assert results['a'].ok and results['b'].ok
+    assert not results['bad'].ok and 'terminated' in results['bad'].error
+
+
+def test_each_worker_process_handles_tasks_per_worker_samples(tmp_path):
+    project = _project('s1', 's2', 's3', 's4')
+    results = run_project_batch(project, tmp_path, max_workers=1, tasks_per_worker=2, worker=_pid_worker)
+    assert len({r.error for r in results.values()}) == 2
@@ -0,0 +1,87 @@
+"""Bin counting tests (``src.common.binning``)."""
+import sys
+from pathlib import Path
+
+import numpy as np
+import matplotlib
+matplotlib.use('Agg')
+from matplotlib.figure import Figure
+
+project_root = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.common.binning import (
+    BinCountCache, hist1d_counts, hist2d_counts, hist_from_counts, histogram_edges
+)
+
+
+def _values():
+    rng = np.random.default_rng(3)
+    values = rng.normal(size=5000)
+    values[::97] = np.nan
+    return values
+
+
+def test_hist1d_matches_numpy_histogram():
+    values = _values()
+    edges = np.linspace(-2, 2, 41)
+    expected, _ = np.histogram(values[~np.isnan(values)], bins=edges)
+    np.testing.assert_array_equal(hist1d_counts(values, edges), expected)
+
+
+def test_right_edge_is_included_in_last_bin():
+    edges = np.array([0.0, 1.0, 2.0])
+    np.testing.assert_array_equal(hist1d_counts(np.array([0.0, 1.0, 2.0, 2.5, -1.0]), edges), [1, 2])
+
+
+def test_grouped_counts_match_per_group_histograms():
+    values = _values()
+    labels = np.random.default_rng(4).integers(0, 4, size=values.size).astype(float)
+    labels[::11] = np.nan
+    edges = np.linspace(-3, 3, 25)
+    groups = [3, 0, 2]  # group 1 deliberately left out, and out of order
+
+    counts = hist1d_counts(values, edges, labels, groups)
+    assert counts.shape == (3, 24)
+    for k, g in enumerate(groups):
+        expected, _ = np.histogram(values[(labels == g) & ~np.isnan(values)], bins=edges)
+        np.testing.assert_array_equal(counts[k], expected)
+
+
+def test_hist2d_matches_numpy_histogram2d():
+    rng = np.random.default_rng(5)
+    x, y = rng.normal(size=(2, 4000))
+    xedges = histogram_edges(x, 30)
+    yedges = histogram_edges(y, 20)
+    expected, ex, ey = np.histogram2d(x, y, bins=[30, 20])
+    np.testing.assert_allclose(xedges, ex)
+    np.testing.assert_allclose(yedges, ey)
+    np.testing.assert_array_equal(hist2d_counts(x, y, xedges, yedges), expected)
+
+
+def test_hist_from_counts_matches_hist_of_raw_values():
+    values = _values()
+    values = values[~np.isnan(values)]
+    edges = np.linspace(-2, 2, 21)
+    ax = Figure().add_subplot()
+
+    raw, _, _ = ax.hist(values, bins=edges, density=True, cumulative=True)
+    binned, _, _ = hist_from_counts(ax, hist1d_counts(values, edges), edges, density=True, cumulative=True)
+    np.testing.assert_allclose(binned, raw)
+
+
+def test_cache_computes_once_per_key_and_evicts_oldest():
+    cache = BinCountCache(max_entries=2)
+    calls = []
+
+    def compute(value):
+        calls.append(value)
+        return value
+
+    assert cache.get('a', lambda: compute(1)) == 1
+    assert cache.get('a', lambda: compute(2)) == 1
+    cache.get('b', lambda: compute(3))
+    cache.get('c', lambda: compute(4))
+    assert len(cache) == 2
+    assert cache.get('a', lambda: compute(5)) == 5
+    assert calls == [1, 3, 4, 5]
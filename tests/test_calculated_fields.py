@@ -0,0 +1,58 @@
+"""Calculated fields on a sample (``SampleObj.add_calculated_field``).
+
+Stale calculated columns are recomputed by the methods that change their
+inputs, never by reads, so ``get_map_data`` leaves ``processed`` untouched.
+"""
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+project_root = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.common.formula import compile_formula
+from src.data.DataHandling import LaserSampleObj
+
+
+def _sample(tmp_path, n=6):
+    x, y = np.meshgrid(np.arange(1, n + 1), np.arange(1, n + 1))
+    pd.DataFrame({
+        'Xc': x.ravel() * 1.0, 'Yc': y.ravel() * 1.0,
+        'Fe57': np.arange(n * n) + 1.0, 'Mg24': np.arange(n * n) * 2 + 1.0,
+    }).to_csv(tmp_path / 'S.lame.csv', index=False)
+    return LaserSampleObj(
+        sample_id='S', file_path=str(tmp_path / 'S.lame.csv'),
+        outlier_method='none', negative_method='ignore negatives', ref_chem=pd.Series(dtype=float),
+    )
+
+
+def test_changed_inputs_recompute_downstream_fields(tmp_path):
+    data = _sample(tmp_path)
+    data.add_calculated_field('Fe2', compile_formula('{Analyte.Fe57} * 2'))
+    data.add_calculated_field('Fe2Mg', compile_formula('{Calculated.Fe2} + {Analyte.Mg24}'))
+
+    fe = np.linspace(10, 20, data.processed.shape[0])
+    data.add_columns('Analyte', 'Fe57', fe)
+
+    np.testing.assert_allclose(data.processed['Fe2'], fe * 2)
+    np.testing.assert_allclose(data.processed['Fe2Mg'], fe * 2 + data.processed['Mg24'])
+
+
+def test_reads_do_not_write_processed(tmp_path):
+    data = _sample(tmp_path)
+    data.add_calculated_field('Fe2', compile_formula('{Analyte.Fe57} * 2'))
+    before = data.processed['Fe2'].to_numpy().copy()
+
+    # a change recorded without going through a refreshing method
+    data.processed['Fe57'] = data.processed['Fe57'] + 1
+    data._invalidate_columns(['Fe57'])
+    version = data.processed_version
+
+    np.testing.assert_array_equal(data.get_map_data('Fe2', 'Calculated')['array'], before)
+    assert data.processed_version == version
+
+    assert data.refresh_calculated_fields() == ['Fe2']
+    np.testing.assert_allclose(data.processed['Fe2'], data.processed['Fe57'] * 2)
+    assert data.refresh_calculated_fields() == []
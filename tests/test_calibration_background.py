@@ -23,6 +23,7 @@ from src.calibration.background import (
     compute_background_result,
     detect_background_window,
     detect_row_outliers,
+    detect_row_outliers_matrix,
     fit_session_background_drift,
     recompute_from_window,
     select_reference_channels,
@@ -639,6 +640,22 @@ def test_detect_row_outliers_order0_zero_inflated_background_no_false_positives(
     assert mask2.sum() == 1
 
 
+
+def test_detect_row_outliers_matrix_matches_order0_per_column():
+    rng = np.random.default_rng(8)
+    values = np.column_stack([
+        rng.poisson(0.3, 30) * 4.0,                     # mostly zero
+        np.r_[rng.poisson(50.0, 29) * 1.0, 5000.0],      # one spike
+        np.r_[np.full(20, 12.0), [12.0] * 8, 900.0, 0.0],  # MAD 0 -> mean-absolute-deviation fallback
+        np.full(30, 7.0),                               # constant: nothing flagged
+        np.r_[np.zeros(27), [1.0, 2.0, 40.0]],          # too few nonzero rows to screen
+    ])
+    mask = detect_row_outliers_matrix(values)
+    for j in range(values.shape[1]):
+        np.testing.assert_array_equal(mask[:, j], detect_row_outliers(values[:, j], order=0))
+    assert mask[-1, 1] and mask[-2, 2]
+
+
 def test_detect_row_outliers_tracks_real_decay_without_false_positives():
     """A genuine within-window trend (not a flat plateau) must not itself
     get flagged -- order=1 exists specifically so this decaying signal is
@@ -11,7 +11,14 @@ import pytest
 project_root = Path(__file__).resolve().parent.parent
 sys.path.insert(0, str(project_root))
 
-from src.calibration.counts import TauEstimate, cps_to_counts, estimate_quantum, resolve_tau
+from src.calibration.counts import (
+    TauEstimate,
+    cps_to_counts,
+    estimate_quantum,
+    estimate_quantum_columns,
+    resolve_tau,
+    resolve_tau_columns,
+)
 
 
 def test_estimate_quantum_recovers_known_step():
@@ -114,3 +121,29 @@ def test_cps_to_counts_exact_with_known_tau():
 def test_cps_to_counts_none_when_tau_unknown():
     tau = TauEstimate(tau_s=None, provenance="unknown")
     assert cps_to_counts([0.0, 5.0], tau) is None
+
+
+def test_resolve_tau_columns_matches_per_column_resolve_tau():
+    rng = np.random.default_rng(2)
+    cps = np.column_stack([
+        rng.poisson(0.4, 30) / 0.2,             # inferred, sparse
+        rng.poisson(30.0, 30) / 0.25,           # inferred, shares no step with the first
+        rng.uniform(100.0, 200.0, 30),          # smooth -> bounded
+        np.zeros(30),                           # unknown
+        np.r_[rng.poisson(2.0, 29) / 0.2, 4e4],  # inferred, with one row masked out below
+    ])
+    valid = np.ones(cps.shape, dtype=bool)
+    valid[-1, 4] = False
+
+    estimates = resolve_tau_columns(cps, valid)
+    for j, estimate in enumerate(estimates):
+        assert estimate == resolve_tau(cps[valid[:, j], j])
+    assert [e.provenance for e in estimates] == ["inferred", "inferred", "bounded", "unknown", "inferred"]
+    np.testing.assert_array_equal(
+        np.isnan(estimate_quantum_columns(cps, valid)), [False, False, True, True, False]
+    )
+
+
+def test_resolve_tau_columns_metadata_applies_to_every_column():
+    estimates = resolve_tau_columns(np.zeros((5, 3)), dwell_time_ms=10.0, sweeps_per_reading=20)
+    assert estimates == [TauEstimate(tau_s=0.2, provenance="metadata")] * 3
@@ -21,8 +21,10 @@ from src.calibration.drift import (
     evaluate,
     fit_polynomial,
     fit_polynomial_with_order_fallback,
+    predict_many,
     select_drift_fit,
     select_order_by_aic,
+    select_orders_by_aic,
 )
 from src.calibration.poisson_drift import PoissonDriftFit
 
@@ -211,3 +213,68 @@ def test_predicted_values_are_stable_flags_wild_extrapolation():
         t0=t0, r_squared=1.0, n_points=len(times), residual_std=0.0,
     )
     assert _predicted_values_are_stable(flat_fit, times, observed_values) is True
+
+
+def _brute_force_loo_rss(times, values, order):
+    total = 0.0
+    for i in range(len(times)):
+        idx = [j for j in range(len(times)) if j != i]
+        fold = fit_polynomial([times[j] for j in idx], np.asarray(values)[idx], order=order)
+        total += (values[i] - fold.predict([times[i]])[0]) ** 2
+    return total
+
+
+@pytest.mark.parametrize("order", [0, 1, 2, 3])
+def test_cv_rss_for_order_matches_refitting_each_fold(order):
+    rng = np.random.default_rng(7)
+    times = _times(25, step_s=137.0)
+    values = 50.0 + 0.002 * np.arange(25) ** 2 + rng.normal(0, 1.0, 25)
+
+    assert _cv_rss_for_order(times, values, order) == pytest.approx(
+        _brute_force_loo_rss(times, values, order), rel=1e-8)
+
+
+def test_select_orders_by_aic_matches_per_analyte_selection():
+    rng = np.random.default_rng(8)
+    times = _times(40, step_s=90.0)
+    s = np.arange(40, dtype=float)
+    series = {
+        "flat": (times, 10.0 + rng.normal(0, 0.5, 40)),
+        "linear": (times, 10.0 + 0.5 * s + rng.normal(0, 0.5, 40)),
+        "quadratic": (times, 10.0 + 0.05 * s ** 2 + rng.normal(0, 0.5, 40)),
+        # different times from the rest: fit in its own group
+        "sparse": (times[::4], 3.0 + rng.normal(0, 0.1, 10)),
+        "empty": ([], []),
+    }
+
+    fits = select_orders_by_aic(series, max_order=3)
+
+    assert set(fits) == {"flat", "linear", "quadratic", "sparse"}
+    for analyte, fit in fits.items():
+        single = select_order_by_aic(*series[analyte], max_order=3, analyte=analyte)
+        assert fit.analyte == analyte
+        assert fit.order == single.order
+        np.testing.assert_allclose(fit.coeffs, single.coeffs)
+    assert fits["linear"].order >= 1
+    assert fits["quadratic"].order >= 2
+
+
+def test_predict_many_matches_predict_per_fit():
+    times = _times(12, step_s=300.0)
+    rng = np.random.default_rng(4)
+    fits = {
+        "Al27": fit_polynomial(times, 100 + rng.normal(size=12), order=2),
+        "Ca43": fit_polynomial(times, 5 + 0.01 * np.arange(12), order=1),
+        "Fe57": fit_polynomial(times[3:], rng.normal(size=9), order=1),  # different t0
+        "Lu175": PoissonDriftFit(
+            analyte="Lu175", order=1, model="poly(1)", coeffs=np.array([-1.0, 0.5]),
+            t0=times[0], t_scale=3300.0, deviance=0.0, n_points=12,
+            drift_pvalue=None, tau_total_s=12.0, converged=True,
+        ),
+    }
+    probe = np.array(_times(40, step_s=97.0), dtype="datetime64[us]")
+
+    predicted = predict_many(fits, probe)
+    assert list(predicted) == list(fits)
+    for analyte, fit in fits.items():
+        np.testing.assert_allclose(predicted[analyte], fit.predict(probe), rtol=1e-12)
@@ -24,6 +24,7 @@ from src.calibration.poisson_drift import (
     detect_poisson_file_outliers,
     fit_poisson_glm,
     select_poisson_order_lrt,
+    select_poisson_orders_lrt,
 )
 
 
@@ -301,3 +302,52 @@ def test_predicted_rate_is_stable_flags_wild_extrapolation():
         drift_pvalue=None, tau_total_s=1.0, converged=True,
     )
     assert _predicted_rate_is_stable(flat_fit, times, observed_max_rate=1.0) is True
+
+
+def _brute_force_loo_deviance(times, counts, tau, order):
+    """The leave-one-out deviance by refitting fit_poisson_glm once per held-out point."""
+    total = 0.0
+    for i in range(len(times)):
+        keep = [j for j in range(len(times)) if j != i]
+        fold = fit_poisson_glm([times[j] for j in keep], counts[keep], tau[keep], order=order)
+        if fold is None or not fold.converged:
+            return None
+        mu_i = max(fold.predict([times[i]])[0] * tau[i], 1e-300)
+        n_i = counts[i]
+        total += 2.0 * ((n_i * np.log(n_i / mu_i) if n_i > 0 else 0.0) - (n_i - mu_i))
+    return total
+
+
+@pytest.mark.parametrize("order", [0, 1, 2, 3])
+def test_cv_deviance_for_order_matches_refitting_each_fold(order):
+    rng = np.random.default_rng(3)
+    # uneven spacing, so dropping an end point changes the fold's t0/t_scale
+    times = _times(1, start=datetime(2026, 3, 1, 9, 0)) + _times(24, step_s=90.0)
+    tau = rng.uniform(0.5, 2.0, len(times))
+    counts = rng.poisson(20.0 * tau * np.linspace(1.0, 1.5, len(times))).astype(float)
+
+    expected = _brute_force_loo_deviance(times, counts, tau, order)
+    assert _cv_deviance_for_order(times, counts, tau, order) == pytest.approx(expected, rel=1e-8)
+
+
+def test_select_poisson_orders_lrt_matches_per_analyte_selection():
+    rng = np.random.default_rng(9)
+    series = {}
+    for i, (n, rate) in enumerate([(30, 0.2), (45, 5.0), (60, 50.0), (25, 800.0)]):
+        times = _times(n, step_s=60.0 + 20 * i)
+        s = np.linspace(0.0, 1.0, n)
+        tau = np.ones(n)
+        series[f"A{i}"] = (times, rng.poisson(rate * (1.0 + i * 0.3 * s)).astype(float), tau)
+    series["empty"] = ([], [], [])
+
+    batched = select_poisson_orders_lrt(series, max_order=3)
+    assert list(batched) == ["A0", "A1", "A2", "A3"]
+    for analyte, fit in batched.items():
+        assert fit.analyte == analyte
+        assert fit.order == select_poisson_order_lrt(*series[analyte], analyte=analyte, max_order=3).order
+        # the batched IRLS reproduces the scalar fit at the selected order
+        scalar = fit_poisson_glm(*series[analyte], order=fit.order, analyte=analyte)
+        np.testing.assert_allclose(fit.coeffs, scalar.coeffs, rtol=1e-8)
+        assert fit.deviance == pytest.approx(scalar.deviance, rel=1e-8)
+        assert (fit.t0, fit.t_scale, fit.converged) == (scalar.t0, scalar.t_scale, scalar.converged)
+    assert {fit.order for fit in batched.values()} != {0}
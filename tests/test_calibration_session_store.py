@@ -0,0 +1,119 @@
+"""Shared session store for line files (``src.calibration.session_store``).
+
+Pure Python -- no PyQt/QApplication needed.
+"""
+import pickle
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+project_root = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.calibration.rawfile import LineFileData, LineFileMeta
+from src.calibration.session_store import SessionStore
+
+
+def _line_file(index, n_rows, analytes=("Al27", "Ca43", "Fe57"), seed=0):
+    rng = np.random.default_rng(seed + index)
+    acquired_at = datetime(2026, 3, 1, 10, 0, 0) + timedelta(minutes=3 * index)
+    time_s = np.round(np.arange(1, n_rows + 1) * 0.28, 4)
+    absolute_time = np.datetime64(acquired_at) + (time_s * 1e6).round().astype("timedelta64[us]")
+    meta = LineFileMeta(
+        path=Path(f"SYNSTD - {index}.csv"), label="SYNSTD", index=index, is_standard=True,
+        acquired_at=acquired_at, batch="Test.b",
+    )
+    signal = pd.DataFrame(rng.poisson(50.0, (n_rows, len(analytes))) / 0.28, columns=list(analytes))
+    return LineFileData(
+        meta=meta, time_s=time_s, absolute_time=absolute_time, analytes=list(analytes),
+        signal=signal, dt_s=0.28, n_rows=n_rows,
+    )
+
+
+def _assert_same_line_file(view, original):
+    assert view.meta == original.meta
+    assert view.analytes == original.analytes
+    assert view.n_rows == original.n_rows and view.dt_s == original.dt_s
+    pd.testing.assert_frame_equal(view.signal, original.signal)
+    np.testing.assert_array_equal(view.time_s, original.time_s)
+    np.testing.assert_array_equal(view.absolute_time, original.absolute_time)
+
+
+def _signal_total(line_data, scale=1.0):
+    return line_data.meta.index, round(float(line_data.signal.to_numpy().sum()) * scale, 6)
+
+
+@pytest.mark.parametrize("backing", ["shared_memory", "memmap", "memory"])
+def test_views_reproduce_line_files_without_copying(backing):
+    files = [_line_file(i, n) for i, n in enumerate([12, 30, 7])]
+    with SessionStore.from_line_files(files, backing=backing) as store:
+        assert len(store) == 3
+        assert store.rows(1) == slice(12, 42)
+        for i, original in enumerate(files):
+            view = store.line_data(i)
+            _assert_same_line_file(view, original)
+            assert np.shares_memory(view.signal.to_numpy(), store.signal)
+            assert np.shares_memory(view.time_s, store.time_s)
+        del view
+
+
+def test_files_with_different_analytes_are_padded_with_nan():
+    files = [_line_file(0, 5), _line_file(1, 4, analytes=("Ca43", "Al27"))]
+    with SessionStore.from_line_files(files) as store:
+        assert store.analytes == ["Al27", "Ca43", "Fe57"]
+        assert np.isnan(store.signal[store.rows(1), 2]).all()
+        _assert_same_line_file(store.line_data(1), files[1])
+
+
+def test_views_are_read_only_but_columns_can_be_replaced():
+    files = [_line_file(0, 6)]
+    with SessionStore.from_line_files(files) as store:
+        view = store.line_data(0)
+        with pytest.raises(ValueError):
+            view.signal.iloc[0, 0] = 1.0
+        view.signal["Al27"] = 0.0
+        assert view.signal["Al27"].eq(0.0).all()
+        assert store.signal[0, 0] == files[0].signal["Al27"].iloc[0]
+        del view
+
+
+def test_pickles_as_a_handle_and_reattaches_to_the_same_memory():
+    files = [_line_file(i, 200) for i in range(4)]
+    with SessionStore.from_line_files(files) as store:
+        payload = pickle.dumps(store)
+        assert len(payload) < len(pickle.dumps(files)) / 20
+        attached = pickle.loads(payload)
+        assert not attached.owner
+        _assert_same_line_file(attached.line_data(2), files[2])
+
+
+def test_map_runs_in_worker_processes():
+    files = [_line_file(i, 25) for i in range(5)]
+    expected = [_signal_total(f, scale=2.0) for f in files]
+    with SessionStore.from_line_files(files) as store:
+        assert store.map(_signal_total, max_workers=2, scale=2.0) == expected
+        assert store.map(_signal_total, indices=[3, 1], max_workers=1, scale=2.0) == [expected[3], expected[1]]
+
+
+def test_memmap_store_removes_its_temporary_file():
+    with SessionStore.from_line_files([_line_file(0, 8)], backing="memmap") as store:
+        path = Path(store.handle.name)
+        assert path.exists()
+        assert SessionStore.attach(store.handle).line_data(0).signal.shape == (8, 3)
+    assert not path.exists()
+
+
+def test_memmap_store_keeps_a_file_the_caller_named(tmp_path):
+    path = tmp_path / "session.store"
+    with SessionStore.from_line_files([_line_file(0, 8)], backing="memmap", path=path) as store:
+        assert SessionStore.attach(store.handle).line_data(0).signal.shape == (8, 3)
+    assert path.exists()
+
+
+def test_unknown_backing_raises():
+    with pytest.raises(ValueError):
+        SessionStore.from_line_files([_line_file(0, 3)], backing="gpu")
@@ -0,0 +1,164 @@
+"""Watch-folder streaming calibration (``src.calibration.streaming``), and
+the ``pipeline.run`` cache it is built on.
+
+Pure Python -- no PyQt/QApplication needed.
+"""
+import sys
+import threading
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pandas as pd
+
+project_root = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.calibration.pipeline import PipelineCache, run
+from src.calibration.streaming import StreamingCalibration, has_printed_trailer
+from tests.test_calibration_pipeline import _reference_library, _write_raw_file
+
+BASE = datetime(2026, 3, 1, 10, 0, 0)
+# acquisition order of the synthetic session: (label, index, minutes after BASE, seed)
+SESSION = [
+    ("NIST610", 1, 0, 1),
+    ("SAMPLE", 1, 15, 2),
+    ("SAMPLE", 2, 30, 3),
+    ("NIST610", 2, 45, 4),
+    ("SAMPLE", 3, 60, 5),
+    ("NIST610", 3, 75, 6),
+]
+RUN_KWARGS = dict(drift_order=0, background_drift_order=0)
+
+
+def _acquire(directory: Path, label, index, minutes, seed, **kwargs):
+    _write_raw_file(directory, label, index, BASE + timedelta(minutes=minutes), seed=seed, **kwargs)
+
+
+def _streaming(directory: Path, **kwargs) -> StreamingCalibration:
+    return StreamingCalibration(
+        directory, standard_names={"NIST610"}, reference_library=_reference_library(), **RUN_KWARGS, **kwargs,
+    )
+
+
+def test_streaming_results_match_batch_run_once_session_ends_on_a_standard(tmp_path):
+    stream = _streaming(tmp_path)
+    for step in SESSION:
+        _acquire(tmp_path, *step)
+        update = stream.poll()
+        assert update.new_files == [f"{step[0]} - {step[1]}.csv"]
+
+    expected = run(tmp_path, {"NIST610"}, _reference_library(), **RUN_KWARGS)["SAMPLE"]
+    result = update.results["SAMPLE"]
+    pd.testing.assert_frame_equal(result.calibrated_ppm, expected.calibrated_ppm)
+    assert result.provenance["reference_channels"] == expected.provenance["reference_channels"]
+    assert len(update.standard_results["NIST610"].occurrences) == 3
+
+
+def test_standards_are_reported_before_any_sample_and_samples_before_a_second_standard(tmp_path):
+    stream = _streaming(tmp_path)
+    _acquire(tmp_path, *SESSION[0])
+    update = stream.poll()
+    assert update.results == {}
+    assert update.error is None
+    assert len(update.standard_results["NIST610"].occurrences) == 1
+
+    _acquire(tmp_path, *SESSION[1])
+    update = stream.poll()
+    assert update.results["SAMPLE"].calibrated_ppm["Al27"].notna().all()
+
+
+def test_samples_reuse_the_session_fits_until_a_new_standard_arrives(tmp_path):
+    stream = _streaming(tmp_path)
+    for step in SESSION[:2]:
+        _acquire(tmp_path, *step)
+        stream.poll()
+    version = stream.cache.drift_version
+    standard = stream.cache.standards["NIST610"]
+    first_background = stream.cache.backgrounds["SAMPLE - 1.csv"][1]
+
+    _acquire(tmp_path, *SESSION[2])
+    stream.poll()
+    assert stream.cache.drift_version == version
+    assert stream.cache.standards["NIST610"] is standard
+    assert stream.cache.backgrounds["SAMPLE - 1.csv"][1] is first_background
+
+    _acquire(tmp_path, *SESSION[3])
+    stream.poll()
+    assert stream.cache.drift_version == version + 1
+    assert len(stream.cache.standards["NIST610"].occurrences) == 2
+
+
+def test_file_without_trailer_waits_until_it_stops_changing(tmp_path):
+    _acquire(tmp_path, *SESSION[0])
+    partial = tmp_path / "SAMPLE - 1.csv"
+    partial.write_bytes(b"S:\\Data\\Synthetic\\SyntheticBatch.b\\SAMPLE - 1.d\r\nIntensity Vs Time,CPS\r\n")
+    assert not has_printed_trailer(partial)
+
+    stream = _streaming(tmp_path)
+    update = stream.poll()
+    assert update.new_files == ["NIST610 - 1.csv"]
+    assert update.pending_files == ["SAMPLE - 1.csv"]
+
+    _acquire(tmp_path, *SESSION[1])  # the instrument finishes the file
+    assert has_printed_trailer(partial)
+    update = stream.poll()
+    assert update.new_files == ["SAMPLE - 1.csv"]
+    assert update.pending_files == []
+    assert "SAMPLE" in update.results
+
+
+def test_unreadable_complete_file_is_reported_and_skipped(tmp_path):
+    for step in SESSION[:2]:
+        _acquire(tmp_path, *step)
+    broken = tmp_path / "SAMPLE - 2.csv"
+    broken.write_bytes(b"not an instrument export\r\n")
+
+    stream = _streaming(tmp_path, settle_polls=1)
+    update = stream.poll()
+    assert "SAMPLE - 2.csv" in update.pending_files
+    update = stream.poll()
+    assert list(update.failed_files) == ["SAMPLE - 2.csv"]
+    assert len(update.results["SAMPLE"].files) == 1
+
+    _acquire(tmp_path, *SESSION[2])
+    update = stream.poll()
+    assert update.new_files == ["SAMPLE - 2.csv"]
+    assert update.failed_files == {}
+    assert len(update.results["SAMPLE"].files) == 2
+
+
+def test_new_standard_far_from_its_reference_is_flagged(tmp_path):
+    stream = _streaming(tmp_path, accuracy_threshold=2.0)
+    for step in SESSION[:3]:
+        _acquire(tmp_path, *step)
+        stream.poll()
+    _acquire(tmp_path, *SESSION[3], ablation_level=(300000.0, 600000.0))
+    update = stream.poll()
+    assert update.flagged_standards.get("NIST610 - 2.csv") == ["Al27"]
+
+
+def test_watch_stops_when_the_session_goes_idle(tmp_path):
+    for step in SESSION[:4]:
+        _acquire(tmp_path, *step)
+    updates = []
+    last = _streaming(tmp_path).watch(interval_s=0.01, on_update=updates.append, idle_timeout_s=0.02)
+    assert len(updates) == 1 and len(updates[0].new_files) == 4
+    assert last.new_files == [] and "SAMPLE" in last.results
+
+    stop = threading.Event()
+    stop.set()
+    assert _streaming(tmp_path).watch(interval_s=0.01, stop=stop) is None
+
+
+def test_cached_run_only_processes_new_files(tmp_path):
+    for step in SESSION[:3]:
+        _acquire(tmp_path, *step)
+    cache = PipelineCache()
+    run(tmp_path, {"NIST610"}, _reference_library(), cache=cache, **RUN_KWARGS)
+    parsed = {name: entry[1] for name, entry in cache.line_files.items()}
+
+    _acquire(tmp_path, *SESSION[3])
+    results = run(tmp_path, {"NIST610"}, _reference_library(), cache=cache, **RUN_KWARGS)
+    assert all(cache.line_files[name][1] is f for name, f in parsed.items())
+    expected = run(tmp_path, {"NIST610"}, _reference_library(), **RUN_KWARGS)
+    pd.testing.assert_frame_equal(results["SAMPLE"].calibrated_ppm, expected["SAMPLE"].calibrated_ppm)
@@ -0,0 +1,85 @@
+"""Correlation matrices from cached pair statistics (``src.common.correlation``)."""
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+from scipy.stats import kendalltau
+
+project_root = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.common.correlation import CorrelationEngine
+
+
+def _frame(nrows=5000, ncols=6, seed=0, nan_fraction=0.0):
+    rng = np.random.default_rng(seed)
+    latent = rng.normal(size=(nrows, 2))
+    data = latent @ rng.normal(size=(2, ncols)) + 0.5 * rng.normal(size=(nrows, ncols))
+    data = np.exp(data) + 100  # skewed, offset values stress the float32 products
+    if nan_fraction:
+        data[rng.random((nrows, ncols)) < nan_fraction] = np.nan
+    return pd.DataFrame(data, columns=[f'A{i}' for i in range(ncols)])
+
+
+def _matrix(engine, df, versions, method='pearson', **kwargs):
+    return engine.matrix(
+        list(df.columns), lambda c: df[c].to_numpy(), lambda c: versions.get(c, 0), method=method, **kwargs
+    )
+
+
+@pytest.mark.parametrize('method', ['pearson', 'spearman'])
+def test_matches_pandas(method):
+    df = _frame()
+    result = _matrix(CorrelationEngine(chunk_rows=1024), df, {}, method)
+    pd.testing.assert_frame_equal(result, df.corr(method), atol=1e-5, rtol=0)
+
+
+def test_pairwise_complete_rows_and_row_mask_match_pandas():
+    df = _frame(nan_fraction=0.1, seed=1)
+    df['A5'] = 3.0  # constant column has no correlation
+    rows = df['A0'].to_numpy() > np.nanmedian(df['A0'])
+    engine = CorrelationEngine(chunk_rows=777)
+    pd.testing.assert_frame_equal(_matrix(engine, df, {}), df.corr(), atol=1e-5, rtol=0)
+    pd.testing.assert_frame_equal(
+        _matrix(engine, df, {}, rows=rows, key='upper'), df[rows].corr(), atol=1e-5, rtol=0
+    )
+
+
+def test_changing_one_column_refreshes_only_its_row_and_column():
+    df = _frame(ncols=8, seed=2)
+    engine = CorrelationEngine()
+    versions = {}
+    _matrix(engine, df, versions)
+    assert engine.columns_computed == 8
+
+    assert _matrix(engine, df, versions) is not None and engine.columns_computed == 8
+    df['A3'] = np.log(df['A3'])
+    versions['A3'] = 1
+    result = _matrix(engine, df, versions)
+    assert engine.columns_computed == 9
+    pd.testing.assert_frame_equal(result, df.corr(), atol=1e-5, rtol=0)
+
+    subset = df[['A6', 'A1', 'A3']]
+    result = _matrix(engine, subset, versions)
+    assert engine.columns_computed == 9
+    pd.testing.assert_frame_equal(result, subset.corr(), atol=1e-5, rtol=0)
+
+
+def test_kendall_estimate_and_confidence_interval():
+    df = _frame(nrows=20000, ncols=4, seed=3)
+    estimate = CorrelationEngine().kendall(list(df.columns), lambda c: df[c].to_numpy(), sample_size=400)
+    assert estimate.sample_size == 400
+
+    exact = kendalltau(df['A0'], df['A1']).statistic
+    assert estimate.lower.loc['A0', 'A1'] < exact < estimate.upper.loc['A0', 'A1']
+    assert np.all(estimate.lower.to_numpy() <= estimate.tau.to_numpy())
+
+    # with every row sampled the estimate is the exact tau-b
+    small = df.iloc[:300].round(1)
+    full = CorrelationEngine().kendall(list(small.columns), lambda c: small[c].to_numpy())
+    pd.testing.assert_frame_equal(full.tau, small.corr('kendall'), atol=1e-6, rtol=0)
+
+    tau = _matrix(CorrelationEngine(), small, {}, 'kendall')
+    assert tau.attrs['kendall'].sample_size == 300
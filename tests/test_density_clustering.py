@@ -0,0 +1,65 @@
+"""HDBSCAN fit on a subsample with label propagation (``src.common.density_clustering``)."""
+import sys
+import warnings
+from pathlib import Path
+
+import numpy as np
+from sklearn.cluster import HDBSCAN
+from sklearn.metrics import adjusted_rand_score
+
+project_root = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.common.density_clustering import stratified_sample, subsample_hdbscan
+
+
+def _blobs(n, seed=1, n_features=8, outlier_fraction=0.005):
+    """Four separated clusters of unequal size on a 3-D subspace, plus scattered outliers."""
+    rng = np.random.default_rng(seed)
+    centres = rng.normal(size=(4, 3)) * 8
+    truth = rng.choice(4, size=n, p=[0.5, 0.3, 0.15, 0.05])
+    X = (centres[truth] + rng.normal(size=(n, 3))) @ rng.normal(size=(3, n_features))
+    X += 0.05 * rng.normal(size=X.shape)
+    outliers = rng.random(n) < outlier_fraction
+    X[outliers] = rng.uniform(-40, 40, size=(outliers.sum(), n_features))
+    truth[outliers] = -1
+    return X, truth
+
+
+def test_propagated_labels_match_a_full_fit():
+    X, _ = _blobs(12000)
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', FutureWarning)
+        full = HDBSCAN(min_cluster_size=100, min_samples=10, copy=True).fit(X)
+    result = subsample_hdbscan(X, sample_size=2000, min_cluster_size=100, min_samples=10)
+
+    assert result.sample_indices.size == 2000
+    assert adjusted_rand_score(full.labels_, result.labels) > 0.95
+    clustered = (full.labels_ >= 0) & (result.labels >= 0)
+    assert clustered.mean() > 0.95
+
+
+def test_outliers_are_noise_with_zero_strength():
+    X, truth = _blobs(12000, seed=2)
+    result = subsample_hdbscan(X, sample_size=2000, min_cluster_size=100, min_samples=10)
+
+    assert np.mean(result.labels[truth == -1] == -1) > 0.9
+    assert np.all(result.probabilities[result.labels == -1] == 0)
+    assert np.all((result.probabilities >= 0) & (result.probabilities <= 1))
+    assert result.noise_fraction == np.mean(result.labels == -1)
+
+
+def test_small_inputs_are_fit_directly():
+    X, _ = _blobs(600, seed=3)
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', FutureWarning)
+        full = HDBSCAN(min_cluster_size=20, min_samples=5, copy=True).fit(X)
+    result = subsample_hdbscan(X, sample_size=1000, min_cluster_size=20, min_samples=5)
+    np.testing.assert_array_equal(result.labels, full.labels_)
+    np.testing.assert_array_equal(result.probabilities, full.probabilities_)
+
+
+def test_stratified_sample_takes_one_row_per_block():
+    rows = stratified_sample(1000, 7, np.random.default_rng(0))
+    edges = np.linspace(0, 1000, 8).astype(int)
+    assert np.all((rows >= edges[:-1]) & (rows < edges[1:]))
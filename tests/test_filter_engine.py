@@ -0,0 +1,134 @@
+"""Incremental filter and ROI evaluation (``src.common.filtering``).
+
+Masks are checked against the row-by-row evaluation ``SampleObj`` used before
+(``iterrows`` over the table, combining each row's range mask in order).
+"""
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+project_root = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.common.filtering import FILTER_COLUMNS, FilterEngine
+
+FIELDS = ['Fe57', 'Mg24', 'Si29', 'Ca43']
+
+
+class Data:
+    """Field values with per-field versions, standing in for a sample."""
+    def __init__(self, size, seed=0):
+        rng = np.random.default_rng(seed)
+        self.columns = {f: rng.normal(size=size) for f in FIELDS}
+        self.versions = dict.fromkeys(FIELDS, 0)
+
+    def values(self, field, field_type):
+        return self.columns[field]
+
+    def version(self, field, field_type):
+        return self.versions.get(field, 0)
+
+    def engine(self):
+        return FilterEngine(len(self.columns['Fe57']), self.values, self.version)
+
+
+def _table(rows):
+    return pd.DataFrame(
+        [[use, 'Analyte', field, 'linear', vmin, vmax, op, True] for use, field, vmin, vmax, op in rows],
+        columns=FILTER_COLUMNS,
+    )
+
+
+def _reference(data, filter_df):
+    mask = np.ones(len(data.columns['Fe57']), dtype=bool)
+    for _, row in filter_df.iterrows():
+        use = row['use']
+        if isinstance(use, str):
+            use = use.strip().lower() == 'true'
+        if not use or row['field'] not in data.columns:
+            continue
+        values = data.columns[row['field']]
+        field_mask = (row['min'] <= values) & (values <= row['max'])
+        if row['operator'] == 'and':
+            mask = mask & field_mask
+        elif row['operator'] == 'or':
+            mask = mask | field_mask
+        elif row['operator'] == 'not':
+            mask = mask & ~field_mask
+    return mask
+
+
+def _random_table(rng, n):
+    return _table([
+        (rng.random() > 0.1, rng.choice(FIELDS + ['missing']), *np.sort(rng.normal(size=2)),
+         rng.choice(['and', 'or', 'not']))
+        for _ in range(n)
+    ])
+
+
+def test_masks_match_row_by_row_evaluation():
+    data = Data(1003)
+    engine = data.engine()
+    rng = np.random.default_rng(1)
+    for _ in range(50):
+        table = _random_table(rng, rng.integers(0, 8))
+        np.testing.assert_array_equal(engine.evaluate(table), _reference(data, table))
+    table = _table([('True', 'Fe57', -1, 1, 'and'), ('false', 'Mg24', 0, 1, 'and')])
+    np.testing.assert_array_equal(engine.evaluate(table), _reference(data, table))
+
+
+def test_editing_one_threshold_evaluates_only_that_row():
+    data = Data(500)
+    engine = data.engine()
+    table = _table([(True, FIELDS[i % 4], -2 + 0.01 * i, 2.0, 'and') for i in range(60)])
+    engine.evaluate(table)
+    assert engine.evaluations == 60
+
+    table.at[30, 'max'] = 0.5
+    np.testing.assert_array_equal(engine.evaluate(table), _reference(data, table))
+    assert engine.evaluations == 61
+
+    table.at[31, 'operator'] = 'or'
+    engine.evaluate(table)
+    assert engine.evaluations == 62
+
+    # new data for one field invalidates only the rows on that field
+    data.columns['Mg24'] = np.random.default_rng(2).normal(size=500)
+    data.versions['Mg24'] += 1
+    np.testing.assert_array_equal(engine.evaluate(table), _reference(data, table))
+    assert engine.evaluations == 62 + 15
+
+
+def test_roi_labels_follow_stack_priority():
+    data = Data(2000, seed=3)
+    engine = data.engine()
+    rng = np.random.default_rng(4)
+    tables = [_random_table(rng, 3) for _ in range(5)]
+    ids = [3, 1, 7, 2, 5]
+    expected = np.zeros(2000, dtype=int)
+    for table, roi_id in zip(tables, ids):
+        expected[_reference(data, table)] = roi_id
+
+    labels = engine.label(tables, ids)
+    assert labels.dtype.kind == 'i'
+    np.testing.assert_array_equal(labels, expected)
+    assert not engine.label([], []).any()
+
+
+def test_retain_drops_rows_no_longer_used():
+    data = Data(100)
+    engine = data.engine()
+    live = _table([(True, 'Fe57', 0, 1, 'and'), (True, 'Mg24', 0, 1, 'and')])
+    roi = _table([(True, 'Si29', 0, 1, 'and')])
+    engine.evaluate(live)
+    engine.label([roi], [1])
+    assert len(engine) == 3
+
+    live.at[0, 'min'] = -1
+    engine.evaluate(live)
+    engine.retain([live, roi])
+    assert len(engine) == 3
+    engine.retain([live])
+    assert len(engine) == 2
@@ -0,0 +1,78 @@
+"""Calculator formula compilation tests (``src.common.formula``)."""
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+project_root = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.common.formula import CalculatedFieldGraph, FieldReference, FormulaError, compile_formula
+
+
+def test_plain_formula_resolves_references_once():
+    plan = compile_formula('{Analyte.Si29}^2 + ln({Analyte.Si29}) - log({Ratio.Fe57 / Mg24_N})')
+    assert plan.references == (FieldReference('Analyte', 'Si29'), FieldReference('Ratio (normalized)', 'Fe57 / Mg24'))
+    si, ratio = np.array([1.0, 10.0, 100.0]), np.array([10.0, 100.0, 1000.0])
+    np.testing.assert_allclose(plan.evaluate([si, ratio]), si**2 + np.log(si) - np.log10(ratio))
+    assert compile_formula('{Analyte.Si29}^2 + ln({Analyte.Si29}) - log({Ratio.Fe57 / Mg24_N})') is plan
+
+
+def test_constant_formula_fills_every_row():
+    np.testing.assert_array_equal(compile_formula('2 * 3').evaluate([], n_rows=4), [6, 6, 6, 6])
+
+
+def test_later_cases_override_earlier_ones_and_otherwise_fills_the_rest():
+    plan = compile_formula('case {Analyte.Fe57} > 1, 10; case {Analyte.Fe57} > 3, {Analyte.Fe57} * 100; otherwise -1')
+    fe = np.array([0.0, 2.0, 4.0, np.nan])
+    np.testing.assert_array_equal(plan.evaluate([fe]), [-1.0, 10.0, 400.0, -1.0])
+
+    no_otherwise = compile_formula('case {Analyte.Fe57} > 1, 10')
+    np.testing.assert_array_equal(no_otherwise.evaluate([fe]), [np.nan, 10.0, 10.0, np.nan])
+
+
+def test_case_expressions_only_see_their_rows():
+    # log10 of the rows the case excludes would warn/produce -inf if evaluated on every row
+    plan = compile_formula('case {Analyte.Fe57} > 0, log({Analyte.Fe57}); otherwise 0')
+    fe = np.array([100.0, 0.0, -5.0, 10.0])
+    with np.errstate(all='raise'):
+        np.testing.assert_array_equal(plan.evaluate([fe]), [2.0, 0.0, 0.0, 1.0])
+
+
+@pytest.mark.parametrize('formula', [
+    '({Analyte.Si29} + 1',
+    '{Analyte.Si29',
+    '{Si29} * 2',
+    'case {Analyte.Si29} > 1',
+    '{Analyte.Si29} +* 2',
+    'x + 1',
+])
+def test_malformed_formulas_raise(formula):
+    with pytest.raises(FormulaError):
+        compile_formula(formula)
+
+
+def test_swapped_case_condition_is_reported():
+    plan = compile_formula('case {Analyte.Si29} * 2, {Analyte.Si29} > 1')
+    with pytest.raises(FormulaError, match='boolean'):
+        plan.evaluate([np.arange(3.0)])
+
+
+def test_graph_orders_dependents_and_rejects_cycles():
+    graph = CalculatedFieldGraph()
+    graph.add('B', compile_formula('{Analyte.A} * 2'))
+    graph.add('C', compile_formula('{Calculated.B} + {Analyte.A}'))
+    graph.add('D', compile_formula('{Calculated.C} + 1'))
+    graph.add('E', compile_formula('{Analyte.Z}'))
+
+    assert graph.dependents('A') == ['B', 'C', 'D']
+    assert graph.dependents('C') == ['D']
+    assert graph.dependents('Z') == ['E']
+    with pytest.raises(FormulaError):
+        graph.add('B', compile_formula('{Calculated.D} - 1'))
+
+    graph.mark_computed('B', (1, 2))
+    assert graph.stamp('B') == (1, 2)
+    graph.discard('B')
+    assert 'B' not in graph and len(graph) == 3
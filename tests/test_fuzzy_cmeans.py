@@ -0,0 +1,76 @@
+"""Chunked float32 fuzzy c-means (``src.common.fuzzy_cmeans``).
+
+``reference_cmeans`` is the textbook float64 iteration on the full matrix
+(as ``skfuzzy.cluster.cmeans``, but started from given centres), which the
+chunked implementation must follow to float32 accuracy.
+"""
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+project_root = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.common.fuzzy_cmeans import fuzzy_cmeans, seed_centers
+
+
+def reference_cmeans(X, centers, m, tol=1e-5, max_iter=1000):
+    previous = None
+    for _ in range(max_iter):
+        d2 = np.fmax(((X[:, np.newaxis, :] - centers[np.newaxis]) ** 2).sum(axis=-1), 1e-300)
+        u = (d2.min(axis=1, keepdims=True) / d2) ** (1 / (m - 1))
+        u /= u.sum(axis=1, keepdims=True)
+        if previous is not None and np.abs(u - previous).max() < tol:
+            break
+        previous = u
+        w = u**m
+        fitted, centers = centers, (w.T @ X) / w.sum(axis=0)[:, np.newaxis]
+    return fitted, u
+
+
+def _blobs(n=20000, n_clusters=4, n_features=5, seed=0, offset=100.0):
+    rng = np.random.default_rng(seed)
+    centres = rng.normal(size=(n_clusters, n_features)) * 4
+    return centres[rng.integers(n_clusters, size=n)] + rng.normal(size=(n, n_features)) + offset
+
+
+@pytest.mark.parametrize('m', [1.5, 2.1, 3.0])
+def test_matches_float64_reference(m):
+    X = _blobs(8000)
+    init = seed_centers(X, 4, seed=1)
+    result = fuzzy_cmeans(X, 4, m=m, init=init, chunk_rows=3000)
+    centers, u = reference_cmeans(X, init, m)
+
+    assert result.memberships.dtype == np.float32 and result.n_iter < 1000
+    np.testing.assert_allclose(result.centers, centers, atol=1e-2)
+    np.testing.assert_allclose(result.memberships, u, atol=1e-3)
+    np.testing.assert_allclose(result.memberships.sum(axis=1), 1, atol=1e-5)
+    expected = np.sum(u**m * ((X[:, np.newaxis, :] - centers) ** 2).sum(axis=-1))
+    assert result.objective == pytest.approx(expected, rel=1e-3)
+
+
+def test_chunking_does_not_change_the_result():
+    X = _blobs(5000, seed=2)
+    whole = fuzzy_cmeans(X, 3, seed=4)
+    chunked = fuzzy_cmeans(X, 3, seed=4, chunk_rows=701)
+    np.testing.assert_allclose(chunked.centers, whole.centers, atol=1e-3)
+    np.testing.assert_array_equal(chunked.labels, whole.labels)
+
+
+def test_warm_start_extends_the_previous_solution():
+    X = _blobs(n_clusters=5, seed=3)
+    previous = fuzzy_cmeans(X, 4, seed=5)
+    centers = seed_centers(X, 5, seed=5, centers=previous.centers)
+    np.testing.assert_array_equal(centers[:4], previous.centers)
+    assert np.min(np.linalg.norm(previous.centers - centers[4], axis=1)) > 0
+
+    warm = fuzzy_cmeans(X, 5, seed=5, init=previous.centers)
+    assert warm.memberships.shape == (len(X), 5)
+    assert warm.objective < previous.objective
+
+
+def test_exponent_must_exceed_one():
+    with pytest.raises(ValueError):
+        fuzzy_cmeans(_blobs(100), 2, m=1.0)
@@ -0,0 +1,120 @@
+"""Censored-Gaussian estimates (``src.common.gausscensor``).
+
+``reference_gausscensor`` is the previous implementation (a Python merge
+loop and ``interp1d``), which the current one must reproduce whenever the
+data contain censored values and the quantiles fall inside the empirical CDF.
+"""
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+from scipy.interpolate import interp1d
+from scipy.special import erf, erfinv
+from scipy.stats import mode
+
+project_root = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.common.gausscensor import gausscensor, gausscensor_batch
+
+
+def reference_gausscensor(x, scale='linear', q=[0.05, 0.25, 0.5, 0.75, 0.95], a=3/8):
+    x = np.array(x)
+    x = x[~np.isnan(x)]
+    c = -x[x <= 0]
+    u = x[x > 0]
+    mode_c = mode(c)[0] if len(c) > 0 else 0
+    c[c == 0] = mode_c if mode_c != 0 else 10 * min(u)
+    if scale == 'log':
+        u, c = np.log(u), np.log(c)
+    c, u = np.sort(c), np.sort(u)
+
+    nc, nu, N = len(c), len(u), len(x)
+    ind = np.zeros_like(u, dtype=int)
+    j = k = 0
+    while k < nc and j < nu:
+        if c[k] <= u[j]:
+            k += 1
+        else:
+            ind[j] = j + k
+            j += 1
+    if j < nu:
+        ind[j:nu] = np.arange(j, nu) + k
+
+    y = (N - a + 1) / (N - 2 * a + 1) * np.cumprod(((ind + 1 - a) / (ind + 2 - a))[::-1], axis=0)[::-1]
+    uu, indices = np.unique(u, return_index=True)
+    yy = y[indices]
+    dy = np.diff(np.insert(yy, 0, 0))
+    mu = np.sum(uu * dy)
+    sigma = np.sqrt(N / (N - 1) * np.sum((uu - mu)**2 * dy))
+    rms = np.sqrt(np.sum((yy - 0.5 * (1 + erf((uu - mu) / (np.sqrt(2) * sigma))))**2) / N)
+    quantile_values = np.zeros((len(q), 2))
+    quantile_values[:, 0] = mu + sigma * np.sqrt(2) * erfinv(2 * np.array(q) - 1)
+    quantile_values[:, 1] = interp1d(yy, uu)(q)
+    return {'mu': mu, 'sigma': sigma, 'rms': rms}, quantile_values
+
+
+def _censored_matrix(n=400, k=6, seed=0):
+    """Rounded lognormal columns (ties) with censored values at known and unknown limits, and NaNs."""
+    rng = np.random.default_rng(seed)
+    x = rng.lognormal(1, 0.8, size=(n, k)).round(1)
+    x[rng.random(x.shape) < 0.2] *= -1
+    x[rng.random(x.shape) < 0.05] = 0
+    x[rng.random(x.shape) < 0.05] = np.nan
+    return x
+
+
+@pytest.mark.parametrize('scale', ['linear', 'log'])
+def test_matches_previous_implementation(scale):
+    q = [0.5, 0.75, 0.9]
+    x = _censored_matrix(seed=1)
+    for column in x.T:
+        model, quantiles = gausscensor(column, scale=scale, q=q)
+        expected_model, expected_quantiles = reference_gausscensor(column, scale=scale, q=q)
+        for key in ('mu', 'sigma', 'rms'):
+            assert model[key] == pytest.approx(expected_model[key], rel=1e-12)
+        np.testing.assert_allclose(quantiles, expected_quantiles, rtol=1e-12)
+
+
+def test_uncensored_data_use_plotting_positions(capsys):
+    x = np.random.default_rng(2).normal(10, 2, 200)
+    model, quantiles = gausscensor(x, q=[0.001, 0.5])
+    a, N = 3/8, len(x)
+    y = (np.arange(N) + 1 - a) / (N + 1 - 2 * a)  # Blom plotting positions
+    assert model['mu'] == pytest.approx(np.sum(np.sort(x) * np.diff(y, prepend=0)))
+    # below the smallest plotting position the model quantile is used, without printing
+    assert quantiles[0, 1] == quantiles[0, 0]
+    assert capsys.readouterr().out == ''
+
+
+@pytest.mark.parametrize('scale', ['linear', 'log10'])
+def test_batch_matches_column_by_column(scale):
+    x = _censored_matrix(seed=3)
+    x[:, 4] = np.abs(x[:, 4])   # no censored values
+    x[8:, 5] = -1.0             # fewer than 8 detections
+    result = gausscensor_batch(x, scale=scale)
+
+    for j, column in enumerate(x.T):
+        single = gausscensor(column, scale=scale)
+        if j == 5:
+            assert np.isnan(single['mu'])
+            assert np.isnan(result['mu'][j]) and np.all(np.isnan(result['quantiles'][j]))
+            continue
+        model, quantiles = single
+        for key in ('mu', 'sigma', 'rms'):
+            assert result[key][j] == pytest.approx(model[key], rel=1e-10)
+        np.testing.assert_allclose(result['quantiles'][j], quantiles, rtol=1e-10)
+
+
+def test_batch_groups():
+    x = _censored_matrix(n=600, k=3, seed=4)
+    groups = np.random.default_rng(5).choice(['b', 'a', 'c'], size=len(x))
+    result = gausscensor_batch(x, groups=groups)
+
+    assert list(result['groups']) == ['a', 'b', 'c']
+    assert result['quantiles'].shape == (3, 3, 5, 2)
+    for g, label in enumerate(result['groups']):
+        expected = gausscensor_batch(x[groups == label])
+        for key in ('mu', 'sigma', 'rms', 'quantiles'):
+            np.testing.assert_array_equal(result[key][g], expected[key])
@@ -69,6 +69,7 @@ class FakeAppData:
         self.max_clusters = 10
         self.cluster_min_size = 5
         self.cluster_min_samples = 3
+        self.cluster_sample_size = 0
 
 
 def _make_sample_dataframe():
@@ -0,0 +1,151 @@
+"""Background map-import worker tests.
+
+Drives ``MapImportWorker.run()`` directly (no QThread/QApplication needed).
+Signals are emitted from the worker's pool threads, so the test slots use
+direct connections rather than relying on an event loop to deliver them.
+"""
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+from PyQt6.QtCore import Qt
+
+project_root = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.importers.MapImportWorker import (
+    ImportFileSpec,
+    MapImportWorker,
+    SampleImportJob,
+    assemble_line_data,
+    read_line_file,
+    read_matrix_file,
+)
+
+
+def _write_matrix(path, values):
+    pd.DataFrame(values).to_csv(path, header=False, index=False)
+
+
+def _write_line(path, values):
+    with open(path, 'w') as f:
+        f.write("header 1\nheader 2\nheader 3\n")
+    pd.DataFrame(values, columns=['Fe57', 'Mg24']).to_csv(path, mode='a', index=False)
+
+
+def _run(jobs, **kwargs):
+    worker = MapImportWorker(jobs, **kwargs)
+    events = {'failed': [], 'finished': None}
+    direct = Qt.ConnectionType.DirectConnection
+    worker.fileFailed.connect(lambda s, f, m: events['failed'].append((s, f, m)), direct)
+    worker.finished.connect(lambda n, c: events.__setitem__('finished', (n, c)), direct)
+    worker.run()
+    return worker, events
+
+
+def test_matrix_import_matches_serial_concat(tmp_path):
+    rng = np.random.default_rng(0)
+    arrays = {name: rng.random((4, 6)) for name in ('Fe57', 'Mg24', 'Si29')}
+    for name, values in arrays.items():
+        _write_matrix(tmp_path / f"{name}.csv", values)
+
+    files = [ImportFileSpec(str(tmp_path / f"{name}.csv"), name) for name in arrays]
+    job = SampleImportJob('S1', str(tmp_path), False, files, swap_xy=True, reverse_x=True, dx=2.0, dy=3.0)
+    _, events = _run([job])
+
+    # the serial path: first file carries coordinates, the rest are bare columns
+    expected = pd.concat([
+        read_matrix_file(spec.label, spec.file_path, True, True, False, *((2.0, 3.0) if i == 0 else ()))
+        for i, spec in enumerate(files)
+    ], axis=1)
+    result = pd.read_csv(tmp_path / 'S1.lame.csv')
+
+    assert events['finished'] == (1, False)
+    assert list(result.columns) == ['Xc', 'Yc', 'Fe57', 'Mg24', 'Si29']
+    np.testing.assert_allclose(result.to_numpy(), expected.to_numpy())
+
+
+def test_line_import_is_ordered_and_shifted_to_origin(tmp_path):
+    for line in (1, 2, 3):
+        _write_line(tmp_path / f"{line}.csv", np.full((5, 2), float(line)))
+
+    files = [ImportFileSpec(str(tmp_path / f"{line}.csv"), str(line)) for line in (1, 2, 3)]
+    job = SampleImportJob('S2', str(tmp_path), True, files, reverse_x=True, dx=10.0, dy=1.0)
+    _run([job])
+    result = pd.read_csv(tmp_path / 'S2.lame.csv')
+
+    assert result['Fe57'].tolist() == [1.0] * 5 + [2.0] * 5 + [3.0] * 5
+    assert result['Xc'].min() == 0.0
+    assert result['Yc'].min() == 0.0
+    # reversed: line 1 is now the furthest from the origin
+    assert result.loc[0, 'Xc'] == 20.0
+
+
+def test_assemble_line_data_falls_back_to_concat_for_mismatched_columns():
+    a = pd.DataFrame({'Xc': [0.0], 'Yc': [0.0], 'Fe57': [1.0]})
+    b = pd.DataFrame({'Xc': [1.0], 'Yc': [0.0], 'Mg24': [2.0]})
+    result = assemble_line_data([a, b])
+    assert list(result.columns) == ['Xc', 'Yc', 'Fe57', 'Mg24']
+    assert np.isnan(result.loc[1, 'Fe57'])
+
+
+def test_unreadable_file_is_reported_and_rest_of_sample_imports(tmp_path):
+    _write_matrix(tmp_path / 'Fe57.csv', np.ones((3, 3)))
+    (tmp_path / 'Mg24.dat').write_text('nonsense')
+    files = [
+        ImportFileSpec(str(tmp_path / 'Fe57.csv'), 'Fe57'),
+        ImportFileSpec(str(tmp_path / 'Mg24.dat'), 'Mg24'),
+    ]
+    _, events = _run([SampleImportJob('S3', str(tmp_path), False, files, dx=1.0, dy=1.0)])
+
+    assert len(events['failed']) == 1
+    assert events['failed'][0][1].endswith('Mg24.dat')
+    assert list(pd.read_csv(tmp_path / 'S3.lame.csv').columns) == ['Xc', 'Yc', 'Fe57']
+
+
+def test_multiple_samples_import_in_parallel(tmp_path):
+    jobs = []
+    for sample in ('A', 'B', 'C'):
+        _write_matrix(tmp_path / f"{sample}_Fe57.csv", np.ones((2, 2)))
+        jobs.append(SampleImportJob(sample, str(tmp_path), False, [ImportFileSpec(str(tmp_path / f"{sample}_Fe57.csv"), 'Fe57')]))
+    _, events = _run(jobs, max_sample_workers=3)
+
+    assert events['finished'] == (3, False)
+    assert all((tmp_path / f"{s}.lame.csv").exists() for s in ('A', 'B', 'C'))
+
+
+def test_cancelled_worker_saves_nothing(tmp_path):
+    _write_matrix(tmp_path / 'Fe57.csv', np.ones((2, 2)))
+    worker = MapImportWorker([SampleImportJob('S4', str(tmp_path), False, [ImportFileSpec(str(tmp_path / 'Fe57.csv'), 'Fe57')])])
+    finished = []
+    worker.finished.connect(lambda n, c: finished.append((n, c)))
+    worker.cancel()
+    worker.run()
+
+    assert finished == [(0, True)]
+    assert not (tmp_path / 'S4.lame.csv').exists()
+
+
+def test_read_line_file_derives_dx_from_length(tmp_path):
+    _write_line(tmp_path / '2.csv', np.zeros((4, 2)))
+    df = read_line_file('2', str(tmp_path / '2.csv'), swap_xy=True, dx=1.0, dy=5.0, length=8.0)
+    assert df['Xc'].tolist() == pytest.approx([0.0, 2.0, 4.0, 6.0])
+    assert (df['Yc'] == 5.0).all()
+
+
+def test_mismatched_map_is_judged_against_first_file_in_table_order(tmp_path):
+    # the large first map finishes reading last, so the expected size must
+    # not come from whichever read completes first
+    _write_matrix(tmp_path / 'Fe57.csv', np.ones((300, 300)))
+    _write_matrix(tmp_path / 'Mg24.csv', np.ones((2, 2)))
+    files = [
+        ImportFileSpec(str(tmp_path / 'Fe57.csv'), 'Fe57'),
+        ImportFileSpec(str(tmp_path / 'Mg24.csv'), 'Mg24'),
+    ]
+    _, events = _run([SampleImportJob('S5', str(tmp_path), False, files, dx=1.0, dy=1.0)])
+
+    assert [f[1] for f in events['failed']] == [str(tmp_path / 'Mg24.csv')]
+    saved = pd.read_csv(tmp_path / 'S5.lame.csv')
+    assert list(saved.columns) == ['Xc', 'Yc', 'Fe57'] and len(saved) == 300 * 300
@@ -0,0 +1,136 @@
+"""Retained SingleView field map (``src.plotting.MapView.FieldMapView``).
+
+The sample, app and style objects are minimal stand-ins for the attributes
+``plot_map_mpl`` reads, so the real canvas, image and colorbar artists are
+built and then updated in place.
+"""
+import os
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from matplotlib import colormaps
+from matplotlib.colors import Normalize
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+from PyQt6.QtWidgets import QApplication
+
+project_root = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.common.pyramid import ImagePyramid
+from src.plotting.MapView import FieldMapView
+
+app = QApplication.instance() or QApplication(sys.argv)
+
+
+class Sample:
+    def __init__(self, arrays):
+        self.arrays = arrays
+        self.array_size = next(iter(arrays.values())).shape
+        self.order = 'C'
+        self.aspect_ratio = 1.0
+        self.dx = self.dy = 1.0
+        self.xlim = self.ylim = (0, 1)
+        self.mask = np.ones(int(np.prod(self.array_size)), dtype=bool)
+        self.processed_version = 0
+        units = {'units': None}
+        self.processed = type('Processed', (), {'column_attributes': {f: units for f in [*arrays, 'Xc']}})()
+
+    def get_map_data(self, field, field_type):
+        return pd.DataFrame({'array': self.arrays[field].ravel()})
+
+    def get_map_pyramid(self, key, array, categorical=False):
+        return ImagePyramid(array, categorical=categorical)
+
+
+class AppData:
+    def __init__(self, sample):
+        self.sample_id = 'S1'
+        self.current_data = sample
+        self.equalize_color_scale = False
+        self.preferences = {'Units': {'Distance': 'µm'}}
+
+
+class StyleData:
+    plot_type = 'field map'
+    cscale = 'linear'
+    cbar_dir = 'vertical'
+    clabel = 'ppm'
+    font_size = 8
+    aspect_ratio = None
+    xlim = ylim = None
+    scale_dir = 'none'
+    scale_length = None
+    scale_location = 'northeast'
+    overlay_color = '#ffffff'
+
+    def __init__(self):
+        self.clim = [0.0, 1.0]
+        self.style_dict = {'field map': {}}
+
+    def get_colormap(self):
+        return colormaps['viridis']
+
+    def color_norm(self):
+        return Normalize()
+
+
+def test_field_changes_update_the_retained_canvas():
+    rng = np.random.default_rng(0)
+    sample = Sample({f: rng.random((40, 60)) * scale for f, scale in (('Fe57', 1), ('Mg24', 1), ('Si29', 50))})
+    app_data, style_data = AppData(sample), StyleData()
+    view = FieldMapView()
+
+    canvas, _, rebuilt = view.update(None, sample, app_data, style_data, 'Analyte', 'Fe57')
+    assert rebuilt
+    colorbar = canvas.colorbar
+    canvas.draw()
+
+    # same limits: only the map axes are blitted
+    updated, info, rebuilt = view.update(None, sample, app_data, style_data, 'Analyte', 'Mg24')
+    assert not rebuilt and updated is canvas and canvas.colorbar is colorbar
+    assert info['field'] == 'Mg24' and canvas.plot_name == 'Mg24'
+    np.testing.assert_array_equal(canvas.map_image.get_array(), sample.arrays['Mg24'])
+
+    # new limits: the same colorbar is updated to the new norm
+    style_data.clim = [0.0, 50.0]
+    updated, _, rebuilt = view.update(None, sample, app_data, style_data, 'Analyte', 'Si29')
+    assert not rebuilt and updated is canvas and canvas.colorbar is colorbar
+    np.testing.assert_array_equal(canvas.map_image.get_array(), sample.arrays['Si29'])
+    assert canvas.map_image.get_clim() == (0.0, 50.0)
+    assert (colorbar.norm.vmin, colorbar.norm.vmax) == (0.0, 50.0)
+    np.testing.assert_array_equal(canvas.data['array'], sample.arrays['Si29'].ravel())
+
+
+def test_layout_change_or_no_reuse_rebuilds():
+    sample = Sample({'Fe57': np.ones((10, 10))})
+    app_data, style_data = AppData(sample), StyleData()
+    view = FieldMapView()
+    canvas, _, _ = view.update(None, sample, app_data, style_data, 'Analyte', 'Fe57')
+
+    new, _, rebuilt = view.update(None, sample, app_data, style_data, 'Analyte', 'Fe57', reuse=False)
+    assert rebuilt and new is not canvas
+
+    style_data.cbar_dir = 'horizontal'
+    newer, _, rebuilt = view.update(None, sample, app_data, style_data, 'Analyte', 'Fe57')
+    assert rebuilt and newer is not new
+
+
+def test_other_sample_or_reloaded_data_rebuilds():
+    sample = Sample({'Fe57': np.ones((10, 10))})
+    app_data, style_data = AppData(sample), StyleData()
+    view = FieldMapView()
+    canvas, _, _ = view.update(None, sample, app_data, style_data, 'Analyte', 'Fe57')
+
+    # same layout, but another sample
+    other = Sample({'Fe57': np.zeros((10, 10))})
+    app_data.sample_id, app_data.current_data = 'S2', other
+    new, _, rebuilt = view.update(None, other, app_data, style_data, 'Analyte', 'Fe57')
+    assert rebuilt and new is not canvas
+
+    # same sample, new processed data
+    other.processed_version += 1
+    newer, _, rebuilt = view.update(None, other, app_data, style_data, 'Analyte', 'Fe57')
+    assert rebuilt and newer is not new
@@ -0,0 +1,98 @@
+"""Bit-packed, versioned sample mask layers (``src.data.MaskStack``)."""
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+project_root = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.data.MaskStack import MASK_LAYERS, MaskStack
+
+
+def _random_layers(size, seed=0):
+    rng = np.random.default_rng(seed)
+    return {name: rng.random(size) > 0.2 for name in MASK_LAYERS}
+
+
+def test_layers_round_trip_through_packing():
+    size = 1001  # not a multiple of 8
+    stack = MaskStack(size)
+    layers = _random_layers(size)
+    for name, value in layers.items():
+        stack[name] = value
+    for name, value in layers.items():
+        np.testing.assert_array_equal(stack[name], value)
+        assert stack[name].dtype == bool and stack[name].shape == (size,)
+    assert stack.layers == MASK_LAYERS
+
+
+def test_combined_mask_is_the_and_of_all_layers():
+    size = 517
+    stack = MaskStack(size)
+    assert stack.mask.all()
+    layers = _random_layers(size, seed=3)
+    for name, value in layers.items():
+        stack[name] = value
+    expected = np.logical_and.reduce(list(layers.values()))
+    np.testing.assert_array_equal(stack.mask, expected)
+    np.testing.assert_array_equal(stack.packed_mask, np.packbits(expected))
+
+
+def test_combined_mask_is_rebuilt_only_when_a_layer_changes():
+    stack = MaskStack(64)
+    stack['filter'] = np.arange(64) % 2 == 0
+    mask, version = stack.mask, stack.version
+    assert stack.mask is mask and stack.version == version
+    assert not mask.flags.writeable
+
+    stack['polygon'] = np.arange(64) < 32
+    assert stack.version != version
+    assert stack.layer_version('polygon') == 1 and stack.layer_version('crop') == 0
+    assert stack.mask.sum() == 16
+
+
+def test_versions_are_unique_across_stacks():
+    a, b = MaskStack(10), MaskStack(10)
+    assert a.version != b.version
+
+
+def test_mask_override_lasts_until_a_layer_changes():
+    stack = MaskStack(8)
+    stack['filter'] = [True] * 7 + [False]
+    override = np.array([False, True, True, True, True, True, True, False])
+    stack.mask = override
+    np.testing.assert_array_equal(stack.mask, override)
+
+    stack['crop'] = np.ones(8, dtype=bool)
+    np.testing.assert_array_equal(stack.mask, [True] * 7 + [False])
+
+
+def test_setting_an_unchanged_mask_keeps_its_version():
+    stack = MaskStack(8)
+    stack['filter'] = [True] * 7 + [False]
+    version = stack.version
+    stack.mask = stack.mask & np.ones(8, dtype=bool)
+    assert stack.version == version
+
+    stack.mask = stack.mask & (np.arange(8) > 0)
+    assert stack.version != version
+
+
+def test_wrong_length_or_unknown_layer_is_rejected():
+    stack = MaskStack(10)
+    with pytest.raises(ValueError, match='expected 10'):
+        stack['filter'] = np.ones(9, dtype=bool)
+    with pytest.raises(ValueError):
+        stack.mask = np.ones(11, dtype=bool)
+    with pytest.raises(KeyError):
+        stack['bogus'] = np.ones(10, dtype=bool)
+
+
+def test_packed_layers_use_an_eighth_of_the_memory():
+    size = 80_000
+    stack = MaskStack(size)
+    layers_nbytes = len(MASK_LAYERS) * size
+    assert stack.nbytes == (len(MASK_LAYERS) + 1) * size // 8
+    assert stack.nbytes < layers_nbytes // 4
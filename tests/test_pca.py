@@ -0,0 +1,70 @@
+"""PCA backend tests (``src.common.pca``)."""
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+from sklearn.decomposition import PCA
+from sklearn.preprocessing import StandardScaler
+
+project_root = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.common.pca import fit_pca, resolve_solver
+
+
+@pytest.fixture
+def correlated_matrix():
+    rng = np.random.default_rng(1)
+    latent = rng.normal(size=(3000, 3)) * [5.0, 2.0, 1.0]
+    mixing = rng.normal(size=(3, 12))
+    return latent @ mixing + 0.05 * rng.normal(size=(3000, 12)) + 10.0
+
+
+def _reference(X, n_components):
+    pca = PCA(n_components=n_components, svd_solver='full')
+    scores = pca.fit_transform(StandardScaler().fit_transform(X))
+    return pca, scores
+
+
+def _assert_same_up_to_sign(a, b, rtol):
+    signs = np.sign(np.sum(a * b, axis=0))
+    np.testing.assert_allclose(a * signs, b, rtol=rtol, atol=rtol * np.abs(b).max())
+
+
+@pytest.mark.parametrize('solver', ['full', 'randomized', 'incremental'])
+def test_solvers_match_full_standardized_pca(correlated_matrix, solver):
+    reference, reference_scores = _reference(correlated_matrix, 3)
+    model, scores = fit_pca(correlated_matrix, n_components=3, solver=solver, batch_size=500)
+
+    assert scores.dtype == np.float32
+    assert scores.shape == (3000, 3)
+    assert model.n_components_ == 3
+    np.testing.assert_allclose(model.explained_variance_ratio_, reference.explained_variance_ratio_, rtol=1e-3)
+    _assert_same_up_to_sign(scores, reference_scores, rtol=1e-3)
+
+
+def test_default_computes_every_component(correlated_matrix):
+    model, scores = fit_pca(correlated_matrix)
+    assert model.n_components_ == 12
+    assert scores.shape == (3000, 12)
+    assert model.explained_variance_ratio_.sum() == pytest.approx(1.0, rel=1e-4)
+
+
+def test_incremental_folds_short_final_chunk():
+    X = np.random.default_rng(2).normal(size=(1003, 6))
+    model, scores = fit_pca(X, n_components=5, solver='incremental', batch_size=100)
+    assert scores.shape == (1003, 5)
+    assert np.isfinite(scores).all()
+
+
+def test_auto_solver_choice():
+    assert resolve_solver('auto', 10**5, 30, 3) == 'randomized'
+    assert resolve_solver('auto', 10**5, 30, 30) == 'full'
+    assert resolve_solver('auto', 10**7, 30, 3) == 'incremental'
+    assert resolve_solver('full', 10**7, 30, 3) == 'full'
+
+
+def test_unknown_solver_raises(correlated_matrix):
+    with pytest.raises(ValueError):
+        fit_pca(correlated_matrix, solver='arpack')
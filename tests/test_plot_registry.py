@@ -0,0 +1,244 @@
+"""Plot registry memory accounting, eviction and re-rendering from recipes.
+
+Most tests use bare ``MplCanvas`` objects with data attached by hand and a
+stand-in renderer. ``test_evicted_field_map_is_redrawn_as_it_was_drawn`` draws
+with the real ``create_plot``, from minimal stand-ins for the sample, app and
+style objects (as in ``test_map_view.py``).
+"""
+import os
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+from matplotlib import colormaps
+from matplotlib.colors import Normalize
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+from PyQt6.QtCore import QObject
+from PyQt6.QtWidgets import QApplication
+
+project_root = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(project_root))
+
+pytest.importorskip('lame_core')
+
+from src.common.pyramid import ImagePyramid
+from src.plotting.CustomMplCanvas import MplCanvas
+from src.plotting.LamePlot import create_plot
+from src.tree.PlotRegistry import PlotRegistry, canvas_nbytes, estimate_nbytes
+
+app = QApplication.instance() or QApplication(sys.argv)
+
+MB = 2**20
+
+
+class Sample:
+    def __init__(self):
+        self.processed_version = 0
+
+
+class AppData:
+    def __init__(self):
+        self.data = {'S1': Sample()}
+
+
+def _canvas(nrows=MB // 8):
+    canvas = MplCanvas(width=1, height=1)
+    canvas._data = pd.DataFrame({'Fe57': np.zeros(nrows)})
+    canvas.array = None
+    return canvas
+
+
+def _plot_info(field):
+    return {
+        'tree': 'Analyte', 'sample_id': 'S1', 'plot_name': field, 'plot_type': 'field map',
+        'field_type': 'Analyte', 'field': field, 'figure': _canvas(),
+        'style': {'CField': field, 'CFieldType': 'Analyte'}, 'data': None,
+    }
+
+
+def _registry(**kwargs):
+    rendered = []
+
+    def renderer(recipe, sample_obj):
+        rendered.append(recipe)
+        return _canvas()
+
+    return PlotRegistry(AppData(), renderer=renderer, **kwargs), rendered
+
+
+def test_sizes_count_data_and_render_buffer():
+    assert estimate_nbytes(np.zeros(10)) == 80
+    assert estimate_nbytes({'a': np.zeros(4), 'b': [np.zeros(2)]}) == 48
+    assert estimate_nbytes('text') == 0
+    canvas = _canvas()
+    width, height = canvas.figure.bbox.size
+    assert canvas_nbytes(canvas) >= MB + int(width * height) * 4
+
+
+def test_registered_metadata_keeps_a_recipe_not_the_canvas():
+    registry, _ = _registry()
+    info = _plot_info('Fe57')
+    plot_id = registry.register_plot(info)
+    metadata = registry.get_plot_metadata(plot_id)
+    assert 'figure' not in metadata and 'data' not in metadata
+    recipe = metadata['recipe']
+    assert (recipe.sample_id, recipe.plot_type, recipe.data_version) == ('S1', 'field map', 0)
+    info['style']['CField'] = 'Mg24'
+    assert recipe.style['CField'] == 'Fe57'
+    assert registry.get_plot_info(plot_id)['figure'] is info['figure']
+
+
+def test_canvases_are_evicted_by_memory_budget():
+    registry, _ = _registry(max_cached_canvases=10, memory_budget_mb=2.5)
+    ids = [registry.register_plot(_plot_info(f)) for f in ('Fe57', 'Mg24', 'Si29')]
+    assert registry.get_cached_canvas_ids() == ids[1:]
+    assert registry.cache_nbytes <= 2.5 * MB
+    registry.get_or_create_canvas(ids[1])  # most recently used now
+    registry.register_plot(_plot_info('Ca43'))
+    assert ids[1] in registry.canvas_cache and ids[2] not in registry.canvas_cache
+
+
+def test_evicted_plot_is_rendered_again_from_its_recipe():
+    registry, rendered = _registry(max_cached_canvases=1)
+    first = registry.register_plot(_plot_info('Fe57'))
+    registry.register_plot(_plot_info('Mg24'))
+    assert first not in registry.canvas_cache
+
+    registry.app_data.data['S1'].processed_version = 3
+    info = registry.get_plot_info(first)
+    assert [r.style['CField'] for r in rendered] == ['Fe57']
+    assert info['figure'].plot_id == first and info['data'] is info['figure'].data
+    assert registry.get_plot_metadata(first)['recipe'].data_version == 3
+    assert registry.get_cached_canvas_ids() == [first]
+
+
+def test_tree_lookup_returns_metadata_without_redrawing():
+    registry, rendered = _registry(max_cached_canvases=1)
+    first = registry.register_plot(_plot_info('Fe57'))
+    registry.link_to_tree('Analyte:S1:Fe57', first)
+    registry.register_plot(_plot_info('Mg24'))
+
+    metadata = registry.get_plot_by_tree_key('Analyte:S1:Fe57')
+    assert metadata['plot_id'] == first and 'figure' not in metadata
+    assert rendered == [] and first not in registry.canvas_cache
+    assert registry.get_plot_by_tree_key('Analyte:S1:Si29') is None
+
+
+def test_plots_that_cannot_be_redrawn_are_not_evicted():
+    registry, _ = _registry(max_cached_canvases=1)
+    info = _plot_info('Fe57')
+    info['plot_type'] = 'gradient map'  # not drawn by create_plot
+    pinned = registry.register_plot(info)
+    first = registry.register_plot(_plot_info('Mg24'))
+    registry.register_plot(_plot_info('Si29'))
+    assert pinned in registry.canvas_cache and first not in registry.canvas_cache
+
+
+class MapSample:
+    def __init__(self, arrays):
+        self.arrays = arrays
+        self.array_size = next(iter(arrays.values())).shape
+        self.order = 'C'
+        self.aspect_ratio = 1.0
+        self.dx = self.dy = 1.0
+        self.xlim = self.ylim = (0, 1)
+        self.mask = np.ones(int(np.prod(self.array_size)), dtype=bool)
+        self.processed_version = 0
+        units = {'units': None}
+        self.processed = type('Processed', (), {'column_attributes': {f: units for f in [*arrays, 'Xc']}})()
+
+    def get_map_data(self, field, field_type):
+        return pd.DataFrame({'array': self.arrays[field].ravel()})
+
+    def get_map_pyramid(self, key, array, categorical=False):
+        return ImagePyramid(array, categorical=categorical)
+
+
+class MapAppData(QObject):
+    def __init__(self, ui, sample):
+        super().__init__()
+        self.ui = ui
+        self.data = {'S1': sample}
+        self.sample_id = 'S1'
+        self.current_data = sample
+        self._equalize_color_scale = False
+        self.preferences = {'Units': {'Distance': 'µm'}}
+
+    @property
+    def equalize_color_scale(self):
+        return self._equalize_color_scale
+
+    @equalize_color_scale.setter
+    def equalize_color_scale(self, flag):
+        raise AssertionError('recipes restore settings without running setters')
+
+    @property
+    def c_field(self):
+        return self.ui.style_data.style_dict[self.ui.style_data.plot_type]['CField']
+
+    @property
+    def c_field_type(self):
+        return self.ui.style_data.style_dict[self.ui.style_data.plot_type]['CFieldType']
+
+
+class MapStyleData(QObject):
+    cscale = 'linear'
+    cbar_dir = 'vertical'
+    clabel = 'ppm'
+    font_size = 8
+    aspect_ratio = None
+    xlim = ylim = None
+    scale_dir = 'none'
+    scale_length = None
+    scale_location = 'northeast'
+    overlay_color = '#ffffff'
+
+    def __init__(self):
+        super().__init__()
+        self.plot_type = 'field map'
+        self.clim = [0.0, 1.0]
+        self.style_dict = {'field map': {'CField': 'Fe57', 'CFieldType': 'Analyte'}}
+
+    def get_colormap(self):
+        return colormaps['viridis']
+
+    def color_norm(self):
+        return Normalize()
+
+
+class MapUI:
+    def __init__(self, sample):
+        self.style_data = MapStyleData()
+        self.app_data = MapAppData(self, sample)
+
+
+def test_evicted_field_map_is_redrawn_as_it_was_drawn():
+    rng = np.random.default_rng(0)
+    sample = MapSample({'Fe57': rng.random((20, 30)) ** 3, 'Mg24': rng.random((20, 30))})
+    ui = MapUI(sample)
+    app_data, style_data = ui.app_data, ui.style_data
+    registry = PlotRegistry(app_data, max_cached_canvases=1)
+
+    app_data._equalize_color_scale = True
+    canvas, plot_info = create_plot(ui, sample, app_data, style_data)
+    original = canvas.map_image.get_array().copy()
+    first = registry.register_plot(plot_info)
+
+    # the app moves on: other field, no equalization
+    app_data._equalize_color_scale = False
+    style_data.style_dict['field map'] = {'CField': 'Mg24', 'CFieldType': 'Analyte'}
+    _, plot_info = create_plot(ui, sample, app_data, style_data)
+    registry.register_plot(plot_info)
+    assert first not in registry.canvas_cache
+
+    redrawn = registry.get_plot_info(first)['figure']
+    assert redrawn is not canvas and redrawn.plot_name == 'Fe57'
+    np.testing.assert_array_equal(redrawn.map_image.get_array(), original)
+    assert redrawn.map_image.get_clim() == canvas.map_image.get_clim()
+
+    # and the app's own settings are back
+    assert app_data.equalize_color_scale is False
+    assert style_data.style_dict['field map']['CField'] == 'Mg24'
@@ -0,0 +1,70 @@
+"""Scanline polygon rasterization (``src.common.rasterize``).
+
+Rasters are checked against ``matplotlib.path.Path.contains_points`` on the
+pixel centres, which is what the polygon tab used to evaluate per pixel.
+"""
+import sys
+from pathlib import Path
+
+import numpy as np
+from matplotlib.path import Path as MplPath
+
+project_root = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.common.rasterize import PolygonRasterCache, intersect_rasters, rasterize_polygon
+
+
+def _contains_points(verts, shape):
+    rows, cols = np.mgrid[0:shape[0], 0:shape[1]]
+    points = np.column_stack([cols.ravel(), rows.ravel()])
+    return MplPath(verts).contains_points(points).reshape(shape)
+
+
+def test_rasters_match_contains_points():
+    rng = np.random.default_rng(7)
+    for _ in range(200):
+        shape = tuple(rng.integers(4, 50, size=2))
+        n = rng.integers(3, 10)
+        # vertices partly off the map, with self-intersections
+        verts = np.column_stack([rng.uniform(-4, shape[1] + 4, n), rng.uniform(-4, shape[0] + 4, n)])
+        mask = intersect_rasters([rasterize_polygon(verts, shape)], shape)
+        np.testing.assert_array_equal(mask, _contains_points(verts, shape))
+
+
+def test_raster_covers_only_the_bounding_box():
+    raster = rasterize_polygon([(10.5, 20.2), (14.5, 20.2), (14.5, 23.9)], (100, 50))
+    assert (raster.row0, raster.col0, raster.mask.shape) == (21, 11, (3, 4))
+    assert rasterize_polygon([(-9, -9), (-5, -9), (-5, -5)], (10, 10)).mask.size == 0
+
+
+def test_even_odd_rule_leaves_a_pentagram_centre_out():
+    star = [(10.1, 0.1), (16.1, 19.1), (0.1, 7.1), (20.1, 7.1), (4.1, 19.1)]
+    mask = intersect_rasters([rasterize_polygon(star, (20, 21))], (20, 21))
+    assert not mask[10, 10] and mask[3, 10]
+
+
+def test_polygons_are_intersected():
+    shape = (30, 30)
+    a = [(2.5, 2.5), (20.5, 2.5), (20.5, 20.5), (2.5, 20.5)]
+    b = [(10.5, 10.5), (28.5, 10.5), (28.5, 28.5), (10.5, 28.5)]
+    mask = intersect_rasters([rasterize_polygon(a, shape), rasterize_polygon(b, shape)], shape)
+    np.testing.assert_array_equal(mask, _contains_points(a, shape) & _contains_points(b, shape))
+    assert intersect_rasters([], shape).all()
+
+
+def test_cache_rebuilds_only_edited_polygons():
+    cache = PolygonRasterCache()
+    shape = (40, 40)
+    square = [(1.5, 1.5), (9.5, 1.5), (9.5, 9.5), (1.5, 9.5)]
+    triangle = [(20.5, 20.5), (35.5, 20.5), (20.5, 35.5)]
+    first = cache.get(('S1', 0), square, shape)
+    other = cache.get(('S1', 1), triangle, shape)
+    assert cache.get(('S1', 0), list(square), shape) is first
+
+    square[2] = (12.5, 12.5)
+    assert cache.get(('S1', 0), square, shape) is not first
+    assert cache.get(('S1', 1), triangle, shape) is other
+
+    cache.retain([('S1', 1)])
+    assert len(cache) == 1
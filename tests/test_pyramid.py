@@ -0,0 +1,101 @@
+"""Image pyramid tests (``src.common.pyramid``)."""
+import sys
+from pathlib import Path
+
+import numpy as np
+import matplotlib
+matplotlib.use('Agg')
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+project_root = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.common.pyramid import ImagePyramid, ImagePyramidBinding, block_mean, block_mode
+
+
+def test_block_mean_ignores_nans_and_partial_edge_blocks():
+    array = np.array([
+        [1.0, 3.0, 5.0],
+        [np.nan, 2.0, 7.0],
+        [np.nan, np.nan, 9.0],
+    ])
+    result = block_mean(array, 2)
+
+    assert result.dtype == np.float32
+    assert result.shape == (2, 2)
+    np.testing.assert_allclose(result[0], [2.0, 6.0])
+    assert np.isnan(result[1, 0])
+    assert result[1, 1] == 9.0
+
+
+def test_block_mean_averages_each_channel():
+    rgba = np.zeros((4, 4, 4))
+    rgba[:2, :2, 3] = 1.0
+    result = block_mean(rgba, 2)
+    assert result.shape == (2, 2, 4)
+    np.testing.assert_allclose(result[..., 3], [[1.0, 0.0], [0.0, 0.0]])
+
+
+def test_block_mode_keeps_labels():
+    labels = np.array([
+        [1.0, 1.0, 4.0, 2.0, 7.0],
+        [3.0, 1.0, 2.0, 4.0, np.nan],
+        [np.nan, np.nan, 5.0, 5.0, np.nan],
+        [np.nan, np.nan, 5.0, 2.0, np.nan],
+    ])
+    result = block_mode(labels, 2)
+
+    assert result.dtype == np.float32 and result.shape == (2, 3)
+    # most common label, ties to the smallest, NaNs ignored unless the block is all NaN
+    np.testing.assert_array_equal(result[0], [1.0, 2.0, 7.0])
+    assert np.isnan(result[1, 0]) and result[1, 1] == 5.0 and np.isnan(result[1, 2])
+
+
+def test_categorical_pyramid_levels_only_hold_existing_labels():
+    labels = np.random.default_rng(0).integers(0, 5, size=(512, 256)).astype(float)
+    labels[labels == 3] = np.nan
+    pyramid = ImagePyramid(labels, min_size=32, categorical=True)
+
+    assert len(pyramid) == 4
+    for level in pyramid.coarse:
+        values = level[~np.isnan(level)]
+        assert set(np.unique(values)) <= {0.0, 1.0, 2.0, 4.0}
+
+    # block means would invent intermediate values
+    assert not np.all(np.isin(ImagePyramid(labels, min_size=32)[1], [0, 1, 2, 4]))
+
+
+def test_levels_halve_until_min_size():
+    pyramid = ImagePyramid(np.ones((1000, 300)), min_size=64)
+    assert [level.shape for level in pyramid.levels] == [(1000, 300), (500, 150), (250, 75)]
+
+    rebuilt = ImagePyramid(pyramid[0], coarse=pyramid.coarse)
+    assert len(rebuilt) == 3 and rebuilt[2] is pyramid[2]
+
+
+def test_level_for_keeps_one_data_pixel_per_screen_pixel():
+    pyramid = ImagePyramid(np.ones((4096, 4096)), min_size=64)
+    assert pyramid.level_for((4096, 4096), (500, 500)) == 3
+    assert pyramid.level_for((4096, 4096), (5000, 5000)) == 0
+    # zoomed in on a 300 pixel window: full resolution
+    assert pyramid.level_for((300, 300), (500, 500)) == 0
+
+
+def test_binding_switches_levels_on_zoom_and_keeps_extent():
+    fig = Figure(figsize=(2, 2), dpi=100)
+    FigureCanvasAgg(fig)
+    ax = fig.add_subplot()
+    array = np.arange(2048*1024, dtype=float).reshape(2048, 1024)
+    image = ax.imshow(array)
+
+    binding = ImagePyramidBinding(ax)
+    binding.add(image, ImagePyramid(array))
+    assert binding.level > 0
+    assert image.get_array().shape[0] < 2048
+    assert image.get_extent() == [-0.5, 1023.5, 2047.5, -0.5]
+
+    ax.set_xlim(0, 50)
+    ax.set_ylim(50, 0)
+    assert binding.level == 0
+    assert image.get_array().shape == (2048, 1024)
@@ -0,0 +1,136 @@
+"""Quick View background thumbnail rendering tests.
+
+``QuickViewRenderer`` emits from its pool threads; the tests connect with
+direct connections and wait for every thumbnail while the event loop feeds
+the pool (maps are read back on the GUI thread as workers finish).
+"""
+import sys
+import threading
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from matplotlib import colormaps
+from PyQt6.QtCore import Qt
+
+project_root = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.plotting.QuickView import QuickViewRenderer, QuickViewThumbnail, quick_view_thumbnail
+
+
+class MapSample:
+    """Minimal stand-in for the parts of SampleObj the renderer reads."""
+    def __init__(self, arrays, sample_id='S1'):
+        self.sample_id = sample_id
+        self.arrays = arrays
+        self.array_size = next(iter(arrays.values())).shape
+        self.order = 'C'
+        self.processed_version = 0
+        self.reads = []
+        self.read_threads = set()
+
+    def get_map_data(self, field, field_type):
+        self.reads.append(field)
+        self.read_threads.add(threading.current_thread())
+        return pd.DataFrame({'array': self.arrays[field].ravel()})
+
+
+def _render(qtbot, renderer, sample, fields, cmap, **kwargs):
+    results = {}
+    direct = Qt.ConnectionType.DirectConnection
+    renderer.thumbnailReady.connect(lambda g, i, f, rgba: results.__setitem__(f, (g, rgba)), direct)
+    generation = renderer.render(sample, [('Analyte', f) for f in fields], cmap, **kwargs)
+    qtbot.waitUntil(lambda: len(results) == len(fields))
+    return generation, results
+
+
+def test_thumbnail_downsamples_and_colormaps():
+    cmap = colormaps['viridis']
+    array = np.linspace(0, 1, 1000*600).reshape(1000, 600)
+    array[0, 0] = np.nan
+    rgba = quick_view_thumbnail(array, cmap, max_size=300)
+
+    assert rgba.dtype == np.uint8
+    assert rgba.shape == (250, 150, 4)
+    assert rgba.flags['C_CONTIGUOUS']
+    np.testing.assert_array_equal(rgba[-1, -1], cmap(1.0, bytes=True))
+
+
+def test_thumbnail_nan_uses_bad_color():
+    cmap = colormaps['viridis'].with_extremes(bad=(0, 0, 0, 0))
+    rgba = quick_view_thumbnail(np.array([[np.nan, 1.0], [2.0, 3.0]]), cmap)
+    assert rgba[0, 0, 3] == 0
+
+
+def test_renderer_emits_every_field_and_caches(qtbot):
+    rng = np.random.default_rng(0)
+    sample = MapSample({f: rng.random((20, 30)) for f in ('Fe57', 'Mg24', 'Si29')})
+    cmap = colormaps['viridis']
+
+    # one worker and one map in flight: the rest are read as the pool frees up
+    renderer = QuickViewRenderer(max_workers=1, max_in_flight=1)
+    generation, results = _render(qtbot, renderer, sample, ['Fe57', 'Mg24', 'Si29'], cmap)
+    assert set(results) == {'Fe57', 'Mg24', 'Si29'}
+    assert all(g == generation for g, _ in results.values())
+    assert sample.read_threads == {threading.main_thread()}
+
+    # cached: reopening the list emits synchronously without touching the sample again
+    sample.reads.clear()
+    again = {}
+    renderer.thumbnailReady.connect(lambda g, i, f, rgba: again.__setitem__(f, rgba), Qt.ConnectionType.DirectConnection)
+    renderer.render(sample, [('Analyte', f) for f in ('Fe57', 'Mg24', 'Si29')], cmap)
+    assert sample.reads == []
+    assert again['Fe57'] is results['Fe57'][1]
+
+
+def test_renderer_cache_misses_on_new_processed_version_or_colormap(qtbot):
+    sample = MapSample({'Fe57': np.ones((4, 4))})
+    renderer = QuickViewRenderer(max_workers=1)
+    norm = (0.0, 1.0, 'linear')
+    key = renderer.cache_key(sample, 'Analyte', 'Fe57', colormaps['viridis'], 400, norm)
+
+    assert renderer.cache_key(sample, 'Analyte', 'Fe57', colormaps['viridis'], 400, (0.0, 2.0, 'linear')) != key
+    sample.processed_version += 1
+    assert renderer.cache_key(sample, 'Analyte', 'Fe57', colormaps['viridis'], 400, norm) != key
+    assert renderer.cache_key(sample, 'Analyte', 'Fe57', colormaps['magma'], 400, norm) != key
+
+
+def test_thumbnails_share_one_normalization(qtbot):
+    cmap = colormaps['viridis']
+    sample = MapSample({'Fe57': np.full((8, 8), 1.0), 'Mg24': np.linspace(0, 10, 64).reshape(8, 8)})
+    renderer = QuickViewRenderer(max_workers=2)
+    _, results = _render(qtbot, renderer, sample, ['Fe57', 'Mg24'], cmap)
+
+    np.testing.assert_array_equal(results['Fe57'][1][0, 0], cmap(0.1, bytes=True))
+    np.testing.assert_array_equal(results['Mg24'][1][-1, -1], cmap(1.0, bytes=True))
+    assert np.array_equal(quick_view_thumbnail(sample.arrays['Mg24'], cmap, vmin=0, vmax=10), results['Mg24'][1])
+
+    # log scale spans the smallest positive value to the largest
+    rgba = quick_view_thumbnail(np.array([[0.0, 1.0], [10.0, 100.0]]), cmap, vmin=1, vmax=100, scale='log')
+    assert rgba[0, 0, 3] == 0
+    np.testing.assert_array_equal(rgba[1, 0], cmap(0.5, bytes=True))
+
+
+def test_cancelled_generation_skips_unstarted_fields(qtbot):
+    renderer = QuickViewRenderer(max_workers=1)
+    emitted = []
+    renderer.thumbnailReady.connect(lambda *args: emitted.append(args), Qt.ConnectionType.DirectConnection)
+    renderer._render_one(renderer.generation - 1, 0, 'Fe57', None, np.ones((4, 4)), colormaps['viridis'], 400, (None, None, 'linear'))
+    assert emitted == [] and renderer._cache == {}
+
+    sample = MapSample({'Fe57': np.ones((4, 4)), 'Mg24': np.ones((4, 4))})
+    renderer = QuickViewRenderer(max_workers=1, max_in_flight=1)
+    renderer.render(sample, [('Analyte', 'Fe57'), ('Analyte', 'Mg24')], colormaps['viridis'])
+    renderer.cancel()
+    assert not renderer._queue and not renderer._arrays
+
+
+def test_thumbnail_widget_keeps_map_aspect(qtbot):
+    widget = QuickViewThumbnail('Fe57', aspect_ratio=2.0)
+    qtbot.addWidget(widget)
+    widget.set_image(np.zeros((10, 40, 4), dtype=np.uint8))
+
+    assert widget.heightForWidth(400) == 200
+    widget.resize(400, 200)
+    assert not widget.grab().isNull()
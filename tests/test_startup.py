@@ -0,0 +1,97 @@
+"""Startup budget: deferred imports and import timing (``src.app.Startup``).
+
+``test_main_window_import_budget`` imports ``MainWindow`` cold in a fresh
+interpreter and fails if a deferred module is loaded at import time or the
+import takes longer than ``IMPORT_BUDGET_S``; it needs the sibling packages.
+``test_module_defers_heavy_imports`` checks each module that imports a
+deferred module inside a function, skipping those whose sibling packages are
+missing.
+"""
+import sys
+from pathlib import Path
+
+import pytest
+
+project_root = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.app.Startup import (
+    DEFERRED_MODULES, LazyClass, StartupTimer, import_times, parse_importtime, startup_timer,
+)
+
+# cold import of src.app.MainWindow, seconds
+IMPORT_BUDGET_S = 5.0
+
+# modules that import one of DEFERRED_MODULES inside the functions that use it
+DEFERRING_MODULES = [
+    'src.common.pca',
+    'src.common.formula',
+    'src.app.DataAnalysis',
+    'src.control.ImageProcessing',
+    'src.data.DataHandling',
+    'src.plotting.LamePlot',
+]
+
+# sibling packages of the app, not installed from PyPI
+SIBLING_PACKAGES = ('lame_core', 'global_geochemistry', 'blueberry')
+
+IMPORTTIME = """\
+import time: self [us] | cumulative | imported package
+import time:       120 |        120 |   _io
+import time:      2500 |     812345 | src.app.Startup
+import time:        15 |         15 |     cv2.data
+"""
+
+
+def test_parse_importtime_reads_cumulative_seconds():
+    times = parse_importtime(IMPORTTIME + "unrelated warning\n")
+    assert list(times) == ['_io', 'src.app.Startup', 'cv2.data']
+    assert times['src.app.Startup'] == pytest.approx(0.812345)
+
+
+def test_lazy_class_imports_its_module_on_first_call():
+    Fraction = LazyClass('fractions', 'Fraction')
+    assert not Fraction.loaded and not isinstance(0.5, Fraction)
+    half = Fraction(1, 2)
+    assert Fraction.loaded and isinstance(half, Fraction) and half == 0.5
+    assert 'fractions' in startup_timer.imports
+
+
+def test_startup_phases_are_consecutive():
+    timer = StartupTimer()
+    timer.mark('imports')
+    timer.mark('setupUI')
+    assert list(timer.phases) == ['imports', 'setupUI']
+    assert timer.total == pytest.approx(sum(timer.phases.values()))
+    assert timer.report().splitlines()[1].startswith('  imports:')
+
+
+def test_import_times_runs_a_cold_import():
+    times = import_times('src.app.Startup')
+    assert times['src.app.Startup'] > 0
+    with pytest.raises(ImportError, match='no_such_module'):
+        import_times('src.no_such_module')
+
+
+def _deferred_loaded(times):
+    return [m for m in times if any(m == d or m.startswith(d + '.') for d in DEFERRED_MODULES)]
+
+
+@pytest.mark.parametrize('module', DEFERRING_MODULES)
+def test_module_defers_heavy_imports(module):
+    try:
+        times = import_times(module)
+    except ImportError as e:
+        missing = [p for p in SIBLING_PACKAGES if f"No module named '{p}" in str(e)]
+        if not missing:
+            raise
+        pytest.skip(f"{module} needs {missing[0]}")
+    assert _deferred_loaded(times) == []
+
+
+def test_main_window_import_budget():
+    pytest.importorskip('lame_core')
+    pytest.importorskip('global_geochemistry')
+    times = import_times('src.app.MainWindow')
+    assert _deferred_loaded(times) == []
+    assert times['src.app.MainWindow'] < IMPORT_BUDGET_S, sorted(times.items(), key=lambda t: -t[1])[:20]
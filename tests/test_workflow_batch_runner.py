@@ -0,0 +1,124 @@
+"""Headless workflow runner (``src.workflow.BatchRunner``).
+
+The real worker executes generated code in a ``HeadlessBlockly`` context;
+these tests cover workflow loading, sample discovery and the batch with a
+module-level stand-in worker, so no QApplication is needed.
+"""
+import sys
+from pathlib import Path
+
+import pytest
+
+project_root = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.project.BatchProcessing import BatchResult
+from src.project.ProjectModel import SampleProcessingState
+from src.workflow.BatchRunner import (
+    find_samples, load_workflow_code, main, retarget_code, run_workflow_batch,
+)
+from src.workflow.WorkflowFile import (
+    append_block, load_workflow_file, new_workflow_payload, save_workflow_file, set_python_code,
+)
+
+CODE = (
+    "self.io.open_directory('/Users/someone/maps', )\n"
+    "self.change_sample(self.app_data.sample_list.index('RM01'))\n"
+    "self.app_data.c_field = 'Fe57'\n"
+)
+
+
+def _code_worker(task):
+    task.output_dir.mkdir(parents=True, exist_ok=True)
+    out = task.output_dir / 'code.py'
+    out.write_text(task.code)
+    return BatchResult(
+        sample_id=task.sample_id, ok=True, output_path=task.output_dir, outputs=[out],
+        error=None if task.processing is None else 'processed',
+    )
+
+
+def _workflow(tmp_path, code=CODE):
+    payload = new_workflow_payload()
+    if code is not None:
+        set_python_code(payload, code)
+    path = tmp_path / 'recipe.json'
+    save_workflow_file(path, payload)
+    return path
+
+
+def _samples(directory, *sample_ids):
+    directory.mkdir(parents=True, exist_ok=True)
+    for sample_id in sample_ids:
+        (directory / f"{sample_id}.lame.csv").write_text('X,Y,Fe57\n0,0,1\n')
+    return directory
+
+
+def test_sample_selections_point_at_the_sample_being_run():
+    code = retarget_code(CODE + "self.change_sample(self.app_data.sample_list.index(sample_id), save_analysis= False)\n")
+    assert "sample_list.index" not in code
+    assert code.count("self.change_sample(0") == 2
+    assert "self.app_data.c_field = 'Fe57'" in code
+
+
+def test_workflow_without_generated_code_is_rejected(tmp_path):
+    with pytest.raises(ValueError, match='save it again'):
+        load_workflow_code(_workflow(tmp_path, code=None))
+    with pytest.raises(FileNotFoundError):
+        load_workflow_code(tmp_path / 'missing.json')
+    assert load_workflow_code(_workflow(tmp_path)) == CODE
+
+
+def test_code_generated_from_other_blocks_is_rejected(tmp_path):
+    path = _workflow(tmp_path)
+
+    # action capture adds a block and drops the code it invalidates
+    payload = load_workflow_file(path)
+    append_block(payload, 'select_samples', {'SAMPLE_IDS': 'RM02'})
+    assert 'python_code' not in payload and 'python_code_state_hash' not in payload
+    save_workflow_file(path, payload)
+    with pytest.raises(ValueError, match='save it again'):
+        load_workflow_code(path)
+
+    # code left over from before the blocks changed (or without a hash) is refused
+    set_python_code(payload, CODE)
+    payload['blockly_state']['blocks']['blocks'].pop()
+    save_workflow_file(path, payload)
+    with pytest.raises(ValueError, match='does not match'):
+        load_workflow_code(path)
+    del payload['python_code_state_hash']
+    save_workflow_file(path, payload)
+    with pytest.raises(ValueError, match='does not match'):
+        load_workflow_code(path)
+
+
+def test_find_samples_scans_directories_and_files(tmp_path):
+    maps = _samples(tmp_path / 'maps', 'RM02', 'RM01')
+    (maps / 'notes.txt').write_text('')
+    extra = _samples(tmp_path / 'other', 'RM03') / 'RM03.lame.csv'
+    samples = find_samples([maps, extra])
+    assert list(samples) == ['RM01', 'RM02', 'RM03']
+    assert samples['RM03'] == extra.resolve()
+    with pytest.raises(FileNotFoundError):
+        find_samples([tmp_path / 'nowhere'])
+
+
+def test_batch_runs_every_sample_into_its_own_directory(tmp_path):
+    samples = find_samples([_samples(tmp_path / 'maps', 'RM01', 'RM02')])
+    processing = {'RM02': SampleProcessingState()}
+    results = run_workflow_batch(
+        _workflow(tmp_path), samples, tmp_path / 'out', processing=processing, max_workers=2, worker=_code_worker,
+    )
+    assert list(results) == ['RM01', 'RM02']
+    for sample_id, result in results.items():
+        assert result.ok and result.output_path == tmp_path / 'out' / sample_id
+        assert result.outputs[0].read_text() == retarget_code(CODE)
+    assert results['RM01'].error is None and results['RM02'].error == 'processed'
+
+
+def test_main_reports_unusable_input(tmp_path, capsys):
+    maps = _samples(tmp_path / 'maps', 'RM01')
+    assert main([str(_workflow(tmp_path, code=None)), str(maps), '-o', str(tmp_path / 'out')]) == 2
+    assert 'no generated code' in capsys.readouterr().err
+    with pytest.raises(SystemExit):
+        main([str(_workflow(tmp_path)), str(maps), '--sample', 'RM09', '-o', str(tmp_path / 'out')])